@@ -1,15 +1,33 @@
-"""dispatch ジョブ進捗（update 数）のファイル I/O。"""
+"""dispatch ジョブ進捗（update 数）の受け渡し（パイプとファイル）。
+
+POSIX の Worker は ``DispatchProgressPipe`` のパイプの書き込み側を train.py に継承させ
+（``DISPATCH_PROGRESS_FD``）、train.py は update ごとに 1 行の JSON を書く。Worker は
+読み取りスレッドで即座に受け取る。進捗ファイル（``DISPATCH_PROGRESS_FILE``）は
+クラッシュ時の手がかりとして間引いて書き、パイプが無い環境（Windows など）では
+従来どおり毎回書いて Worker がポーリングする。
+"""
 
 from __future__ import annotations
 
 import json
 import os
+import threading
+import time
+from collections.abc import Callable
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
 from mujoco_rl_sim.dispatch.paths import MUJOCO_RL_SIM_ROOT
 
+# パイプを継承させられる環境（pass_fds）
+PROGRESS_PIPE_SUPPORTED = os.name == "posix"
+# パイプで送れている間に進捗ファイルを書き直す間隔（秒）
+_FALLBACK_FILE_INTERVAL_SEC = 30.0
+
+_last_fallback_write_at: float | None = None
+_pipe_broken = False
+
 
 def _utc_iso() -> str:
   return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
@@ -33,42 +51,69 @@ def _progress_path_for_write() -> Path | None:
   return Path.cwd() / "dispatch_progress.json"
 
 
+def _progress_record(run_id: str, current_update: int, total_updates: int) -> dict[str, Any]:
+  return {
+    "dispatch_run_id": run_id,
+    "current_update": int(current_update),
+    "total_updates": int(total_updates),
+    "updated_at": _utc_iso(),
+  }
+
+
+def _write_progress_pipe(record: dict[str, Any]) -> bool:
+  """``DISPATCH_PROGRESS_FD`` に 1 行書く。パイプが無い・壊れていれば False。"""
+  global _pipe_broken
+  raw = os.environ.get("DISPATCH_PROGRESS_FD", "").strip()
+  if not raw or _pipe_broken:
+    return False
+  line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+  try:
+    # PIPE_BUF 未満の write はアトミック。Worker 側でノンブロッキングにしてあるので、
+    # 読み手が詰まっていれば BlockingIOError でこの 1 件を捨てる（学習は止めない）
+    os.write(int(raw), line)
+  except BlockingIOError:
+    return True
+  except (OSError, ValueError):
+    _pipe_broken = True
+    return False
+  return True
+
+
 def write_dispatch_progress(*, current_update: int, total_updates: int) -> None:
-  """train ループから進捗 JSON を書き出す（DISPATCH_RUN_ID 未設定時は no-op）。"""
+  """train ループから進捗を送る（DISPATCH_RUN_ID 未設定時は no-op）。
+
+  パイプが使えればパイプに書き、進捗ファイルは ``_FALLBACK_FILE_INTERVAL_SEC`` ごとと
+  最終 update でだけ書き直す。パイプが無ければ毎回ファイルを書く。
+  """
+  global _last_fallback_write_at
   run_id = os.environ.get("DISPATCH_RUN_ID", "").strip()
   if not run_id:
     return
+  record = _progress_record(run_id, current_update, total_updates)
+  if _write_progress_pipe(record):
+    now = time.monotonic()
+    finished = int(current_update) >= int(total_updates)
+    if (
+      not finished
+      and _last_fallback_write_at is not None
+      and now - _last_fallback_write_at < _FALLBACK_FILE_INTERVAL_SEC
+    ):
+      return
+    _last_fallback_write_at = now
   path = _progress_path_for_write()
   if path is None:
     return
-  payload = {
-    "dispatch_run_id": run_id,
-    "current_update": int(current_update),
-    "total_updates": int(total_updates),
-    "updated_at": _utc_iso(),
-  }
   path.parent.mkdir(parents=True, exist_ok=True)
   tmp = path.with_suffix(".json.tmp")
-  tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+  tmp.write_text(json.dumps(record, ensure_ascii=False), encoding="utf-8")
   tmp.replace(path)
 
 
-def read_dispatch_progress(
-  path: Path,
-  *,
-  run_id: str | None = None,
-) -> dict[str, int] | None:
-  """進捗ファイルを読む。run_id が一致しない場合は None。"""
-  if not path.is_file():
-    return None
-  try:
-    data = json.loads(path.read_text(encoding="utf-8"))
-  except (OSError, json.JSONDecodeError):
-    return None
+def _parse_progress(data: Any, *, run_id: str | None) -> dict[str, int] | None:
   if not isinstance(data, dict):
     return None
-  file_run_id = str(data.get("dispatch_run_id", "")).strip()
-  if run_id and file_run_id and file_run_id != run_id:
+  record_run_id = str(data.get("dispatch_run_id", "")).strip()
+  if run_id and record_run_id and record_run_id != run_id:
     return None
   try:
     current = int(data["current_update"])
@@ -83,6 +128,76 @@ def read_dispatch_progress(
   }
 
 
+def read_dispatch_progress(
+  path: Path,
+  *,
+  run_id: str | None = None,
+) -> dict[str, int] | None:
+  """進捗ファイルを読む。run_id が一致しない場合は None。"""
+  if not path.is_file():
+    return None
+  try:
+    data = json.loads(path.read_text(encoding="utf-8"))
+  except (OSError, json.JSONDecodeError):
+    return None
+  return _parse_progress(data, run_id=run_id)
+
+
+class DispatchProgressPipe:
+  """Worker 側: train.py に継承させる進捗パイプと、その読み取りスレッド。
+
+  ``Popen(pass_fds=(pipe.write_fd,), env={..., **pipe.env()})`` で起動した後に
+  ``start()`` を呼ぶ（親プロセス側の書き込み端を閉じて読み始める）。進捗が変わるたびに
+  読み取りスレッドから ``on_progress`` を呼ぶ。最後に 1 行受け取った時刻（monotonic）は
+  ``last_record_at`` にあり、パイプが途切れたかどうかの判定に使う。
+  """
+
+  def __init__(self, *, run_id: str, on_progress: Callable[[dict[str, int]], None]) -> None:
+    self._run_id = run_id
+    self._on_progress = on_progress
+    self._read_fd, self._write_fd = os.pipe()
+    os.set_blocking(self._write_fd, False)
+    self._thread: threading.Thread | None = None
+    self.last_record_at: float | None = None
+
+  @property
+  def write_fd(self) -> int:
+    return self._write_fd
+
+  def env(self) -> dict[str, str]:
+    return {"DISPATCH_PROGRESS_FD": str(self._write_fd)}
+
+  def start(self) -> None:
+    os.close(self._write_fd)
+    self._thread = threading.Thread(target=self._read_loop, name="dispatch-progress-pipe", daemon=True)
+    self._thread.start()
+
+  def close(self, timeout: float = 2.0) -> None:
+    """EOF（train.py とその子プロセスの終了）まで最大 ``timeout`` 秒待つ。"""
+    if self._thread is None:
+      os.close(self._write_fd)
+      os.close(self._read_fd)
+      return
+    # 子プロセスが書き込み端を持ったまま残っていれば、スレッドは EOF で自分で閉じる
+    self._thread.join(timeout)
+
+  def _read_loop(self) -> None:
+    last: dict[str, int] | None = None
+    with os.fdopen(self._read_fd, "rb") as stream:
+      for line in stream:
+        try:
+          prog = _parse_progress(json.loads(line), run_id=self._run_id)
+        except ValueError:
+          continue
+        if prog is None:
+          continue
+        self.last_record_at = time.monotonic()
+        if prog == last:
+          continue
+        last = prog
+        self._on_progress(prog)
+
+
 def total_updates_from_job(job: dict[str, Any]) -> int | None:
   overrides = job.get("overrides") or {}
   raw = overrides.get("num_updates")
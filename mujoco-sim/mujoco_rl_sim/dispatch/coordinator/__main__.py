@@ -3,8 +3,9 @@
 from __future__ import annotations
 
 import argparse
+import atexit
 
-from mujoco_rl_sim.dispatch.coordinator.app import create_app
+from mujoco_rl_sim.dispatch.coordinator.app import create_app, stop_background_services
 from mujoco_rl_sim.dispatch.coordinator.settings import load_coordinator_settings
 
 
@@ -17,6 +18,7 @@ def main() -> None:
   cfg_path = Path(args.config) if args.config else None
   settings = load_coordinator_settings(cfg_path)
   app = create_app(settings)
+  atexit.register(stop_background_services, app)
   print(f"[dispatch] Coordinator http://{settings.host}:{settings.port} db={settings.db_path}")
   app.run(host=settings.host, port=settings.port, threaded=True)
 
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import time
 from functools import wraps
 from typing import Any, Callable
 
@@ -10,16 +11,52 @@ from flask import Flask, jsonify, request, send_from_directory
 from mujoco_rl_sim.dispatch.common.auth import check_token
 from mujoco_rl_sim.dispatch.coordinator.db.connection import connect
 from mujoco_rl_sim.dispatch.coordinator.db.repository import DispatchRepository
-from mujoco_rl_sim.dispatch.coordinator.services.checkpoint_catalog import list_checkpoints
+from mujoco_rl_sim.dispatch.coordinator.services.checkpoint_catalog import CheckpointCatalog
+from mujoco_rl_sim.dispatch.coordinator.services.lease_notifier import LeaseNotifier
+from mujoco_rl_sim.dispatch.coordinator.services.lease_sweeper import LeaseSweeper
 from mujoco_rl_sim.dispatch.coordinator.services.visualize_runner import VisualizeRunner
 from mujoco_rl_sim.dispatch.coordinator.settings import CoordinatorSettings
 
+# long-poll の待ち時間の上限（worker の HTTP タイムアウト 60 秒より十分短く）
+_MAX_LEASE_WAIT_SEC = 30.0
+
+
+# create_app が起動し app.extensions に置くバックグラウンドスレッド
+_BACKGROUND_SERVICE_KEYS = (
+  "dispatch_lease_sweeper",
+  "dispatch_lease_notifier",
+  "dispatch_checkpoint_catalog",
+)
+
+
+def _optional_int(value: Any) -> int | None:
+  return None if value is None else int(value)
+
+
+def stop_background_services(app: Flask, timeout: float | None = 5.0) -> None:
+  """``create_app`` が起動したスレッド（lease の回収・通知、checkpoint 索引）を止める。何度呼んでもよい。"""
+  for key in _BACKGROUND_SERVICE_KEYS:
+    service = app.extensions.get(key)
+    if service is not None:
+      service.stop(timeout)
+
 
 def create_app(settings: CoordinatorSettings) -> Flask:
   # 既定の /static/（存在しない coordinator/static/）より先に UI 用静的ファイルを配信する
   app = Flask(__name__, static_folder=None)
   conn = connect(settings.db_path)
   repo = DispatchRepository(conn)
+  sweeper = LeaseSweeper(repo, interval_sec=settings.lease_sweep_interval_sec)
+  sweeper.start()
+  app.extensions["dispatch_lease_sweeper"] = sweeper
+  notifier = LeaseNotifier(conn, repo)
+  notifier.start()
+  app.extensions["dispatch_lease_notifier"] = notifier
+  catalog = CheckpointCatalog(
+    repo, runs_root=settings.runs_root, interval_sec=settings.checkpoint_index_interval_sec
+  )
+  catalog.start()
+  app.extensions["dispatch_checkpoint_catalog"] = catalog
   viz_runner = VisualizeRunner(
     runs_root=settings.runs_root,
     python_executable=settings.python_executable,
@@ -134,10 +171,24 @@ def create_app(settings: CoordinatorSettings) -> Flask:
     worker_id = str(body.get("worker_id", "")).strip()
     if not worker_id:
       return jsonify({"error": "worker_id required"}), 400
-    job = repo.lease_next_job(worker_id=worker_id)
-    if job is None:
-      return jsonify({"job": None})
-    return jsonify({"job": job})
+    try:
+      max_jobs = int(body.get("max_jobs", 1))
+    except (TypeError, ValueError):
+      return jsonify({"error": "invalid max_jobs"}), 400
+    try:
+      wait_sec = min(max(float(body.get("wait_sec", 0.0)), 0.0), _MAX_LEASE_WAIT_SEC)
+    except (TypeError, ValueError):
+      return jsonify({"error": "invalid wait_sec"}), 400
+    # long-poll: 空なら wait_sec 秒まで、ジョブが増えた通知を待って lease し直す
+    deadline = time.monotonic() + wait_sec
+    while True:
+      generation = notifier.generation
+      jobs = repo.lease_jobs(worker_id=worker_id, max_jobs=max_jobs)
+      remaining = deadline - time.monotonic()
+      if jobs or remaining <= 0 or not notifier.wait(generation, remaining):
+        break
+    # "job" は 1 件ずつ lease する旧 worker 向け
+    return jsonify({"job": jobs[0] if jobs else None, "jobs": jobs})
 
   @app.post("/api/jobs/<run_id>/start")
   @_auth
@@ -148,23 +199,43 @@ def create_app(settings: CoordinatorSettings) -> Flask:
       return jsonify({"error": "cannot start"}), 409
     return jsonify({"ok": True})
 
-  @app.post("/api/jobs/<run_id>/heartbeat")
+  @app.post("/api/jobs/heartbeat")
   @_auth
-  def job_hb(run_id: str) -> Any:
+  def jobs_hb() -> Any:
+    """Worker の実行中ジョブ全部の heartbeat / 進捗をまとめて受け取る。"""
     body = request.get_json(force=True, silent=True) or {}
     worker_id = str(body.get("worker_id", "")).strip()
-    current_update = body.get("current_update")
-    total_updates = body.get("total_updates")
-    if current_update is not None:
-      try:
-        current_update = int(current_update)
-      except (TypeError, ValueError):
-        return jsonify({"error": "invalid current_update"}), 400
-    if total_updates is not None:
+    if not worker_id:
+      return jsonify({"error": "worker_id required"}), 400
+    progress: list[dict[str, Any]] = []
+    for item in body.get("jobs") or []:
+      run_id = str((item or {}).get("run_id", "")).strip()
+      if not run_id:
+        return jsonify({"error": "run_id required"}), 400
       try:
-        total_updates = int(total_updates)
+        current_update = _optional_int(item.get("current_update"))
+        total_updates = _optional_int(item.get("total_updates"))
       except (TypeError, ValueError):
-        return jsonify({"error": "invalid total_updates"}), 400
+        return jsonify({"error": f"invalid progress for {run_id}"}), 400
+      progress.append({"run_id": run_id, "current_update": current_update, "total_updates": total_updates})
+    refreshed = repo.refresh_job_leases(worker_id=worker_id, progress=progress)
+    refreshed_ids = set(refreshed)
+    rejected = [p["run_id"] for p in progress if p["run_id"] not in refreshed_ids]
+    return jsonify({"ok": True, "refreshed": refreshed, "rejected": rejected})
+
+  @app.post("/api/jobs/<run_id>/heartbeat")
+  @_auth
+  def job_hb(run_id: str) -> Any:
+    body = request.get_json(force=True, silent=True) or {}
+    worker_id = str(body.get("worker_id", "")).strip()
+    try:
+      current_update = _optional_int(body.get("current_update"))
+    except (TypeError, ValueError):
+      return jsonify({"error": "invalid current_update"}), 400
+    try:
+      total_updates = _optional_int(body.get("total_updates"))
+    except (TypeError, ValueError):
+      return jsonify({"error": "invalid total_updates"}), 400
     if not repo.refresh_job_lease(
       run_id,
       worker_id=worker_id,
@@ -188,6 +259,13 @@ def create_app(settings: CoordinatorSettings) -> Flask:
     )
     if not ok:
       return jsonify({"error": "cannot complete"}), 409
+    job = repo.get_job(run_id)
+    if job is not None:
+      # 完了した run の final.pt などをすぐ一覧に出す（Coordinator から見える runs_root にある場合）
+      try:
+        catalog.refresh_run(str(job["exp_id"]), run_id)
+      except (OSError, ValueError):
+        pass
     return jsonify({"ok": True})
 
   @app.post("/api/jobs/<run_id>/fail")
@@ -204,7 +282,6 @@ def create_app(settings: CoordinatorSettings) -> Flask:
   @app.get("/api/ui/dashboard")
   @_auth
   def dashboard() -> Any:
-    repo.expire_stale_jobs()
     return jsonify(
       {
         "sweeps": repo.list_sweeps(),
@@ -234,9 +311,9 @@ def create_app(settings: CoordinatorSettings) -> Flask:
       offset = int(request.args.get("offset", "0"))
     except ValueError:
       return jsonify({"error": "invalid limit or offset"}), 400
+    refresh = request.args.get("refresh", "").lower() in ("1", "true", "yes")
     try:
-      payload = list_checkpoints(
-        runs_root=settings.runs_root,
+      payload = catalog.list_checkpoints(
         exp_id=exp_id,
         run_dir=run_dir,
         filename=filename,
@@ -244,6 +321,7 @@ def create_app(settings: CoordinatorSettings) -> Flask:
         visualizable_only=visualizable_only,
         limit=limit,
         offset=offset,
+        refresh=refresh,
       )
     except ValueError as exc:
       return jsonify({"error": str(exc)}), 400
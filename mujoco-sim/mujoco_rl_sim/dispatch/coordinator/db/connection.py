@@ -1,13 +1,29 @@
-"""SQLite 接続。"""
+"""SQLite 接続（WAL・小さな接続プール）。
+
+Flask の各リクエストスレッドは ``read()`` / ``write()`` で接続を 1 本借りる。
+
+- 接続は autocommit（``isolation_level=None``）で、読み取りはトランザクションを張らない
+  （WAL なので読み取りは書き込みを待たず、書き込みも読み取りを待たない）
+- 書き込みは ``write()`` の ``BEGIN IMMEDIATE`` … ``COMMIT`` で 1 つにまとめる
+  （書き込みロックを先に取るので、途中で SQLITE_BUSY になって巻き戻ることがない）
+- 同じスレッド内で入れ子になった ``read()`` / ``write()`` は同じ接続を使う
+- SQL 文字列は定数なので、接続ごとの文キャッシュ（``cached_statements``）で再利用される
+"""
 
 from __future__ import annotations
 
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator
 
 from mujoco_rl_sim.dispatch.paths import default_db_path
 
 _SCHEMA = (Path(__file__).parent / "schema.sql").read_text(encoding="utf-8")
+# ``DispatchRepository.lease_jobs`` の ``UPDATE ... RETURNING`` に必要な SQLite
+_MIN_SQLITE_VERSION = (3, 35, 0)
 
 _JOB_PROGRESS_COLUMNS: tuple[tuple[str, str], ...] = (
   ("current_update", "INTEGER"),
@@ -21,6 +37,12 @@ _JOB_DISPLAY_COLUMNS: tuple[tuple[str, str], ...] = (
   ("config_overrides_json", "TEXT"),
 )
 
+# 書き込みロック待ちの上限（heartbeat が集中しても失敗させない）
+_BUSY_TIMEOUT_MS = 10_000
+# プールに残しておく空き接続の数（超えた分は返却時に閉じる）
+_MAX_IDLE_CONNECTIONS = 8
+_CACHED_STATEMENTS = 256
+
 
 def _migrate_jobs_columns(conn: sqlite3.Connection, columns: tuple[tuple[str, str], ...]) -> None:
   cur = conn.execute("PRAGMA table_info(jobs)")
@@ -35,13 +57,121 @@ def _migrate_jobs(conn: sqlite3.Connection) -> None:
   _migrate_jobs_columns(conn, _JOB_DISPLAY_COLUMNS)
 
 
-def connect(db_path: Path | None = None) -> sqlite3.Connection:
-  path = db_path or default_db_path()
-  path.parent.mkdir(parents=True, exist_ok=True)
-  conn = sqlite3.connect(str(path), check_same_thread=False)
+def open_connection(path: Path) -> sqlite3.Connection:
+  """設定済みの新しい接続（プール外で使う場合は呼び出し側で close する）。"""
+  # 接続はプール経由でスレッド間を渡るため check_same_thread は外す（同時に使うのは 1 スレッド）
+  conn = sqlite3.connect(
+    str(path),
+    isolation_level=None,
+    check_same_thread=False,
+    timeout=_BUSY_TIMEOUT_MS / 1000.0,
+    cached_statements=_CACHED_STATEMENTS,
+  )
   conn.row_factory = sqlite3.Row
   conn.execute("PRAGMA foreign_keys = ON")
-  conn.executescript(_SCHEMA)
-  _migrate_jobs(conn)
-  conn.commit()
+  conn.execute(f"PRAGMA busy_timeout = {_BUSY_TIMEOUT_MS}")
+  # WAL では NORMAL でも DB は壊れない（電源断で直近のコミットが失われうるだけ）
+  conn.execute("PRAGMA synchronous = NORMAL")
   return conn
+
+
+class SqliteDatabase:
+  """Coordinator DB への接続プール。``DispatchRepository`` が使う。"""
+
+  def __init__(self, path: Path, *, max_idle: int = _MAX_IDLE_CONNECTIONS) -> None:
+    if sqlite3.sqlite_version_info < _MIN_SQLITE_VERSION:
+      raise sqlite3.NotSupportedError(
+        f"dispatch coordinator needs SQLite >= {'.'.join(map(str, _MIN_SQLITE_VERSION))} "
+        f"(UPDATE ... RETURNING); Python is linked against SQLite {sqlite3.sqlite_version}"
+      )
+    self.path = path
+    self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue(maxsize=max(1, max_idle))
+    self._local = threading.local()
+    self._closed = False
+    conn = open_connection(path)
+    try:
+      # journal_mode は DB ファイルに記録されるので、最初の 1 回で全接続に効く
+      conn.execute("PRAGMA journal_mode = WAL")
+      conn.executescript(_SCHEMA)
+      conn.execute("BEGIN IMMEDIATE")
+      try:
+        _migrate_jobs(conn)
+      except BaseException:
+        conn.rollback()
+        raise
+      conn.commit()
+    except BaseException:
+      conn.close()
+      raise
+    self._idle.put_nowait(conn)
+
+  def _acquire(self) -> sqlite3.Connection:
+    if self._closed:
+      raise sqlite3.ProgrammingError("database is closed")
+    try:
+      return self._idle.get_nowait()
+    except queue.Empty:
+      return open_connection(self.path)
+
+  def _release(self, conn: sqlite3.Connection) -> None:
+    if conn.in_transaction:
+      conn.rollback()
+    if self._closed:
+      conn.close()
+      return
+    try:
+      self._idle.put_nowait(conn)
+    except queue.Full:
+      conn.close()
+
+  @contextmanager
+  def _checkout(self) -> Iterator[sqlite3.Connection]:
+    conn = getattr(self._local, "conn", None)
+    if conn is not None:
+      yield conn
+      return
+    conn = self._acquire()
+    self._local.conn = conn
+    try:
+      yield conn
+    finally:
+      self._local.conn = None
+      self._release(conn)
+
+  @contextmanager
+  def read(self) -> Iterator[sqlite3.Connection]:
+    """読み取り用の接続（各 SELECT はそれぞれ最新のコミット済み状態を読む）。"""
+    with self._checkout() as conn:
+      yield conn
+
+  @contextmanager
+  def write(self) -> Iterator[sqlite3.Connection]:
+    """``BEGIN IMMEDIATE`` の書き込みトランザクション（例外なら ROLLBACK）。"""
+    with self._checkout() as conn:
+      if conn.in_transaction:
+        # 入れ子の write() は外側のトランザクションに含める
+        yield conn
+        return
+      conn.execute("BEGIN IMMEDIATE")
+      try:
+        yield conn
+      except BaseException:
+        conn.rollback()
+        raise
+      conn.commit()
+
+  def close(self) -> None:
+    """空き接続を閉じる（貸し出し中の接続は返却時に閉じる）。"""
+    self._closed = True
+    while True:
+      try:
+        self._idle.get_nowait().close()
+      except queue.Empty:
+        return
+
+
+def connect(db_path: Path | None = None) -> SqliteDatabase:
+  """Coordinator DB を開く（無ければ作成し、スキーマを最新にする）。"""
+  path = db_path or default_db_path()
+  path.parent.mkdir(parents=True, exist_ok=True)
+  return SqliteDatabase(path)
@@ -12,10 +12,13 @@ from mujoco_rl_sim.dispatch.common.models import JobStatus
 from mujoco_rl_sim.dispatch.common.primary_metric import PRIMARY_METRIC_NAME
 from mujoco_rl_sim.dispatch.common.progress import total_updates_from_job
 from mujoco_rl_sim.dispatch.common.sweep_spec import PlannedJob, SweepSpec
+from mujoco_rl_sim.dispatch.coordinator.db.connection import SqliteDatabase
 
 _HEARTBEAT_SEC = 15
 _LEASE_TIMEOUT_SEC = 90
 _WORKER_ONLINE_TIMEOUT_SEC = 45
+# 1 回の lease で渡す最大件数（worker のスロット数の上限の目安）
+_MAX_LEASE_BATCH = 64
 
 
 def _utc_now() -> datetime:
@@ -47,117 +50,112 @@ def _worker_is_online(last_heartbeat_at: str | None, *, now: datetime | None = N
 
 
 class DispatchRepository:
-  def __init__(self, conn: sqlite3.Connection) -> None:
-    self._conn = conn
+  """ジョブ台帳。各メソッドは ``SqliteDatabase`` から接続を借りる。
+
+  書き込みは 1 メソッド = 1 つの ``BEGIN IMMEDIATE`` トランザクション。読み取りは
+  トランザクションを張らず、WAL のスナップショットを読む（書き込みを待たない）。
+  """
+
+  def __init__(self, db: SqliteDatabase) -> None:
+    self._db = db
 
   def expire_stale_jobs(self) -> int:
     """lease / running の失効ジョブを failed にする。"""
     now = _iso(_utc_now())
-    cur = self._conn.cursor()
-    cur.execute(
-      """
-      UPDATE jobs
-      SET status = ?, error_message = ?, finished_at = ?, lease_expires_at = NULL
-      WHERE status IN (?, ?)
-        AND lease_expires_at IS NOT NULL
-        AND lease_expires_at < ?
-      """,
-      (
-        JobStatus.FAILED.value,
-        "lease/heartbeat timeout",
-        now,
-        JobStatus.LEASED.value,
-        JobStatus.RUNNING.value,
-        now,
-      ),
-    )
-    n = cur.rowcount
-    self._conn.commit()
-    return n
+    with self._db.write() as conn:
+      cur = conn.execute(
+        """
+        UPDATE jobs
+        SET status = ?, error_message = ?, finished_at = ?, lease_expires_at = NULL
+        WHERE status IN (?, ?)
+          AND lease_expires_at IS NOT NULL
+          AND lease_expires_at < ?
+        """,
+        (
+          JobStatus.FAILED.value,
+          "lease/heartbeat timeout",
+          now,
+          JobStatus.LEASED.value,
+          JobStatus.RUNNING.value,
+          now,
+        ),
+      )
+      return cur.rowcount
 
   def register_sweep(self, spec: SweepSpec, *, spec_path: str | None, jobs: list[PlannedJob]) -> int:
-    cur = self._conn.cursor()
-    cur.execute("SELECT 1 FROM sweeps WHERE sweep_id = ?", (spec.sweep_id,))
-    if cur.fetchone():
-      raise ValueError(f"sweep_id は既に登録済みです: {spec.sweep_id}")
-
-    cur.execute(
-      """
-      INSERT INTO sweeps (sweep_id, exp_id, description, shuffle_seed, status, spec_path)
-      VALUES (?, ?, ?, ?, 'active', ?)
-      """,
-      (spec.sweep_id, spec.exp_id, spec.description, spec.shuffle_seed, spec_path),
-    )
-    inserted = 0
-    for job in jobs:
-      try:
-        cur.execute(
-          """
-          INSERT INTO jobs (
-            run_id, sweep_id, exp_id, config_hash, seed, run_index,
-            status, queue_position, overrides_json,
-            config_id, seed_id, config_overrides_json
-          ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-          """,
-          (
-            job.run_id,
-            job.sweep_id,
-            job.exp_id,
-            job.config_hash,
-            job.seed,
-            job.run_index,
-            JobStatus.QUEUED.value,
-            job.queue_position,
-            json.dumps(job.overrides, ensure_ascii=False),
-            job.config_id,
-            job.seed_id,
-            json.dumps(job.config_overrides, ensure_ascii=False),
-          ),
-        )
-        inserted += 1
-      except sqlite3.IntegrityError as exc:
-        raise ValueError(f"run_id 重複: {job.run_id}") from exc
-    self._conn.commit()
-    return inserted
+    with self._db.write() as conn:
+      if conn.execute("SELECT 1 FROM sweeps WHERE sweep_id = ?", (spec.sweep_id,)).fetchone():
+        raise ValueError(f"sweep_id は既に登録済みです: {spec.sweep_id}")
+
+      conn.execute(
+        """
+        INSERT INTO sweeps (sweep_id, exp_id, description, shuffle_seed, status, spec_path)
+        VALUES (?, ?, ?, ?, 'active', ?)
+        """,
+        (spec.sweep_id, spec.exp_id, spec.description, spec.shuffle_seed, spec_path),
+      )
+      for job in jobs:
+        try:
+          conn.execute(
+            """
+            INSERT INTO jobs (
+              run_id, sweep_id, exp_id, config_hash, seed, run_index,
+              status, queue_position, overrides_json,
+              config_id, seed_id, config_overrides_json
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+              job.run_id,
+              job.sweep_id,
+              job.exp_id,
+              job.config_hash,
+              job.seed,
+              job.run_index,
+              JobStatus.QUEUED.value,
+              job.queue_position,
+              json.dumps(job.overrides, ensure_ascii=False),
+              job.config_id,
+              job.seed_id,
+              json.dumps(job.config_overrides, ensure_ascii=False),
+            ),
+          )
+        except sqlite3.IntegrityError as exc:
+          raise ValueError(f"run_id 重複: {job.run_id}") from exc
+    return len(jobs)
 
   def cancel_sweep(self, sweep_id: str) -> int:
     now = _iso(_utc_now())
-    cur = self._conn.cursor()
-    cur.execute("UPDATE sweeps SET status = 'cancelled' WHERE sweep_id = ?", (sweep_id,))
-    cur.execute(
-      """
-      UPDATE jobs
-      SET status = ?, finished_at = ?
-      WHERE sweep_id = ? AND status = ?
-      """,
-      (JobStatus.CANCELLED.value, now, sweep_id, JobStatus.QUEUED.value),
-    )
-    n = cur.rowcount
-    self._conn.commit()
-    return n
+    with self._db.write() as conn:
+      conn.execute("UPDATE sweeps SET status = 'cancelled' WHERE sweep_id = ?", (sweep_id,))
+      cur = conn.execute(
+        """
+        UPDATE jobs
+        SET status = ?, finished_at = ?
+        WHERE sweep_id = ? AND status = ?
+        """,
+        (JobStatus.CANCELLED.value, now, sweep_id, JobStatus.QUEUED.value),
+      )
+      return cur.rowcount
 
   def delete_sweep(self, sweep_id: str) -> dict[str, int]:
     """sweep と配下ジョブを DB から削除する。実行中ジョブがあっても削除する。"""
-    cur = self._conn.cursor()
-    cur.execute("SELECT 1 FROM sweeps WHERE sweep_id = ?", (sweep_id,))
-    if cur.fetchone() is None:
-      raise ValueError(f"sweep が見つかりません: {sweep_id}")
-
-    cur.execute(
-      """
-      SELECT COUNT(*) FROM jobs
-      WHERE sweep_id = ? AND status IN (?, ?)
-      """,
-      (sweep_id, JobStatus.LEASED.value, JobStatus.RUNNING.value),
-    )
-    active = int(cur.fetchone()[0])
-
-    cur.execute("SELECT COUNT(*) FROM jobs WHERE sweep_id = ?", (sweep_id,))
-    job_count = int(cur.fetchone()[0])
-
-    cur.execute("DELETE FROM jobs WHERE sweep_id = ?", (sweep_id,))
-    cur.execute("DELETE FROM sweeps WHERE sweep_id = ?", (sweep_id,))
-    self._conn.commit()
+    with self._db.write() as conn:
+      if conn.execute("SELECT 1 FROM sweeps WHERE sweep_id = ?", (sweep_id,)).fetchone() is None:
+        raise ValueError(f"sweep が見つかりません: {sweep_id}")
+
+      active = int(
+        conn.execute(
+          """
+          SELECT COUNT(*) FROM jobs
+          WHERE sweep_id = ? AND status IN (?, ?)
+          """,
+          (sweep_id, JobStatus.LEASED.value, JobStatus.RUNNING.value),
+        ).fetchone()[0]
+      )
+      job_count = int(conn.execute("SELECT COUNT(*) FROM jobs WHERE sweep_id = ?", (sweep_id,)).fetchone()[0])
+
+      conn.execute("DELETE FROM jobs WHERE sweep_id = ?", (sweep_id,))
+      conn.execute("DELETE FROM sweeps WHERE sweep_id = ?", (sweep_id,))
     return {"deleted_jobs": job_count, "active_jobs_removed": active}
 
   def upsert_worker(
@@ -168,104 +166,123 @@ class DispatchRepository:
     max_concurrent_jobs: int,
     metadata: dict[str, Any] | None = None,
   ) -> None:
-    cur = self._conn.cursor()
-    cur.execute(
-      """
-      INSERT INTO workers (worker_id, hostname, max_concurrent_jobs, last_heartbeat_at, metadata_json)
-      VALUES (?, ?, ?, ?, ?)
-      ON CONFLICT(worker_id) DO UPDATE SET
-        hostname = excluded.hostname,
-        max_concurrent_jobs = excluded.max_concurrent_jobs,
-        last_heartbeat_at = excluded.last_heartbeat_at,
-        metadata_json = excluded.metadata_json
-      """,
-      (
-        worker_id,
-        hostname,
-        max_concurrent_jobs,
-        _iso(_utc_now()),
-        json.dumps(metadata or {}, ensure_ascii=False),
-      ),
-    )
-    self._conn.commit()
+    with self._db.write() as conn:
+      conn.execute(
+        """
+        INSERT INTO workers (worker_id, hostname, max_concurrent_jobs, last_heartbeat_at, metadata_json)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(worker_id) DO UPDATE SET
+          hostname = excluded.hostname,
+          max_concurrent_jobs = excluded.max_concurrent_jobs,
+          last_heartbeat_at = excluded.last_heartbeat_at,
+          metadata_json = excluded.metadata_json
+        """,
+        (
+          worker_id,
+          hostname,
+          max_concurrent_jobs,
+          _iso(_utc_now()),
+          json.dumps(metadata or {}, ensure_ascii=False),
+        ),
+      )
 
   def worker_heartbeat(self, worker_id: str) -> None:
-    cur = self._conn.cursor()
-    cur.execute(
-      "UPDATE workers SET last_heartbeat_at = ? WHERE worker_id = ?",
-      (_iso(_utc_now()), worker_id),
-    )
-    self._conn.commit()
+    with self._db.write() as conn:
+      conn.execute(
+        "UPDATE workers SET last_heartbeat_at = ? WHERE worker_id = ?",
+        (_iso(_utc_now()), worker_id),
+      )
 
   def count_worker_active_jobs(self, worker_id: str) -> int:
-    cur = self._conn.cursor()
-    cur.execute(
-      """
-      SELECT COUNT(*) FROM jobs
-      WHERE worker_id = ? AND status IN (?, ?)
-      """,
-      (worker_id, JobStatus.LEASED.value, JobStatus.RUNNING.value),
-    )
-    return int(cur.fetchone()[0])
+    with self._db.read() as conn:
+      cur = conn.execute(
+        """
+        SELECT COUNT(*) FROM jobs
+        WHERE worker_id = ? AND status IN (?, ?)
+        """,
+        (worker_id, JobStatus.LEASED.value, JobStatus.RUNNING.value),
+      )
+      return int(cur.fetchone()[0])
 
-  def lease_next_job(self, *, worker_id: str) -> dict[str, Any] | None:
-    self.expire_stale_jobs()
-    cur = self._conn.cursor()
-    cur.execute(
-      """
-      SELECT j.run_id FROM jobs j
-      JOIN sweeps s ON s.sweep_id = j.sweep_id
-      WHERE j.status = ? AND s.status = 'active'
-      ORDER BY j.queue_position ASC
-      LIMIT 1
-      """,
-      (JobStatus.QUEUED.value,),
-    )
-    row = cur.fetchone()
-    if row is None:
-      return None
-    run_id = row["run_id"]
+  def has_leasable_jobs(self) -> bool:
+    """active な sweep に queued ジョブが 1 件でもあるか。"""
+    with self._db.read() as conn:
+      row = conn.execute(
+        """
+        SELECT 1 FROM jobs j
+        JOIN sweeps s ON s.sweep_id = j.sweep_id
+        WHERE j.status = ? AND s.status = 'active'
+        LIMIT 1
+        """,
+        (JobStatus.QUEUED.value,),
+      ).fetchone()
+    return row is not None
+
+  def lease_jobs(self, *, worker_id: str, max_jobs: int = 1) -> list[dict[str, Any]]:
+    """キュー先頭から最大 ``max_jobs`` 件を 1 文の ``UPDATE ... RETURNING`` で lease する。
+
+    対象の選択と状態遷移が同じ文（同じ書き込みトランザクション）なので、並行して
+    lease しても同じジョブが 2 つの worker に渡ることはない。失効 lease の回収は
+    ``LeaseSweeper`` が定期的に行う（lease のたびには走らせない）。
+    """
+    limit = max(1, min(int(max_jobs), _MAX_LEASE_BATCH))
     expires = _utc_now() + timedelta(seconds=_LEASE_TIMEOUT_SEC)
-    cur.execute(
-      """
-      UPDATE jobs
-      SET status = ?, worker_id = ?, lease_expires_at = ?
-      WHERE run_id = ? AND status = ?
-      """,
-      (JobStatus.LEASED.value, worker_id, _iso(expires), run_id, JobStatus.QUEUED.value),
-    )
-    if cur.rowcount != 1:
-      self._conn.commit()
-      return None
-    self._conn.commit()
-    return self.get_job(run_id)
+    with self._db.write() as conn:
+      rows = conn.execute(
+        """
+        UPDATE jobs
+        SET status = ?, worker_id = ?, lease_expires_at = ?
+        WHERE status = ? AND run_id IN (
+          SELECT j.run_id FROM jobs j
+          JOIN sweeps s ON s.sweep_id = j.sweep_id
+          WHERE j.status = ? AND s.status = 'active'
+          ORDER BY j.queue_position ASC
+          LIMIT ?
+        )
+        RETURNING *
+        """,
+        (
+          JobStatus.LEASED.value,
+          worker_id,
+          _iso(expires),
+          JobStatus.QUEUED.value,
+          JobStatus.QUEUED.value,
+          limit,
+        ),
+      ).fetchall()
+    # RETURNING の行順は保証されないのでキュー順に並べ直す
+    jobs = sorted((self._job_row_to_dict(r) for r in rows), key=lambda j: j["queue_position"])
+    enrich_jobs_display_fields(jobs)
+    return jobs
+
+  def lease_next_job(self, *, worker_id: str) -> dict[str, Any] | None:
+    jobs = self.lease_jobs(worker_id=worker_id, max_jobs=1)
+    return jobs[0] if jobs else None
 
   def mark_running(self, run_id: str, *, worker_id: str) -> bool:
     job = self.get_job(run_id)
     total = total_updates_from_job(job) if job else None
     expires = _utc_now() + timedelta(seconds=_LEASE_TIMEOUT_SEC)
-    cur = self._conn.cursor()
-    cur.execute(
-      """
-      UPDATE jobs
-      SET status = ?, started_at = COALESCE(started_at, ?), lease_expires_at = ?,
-          total_updates = COALESCE(?, total_updates),
-          current_update = COALESCE(current_update, 0)
-      WHERE run_id = ? AND worker_id = ? AND status = ?
-      """,
-      (
-        JobStatus.RUNNING.value,
-        _iso(_utc_now()),
-        _iso(expires),
-        total,
-        run_id,
-        worker_id,
-        JobStatus.LEASED.value,
-      ),
-    )
-    ok = cur.rowcount == 1
-    self._conn.commit()
-    return ok
+    with self._db.write() as conn:
+      cur = conn.execute(
+        """
+        UPDATE jobs
+        SET status = ?, started_at = COALESCE(started_at, ?), lease_expires_at = ?,
+            total_updates = COALESCE(?, total_updates),
+            current_update = COALESCE(current_update, 0)
+        WHERE run_id = ? AND worker_id = ? AND status = ?
+        """,
+        (
+          JobStatus.RUNNING.value,
+          _iso(_utc_now()),
+          _iso(expires),
+          total,
+          run_id,
+          worker_id,
+          JobStatus.LEASED.value,
+        ),
+      )
+      return cur.rowcount == 1
 
   def refresh_job_lease(
     self,
@@ -277,25 +294,91 @@ class DispatchRepository:
   ) -> bool:
     expires = _utc_now() + timedelta(seconds=_LEASE_TIMEOUT_SEC)
     now = _iso(_utc_now())
-    cur = self._conn.cursor()
-    if current_update is not None or total_updates is not None:
-      cur.execute(
+    with self._db.write() as conn:
+      if current_update is not None or total_updates is not None:
+        cur = conn.execute(
+          """
+          UPDATE jobs
+          SET lease_expires_at = ?,
+              current_update = CASE
+                WHEN ? IS NULL THEN current_update
+                ELSE MAX(COALESCE(current_update, 0), ?)
+              END,
+              total_updates = COALESCE(?, total_updates),
+              progress_updated_at = ?
+          WHERE run_id = ? AND worker_id = ? AND status IN (?, ?)
+          """,
+          (
+            _iso(expires),
+            current_update,
+            current_update,
+            total_updates,
+            now,
+            run_id,
+            worker_id,
+            JobStatus.LEASED.value,
+            JobStatus.RUNNING.value,
+          ),
+        )
+      else:
+        cur = conn.execute(
+          """
+          UPDATE jobs SET lease_expires_at = ?
+          WHERE run_id = ? AND worker_id = ? AND status IN (?, ?)
+          """,
+          (
+            _iso(expires),
+            run_id,
+            worker_id,
+            JobStatus.LEASED.value,
+            JobStatus.RUNNING.value,
+          ),
+        )
+      return cur.rowcount == 1
+
+  def refresh_job_leases(self, *, worker_id: str, progress: list[dict[str, Any]]) -> list[str]:
+    """複数ジョブの heartbeat（``run_id`` / ``current_update`` / ``total_updates``）を
+    1 トランザクションで反映する。更新できた run_id を返す。"""
+    refreshed: list[str] = []
+    with self._db.write():
+      for item in progress:
+        run_id = str(item["run_id"])
+        if self.refresh_job_lease(
+          run_id,
+          worker_id=worker_id,
+          current_update=item.get("current_update"),
+          total_updates=item.get("total_updates"),
+        ):
+          refreshed.append(run_id)
+    return refreshed
+
+  def complete_job(
+    self,
+    run_id: str,
+    *,
+    worker_id: str,
+    primary_metric: float | None,
+    artifact_path: str | None,
+    git_commit: str | None,
+  ) -> bool:
+    now = _iso(_utc_now())
+    with self._db.write() as conn:
+      cur = conn.execute(
         """
         UPDATE jobs
-        SET lease_expires_at = ?,
-            current_update = CASE
-              WHEN ? IS NULL THEN current_update
-              ELSE MAX(COALESCE(current_update, 0), ?)
-            END,
-            total_updates = COALESCE(?, total_updates),
+        SET status = ?, finished_at = ?, lease_expires_at = NULL,
+            primary_metric = ?, primary_metric_name = ?, artifact_path = ?, git_commit = ?,
+            current_update = COALESCE(total_updates, current_update),
             progress_updated_at = ?
         WHERE run_id = ? AND worker_id = ? AND status IN (?, ?)
         """,
         (
-          _iso(expires),
-          current_update,
-          current_update,
-          total_updates,
+          JobStatus.SUCCEEDED.value,
+          now,
+          primary_metric,
+          PRIMARY_METRIC_NAME if primary_metric is not None else None,
+          artifact_path,
+          git_commit,
           now,
           run_id,
           worker_id,
@@ -303,61 +386,7 @@ class DispatchRepository:
           JobStatus.RUNNING.value,
         ),
       )
-    else:
-      cur.execute(
-        """
-        UPDATE jobs SET lease_expires_at = ?
-        WHERE run_id = ? AND worker_id = ? AND status IN (?, ?)
-        """,
-        (
-          _iso(expires),
-          run_id,
-          worker_id,
-          JobStatus.LEASED.value,
-          JobStatus.RUNNING.value,
-        ),
-      )
-    ok = cur.rowcount == 1
-    self._conn.commit()
-    return ok
-
-  def complete_job(
-    self,
-    run_id: str,
-    *,
-    worker_id: str,
-    primary_metric: float | None,
-    artifact_path: str | None,
-    git_commit: str | None,
-  ) -> bool:
-    now = _iso(_utc_now())
-    cur = self._conn.cursor()
-    cur.execute(
-      """
-      UPDATE jobs
-      SET status = ?, finished_at = ?, lease_expires_at = NULL,
-          primary_metric = ?, primary_metric_name = ?, artifact_path = ?, git_commit = ?,
-          current_update = COALESCE(total_updates, current_update),
-          progress_updated_at = ?
-      WHERE run_id = ? AND worker_id = ? AND status IN (?, ?)
-      """,
-      (
-        JobStatus.SUCCEEDED.value,
-        now,
-        primary_metric,
-        PRIMARY_METRIC_NAME if primary_metric is not None else None,
-        artifact_path,
-        git_commit,
-        now,
-        run_id,
-        worker_id,
-        JobStatus.LEASED.value,
-        JobStatus.RUNNING.value,
-      ),
-    )
-    ok = cur.rowcount == 1
-    self._conn.commit()
-    return ok
+      return cur.rowcount == 1
 
   def fail_job(
     self,
@@ -367,32 +396,29 @@ class DispatchRepository:
     error_message: str,
   ) -> bool:
     now = _iso(_utc_now())
-    cur = self._conn.cursor()
-    cur.execute(
-      """
-      UPDATE jobs
-      SET status = ?, finished_at = ?, lease_expires_at = NULL, error_message = ?
-      WHERE run_id = ? AND worker_id = ? AND status IN (?, ?, ?)
-      """,
-      (
-        JobStatus.FAILED.value,
-        now,
-        error_message[:4000],
-        run_id,
-        worker_id,
-        JobStatus.QUEUED.value,
-        JobStatus.LEASED.value,
-        JobStatus.RUNNING.value,
-      ),
-    )
-    ok = cur.rowcount == 1
-    self._conn.commit()
-    return ok
+    with self._db.write() as conn:
+      cur = conn.execute(
+        """
+        UPDATE jobs
+        SET status = ?, finished_at = ?, lease_expires_at = NULL, error_message = ?
+        WHERE run_id = ? AND worker_id = ? AND status IN (?, ?, ?)
+        """,
+        (
+          JobStatus.FAILED.value,
+          now,
+          error_message[:4000],
+          run_id,
+          worker_id,
+          JobStatus.QUEUED.value,
+          JobStatus.LEASED.value,
+          JobStatus.RUNNING.value,
+        ),
+      )
+      return cur.rowcount == 1
 
   def get_job(self, run_id: str) -> dict[str, Any] | None:
-    cur = self._conn.cursor()
-    cur.execute("SELECT * FROM jobs WHERE run_id = ?", (run_id,))
-    row = cur.fetchone()
+    with self._db.read() as conn:
+      row = conn.execute("SELECT * FROM jobs WHERE run_id = ?", (run_id,)).fetchone()
     if row is None:
       return None
     job = self._job_row_to_dict(row)
@@ -400,23 +426,23 @@ class DispatchRepository:
     return job
 
   def list_sweeps(self) -> list[dict[str, Any]]:
-    cur = self._conn.cursor()
-    cur.execute(
-      """
-      SELECT s.*,
-        SUM(CASE WHEN j.status='queued' THEN 1 ELSE 0 END) AS queued,
-        SUM(CASE WHEN j.status IN ('leased','running') THEN 1 ELSE 0 END) AS running,
-        SUM(CASE WHEN j.status='succeeded' THEN 1 ELSE 0 END) AS succeeded,
-        SUM(CASE WHEN j.status='failed' THEN 1 ELSE 0 END) AS failed,
-        SUM(CASE WHEN j.status='cancelled' THEN 1 ELSE 0 END) AS cancelled,
-        COUNT(j.run_id) AS job_count
-      FROM sweeps s
-      LEFT JOIN jobs j ON j.sweep_id = s.sweep_id
-      GROUP BY s.sweep_id
-      ORDER BY s.created_at DESC
-      """
-    )
-    return [dict(r) for r in cur.fetchall()]
+    with self._db.read() as conn:
+      rows = conn.execute(
+        """
+        SELECT s.*,
+          SUM(CASE WHEN j.status='queued' THEN 1 ELSE 0 END) AS queued,
+          SUM(CASE WHEN j.status IN ('leased','running') THEN 1 ELSE 0 END) AS running,
+          SUM(CASE WHEN j.status='succeeded' THEN 1 ELSE 0 END) AS succeeded,
+          SUM(CASE WHEN j.status='failed' THEN 1 ELSE 0 END) AS failed,
+          SUM(CASE WHEN j.status='cancelled' THEN 1 ELSE 0 END) AS cancelled,
+          COUNT(j.run_id) AS job_count
+        FROM sweeps s
+        LEFT JOIN jobs j ON j.sweep_id = s.sweep_id
+        GROUP BY s.sweep_id
+        ORDER BY s.created_at DESC
+        """
+      ).fetchall()
+    return [dict(r) for r in rows]
 
   def list_jobs(
     self,
@@ -435,29 +461,173 @@ class DispatchRepository:
       params.append(status)
     q += " ORDER BY queue_position ASC LIMIT ?"
     params.append(limit)
-    cur = self._conn.cursor()
-    cur.execute(q, params)
-    jobs = [self._job_row_to_dict(r) for r in cur.fetchall()]
+    with self._db.read() as conn:
+      rows = conn.execute(q, params).fetchall()
+    jobs = [self._job_row_to_dict(r) for r in rows]
     enrich_jobs_display_fields(jobs)
     return jobs
 
   def list_workers(self) -> list[dict[str, Any]]:
-    cur = self._conn.cursor()
-    cur.execute(
-      """
-      SELECT w.*,
-        (SELECT COUNT(*) FROM jobs j
-         WHERE j.worker_id = w.worker_id AND j.status IN ('leased','running')) AS active_jobs
-      FROM workers w
-      ORDER BY w.worker_id
-      """
-    )
-    workers = [dict(r) for r in cur.fetchall()]
+    with self._db.read() as conn:
+      rows = conn.execute(
+        """
+        SELECT w.*,
+          (SELECT COUNT(*) FROM jobs j
+           WHERE j.worker_id = w.worker_id AND j.status IN ('leased','running')) AS active_jobs
+        FROM workers w
+        ORDER BY w.worker_id
+        """
+      ).fetchall()
+    workers = [dict(r) for r in rows]
     now = _utc_now()
     for w in workers:
       w["online"] = _worker_is_online(w.get("last_heartbeat_at"), now=now)
     return workers
 
+  def checkpoint_run_states(self) -> dict[str, dict[str, Any]]:
+    """索引済み run ディレクトリ（run_rel → dir_mtime_ns / has_manifest / files_mtime_ns）。"""
+    with self._db.read() as conn:
+      rows = conn.execute(
+        "SELECT run_rel, dir_mtime_ns, has_manifest, files_mtime_ns FROM checkpoint_runs"
+      ).fetchall()
+    return {r["run_rel"]: dict(r) for r in rows}
+
+  def replace_checkpoint_run(
+    self,
+    *,
+    run_rel: str,
+    exp_id: str,
+    run_dir: str,
+    archive: bool,
+    dir_mtime_ns: int,
+    has_manifest: bool,
+    files_mtime_ns: int | None,
+    checkpoints: list[dict[str, Any]],
+  ) -> None:
+    """1 run ディレクトリ分の索引を置き換える。"""
+    with self._db.write() as conn:
+      conn.execute(
+        """
+        INSERT INTO checkpoint_runs (
+          run_rel, exp_id, run_dir, archive, dir_mtime_ns, has_manifest, files_mtime_ns, scanned_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(run_rel) DO UPDATE SET
+          dir_mtime_ns = excluded.dir_mtime_ns,
+          has_manifest = excluded.has_manifest,
+          files_mtime_ns = excluded.files_mtime_ns,
+          scanned_at = excluded.scanned_at
+        """,
+        (
+          run_rel,
+          exp_id,
+          run_dir,
+          int(archive),
+          dir_mtime_ns,
+          int(has_manifest),
+          files_mtime_ns,
+          _iso(_utc_now()),
+        ),
+      )
+      conn.execute("DELETE FROM checkpoints WHERE run_rel = ?", (run_rel,))
+      conn.executemany(
+        """
+        INSERT INTO checkpoints (
+          checkpoint_rel, run_rel, exp_id, run_dir, filename, archive, size_bytes, mtime_utc, update_num
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+          (
+            c["checkpoint_rel"],
+            run_rel,
+            exp_id,
+            run_dir,
+            c["filename"],
+            int(archive),
+            int(c["size_bytes"]),
+            c["mtime_utc"],
+            c["update"],
+          )
+          for c in checkpoints
+        ],
+      )
+
+  def delete_checkpoint_runs(self, run_rels: list[str]) -> None:
+    with self._db.write() as conn:
+      for run_rel in run_rels:
+        conn.execute("DELETE FROM checkpoints WHERE run_rel = ?", (run_rel,))
+        conn.execute("DELETE FROM checkpoint_runs WHERE run_rel = ?", (run_rel,))
+
+  def checkpoint_experiments(self) -> list[tuple[str, bool]]:
+    """索引に出てくる (exp_id, archive) の組。"""
+    with self._db.read() as conn:
+      rows = conn.execute("SELECT DISTINCT exp_id, archive FROM checkpoint_runs").fetchall()
+    return [(r["exp_id"], bool(r["archive"])) for r in rows]
+
+  def query_checkpoints(
+    self,
+    *,
+    exp_id: str | None = None,
+    run_dir: str | None = None,
+    filename: str | None = None,
+    archive: bool | None = None,
+    experiments: list[tuple[str, bool]] | None = None,
+    limit: int = 500,
+    offset: int = 0,
+  ) -> tuple[list[dict[str, Any]], int, list[str]]:
+    """索引からチェックポイントを mtime 降順で引く。(ページ, 総数, exp_id 一覧) を返す。
+
+    ``experiments``: この (exp_id, archive) の組だけに絞る（visualize 可能な exp など）。
+    各項目の ``job_run_id`` / ``job_status`` は run ディレクトリ名と同じ run_id のジョブ。
+    """
+    where = ["1=1"]
+    params: list[Any] = []
+    if exp_id is not None:
+      where.append("c.exp_id = ?")
+      params.append(exp_id)
+    if run_dir is not None:
+      where.append("c.run_dir = ?")
+      params.append(run_dir)
+    if filename is not None:
+      where.append("c.filename = ?")
+      params.append(filename)
+    if archive is not None:
+      where.append("c.archive = ?")
+      params.append(int(archive))
+    if experiments is not None:
+      if not experiments:
+        return [], 0, []
+      where.append("(" + " OR ".join("(c.exp_id = ? AND c.archive = ?)" for _ in experiments) + ")")
+      for exp, is_archive in experiments:
+        params.extend((exp, int(is_archive)))
+    cond = " AND ".join(where)
+    with self._db.read() as conn:
+      rows = conn.execute(
+        f"""
+        SELECT c.checkpoint_rel, c.exp_id, c.run_dir, c.filename, c.archive, c.size_bytes,
+          c.mtime_utc, c.update_num, j.run_id AS job_run_id, j.status AS job_status
+        FROM checkpoints c
+        LEFT JOIN jobs j ON j.run_id = c.run_dir AND j.exp_id = c.exp_id
+        WHERE {cond}
+        ORDER BY c.mtime_utc DESC, c.checkpoint_rel ASC
+        LIMIT ? OFFSET ?
+        """,
+        (*params, limit, offset),
+      ).fetchall()
+      total = int(conn.execute(f"SELECT COUNT(*) FROM checkpoints c WHERE {cond}", params).fetchone()[0])
+      exp_ids = [
+        r[0]
+        for r in conn.execute(
+          f"SELECT DISTINCT c.exp_id FROM checkpoints c WHERE {cond} ORDER BY c.exp_id", params
+        ).fetchall()
+      ]
+    page = []
+    for r in rows:
+      d = dict(r)
+      d["archive"] = bool(d["archive"])
+      d["update"] = d.pop("update_num")
+      page.append(d)
+    return page, total, exp_ids
+
   @staticmethod
   def _job_row_to_dict(row: sqlite3.Row) -> dict[str, Any]:
     d = dict(row)
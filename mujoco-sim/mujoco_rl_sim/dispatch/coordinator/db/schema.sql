@@ -49,3 +49,30 @@ CREATE TABLE IF NOT EXISTS workers (
   registered_at TEXT NOT NULL DEFAULT (datetime('now')),
   metadata_json TEXT
 );
+
+-- runs/ 配下のチェックポイント索引（CheckpointCatalog が run ディレクトリの mtime 差分で更新する）
+CREATE TABLE IF NOT EXISTS checkpoint_runs (
+  run_rel TEXT PRIMARY KEY,
+  exp_id TEXT NOT NULL,
+  run_dir TEXT NOT NULL,
+  archive INTEGER NOT NULL,
+  dir_mtime_ns INTEGER NOT NULL,
+  has_manifest INTEGER NOT NULL,
+  files_mtime_ns INTEGER,
+  scanned_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+  checkpoint_rel TEXT PRIMARY KEY,
+  run_rel TEXT NOT NULL,
+  exp_id TEXT NOT NULL,
+  run_dir TEXT NOT NULL,
+  filename TEXT NOT NULL,
+  archive INTEGER NOT NULL,
+  size_bytes INTEGER NOT NULL,
+  mtime_utc TEXT NOT NULL,
+  update_num INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_checkpoints_run ON checkpoints(run_rel);
+CREATE INDEX IF NOT EXISTS idx_checkpoints_mtime ON checkpoints(mtime_utc);
@@ -1,142 +1,275 @@
-"""runs/ 配下の .pt チェックポイント一覧。"""
+"""runs/ 配下の .pt チェックポイント一覧（Coordinator DB の索引から引く）。
+
+``CheckpointCatalog`` が run ディレクトリごとの索引（パス・update・サイズ・mtime）を DB に持ち、
+一覧 API は索引だけを引く（ファイル走査しない）。索引の更新は差分のみ:
+
+- run ディレクトリの mtime が前回と違う run だけ読み直す（ckpt もマニフェストも
+  一時ファイル → rename で置くので、追加・削除・更新でディレクトリの mtime が変わる）
+- マニフェスト（``checkpoints.json``）がある run はそれを読み、.pt を stat しない。無い run
+  （旧 run・マニフェストを書かない実験）は ``*.pt`` を列挙して stat する。後者は .pt を
+  その場で上書きする実験があるため、最近書かれた run は mtime が同じでも読み直す
+
+更新はバックグラウンドスレッド（``interval_sec`` ごと）、ジョブ完了時（その run だけ）、
+``refresh=1`` 付きの一覧 API で行う。
+"""
 
 from __future__ import annotations
 
+import json
+import re
+import sqlite3
+import threading
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
 from mujoco_rl_sim.dispatch.common.checkpoint_paths import parse_checkpoint_rel
+from mujoco_rl_sim.dispatch.coordinator.db.repository import DispatchRepository
 from mujoco_rl_sim.dispatch.paths import resolve_experiment_dir
 
 FILTERABLE_CHECKPOINT_FILENAMES = frozenset({"final.pt", "latest.pt"})
+# 実験側（例: exp_030 の rl/checkpoint_retention.py）が run ディレクトリに書くマニフェスト
+CHECKPOINT_MANIFEST_FILENAME = "checkpoints.json"
+CHECKPOINT_MANIFEST_FORMAT = "checkpoint_manifest_v1"
+
+_NUMBERED_RE = re.compile(r"^update_(\d+)\.pt$")
+# mtime がこれより新しいディレクトリは、同じ時刻刻み内の後続の変更を見落とさないよう次回も読み直す
+_RACY_MTIME_NS = 2_000_000_000
+# マニフェストの無い run で、最後の .pt 書き込みからこの時間は毎回読み直す（その場上書き対策）
+_HOT_RUN_NS = 600_000_000_000
+
+
+def _iso_mtime(mtime_ns: int) -> str:
+  return datetime.fromtimestamp(mtime_ns / 1e9, tz=timezone.utc).isoformat()
 
 
-def _checkpoint_entry(
-  *,
-  runs_root: Path,
-  rel_posix: str,
-  archive: bool,
-) -> dict[str, Any] | None:
+def _update_from_filename(filename: str) -> int | None:
+  m = _NUMBERED_RE.match(filename)
+  return int(m.group(1)) if m else None
+
+
+def _manifest_checkpoints(run_path: Path) -> list[dict[str, Any]] | None:
+  """run ディレクトリのマニフェストの ckpt 項目（無い・読めない・形式違いなら None）。"""
   try:
-    loc = parse_checkpoint_rel(rel_posix)
-  except ValueError:
+    data = json.loads((run_path / CHECKPOINT_MANIFEST_FILENAME).read_text(encoding="utf-8"))
+  except (OSError, ValueError):
     return None
-  if loc.archive != archive:
+  if not isinstance(data, dict) or data.get("format") != CHECKPOINT_MANIFEST_FORMAT:
     return None
-
-  path = runs_root / rel_posix
-  if not path.is_file():
+  entries = data.get("checkpoints")
+  if not isinstance(entries, list):
     return None
+  return [e for e in entries if isinstance(e, dict) and str(e.get("filename", "")).endswith(".pt")]
 
-  try:
-    resolve_experiment_dir(loc.exp_id, archive=loc.archive)
-    experiment_found = True
-  except FileNotFoundError:
-    experiment_found = False
 
-  exp_path = None
-  visualize_py = False
-  if experiment_found:
+def _iter_run_dirs(runs_root: Path) -> list[tuple[Path, bool]]:
+  """``<exp>/<run>`` と ``archive/<exp>/<run>`` のディレクトリ（深さ固定で列挙する）。"""
+  found: list[tuple[Path, bool]] = []
+  for exp_path in sorted(runs_root.iterdir()):
+    if not exp_path.is_dir():
+      continue
+    archive = exp_path.name == "archive"
+    exp_paths = sorted(p for p in exp_path.iterdir() if p.is_dir()) if archive else [exp_path]
+    for exp in exp_paths:
+      found.extend((run, archive) for run in sorted(exp.iterdir()) if run.is_dir())
+  return found
+
+
+def _scan_run(run_path: Path, rel_dir: str) -> tuple[list[dict[str, Any]], bool, int | None]:
+  """run ディレクトリの ckpt 項目・マニフェストの有無・.pt の最新 mtime（マニフェスト無しのみ）。"""
+  recorded = _manifest_checkpoints(run_path)
+  entries: list[dict[str, Any]] = []
+  if recorded is not None:
+    for e in recorded:
+      filename = str(e["filename"])
+      update = e.get("update")
+      entries.append(
+        {
+          "checkpoint_rel": f"{rel_dir}/{filename}",
+          "filename": filename,
+          "size_bytes": int(e.get("size_bytes", 0)),
+          "mtime_utc": str(e.get("mtime_utc", "")),
+          "update": int(update) if update is not None else _update_from_filename(filename),
+        }
+      )
+    return entries, True, None
+
+  newest: int | None = None
+  for path in sorted(run_path.glob("*.pt")):
     try:
-      exp_path = resolve_experiment_dir(loc.exp_id, archive=loc.archive)
-      visualize_py = (exp_path / "visualize.py").is_file()
-    except FileNotFoundError:
-      experiment_found = False
-
-  stat = path.stat()
-  mtime = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat()
-
-  return {
-    "checkpoint_rel": rel_posix,
-    "exp_id": loc.exp_id,
-    "run_dir": loc.run_dir,
-    "filename": loc.filename,
-    "archive": loc.archive,
-    "size_bytes": stat.st_size,
-    "mtime_utc": mtime,
-    "experiment_found": experiment_found,
-    "visualizable": visualize_py,
-  }
-
-
-def _iter_checkpoint_files(runs_root: Path) -> list[tuple[str, bool]]:
-  """(relative posix path, archive flag)"""
-  if not runs_root.is_dir():
-    return []
-
-  found: list[tuple[str, bool]] = []
-  for path in runs_root.rglob("*.pt"):
+      stat = path.stat()
+    except OSError:
+      continue
     if not path.is_file():
       continue
+    newest = stat.st_mtime_ns if newest is None else max(newest, stat.st_mtime_ns)
+    entries.append(
+      {
+        "checkpoint_rel": f"{rel_dir}/{path.name}",
+        "filename": path.name,
+        "size_bytes": int(stat.st_size),
+        "mtime_utc": _iso_mtime(stat.st_mtime_ns),
+        "update": _update_from_filename(path.name),
+      }
+    )
+  return entries, False, newest
+
+
+class CheckpointCatalog:
+  def __init__(self, repo: DispatchRepository, *, runs_root: Path, interval_sec: float = 10.0) -> None:
+    self._repo = repo
+    self._runs_root = runs_root.resolve()
+    self._interval_sec = max(0.1, float(interval_sec))
+    self._lock = threading.Lock()
+    self._refreshed = False
+    self._stop = threading.Event()
+    self._thread: threading.Thread | None = None
+
+  def refresh(self) -> dict[str, int]:
+    """全 run ディレクトリの mtime を見て、変わった run だけ索引を更新する。"""
+    with self._lock:
+      known = self._repo.checkpoint_run_states()
+      seen: set[str] = set()
+      scanned = 0
+      run_dirs = _iter_run_dirs(self._runs_root) if self._runs_root.is_dir() else []
+      for run_path, archive in run_dirs:
+        rel_dir = run_path.relative_to(self._runs_root).as_posix()
+        seen.add(rel_dir)
+        if self._refresh_run_locked(run_path, rel_dir, archive, known.get(rel_dir)):
+          scanned += 1
+      removed = [rel for rel in known if rel not in seen]
+      if removed:
+        self._repo.delete_checkpoint_runs(removed)
+      self._refreshed = True
+    return {"runs": len(seen), "scanned": scanned, "removed": len(removed)}
+
+  def refresh_run(self, exp_id: str, run_dir: str, *, archive: bool = False) -> None:
+    """1 run ディレクトリだけ読み直す（ジョブ完了時など）。"""
+    rel_dir = f"archive/{exp_id}/{run_dir}" if archive else f"{exp_id}/{run_dir}"
+    run_path = self._runs_root / rel_dir
+    with self._lock:
+      if run_path.is_dir():
+        self._refresh_run_locked(run_path, rel_dir, archive, None)
+      else:
+        self._repo.delete_checkpoint_runs([rel_dir])
+
+  def _refresh_run_locked(
+    self,
+    run_path: Path,
+    rel_dir: str,
+    archive: bool,
+    state: dict[str, Any] | None,
+  ) -> bool:
     try:
-      rel = path.relative_to(runs_root)
-    except ValueError:
-      continue
-    rel_posix = rel.as_posix()
-    parts = rel.parts
-    if parts[0] == "archive":
-      if len(parts) != 4:
+      dir_mtime_ns = run_path.stat().st_mtime_ns
+    except OSError:
+      return False
+    now_ns = time.time_ns()
+    if state is not None and state["dir_mtime_ns"] == dir_mtime_ns:
+      files_mtime_ns = state["files_mtime_ns"]
+      hot = not state["has_manifest"] and files_mtime_ns is not None and now_ns - files_mtime_ns < _HOT_RUN_NS
+      if not hot:
+        return False
+
+    parts = rel_dir.split("/")
+    exp_id, run_dir = parts[-2], parts[-1]
+    entries, has_manifest, files_mtime_ns = _scan_run(run_path, rel_dir)
+    valid = []
+    for e in entries:
+      try:
+        parse_checkpoint_rel(e["checkpoint_rel"])
+      except ValueError:
         continue
-      found.append((rel_posix, True))
-    elif len(parts) == 3:
-      found.append((rel_posix, False))
-  return found
+      valid.append(e)
+    self._repo.replace_checkpoint_run(
+      run_rel=rel_dir,
+      exp_id=exp_id,
+      run_dir=run_dir,
+      archive=archive,
+      # 書き込み直後のディレクトリは次回も読み直す
+      dir_mtime_ns=0 if now_ns - dir_mtime_ns < _RACY_MTIME_NS else dir_mtime_ns,
+      has_manifest=has_manifest,
+      files_mtime_ns=files_mtime_ns,
+      checkpoints=valid,
+    )
+    return True
 
+  def list_checkpoints(
+    self,
+    *,
+    exp_id: str | None = None,
+    run_dir: str | None = None,
+    filename: str | None = None,
+    archive: bool | None = None,
+    visualizable_only: bool = False,
+    limit: int = 500,
+    offset: int = 0,
+    refresh: bool = False,
+  ) -> dict[str, Any]:
+    """チェックポイント一覧（mtime 降順）。
 
-def list_checkpoints(
-  *,
-  runs_root: Path,
-  exp_id: str | None = None,
-  run_dir: str | None = None,
-  filename: str | None = None,
-  archive: bool | None = None,
-  visualizable_only: bool = False,
-  limit: int = 500,
-  offset: int = 0,
-) -> dict[str, Any]:
-  """チェックポイント一覧（mtime 降順）。
-
-  ``filename`` に ``final.pt`` または ``latest.pt`` を指定するとそのファイルのみ。
-  """
-  runs_root = runs_root.resolve()
-  limit = max(1, min(limit, 5000))
-  offset = max(0, offset)
-  if filename is not None and filename not in FILTERABLE_CHECKPOINT_FILENAMES:
-    raise ValueError(
-      f"filename must be one of {sorted(FILTERABLE_CHECKPOINT_FILENAMES)}: {filename!r}"
-    )
+    ``filename`` に ``final.pt`` または ``latest.pt`` を指定するとそのファイルのみ。
+    """
+    limit = max(1, min(limit, 5000))
+    offset = max(0, offset)
+    if filename is not None and filename not in FILTERABLE_CHECKPOINT_FILENAMES:
+      raise ValueError(
+        f"filename must be one of {sorted(FILTERABLE_CHECKPOINT_FILENAMES)}: {filename!r}"
+      )
+    if refresh or not self._refreshed:
+      self.refresh()
 
-  entries: list[dict[str, Any]] = []
-  for rel_posix, is_archive in _iter_checkpoint_files(runs_root):
-    if archive is not None and is_archive != archive:
-      continue
-    entry = _checkpoint_entry(
-      runs_root=runs_root,
-      rel_posix=rel_posix,
-      archive=is_archive,
+    # visualize.py の有無は exp 単位なので、索引に出てくる exp の数だけ調べる
+    experiments = {key: _experiment_status(*key) for key in self._repo.checkpoint_experiments()}
+    visualizable = [key for key, (_, viz) in experiments.items() if viz] if visualizable_only else None
+    page, total, exp_ids = self._repo.query_checkpoints(
+      exp_id=exp_id,
+      run_dir=run_dir,
+      filename=filename,
+      archive=archive,
+      experiments=visualizable,
+      limit=limit,
+      offset=offset,
     )
-    if entry is None:
-      continue
-    if exp_id is not None and entry["exp_id"] != exp_id:
-      continue
-    if run_dir is not None and entry["run_dir"] != run_dir:
-      continue
-    if filename is not None and entry["filename"] != filename:
-      continue
-    if visualizable_only and not entry["visualizable"]:
-      continue
-    entries.append(entry)
-
-  entries.sort(key=lambda e: e["mtime_utc"], reverse=True)
-  total = len(entries)
-  page = entries[offset : offset + limit]
-
-  exp_ids = sorted({e["exp_id"] for e in entries})
-  return {
-    "checkpoints": page,
-    "total": total,
-    "limit": limit,
-    "offset": offset,
-    "exp_ids": exp_ids,
-  }
+    for entry in page:
+      found, viz = experiments.get((entry["exp_id"], entry["archive"]), (False, False))
+      entry["experiment_found"] = found
+      entry["visualizable"] = viz
+    return {
+      "checkpoints": page,
+      "total": total,
+      "limit": limit,
+      "offset": offset,
+      "exp_ids": exp_ids,
+    }
+
+  def start(self) -> None:
+    if self._thread is not None:
+      return
+    self._thread = threading.Thread(target=self._run, name="dispatch-checkpoint-catalog", daemon=True)
+    self._thread.start()
+
+  def stop(self, timeout: float | None = None) -> None:
+    self._stop.set()
+    if self._thread is not None:
+      self._thread.join(timeout)
+      self._thread = None
+
+  def _run(self) -> None:
+    while True:
+      try:
+        self.refresh()
+      except (OSError, sqlite3.Error) as exc:
+        print(f"[dispatch] checkpoint catalog refresh error: {exc}")
+      if self._stop.wait(self._interval_sec):
+        return
+
+
+def _experiment_status(exp_id: str, archive: bool) -> tuple[bool, bool]:
+  """(experiment_found, visualizable)"""
+  try:
+    exp_path = resolve_experiment_dir(exp_id, archive=archive)
+  except FileNotFoundError:
+    return False, False
+  return True, (exp_path / "visualize.py").is_file()
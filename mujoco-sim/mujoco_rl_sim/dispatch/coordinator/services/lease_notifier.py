@@ -0,0 +1,90 @@
+"""lease の long-poll 用: lease できるジョブが増えたら待機中のリクエストを起こす。
+
+sweep は CLI（別プロセス）が DB に直接登録するので、アプリ内の呼び出しだけでは
+登録を知ることができない。専用の接続で ``PRAGMA data_version``（他の接続が
+コミットすると変わる）を短い間隔で見て、変化があり、かつ lease できるジョブが
+あるときだけ待機中のスレッドを起こす。sweep 登録・ジョブの再キューなど、
+ジョブを queued にする書き込みはどの経路でもこれで拾える。
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+
+from mujoco_rl_sim.dispatch.coordinator.db.connection import SqliteDatabase, open_connection
+from mujoco_rl_sim.dispatch.coordinator.db.repository import DispatchRepository
+
+# DB の変化を見る間隔（sweep 登録から worker が起きるまでの遅れの上限）
+_WATCH_INTERVAL_SEC = 0.25
+
+
+class LeaseNotifier:
+  def __init__(
+    self,
+    db: SqliteDatabase,
+    repo: DispatchRepository,
+    *,
+    watch_interval_sec: float = _WATCH_INTERVAL_SEC,
+  ) -> None:
+    self._db = db
+    self._repo = repo
+    self._watch_interval_sec = watch_interval_sec
+    self._cond = threading.Condition()
+    self._generation = 0
+    self._stop = threading.Event()
+    self._thread: threading.Thread | None = None
+
+  @property
+  def generation(self) -> int:
+    """``notify`` のたびに増える番号。lease を試す前に読んで ``wait`` に渡す。"""
+    with self._cond:
+      return self._generation
+
+  def notify(self) -> None:
+    with self._cond:
+      self._generation += 1
+      self._cond.notify_all()
+
+  def wait(self, generation: int, timeout: float) -> bool:
+    """``generation`` 以降に ``notify`` されるか ``timeout`` 秒経つまで待つ。起こされたら True。"""
+    deadline = time.monotonic() + timeout
+    with self._cond:
+      while self._generation == generation:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or self._stop.is_set():
+          return False
+        self._cond.wait(remaining)
+      return True
+
+  def start(self) -> None:
+    if self._thread is not None:
+      return
+    self._thread = threading.Thread(target=self._watch, name="dispatch-lease-notifier", daemon=True)
+    self._thread.start()
+
+  def stop(self, timeout: float | None = None) -> None:
+    self._stop.set()
+    with self._cond:
+      self._cond.notify_all()
+    if self._thread is not None:
+      self._thread.join(timeout)
+      self._thread = None
+
+  def _watch(self) -> None:
+    conn = open_connection(self._db.path)
+    try:
+      last = None
+      while not self._stop.wait(self._watch_interval_sec):
+        try:
+          version = conn.execute("PRAGMA data_version").fetchone()[0]
+          if version == last:
+            continue
+          last = version
+          if self._repo.has_leasable_jobs():
+            self.notify()
+        except sqlite3.Error as exc:
+          print(f"[dispatch] lease notifier error: {exc}")
+    finally:
+      conn.close()
@@ -0,0 +1,50 @@
+"""失効した lease / running ジョブを定期的に failed にするバックグラウンドスレッド。"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+
+from mujoco_rl_sim.dispatch.coordinator.db.repository import DispatchRepository
+
+
+class LeaseSweeper:
+  """``interval_sec`` ごとに ``DispatchRepository.expire_stale_jobs`` を呼ぶ。
+
+  lease の有効期限（90 秒）に対して十分短い間隔で回せば、失効の検出が数十秒遅れるだけで
+  lease / dashboard の各リクエストで回収処理を走らせる必要がなくなる。
+  """
+
+  def __init__(self, repo: DispatchRepository, *, interval_sec: float) -> None:
+    self._repo = repo
+    self._interval_sec = max(0.1, float(interval_sec))
+    self._stop = threading.Event()
+    self._thread: threading.Thread | None = None
+
+  def sweep_once(self) -> int:
+    try:
+      n = self._repo.expire_stale_jobs()
+    except sqlite3.Error as exc:
+      print(f"[dispatch] lease sweep error: {exc}")
+      return 0
+    if n:
+      print(f"[dispatch] expired {n} stale job lease(s)")
+    return n
+
+  def start(self) -> None:
+    if self._thread is not None:
+      return
+    self._thread = threading.Thread(target=self._run, name="dispatch-lease-sweeper", daemon=True)
+    self._thread.start()
+
+  def stop(self, timeout: float | None = None) -> None:
+    self._stop.set()
+    if self._thread is not None:
+      self._thread.join(timeout)
+      self._thread = None
+
+  def _run(self) -> None:
+    # 起動直後にも 1 回回す（前回の Coordinator 停止中に切れた lease を回収する）
+    self.sweep_once()
+    while not self._stop.wait(self._interval_sec):
+      self.sweep_once()
@@ -22,6 +22,10 @@ class CoordinatorSettings:
   visualize_enabled: bool
   python_executable: str
   visualize_log_dir: Path | None
+  # 失効 lease を回収する間隔（秒）
+  lease_sweep_interval_sec: float = 15.0
+  # チェックポイント索引を runs_root の差分で更新する間隔（秒）
+  checkpoint_index_interval_sec: float = 10.0
 
 
 def load_coordinator_settings(config_path: Path | None = None) -> CoordinatorSettings:
@@ -64,6 +68,15 @@ def load_coordinator_settings(config_path: Path | None = None) -> CoordinatorSet
   else:
     visualize_log_dir = Path(log_raw).expanduser()
 
+  sweep_raw = os.environ.get(
+    "MUJOCO_DISPATCH_LEASE_SWEEP_SEC",
+    data.get("lease_sweep_interval_sec", 15.0),
+  )
+  index_raw = os.environ.get(
+    "MUJOCO_DISPATCH_CHECKPOINT_INDEX_SEC",
+    data.get("checkpoint_index_interval_sec", 10.0),
+  )
+
   return CoordinatorSettings(
     host=str(host),
     port=port,
@@ -74,4 +87,6 @@ def load_coordinator_settings(config_path: Path | None = None) -> CoordinatorSet
     visualize_enabled=visualize_enabled,
     python_executable=python_executable,
     visualize_log_dir=visualize_log_dir,
+    lease_sweep_interval_sec=float(sweep_raw),
+    checkpoint_index_interval_sec=float(index_raw),
   )
@@ -1,10 +1,16 @@
-"""チェックポイント一覧走査のユニットテスト。"""
+"""チェックポイント索引（CheckpointCatalog）のユニットテスト。"""
 
 from __future__ import annotations
 
+import json
+import os
+import time
 from pathlib import Path
 
-from mujoco_rl_sim.dispatch.coordinator.services.checkpoint_catalog import list_checkpoints
+from mujoco_rl_sim.dispatch.common.sweep_spec import PlannedJob, SweepSpec
+from mujoco_rl_sim.dispatch.coordinator.db.connection import connect
+from mujoco_rl_sim.dispatch.coordinator.db.repository import DispatchRepository
+from mujoco_rl_sim.dispatch.coordinator.services.checkpoint_catalog import CheckpointCatalog
 
 
 def _touch(path: Path) -> None:
@@ -12,6 +18,17 @@ def _touch(path: Path) -> None:
   path.write_bytes(b"ckpt")
 
 
+def _catalog(tmp_path: Path, runs: Path) -> CheckpointCatalog:
+  return CheckpointCatalog(DispatchRepository(connect(tmp_path / "coord.db")), runs_root=runs)
+
+
+def _age_dirs(root: Path, seconds: float = 3600.0) -> None:
+  """ディレクトリの mtime を過去にする（書き込み直後は毎回読み直す扱いになるため）。"""
+  past = time.time() - seconds
+  for path in [root, *root.rglob("*")]:
+    os.utime(path, (past, past))
+
+
 def test_list_checkpoints_main_and_archive(tmp_path: Path, monkeypatch) -> None:
   runs = tmp_path / "runs"
   _touch(runs / "exp_test" / "run_a" / "final.pt")
@@ -34,7 +51,8 @@ def test_list_checkpoints_main_and_archive(tmp_path: Path, monkeypatch) -> None:
     _fake_resolve,
   )
 
-  data = list_checkpoints(runs_root=runs, limit=100)
+  catalog = _catalog(tmp_path, runs)
+  data = catalog.list_checkpoints(limit=100)
   assert data["total"] == 3
   rels = {c["checkpoint_rel"] for c in data["checkpoints"]}
   assert "exp_test/run_a/final.pt" in rels
@@ -44,10 +62,113 @@ def test_list_checkpoints_main_and_archive(tmp_path: Path, monkeypatch) -> None:
   viz = [c for c in data["checkpoints"] if c["visualizable"]]
   assert len(viz) == 3
 
-  final_only = list_checkpoints(runs_root=runs, filename="final.pt", limit=100)
+  final_only = catalog.list_checkpoints(filename="final.pt", limit=100)
   assert final_only["total"] == 1
   assert final_only["checkpoints"][0]["filename"] == "final.pt"
 
-  latest_only = list_checkpoints(runs_root=runs, filename="latest.pt", limit=100)
+  latest_only = catalog.list_checkpoints(filename="latest.pt", limit=100)
   assert latest_only["total"] == 1
   assert latest_only["checkpoints"][0]["filename"] == "latest.pt"
+
+
+def test_list_checkpoints_reads_run_manifest(tmp_path: Path, monkeypatch) -> None:
+  runs = tmp_path / "runs"
+  run_dir = runs / "exp_test" / "run_a"
+  _touch(run_dir / "final.pt")
+  # マニフェストに無い .pt（保持ポリシーで削除予定など）は一覧に出さない
+  _touch(run_dir / "update_000500.pt")
+  (run_dir / "checkpoints.json").write_text(
+    json.dumps(
+      {
+        "format": "checkpoint_manifest_v1",
+        "checkpoints": [
+          {"filename": "final.pt", "update": 1000, "size_bytes": 1234, "mtime_utc": "2026-01-01T00:00:00+00:00"},
+        ],
+      }
+    ),
+    encoding="utf-8",
+  )
+  _touch(runs / "exp_test" / "run_b" / "latest.pt")
+  monkeypatch.setattr(
+    "mujoco_rl_sim.dispatch.coordinator.services.checkpoint_catalog.resolve_experiment_dir",
+    lambda exp_id, *, archive=False: tmp_path / "experiments" / exp_id,
+  )
+
+  data = _catalog(tmp_path, runs).list_checkpoints(limit=100)
+  by_rel = {c["checkpoint_rel"]: c for c in data["checkpoints"]}
+  assert set(by_rel) == {"exp_test/run_a/final.pt", "exp_test/run_b/latest.pt"}
+  assert by_rel["exp_test/run_a/final.pt"]["size_bytes"] == 1234
+  assert by_rel["exp_test/run_a/final.pt"]["update"] == 1000
+  assert by_rel["exp_test/run_b/latest.pt"]["update"] is None
+
+
+def test_catalog_refresh_rescans_only_changed_runs(tmp_path: Path, monkeypatch) -> None:
+  runs = tmp_path / "runs"
+  for i in range(5):
+    _touch(runs / "exp_test" / f"run_{i}" / "final.pt")
+  _touch(runs / "exp_test" / "run_0" / "update_000100.pt")
+  _age_dirs(runs)
+  monkeypatch.setattr(
+    "mujoco_rl_sim.dispatch.coordinator.services.checkpoint_catalog.resolve_experiment_dir",
+    lambda exp_id, *, archive=False: tmp_path / "experiments" / exp_id,
+  )
+  repo = DispatchRepository(connect(tmp_path / "coord.db"))
+  repo.register_sweep(
+    SweepSpec(
+      sweep_id="s1",
+      exp_id="exp_test",
+      description="",
+      shuffle_seed=0,
+      seeds=(1,),
+      param_grid={},
+      fixed_overrides={},
+    ),
+    spec_path=None,
+    jobs=[
+      PlannedJob(
+        run_id="run_1",
+        sweep_id="s1",
+        exp_id="exp_test",
+        config_hash="h",
+        seed=1,
+        run_index=0,
+        overrides={"seed": 1},
+        queue_position=0,
+        config_id=1,
+        seed_id=1,
+        config_overrides={},
+      )
+    ],
+  )
+  catalog = CheckpointCatalog(repo, runs_root=runs)
+  assert catalog.refresh() == {"runs": 5, "scanned": 5, "removed": 0}
+  # ファイルの mtime は古いので、マニフェストの無い run でも読み直さない
+  assert catalog.refresh() == {"runs": 5, "scanned": 0, "removed": 0}
+
+  by_rel = {c["checkpoint_rel"]: c for c in catalog.list_checkpoints(limit=100)["checkpoints"]}
+  assert by_rel["exp_test/run_0/update_000100.pt"]["update"] == 100
+  assert by_rel["exp_test/run_1/final.pt"]["job_run_id"] == "run_1"
+  assert by_rel["exp_test/run_1/final.pt"]["job_status"] == "queued"
+  assert by_rel["exp_test/run_2/final.pt"]["job_run_id"] is None
+
+  # 一時ファイル → rename で ckpt を足す・run を消す・run を増やす
+  tmp = runs / "exp_test" / "run_3" / ".latest.pt.tmp"
+  tmp.write_bytes(b"newer")
+  os.replace(tmp, runs / "exp_test" / "run_3" / "latest.pt")
+  for path in (runs / "exp_test" / "run_4").iterdir():
+    path.unlink()
+  (runs / "exp_test" / "run_4").rmdir()
+  _touch(runs / "exp_test" / "run_5" / "final.pt")
+  assert catalog.refresh() == {"runs": 5, "scanned": 2, "removed": 1}
+
+  data = catalog.list_checkpoints(limit=2)
+  assert data["total"] == 7 and data["exp_ids"] == ["exp_test"]
+  assert len(data["checkpoints"]) == 2
+  rels = {c["checkpoint_rel"] for c in catalog.list_checkpoints(limit=100)["checkpoints"]}
+  assert "exp_test/run_3/latest.pt" in rels and "exp_test/run_5/final.pt" in rels
+  assert not any(rel.startswith("exp_test/run_4/") for rel in rels)
+
+  # ジョブ完了時はその run だけ読み直す
+  _touch(runs / "exp_test" / "run_1" / "latest.pt")
+  catalog.refresh_run("exp_test", "run_1")
+  assert catalog.list_checkpoints(run_dir="run_1", limit=100)["total"] == 2
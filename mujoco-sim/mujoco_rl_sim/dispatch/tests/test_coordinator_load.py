@@ -0,0 +1,148 @@
+"""Coordinator の負荷テスト: 100 worker が同時に heartbeat / lease / 完了報告する。
+
+ローカルにスレッド版 Flask サーバーを立て、worker ごとのスレッドから HTTP で叩く
+（ダッシュボードの読み取りも並行して流す）。全ジョブがちょうど 1 回ずつ実行され、
+どのリクエストも失敗しないことを確かめる。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from werkzeug.serving import make_server
+
+from mujoco_rl_sim.dispatch.common.sweep_spec import PlannedJob, SweepSpec
+from mujoco_rl_sim.dispatch.coordinator.app import create_app, stop_background_services
+from mujoco_rl_sim.dispatch.coordinator.db.connection import connect
+from mujoco_rl_sim.dispatch.coordinator.db.repository import DispatchRepository
+from mujoco_rl_sim.dispatch.coordinator.settings import CoordinatorSettings
+from mujoco_rl_sim.dispatch.worker.client import CoordinatorClient
+
+_NUM_WORKERS = 100
+_NUM_JOBS = 300
+
+
+def _register_jobs(db_path: Path) -> None:
+  spec = SweepSpec(
+    sweep_id="load",
+    exp_id="exp_test",
+    description="",
+    shuffle_seed=0,
+    seeds=tuple(range(_NUM_JOBS)),
+    param_grid={},
+    fixed_overrides={"num_updates": 10},
+  )
+  jobs = [
+    PlannedJob(
+      run_id=f"load_r{i:04d}",
+      sweep_id="load",
+      exp_id="exp_test",
+      config_hash="h",
+      seed=i,
+      run_index=i,
+      overrides={"num_updates": 10, "seed": i},
+      queue_position=i,
+      config_id=1,
+      seed_id=i,
+      config_overrides={"num_updates": 10},
+    )
+    for i in range(_NUM_JOBS)
+  ]
+  db = connect(db_path)
+  DispatchRepository(db).register_sweep(spec, spec_path=None, jobs=jobs)
+  db.close()
+
+
+def test_hundred_workers_heartbeat_and_lease_concurrently(tmp_path: Path) -> None:
+  db_path = tmp_path / "coord.db"
+  _register_jobs(db_path)
+  settings = CoordinatorSettings(
+    host="127.0.0.1",
+    port=0,
+    db_path=db_path,
+    api_token=None,
+    web_root=tmp_path,
+    runs_root=tmp_path / "runs",
+    visualize_enabled=False,
+    python_executable="python",
+    visualize_log_dir=None,
+  )
+  app = create_app(settings)
+  server = make_server("127.0.0.1", 0, app, threaded=True)
+  server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+  server_thread.start()
+  base_url = f"http://127.0.0.1:{server.server_port}"
+
+  completed: list[tuple[str, str]] = []
+  errors: list[BaseException] = []
+  lock = threading.Lock()
+  start_barrier = threading.Barrier(_NUM_WORKERS)
+  workers_done = threading.Event()
+
+  def worker(i: int) -> None:
+    client = CoordinatorClient(base_url)
+    worker_id = f"w{i:03d}"
+    try:
+      client.register_worker(worker_id=worker_id, hostname="load", max_concurrent_jobs=1)
+      start_barrier.wait()
+      while True:
+        client.worker_heartbeat(worker_id)
+        job = client.lease_job(worker_id)
+        if job is None:
+          return
+        run_id = job["run_id"]
+        client.start_job(run_id, worker_id=worker_id)
+        client.job_heartbeat(run_id, worker_id=worker_id, current_update=5, total_updates=10)
+        client.complete_job(run_id, worker_id=worker_id, primary_metric=1.0)
+        with lock:
+          completed.append((run_id, worker_id))
+    except BaseException as exc:  # noqa: BLE001 - テスト本体で集計する
+      with lock:
+        errors.append(exc)
+
+  dashboard_reads = 0
+
+  def dashboard() -> None:
+    nonlocal dashboard_reads
+    client = CoordinatorClient(base_url)
+    try:
+      while not workers_done.is_set():
+        client._request("GET", "/api/ui/dashboard")
+        dashboard_reads += 1
+    except BaseException as exc:  # noqa: BLE001
+      with lock:
+        errors.append(exc)
+
+  threads = [threading.Thread(target=worker, args=(i,)) for i in range(_NUM_WORKERS)]
+  reader = threading.Thread(target=dashboard)
+  t0 = time.perf_counter()
+  try:
+    reader.start()
+    for t in threads:
+      t.start()
+    for t in threads:
+      t.join(timeout=300)
+    workers_done.set()
+    reader.join(timeout=60)
+  finally:
+    server.shutdown()
+    stop_background_services(app)
+  elapsed = time.perf_counter() - t0
+
+  assert not errors, errors[:3]
+  counts = Counter(run_id for run_id, _ in completed)
+  assert len(counts) == _NUM_JOBS and set(counts.values()) == {1}
+  print(
+    f"[load] {_NUM_WORKERS} workers, {_NUM_JOBS} jobs in {elapsed:.2f}s "
+    f"({len(completed) * 5 / elapsed:.0f} job requests/s, {dashboard_reads} dashboard reads)"
+  )
+
+  db = connect(db_path)
+  repo = DispatchRepository(db)
+  jobs = repo.list_jobs(sweep_id="load", limit=10_000)
+  assert {j["status"] for j in jobs} == {"succeeded"}
+  assert len(repo.list_workers()) == _NUM_WORKERS
+  db.close()
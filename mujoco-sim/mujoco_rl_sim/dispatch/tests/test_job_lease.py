@@ -0,0 +1,213 @@
+"""ジョブの一括 lease・long-poll lease と、失効 lease の回収（LeaseSweeper）のテスト。"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import pytest
+from werkzeug.serving import make_server
+
+from mujoco_rl_sim.dispatch.common.models import JobStatus
+from mujoco_rl_sim.dispatch.common.sweep_spec import PlannedJob, SweepSpec
+from mujoco_rl_sim.dispatch.coordinator.app import create_app, stop_background_services
+from mujoco_rl_sim.dispatch.coordinator.db.connection import connect
+from mujoco_rl_sim.dispatch.coordinator.db.repository import DispatchRepository
+from mujoco_rl_sim.dispatch.coordinator.services.lease_sweeper import LeaseSweeper
+from mujoco_rl_sim.dispatch.coordinator.settings import CoordinatorSettings
+from mujoco_rl_sim.dispatch.worker import agent as agent_mod
+from mujoco_rl_sim.dispatch.worker.settings import WorkerSettings
+
+
+def _register(repo: DispatchRepository, n: int, *, sweep_id: str = "s1") -> None:
+  spec = SweepSpec(
+    sweep_id=sweep_id,
+    exp_id="exp_test",
+    description="",
+    shuffle_seed=0,
+    seeds=tuple(range(n)),
+    param_grid={},
+    fixed_overrides={"num_updates": 10},
+  )
+  jobs = [
+    PlannedJob(
+      run_id=f"{sweep_id}_r{i:03d}",
+      sweep_id=sweep_id,
+      exp_id="exp_test",
+      config_hash="h",
+      seed=i,
+      run_index=i,
+      overrides={"num_updates": 10, "seed": i},
+      queue_position=i,
+      config_id=1,
+      seed_id=i,
+      config_overrides={"num_updates": 10},
+    )
+    for i in range(n)
+  ]
+  repo.register_sweep(spec, spec_path=None, jobs=jobs)
+
+
+def test_lease_jobs_returns_batch_in_queue_order(tmp_path: Path) -> None:
+  repo = DispatchRepository(connect(tmp_path / "c.db"))
+  _register(repo, 20)
+  jobs = repo.lease_jobs(worker_id="w1", max_jobs=16)
+  assert [j["queue_position"] for j in jobs] == list(range(16))
+  assert {j["status"] for j in jobs} == {JobStatus.LEASED.value}
+  assert {j["worker_id"] for j in jobs} == {"w1"}
+  assert jobs[0]["overrides"] == {"num_updates": 10, "seed": 0}
+  assert [j["run_id"] for j in repo.lease_jobs(worker_id="w2", max_jobs=16)] == [
+    f"s1_r{i:03d}" for i in range(16, 20)
+  ]
+  assert repo.lease_jobs(worker_id="w3", max_jobs=16) == []
+  assert repo.lease_next_job(worker_id="w3") is None
+
+
+def test_concurrent_batch_leases_never_double_assign(tmp_path: Path) -> None:
+  db = connect(tmp_path / "c.db")
+  repo = DispatchRepository(db)
+  _register(repo, 500)
+  leased: list[tuple[str, str]] = []
+  lock = threading.Lock()
+  barrier = threading.Barrier(12)
+
+  def worker(i: int) -> None:
+    barrier.wait()
+    while True:
+      jobs = repo.lease_jobs(worker_id=f"w{i}", max_jobs=7)
+      if not jobs:
+        return
+      with lock:
+        leased.extend((j["run_id"], f"w{i}") for j in jobs)
+
+  threads = [threading.Thread(target=worker, args=(i,)) for i in range(12)]
+  for t in threads:
+    t.start()
+  for t in threads:
+    t.join(timeout=60)
+
+  counts = Counter(run_id for run_id, _ in leased)
+  assert len(counts) == 500 and set(counts.values()) == {1}
+  owners = {j["run_id"]: j["worker_id"] for j in repo.list_jobs(sweep_id="s1", limit=1000)}
+  assert all(owners[run_id] == worker_id for run_id, worker_id in leased)
+
+
+def test_database_rejects_sqlite_without_returning(tmp_path: Path, monkeypatch) -> None:
+  # lease_jobs の UPDATE ... RETURNING が使えない SQLite では起動時に止める
+  monkeypatch.setattr(sqlite3, "sqlite_version_info", (3, 34, 1))
+  with pytest.raises(sqlite3.NotSupportedError, match="3.35.0"):
+    connect(tmp_path / "c.db")
+
+
+def _coordinator_settings(tmp_path: Path) -> CoordinatorSettings:
+  return CoordinatorSettings(
+    host="127.0.0.1",
+    port=0,
+    db_path=tmp_path / "c.db",
+    api_token=None,
+    web_root=tmp_path,
+    runs_root=tmp_path / "runs",
+    visualize_enabled=False,
+    python_executable="python",
+    visualize_log_dir=None,
+  )
+
+
+def test_lease_endpoint_fills_all_slots_in_one_request(tmp_path: Path) -> None:
+  settings = _coordinator_settings(tmp_path)
+  app = create_app(settings)
+  _register(DispatchRepository(connect(settings.db_path)), 20)
+  client = app.test_client()
+  try:
+    body = client.post("/api/jobs/lease", json={"worker_id": "w1", "max_jobs": 16}).get_json()
+    assert len(body["jobs"]) == 16 and body["job"]["run_id"] == "s1_r000"
+    # max_jobs を送らない旧 worker は 1 件ずつ
+    body = client.post("/api/jobs/lease", json={"worker_id": "w2"}).get_json()
+    assert [j["run_id"] for j in body["jobs"]] == ["s1_r016"] and body["job"]["run_id"] == "s1_r016"
+    assert client.post("/api/jobs/lease", json={"worker_id": "w2", "max_jobs": "x"}).status_code == 400
+  finally:
+    stop_background_services(app)
+  names = {t.name for t in threading.enumerate()}
+  assert not names & {"dispatch-lease-sweeper", "dispatch-lease-notifier", "dispatch-checkpoint-catalog"}
+
+
+def test_idle_worker_long_poll_starts_job_soon_after_sweep_registration(tmp_path: Path, monkeypatch) -> None:
+  settings = _coordinator_settings(tmp_path)
+  app = create_app(settings)
+  server = make_server("127.0.0.1", 0, app, threaded=True)
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  release = threading.Event()
+
+  def fake_train_job(job: dict, **kwargs) -> tuple[int, str, float | None, str | None]:
+    release.wait(30)
+    return 0, "", 1.0, None
+
+  monkeypatch.setattr(agent_mod, "run_train_job", fake_train_job)
+  worker = agent_mod.WorkerAgent(
+    WorkerSettings(
+      worker_id="w1",
+      coordinator_url=f"http://127.0.0.1:{server.server_port}",
+      api_token=None,
+      max_concurrent_jobs=2,
+      poll_interval_sec=10.0,
+      heartbeat_interval_sec=15.0,
+      lease_wait_sec=15.0,
+      mujoco_rl_sim_root=tmp_path,
+      artifacts_root=None,
+    )
+  )
+  threading.Thread(target=worker.run_forever, daemon=True).start()
+  repo = DispatchRepository(connect(settings.db_path))
+  try:
+    while not repo.list_workers():
+      time.sleep(0.05)
+    time.sleep(0.5)  # worker が空のキューで long-poll に入るのを待つ
+
+    # CLI と同じく別接続から sweep を登録する
+    t0 = time.monotonic()
+    _register(DispatchRepository(connect(settings.db_path)), 3)
+    while not repo.list_jobs(status=JobStatus.RUNNING.value):
+      assert time.monotonic() - t0 < 5.0, "job did not start"
+      time.sleep(0.02)
+    latency = time.monotonic() - t0
+    # poll 間隔（10 秒）を待たずに始まる
+    assert latency < 2.0
+    print(f"[lease] sweep registration -> first job running: {latency * 1000:.0f} ms")
+    time.sleep(0.3)
+    assert len(repo.list_jobs(status=JobStatus.RUNNING.value)) == 2
+  finally:
+    worker._stop.set()
+    release.set()
+    server.shutdown()
+    stop_background_services(app)
+
+
+def test_lease_sweeper_expires_stale_leases(tmp_path: Path) -> None:
+  db = connect(tmp_path / "c.db")
+  repo = DispatchRepository(db)
+  _register(repo, 3)
+  (stale, fresh) = repo.lease_jobs(worker_id="w1", max_jobs=2)
+  with db.write() as conn:
+    conn.execute(
+      "UPDATE jobs SET lease_expires_at = '2000-01-01T00:00:00Z' WHERE run_id = ?", (stale["run_id"],)
+    )
+
+  sweeper = LeaseSweeper(repo, interval_sec=0.1)
+  assert sweeper.sweep_once() == 1
+  assert repo.get_job(stale["run_id"])["status"] == JobStatus.FAILED.value
+  assert repo.get_job(fresh["run_id"])["status"] == JobStatus.LEASED.value
+
+  sweeper.start()
+  with db.write() as conn:
+    conn.execute(
+      "UPDATE jobs SET lease_expires_at = '2000-01-01T00:00:00Z' WHERE run_id = ?", (fresh["run_id"],)
+    )
+  for _ in range(50):
+    if repo.get_job(fresh["run_id"])["status"] == JobStatus.FAILED.value:
+      break
+    threading.Event().wait(0.05)
+  sweeper.stop(timeout=5)
+  assert repo.get_job(fresh["run_id"])["status"] == JobStatus.FAILED.value
@@ -1,20 +1,30 @@
-"""dispatch 進捗ファイルのユニットテスト。"""
+"""dispatch 進捗（パイプ・ファイル・heartbeat）のユニットテスト。"""
 
 from __future__ import annotations
 
 import json
+import os
+import subprocess
+import sys
+import threading
 from pathlib import Path
 
+import mujoco_rl_sim
+from mujoco_rl_sim.dispatch.common import progress as progress_mod
 from mujoco_rl_sim.dispatch.common.models import JobStatus
 from mujoco_rl_sim.dispatch.common.progress import (
+  DispatchProgressPipe,
   dispatch_progress_path_for_job,
   read_dispatch_progress,
   total_updates_from_job,
   write_dispatch_progress,
 )
 from mujoco_rl_sim.dispatch.common.sweep_spec import PlannedJob, SweepSpec
+from mujoco_rl_sim.dispatch.coordinator.app import create_app, stop_background_services
 from mujoco_rl_sim.dispatch.coordinator.db.connection import connect
 from mujoco_rl_sim.dispatch.coordinator.db.repository import DispatchRepository
+from mujoco_rl_sim.dispatch.coordinator.settings import CoordinatorSettings
+from mujoco_rl_sim.dispatch.worker import executor as executor_mod
 
 
 def test_write_and_read_progress(tmp_path: Path, monkeypatch) -> None:
@@ -29,6 +39,99 @@ def test_write_and_read_progress(tmp_path: Path, monkeypatch) -> None:
   assert prog == {"current_update": 42, "total_updates": 6000}
 
 
+def test_progress_pipe_thins_fallback_file(tmp_path: Path, monkeypatch) -> None:
+  progress_file = tmp_path / "dispatch_progress.json"
+  read_fd, write_fd = os.pipe()
+  monkeypatch.setenv("DISPATCH_RUN_ID", "run-001")
+  monkeypatch.setenv("DISPATCH_PROGRESS_FILE", str(progress_file))
+  monkeypatch.setenv("DISPATCH_PROGRESS_FD", str(write_fd))
+  monkeypatch.setattr(progress_mod, "_last_fallback_write_at", None)
+  monkeypatch.setattr(progress_mod, "_pipe_broken", False)
+  try:
+    for update in (1, 2, 3):
+      write_dispatch_progress(current_update=update, total_updates=10)
+    lines = os.read(read_fd, 65536).decode("utf-8").splitlines()
+    assert [json.loads(line)["current_update"] for line in lines] == [1, 2, 3]
+    # ファイルは最初の 1 回だけ（次は間隔が空くか最終 update のとき）
+    assert read_dispatch_progress(progress_file, run_id="run-001") == {"current_update": 1, "total_updates": 10}
+    write_dispatch_progress(current_update=10, total_updates=10)
+    assert read_dispatch_progress(progress_file, run_id="run-001") == {"current_update": 10, "total_updates": 10}
+  finally:
+    os.close(read_fd)
+    os.close(write_fd)
+
+  # 読み手がいなくなったらファイルに毎回書く
+  write_dispatch_progress(current_update=4, total_updates=10)
+  assert progress_mod._pipe_broken
+  assert read_dispatch_progress(progress_file, run_id="run-001") == {"current_update": 4, "total_updates": 10}
+
+
+def test_progress_pipe_receives_child_updates(tmp_path: Path) -> None:
+  events: list[dict[str, int]] = []
+  done = threading.Event()
+
+  def on_progress(prog: dict[str, int]) -> None:
+    events.append(prog)
+    if prog["current_update"] == prog["total_updates"]:
+      done.set()
+
+  pipe = DispatchProgressPipe(run_id="run-001", on_progress=on_progress)
+  env = {
+    **os.environ,
+    **pipe.env(),
+    "DISPATCH_RUN_ID": "run-001",
+    "DISPATCH_PROGRESS_FILE": str(tmp_path / "dispatch_progress.json"),
+    "PYTHONPATH": str(Path(mujoco_rl_sim.__file__).resolve().parents[1]),
+  }
+  script = (
+    "from mujoco_rl_sim.dispatch.common.progress import write_dispatch_progress\n"
+    "for u in range(1, 51):\n"
+    "  write_dispatch_progress(current_update=u, total_updates=50)\n"
+  )
+  proc = subprocess.Popen([sys.executable, "-c", script], env=env, pass_fds=(pipe.write_fd,))
+  pipe.start()
+  assert proc.wait(timeout=60) == 0
+  pipe.close()
+  assert done.wait(5)
+  assert [e["current_update"] for e in events] == list(range(1, 51))
+  assert read_dispatch_progress(tmp_path / "dispatch_progress.json", run_id="run-001") == {
+    "current_update": 50,
+    "total_updates": 50,
+  }
+  assert pipe.last_record_at is not None
+
+
+def test_executor_polls_file_after_pipe_goes_stale(tmp_path: Path, monkeypatch) -> None:
+  # 1 件目だけパイプで送り、その後パイプを閉じて（ファイルへのフォールバック）2, 3 件目を書く
+  script = (
+    "import os, time\n"
+    "from mujoco_rl_sim.dispatch.common.progress import write_dispatch_progress\n"
+    "write_dispatch_progress(current_update=1, total_updates=3)\n"
+    "os.close(int(os.environ['DISPATCH_PROGRESS_FD']))\n"
+    "time.sleep(0.5)\n"
+    "write_dispatch_progress(current_update=2, total_updates=3)\n"
+    "time.sleep(0.5)\n"
+    "write_dispatch_progress(current_update=3, total_updates=3)\n"
+    "time.sleep(0.5)\n"
+  )
+  monkeypatch.setattr(executor_mod, "build_train_command", lambda job, *, exp_path: [sys.executable, "-c", script])
+  monkeypatch.setattr(executor_mod, "experiment_dir", lambda exp_id: tmp_path)
+  monkeypatch.setattr(executor_mod, "_PROGRESS_POLL_SEC", 0.1)
+  monkeypatch.setattr(executor_mod, "_PIPE_STALE_SEC", 0.3)
+  monkeypatch.setenv("PYTHONPATH", str(Path(mujoco_rl_sim.__file__).resolve().parents[1]))
+  job = {
+    "run_id": "run-001",
+    "sweep_id": "s1",
+    "exp_id": "exp_test",
+    "config_hash": "h",
+    "overrides": {"num_updates": 3},
+  }
+  events: list[dict[str, int]] = []
+  code, _, _, _ = executor_mod.run_train_job(job, mujoco_rl_sim_root=tmp_path, on_progress=events.append)
+  assert code == 0
+  assert [e["current_update"] for e in events] == [1, 2, 3]
+
+
 def test_read_progress_rejects_wrong_run_id(tmp_path: Path) -> None:
   path = tmp_path / "dispatch_progress.json"
   path.write_text(
@@ -106,3 +209,68 @@ def test_job_heartbeat_updates_progress(tmp_path: Path) -> None:
   assert done is not None
   assert done["status"] == JobStatus.SUCCEEDED.value
   assert done["current_update"] == 100
+
+
+def test_batched_job_heartbeat_endpoint(tmp_path: Path) -> None:
+  settings = CoordinatorSettings(
+    host="127.0.0.1",
+    port=0,
+    db_path=tmp_path / "test.db",
+    api_token=None,
+    web_root=tmp_path,
+    runs_root=tmp_path / "runs",
+    visualize_enabled=False,
+    python_executable="python",
+    visualize_log_dir=None,
+  )
+  app = create_app(settings)
+  repo = DispatchRepository(connect(settings.db_path))
+  repo.register_sweep(
+    SweepSpec(
+      sweep_id="s1",
+      exp_id="exp_test",
+      description="",
+      shuffle_seed=0,
+      seeds=(1, 2),
+      param_grid={},
+      fixed_overrides={"num_updates": 100},
+    ),
+    spec_path=None,
+    jobs=[
+      PlannedJob(
+        run_id=f"run{i}",
+        sweep_id="s1",
+        exp_id="exp_test",
+        config_hash="abc",
+        seed=i,
+        run_index=i,
+        overrides={"num_updates": 100, "seed": i},
+        queue_position=i,
+        config_id=1,
+        seed_id=i,
+        config_overrides={"num_updates": 100},
+      )
+      for i in (1, 2)
+    ],
+  )
+  repo.lease_jobs(worker_id="w1", max_jobs=2)
+  client = app.test_client()
+  try:
+    body = client.post(
+      "/api/jobs/heartbeat",
+      json={
+        "worker_id": "w1",
+        "jobs": [
+          {"run_id": "run1", "current_update": 10, "total_updates": 100},
+          {"run_id": "run2", "current_update": None, "total_updates": None},
+          {"run_id": "other", "current_update": 1, "total_updates": 100},
+        ],
+      },
+    ).get_json()
+    assert body["refreshed"] == ["run1", "run2"] and body["rejected"] == ["other"]
+    assert repo.get_job("run1")["current_update"] == 10
+    assert repo.get_job("run2")["current_update"] is None
+    bad = client.post("/api/jobs/heartbeat", json={"worker_id": "w1", "jobs": [{"run_id": "run1", "current_update": "x"}]})
+    assert bad.status_code == 400
+  finally:
+    stop_background_services(app)
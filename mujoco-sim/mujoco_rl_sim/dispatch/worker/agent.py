@@ -48,17 +48,27 @@ class WorkerAgent:
         with self._lock:
           free_slots = s.max_concurrent_jobs - len(self._active)
 
-        for _ in range(free_slots):
-          try:
-            job = self._client.lease_job(s.worker_id)
-          except RuntimeError as exc:
-            print(f"[dispatch-worker] lease error: {exc}")
-            break
-          if job is None:
-            break
+        if free_slots <= 0:
+          time.sleep(s.poll_interval_sec)
+          continue
+
+        # long-poll: ジョブが来るまで Coordinator 側で待つ。実行中ジョブがあるときは
+        # 終了の回収と heartbeat を遅らせないよう poll 間隔まで、無ければ heartbeat 間隔まで
+        if free_slots < s.max_concurrent_jobs:
+          wait_sec = s.poll_interval_sec
+        else:
+          wait_sec = min(s.lease_wait_sec, s.heartbeat_interval_sec)
+        t0 = time.monotonic()
+        try:
+          jobs = self._client.lease_jobs(s.worker_id, max_jobs=free_slots, wait_sec=wait_sec)
+        except RuntimeError as exc:
+          print(f"[dispatch-worker] lease error: {exc}")
+          jobs = []
+        for job in jobs:
           self._start_job(pool, job)
-
-        time.sleep(s.poll_interval_sec)
+        if not jobs:
+          # long-poll 非対応の Coordinator・エラー・lease_wait_sec=0 のときは poll 間隔まで待つ
+          time.sleep(max(0.0, max(wait_sec, s.poll_interval_sec) - (time.monotonic() - t0)))
 
   def _start_job(self, pool: ThreadPoolExecutor, job: dict[str, Any]) -> None:
     run_id = job["run_id"]
@@ -90,15 +100,30 @@ class WorkerAgent:
   def _heartbeat_running_jobs(self) -> None:
     with self._lock:
       run_ids = list(self._active.keys())
-    for run_id in run_ids:
-      with self._lock:
-        prog = self._job_progress.get(run_id)
+      progress = {run_id: self._job_progress.get(run_id) for run_id in run_ids}
+    if not run_ids:
+      return
+    items = [
+      {
+        "run_id": run_id,
+        "current_update": prog.get("current_update") if prog else None,
+        "total_updates": prog.get("total_updates") if prog else None,
+      }
+      for run_id, prog in progress.items()
+    ]
+    try:
+      self._client.job_heartbeats(worker_id=self._settings.worker_id, jobs=items)
+      return
+    except RuntimeError:
+      pass
+    # まとめ送り非対応の Coordinator 向けに 1 件ずつ送る
+    for item in items:
       try:
         self._client.job_heartbeat(
-          run_id,
+          item["run_id"],
           worker_id=self._settings.worker_id,
-          current_update=prog.get("current_update") if prog else None,
-          total_updates=prog.get("total_updates") if prog else None,
+          current_update=item["current_update"],
+          total_updates=item["total_updates"],
         )
       except RuntimeError:
         pass
@@ -58,8 +58,26 @@ class CoordinatorClient:
     self._request("POST", "/api/workers/heartbeat", {"worker_id": worker_id})
 
   def lease_job(self, worker_id: str) -> dict[str, Any] | None:
-    out = self._request("POST", "/api/jobs/lease", {"worker_id": worker_id})
-    return out.get("job") if out else None
+    jobs = self.lease_jobs(worker_id, max_jobs=1)
+    return jobs[0] if jobs else None
+
+  def lease_jobs(self, worker_id: str, *, max_jobs: int, wait_sec: float = 0.0) -> list[dict[str, Any]]:
+    """空きスロット分（最大 ``max_jobs`` 件）を 1 リクエストで lease する。
+
+    ``wait_sec`` > 0 なら long-poll（キューが空のとき、ジョブが登録されるか
+    ``wait_sec`` 秒経つまで Coordinator 側で待つ）。
+    """
+    out = self._request(
+      "POST",
+      "/api/jobs/lease",
+      {"worker_id": worker_id, "max_jobs": max_jobs, "wait_sec": wait_sec},
+    )
+    if not out:
+      return []
+    if "jobs" in out:
+      return list(out["jobs"])
+    # 旧 Coordinator（1 件ずつ）
+    return [out["job"]] if out.get("job") else []
 
   def start_job(self, run_id: str, *, worker_id: str) -> None:
     self._request("POST", f"/api/jobs/{run_id}/start", {"worker_id": worker_id})
@@ -79,6 +97,14 @@ class CoordinatorClient:
       body["total_updates"] = total_updates
     self._request("POST", f"/api/jobs/{run_id}/heartbeat", body)
 
+  def job_heartbeats(self, *, worker_id: str, jobs: list[dict[str, Any]]) -> list[str]:
+    """実行中ジョブ全部の heartbeat を 1 リクエストで送る（``jobs``: run_id / 進捗）。
+
+    lease を延長できなかった run_id を返す。
+    """
+    out = self._request("POST", "/api/jobs/heartbeat", {"worker_id": worker_id, "jobs": jobs})
+    return list((out or {}).get("rejected") or [])
+
   def complete_job(
     self,
     run_id: str,
@@ -7,6 +7,7 @@ import os
 import subprocess
 import sys
 import tempfile
+import threading
 import time
 from collections.abc import Callable
 from pathlib import Path
@@ -14,12 +15,18 @@ from typing import Any
 
 from mujoco_rl_sim.dispatch.common.primary_metric import metric_from_summary_file
 from mujoco_rl_sim.dispatch.common.progress import (
+  PROGRESS_PIPE_SUPPORTED,
+  DispatchProgressPipe,
   dispatch_progress_path_for_job,
   read_dispatch_progress,
 )
 from mujoco_rl_sim.dispatch.paths import experiment_dir
 
+# パイプで進捗が届かない間（旧 train.py・Windows）に進捗ファイルを読む間隔
 _PROGRESS_POLL_SEC = 2.0
+# パイプから最後に届いてからこれだけ経ったら、途切れたとみなして進捗ファイルも読む
+# （train.py 側は書き込みに失敗すると毎回ファイルに書くようになる）
+_PIPE_STALE_SEC = 10.0
 
 
 def _git_commit(cwd: Path) -> str | None:
@@ -106,30 +113,67 @@ def run_train_job(
   repo_root = mujoco_rl_sim_root.parent
   run_id = str(job["run_id"])
 
+  last_progress: dict[str, int] | None = None
+  progress_lock = threading.Lock()
+
+  # パイプの読み取りスレッドとファイルのポーリングの両方から呼ばれる。
+  # 進捗ファイルはパイプより古いことがあるので、update 数が戻る値は捨てる
+  def _emit(prog: dict[str, int]) -> None:
+    nonlocal last_progress
+    with progress_lock:
+      if last_progress is not None and (
+        prog == last_progress or prog["current_update"] < last_progress["current_update"]
+      ):
+        return
+      last_progress = prog
+    if on_progress is not None:
+      on_progress(prog)
+
+  pipe = DispatchProgressPipe(run_id=run_id, on_progress=_emit) if PROGRESS_PIPE_SUPPORTED else None
+  if pipe is not None:
+    env.update(pipe.env())
+
   with tempfile.TemporaryDirectory(prefix="dispatch-train-") as tmpdir:
     log_path = Path(tmpdir) / "train.log"
     with log_path.open("w", encoding="utf-8") as log_file:
-      proc = subprocess.Popen(
-        cmd,
-        cwd=exp_path,
-        env=env,
-        stdout=log_file,
-        stderr=subprocess.STDOUT,
-        text=True,
-      )
-      last_progress: dict[str, int] | None = None
-      while proc.poll() is None:
+      try:
+        proc = subprocess.Popen(
+          cmd,
+          cwd=exp_path,
+          env=env,
+          stdout=log_file,
+          stderr=subprocess.STDOUT,
+          text=True,
+          pass_fds=(pipe.write_fd,) if pipe is not None else (),
+        )
+      except BaseException:
+        if pipe is not None:
+          pipe.close()
+        raise
+      if pipe is not None:
+        pipe.start()
+      while True:
+        try:
+          proc.wait(timeout=_PROGRESS_POLL_SEC)
+          break
+        except subprocess.TimeoutExpired:
+          pass
+        if (
+          pipe is not None
+          and pipe.last_record_at is not None
+          and time.monotonic() - pipe.last_record_at < _PIPE_STALE_SEC
+        ):
+          continue
         prog = read_dispatch_progress(progress_path, run_id=run_id)
         if prog is None:
           fallback = exp_path / "dispatch_progress.json"
           prog = read_dispatch_progress(fallback, run_id=run_id)
-        if prog is not None and prog != last_progress:
-          last_progress = prog
-          if on_progress is not None:
-            on_progress(prog)
-        time.sleep(_PROGRESS_POLL_SEC)
+        if prog is not None:
+          _emit(prog)
 
-      code = int(proc.wait())
+      code = int(proc.returncode)
+      if pipe is not None:
+        pipe.close()
 
     log_tail = _read_log_tail(log_path)
 
@@ -19,6 +19,7 @@ class WorkerSettings:
   max_concurrent_jobs: int
   poll_interval_sec: float
   heartbeat_interval_sec: float
+  lease_wait_sec: float
   mujoco_rl_sim_root: Path
   artifacts_root: Path | None
 
@@ -36,6 +37,7 @@ def load_worker_settings(config_path: Path) -> WorkerSettings:
   max_jobs = int(data.get("max_concurrent_jobs", 1))
   poll = float(data.get("poll_interval_sec", 10.0))
   hb = float(data.get("heartbeat_interval_sec", 15.0))
+  lease_wait = float(data.get("lease_wait_sec", 15.0))
   root_raw = data.get("mujoco_rl_sim_root", "")
   root = Path(root_raw).resolve() if root_raw else MUJOCO_RL_SIM_ROOT
   art_raw = data.get("artifacts_root", "")
@@ -48,6 +50,7 @@ def load_worker_settings(config_path: Path) -> WorkerSettings:
     max_concurrent_jobs=max(1, max_jobs),
     poll_interval_sec=poll,
     heartbeat_interval_sec=hb,
+    lease_wait_sec=max(0.0, lease_wait),
     mujoco_rl_sim_root=root,
     artifacts_root=artifacts,
   )
@@ -160,6 +160,13 @@ class PpoConfig:
   adv_std_min: float = 0.1
   action_log_prob_eps: float = 1e-6
   log_prob_clip: float = 20.0
+  # true: ミニバッチ損失を torch.compile する（CPU でも可。初回 update がコンパイル分遅くなる）
+  compile_update: bool = False
+  # true: 観測を逐次平均・分散で正規化して方策に入れる（rl/running_norm.py。統計は ckpt に保存）
+  obs_norm: bool = False
+  obs_norm_clip: float = 10.0
+  # true: 報酬を割引リターンの標準偏差で割ってから reward_clip する
+  reward_norm: bool = False
   _sim: SimConfig | None = field(default=None, init=False, repr=False, compare=False)
 
   @property
@@ -191,6 +198,18 @@ class RuntimeConfig:
   viewer: bool = True
   telemetry: bool = True
   num_envs: int = 1
+  # Subproc VecEnv の転送路: "shm"（共有メモリ）/ "pipe"（Pipe + pickle フォールバック）
+  vec_env_transport: str = "shm"
+  # 1 worker プロセスが順に step する env 数（worker 数 = ceil(num_envs / envs_per_worker)）
+  envs_per_worker: int = 1
+  # true: worker を 2 group に分け、片方の物理 step 中にもう片方の方策推論を行う
+  vec_env_pipeline: bool = False
+  # true: 毎 step 観測ベクトルを契約（contract/validate.py）で検証する（デバッグ用）
+  check_obs_contract: bool = False
+  # true: 1 制御ステップの物理ステップを mujoco.rollout の 1 呼び出しで積分する（sim/substep_rollout.py）
+  physics_rollout: bool = False
+  # 学習 DR の初期 state を env ごとに何 episode 先まで先読みするか（subproc worker の待ち時間に作る。0 で無効）
+  reset_prefetch: int = 1
   step_wall_sleep_sec: float = 0.02
   telemetry_host: str = "0.0.0.0"
   telemetry_port: int = 8791
@@ -230,6 +249,17 @@ class CheckpointConfig:
   checkpoint_every: int = 500
   save_latest: bool = True
   save_final: bool = True
+  # "tensors": mmap で読める形式（rl/checkpoint_file.py）/ "torch": torch.save（以前の .pt）
+  file_format: str = "tensors"
+  # true: 書き込みをバックグラウンドスレッドで行い、学習ループを止めない
+  async_save: bool = True
+  # update_*.pt の保持（rl/checkpoint_retention.py）。3 つとも 0 なら全部残す
+  # keep_last: 最新 N 個 / keep_every: update 数が K の倍数 / keep_best: keep_best_metric の上位 N 個
+  keep_last: int = 0
+  keep_every: int = 0
+  keep_best: int = 0
+  # 大きいほど良い指標（train/ep_return_mean、または eval 後の eval/displacement_x_mean）
+  keep_best_metric: str = "train/ep_return_mean"
 
 
 @dataclass
@@ -238,6 +268,14 @@ class EvalConfig:
   eval_seeds: tuple[int, ...] = (101, 102, 103, 104, 105, 106, 107, 108, 109, 110)
   episodes_per_seed: int = 5
   primary_metric_name: str = "eval/displacement_x_mean"
+  # 並列 eval（eval/runner.py）のプロセス数。0 ならプロセスを使わず eval を呼んだプロセスで回す
+  num_workers: int = 4
+  # worker 1 つが同時に進める試行数（行動はこの幅でまとめて推論する）
+  envs_per_worker: int = 4
+  # true: 試行結果を eval/cache.py のキャッシュから読み、未評価の試行だけ回す
+  cache: bool = True
+  # キャッシュの保存先（空なら mujoco_rl_sim/runs/_eval_cache/<exp_name>）
+  cache_dir: str = ""
 
 
 @dataclass
@@ -12,10 +12,13 @@ from omegaconf import DictConfig
 
 from contract import TELEMETRY_CONTRACT
 from contract.telemetry import build_reset_payload, build_step_payload
+from lib.episode_rolling import rolling_summary_to_wandb
 from lib.experiment_context import ExperimentContext
 from lib.hydra_checkpoint import hydra_config_path
 from lib.train_throughput import ThroughputTracker, UpdateTiming, pacing_warnings
 from mujoco_sim_common.telemetry import HubTelemetrySocketIoServer
+from rl.checkpoint_retention import RetentionPolicy
+from sim.domain_randomization import write_dr_episode_log
 from sim.subproc_vec_env import SubprocVecEnvBiped
 
 
@@ -90,6 +93,12 @@ def _viewer_visualize_realtime(cfg: Any, wall_sleep_sec: float) -> bool:
   return wall_sleep_sec > 0.0
 
 
+def _checkpoint_metrics(episode_metrics: Any) -> dict[str, float]:
+  """チェックポイントのマニフェストに残す学習中の指標（直近エピソードの rolling 統計）。"""
+  rolling = episode_metrics.rolling_summary()
+  return rolling_summary_to_wandb(rolling) if rolling else {}
+
+
 def _print_run_banner(
   bindings: PpoTrainBindings,
   *,
@@ -143,6 +152,9 @@ def _print_run_banner(
   if num_envs > 1:
     print(
       f"[subproc-vec] enabled: {num_envs} env workers "
+      f"envs_per_worker={int(cfg.runtime.envs_per_worker)} "
+      f"transport={cfg.runtime.vec_env_transport} "
+      f"pipeline={bool(cfg.runtime.vec_env_pipeline)} "
       f"(rollout_steps={cfg.ppo.rollout_steps} total per update)"
     )
 
@@ -223,39 +235,71 @@ def _run_warmup_step(
   return obs, obs_vec, episode_step, total_env_steps, episode_index
 
 
+def _consume_vec_rows(
+  batch: Any,
+  *,
+  env_slice: slice,
+  obs_rows: np.ndarray,
+  actions: np.ndarray,
+  values: Any,
+  log_probs: Any,
+  agent: Any,
+  episode_metrics: Any,
+  policy_steps: int,
+  total_env_steps: int,
+  episodes_finished: int,
+) -> tuple[int, int, int]:
+  """1 回分の vec step 結果（``env_slice`` の連続行）を store し、エピソード集計する。
+
+  戻り値は ``(policy_steps, total_env_steps, episodes_finished)``。
+  """
+  dones = batch.terminated | batch.truncated
+  agent.store_batch(
+    obs_rows,
+    actions,
+    batch.rewards,
+    values,
+    dones,
+    log_probs,
+    env_slice=env_slice,
+  )
+  episodes_finished += episode_metrics.on_vec_batch(
+    batch, env_slice=env_slice, env_step=total_env_steps
+  )
+  policy_steps += len(dones)
+  total_env_steps += len(dones)
+  return policy_steps, total_env_steps, episodes_finished
+
+
 def _collect_rollout_subproc(
   *,
   vec_env: SubprocVecEnvBiped,
   agent: Any,
   cfg: Any,
-  obs_list: list[tuple[float, ...]],
-  episode_steps: list[int],
-  next_episode_index: int,
+  obs_batch: np.ndarray,
   episode_metrics: Any,
   total_env_steps: int,
   episodes_finished: int,
 ) -> tuple[
-  list[tuple[float, ...]],
-  list[int],
-  int,
+  np.ndarray,
   int,
   int,
-  Any,
   float,
   float,
 ]:
-  """Subproc VecEnv で ``ppo.rollout_steps`` 分のロールアウトを収集する。"""
-  num_envs = vec_env.num_envs
+  """Subproc VecEnv で ``ppo.rollout_steps`` 分のロールアウトを収集する。
+
+  ``obs_batch`` は ``[num_envs, obs_dim]``。終了した env は worker 側で auto-reset
+  され、同じ step の結果に reset 後の観測が入って返る（親から reset を送らない）。
+  vec step 数は ``ceil(rollout_steps / num_envs)`` で、各 step の全 env を env 列として
+  store する（``AgentPPO`` のロールアウトバッファの horizon と一致する）。
+  """
   policy_steps = 0
-  last_obs: Any = obs_list[0]
   sum_ipc_s = 0.0
   sum_act_batch_s = 0.0
   rollout_steps = int(cfg.ppo.rollout_steps)
-  max_steps_per_episode = int(cfg.training.max_steps_per_episode)
 
   while policy_steps < rollout_steps:
-    obs_batch = np.asarray(obs_list, dtype=np.float64)
-
     t_act = time.perf_counter()
     actions, values, log_probs = agent.act_batch(obs_batch)
     sum_act_batch_s += time.perf_counter() - t_act
@@ -264,62 +308,116 @@ def _collect_rollout_subproc(
     batch = vec_env.step(actions)
     sum_ipc_s += time.perf_counter() - t_ipc
 
-    for env_id in range(num_envs):
-      obs_before = obs_list[env_id]
-      action_row = actions[env_id]
-      action_tuple = tuple(float(x) for x in action_row)
-      reward = float(batch.rewards[env_id])
-      terminated = bool(batch.terminated[env_id])
-      step_info = batch.infos[env_id]
-
-      episode_steps[env_id] += 1
-      total_env_steps += 1
-      episode_metrics.on_step(reward, step_info)
-
-      truncated = episode_steps[env_id] >= max_steps_per_episode
-      done = terminated or truncated
-
-      agent.store(
-        obs_before,
-        action_tuple,
-        reward,
-        values[env_id],
-        done,
-        log_probs[env_id],
+    policy_steps, total_env_steps, episodes_finished = _consume_vec_rows(
+      batch,
+      env_slice=slice(0, vec_env.num_envs),
+      obs_rows=obs_batch,
+      actions=actions,
+      values=values,
+      log_probs=log_probs,
+      agent=agent,
+      episode_metrics=episode_metrics,
+      policy_steps=policy_steps,
+      total_env_steps=total_env_steps,
+      episodes_finished=episodes_finished,
+    )
+    # batch.observations はコピー済みなので、そのまま次の obs_batch にできる
+    obs_batch = batch.observations
+
+  return (
+    obs_batch,
+    total_env_steps,
+    episodes_finished,
+    sum_ipc_s,
+    sum_act_batch_s,
+  )
+
+
+def _collect_rollout_subproc_pipelined(
+  *,
+  vec_env: SubprocVecEnvBiped,
+  agent: Any,
+  cfg: Any,
+  obs_batch: np.ndarray,
+  episode_metrics: Any,
+  total_env_steps: int,
+  episodes_finished: int,
+) -> tuple[
+  np.ndarray,
+  int,
+  int,
+  float,
+  float,
+  float,
+]:
+  """``_collect_rollout_subproc`` のパイプライン版（``runtime.vec_env_pipeline``）。
+
+  env を worker 境界で 2 group に分け、片方の group が物理 step している間に
+  もう片方の ``act_batch`` を行う。store 順・vec step 数は lock-step 版と同じ
+  （各 vec step を group 順に集計する）。戻り値の最後は、別 group が in-flight の間に
+  走った ``act_batch`` の合計秒数（``UpdateTiming.overlap_s``）。
+  """
+  groups = vec_env.env_groups(2)
+  # group ごとに観測を持つ（store 済みの行を後から上書きしないよう、行は都度差し替える）
+  group_obs = [obs_batch[g] for g in groups]
+  group_act: list[tuple[np.ndarray, Any, Any]] = [None] * len(groups)  # type: ignore[list-item]
+  in_flight = [False] * len(groups)
+  policy_steps = 0
+  sum_ipc_s = 0.0
+  sum_act_batch_s = 0.0
+  sum_overlap_s = 0.0
+  rollout_steps = int(cfg.ppo.rollout_steps)
+
+  def dispatch(gi: int) -> None:
+    nonlocal sum_act_batch_s, sum_overlap_s, sum_ipc_s
+    t_act = time.perf_counter()
+    group_act[gi] = agent.act_batch(group_obs[gi])
+    dt = time.perf_counter() - t_act
+    sum_act_batch_s += dt
+    if any(in_flight):
+      sum_overlap_s += dt
+    t_ipc = time.perf_counter()
+    vec_env.step_async(group_act[gi][0], env_slice=groups[gi])
+    sum_ipc_s += time.perf_counter() - t_ipc
+    in_flight[gi] = True
+
+  for gi in range(len(groups)):
+    dispatch(gi)
+
+  while policy_steps < rollout_steps:
+    # この vec step で打ち切らないなら、集計を終えた group から次の step を先出しする
+    more = policy_steps + vec_env.num_envs < rollout_steps
+    for gi, env_slice in enumerate(groups):
+      t_ipc = time.perf_counter()
+      batch = vec_env.step_wait(env_slice=env_slice)
+      sum_ipc_s += time.perf_counter() - t_ipc
+      in_flight[gi] = False
+
+      actions, values, log_probs = group_act[gi]
+      policy_steps, total_env_steps, episodes_finished = _consume_vec_rows(
+        batch,
+        env_slice=env_slice,
+        obs_rows=group_obs[gi],
+        actions=actions,
+        values=values,
+        log_probs=log_probs,
+        agent=agent,
+        episode_metrics=episode_metrics,
+        policy_steps=policy_steps,
+        total_env_steps=total_env_steps,
+        episodes_finished=episodes_finished,
       )
-      policy_steps += 1
-      obs_list[env_id] = batch.observations[env_id]
-      last_obs = obs_list[env_id]
-
-      if policy_steps >= rollout_steps:
-        break
-
-      if done:
-        episode_metrics.on_episode_end(
-          episode_step=episode_steps[env_id],
-          terminated=terminated,
-          truncated=truncated,
-          step_info=step_info,
-          env_step=total_env_steps,
-        )
-        episodes_finished += 1
-        obs_list[env_id] = vec_env.reset_env(
-          env_id,
-          episode_index=next_episode_index,
-        )
-        next_episode_index += 1
-        episode_steps[env_id] = 0
-        last_obs = obs_list[env_id]
+      group_obs[gi] = batch.observations
+      if more:
+        dispatch(gi)
 
   return (
-    obs_list,
-    episode_steps,
-    next_episode_index,
+    np.concatenate(group_obs, axis=0),
     total_env_steps,
     episodes_finished,
-    last_obs,
     sum_ipc_s,
     sum_act_batch_s,
+    sum_overlap_s,
   )
 
 
@@ -341,9 +439,15 @@ def run_ppo_train(bindings: PpoTrainBindings) -> TrainRunResult:
     wandb_logging.log_checkpoint_run_dir(checkpoint_run_dir)
     if bindings.on_checkpoint_run_dir is not None:
       bindings.on_checkpoint_run_dir(checkpoint_run_dir)
+  # 保存はバックグラウンドで書き、最後の final 保存後に close で書き終わりを待つ
+  checkpoint_writer = checkpoint.CheckpointWriter(
+    file_format=str(cfg.checkpoint.file_format),
+    async_save=bool(cfg.checkpoint.async_save),
+    retention=RetentionPolicy.from_cfg(cfg.checkpoint),
+  )
 
-  episode_metrics = wandb_logging.episode_collector()
   num_envs = int(cfg.runtime.num_envs)
+  episode_metrics = wandb_logging.episode_collector(num_envs)
   use_subproc = num_envs > 1
   wall_sleep_sec = _effective_step_wall_sleep_sec(cfg)
 
@@ -351,6 +455,7 @@ def run_ppo_train(bindings: PpoTrainBindings) -> TrainRunResult:
   vec_env: SubprocVecEnvBiped | None = None
   tel: HubTelemetrySocketIoServer | None = None
   visualize_steps = False
+  use_pipeline = False
 
   if use_subproc:
     if bool(cfg.training.warmup_enabled):
@@ -370,7 +475,19 @@ def run_ppo_train(bindings: PpoTrainBindings) -> TrainRunResult:
       training_seed=bindings.training_seed_resolved,
       step_wall_sleep_sec=wall_sleep_sec,
       hydra_config_path=subproc_hydra_path,
+      transport=str(cfg.runtime.vec_env_transport),
+      envs_per_worker=int(cfg.runtime.envs_per_worker),
+      max_episode_steps=int(cfg.training.max_steps_per_episode),
+      obs_dim=int(cfg.sim.obs_dim),
+      action_dim=int(cfg.sim.action_dim),
     )
+    use_pipeline = bool(cfg.runtime.vec_env_pipeline)
+    if use_pipeline and vec_env.num_workers < 2:
+      print(
+        "[subproc-vec] pipeline disabled: needs >= 2 workers "
+        f"(num_workers={vec_env.num_workers})"
+      )
+      use_pipeline = False
   else:
     env = bindings.env_factory(bool(cfg.runtime.viewer))
     env.set_step_wall_sleep_sec(wall_sleep_sec)
@@ -394,21 +511,18 @@ def run_ppo_train(bindings: PpoTrainBindings) -> TrainRunResult:
   start_update = int(payload["update"]) if payload is not None else 0
   total_env_steps = int(payload.get("total_env_steps", 0)) if payload is not None else 0
   episode_index = int(payload.get("episodes_finished", 0)) if payload is not None else 0
+  start_episode_index = episode_index
   end_update = start_update + int(cfg.training.num_updates)
 
-  obs_list: list[tuple[float, ...]] = []
-  episode_steps: list[int] = []
-  next_episode_index = episode_index
+  obs_batch: np.ndarray | None = None
   obs_vec: tuple[float, ...] = ()
   obs = None
   episode_step = 0
 
   if use_subproc:
     assert vec_env is not None
-    obs_list = vec_env.reset_all(start_episode_index=episode_index)
-    next_episode_index = episode_index + num_envs
-    episode_steps = [0] * num_envs
-    obs_vec = obs_list[0]
+    obs_batch = vec_env.reset_all(start_episode_index=episode_index)
+    obs_vec = tuple(obs_batch[0])
   else:
     assert env is not None
     obs = env.reset(episode_index=episode_index)
@@ -444,35 +558,53 @@ def run_ppo_train(bindings: PpoTrainBindings) -> TrainRunResult:
   updates_done_this_run = 0
   throughput = ThroughputTracker(rollout_steps_per_update=int(cfg.ppo.rollout_steps))
   final_checkpoint_path: Path | None = None
+  training_failed = False
   try:
     for u in range(start_update, end_update):
       t_rollout_start = time.perf_counter()
       ipc_s = 0.0
       act_batch_s = 0.0
+      overlap_s = 0.0
 
-      if use_subproc:
+      if use_subproc and use_pipeline:
+        assert vec_env is not None
+        assert obs_batch is not None
+        (
+          obs_batch,
+          total_env_steps,
+          episode_index,
+          ipc_s,
+          act_batch_s,
+          overlap_s,
+        ) = _collect_rollout_subproc_pipelined(
+          vec_env=vec_env,
+          agent=agent,
+          cfg=cfg,
+          obs_batch=obs_batch,
+          episode_metrics=episode_metrics,
+          total_env_steps=total_env_steps,
+          episodes_finished=episode_index,
+        )
+        obs = obs_batch
+      elif use_subproc:
         assert vec_env is not None
+        assert obs_batch is not None
         (
-          obs_list,
-          episode_steps,
-          next_episode_index,
+          obs_batch,
           total_env_steps,
           episode_index,
-          last_obs,
           ipc_s,
           act_batch_s,
         ) = _collect_rollout_subproc(
           vec_env=vec_env,
           agent=agent,
           cfg=cfg,
-          obs_list=obs_list,
-          episode_steps=episode_steps,
-          next_episode_index=next_episode_index,
+          obs_batch=obs_batch,
           episode_metrics=episode_metrics,
           total_env_steps=total_env_steps,
           episodes_finished=episode_index,
         )
-        obs = last_obs
+        obs = obs_batch
       else:
         policy_steps = 0
         rollout_steps = int(cfg.ppo.rollout_steps)
@@ -561,6 +693,7 @@ def run_ppo_train(bindings: PpoTrainBindings) -> TrainRunResult:
         ipc_s=ipc_s,
         act_batch_s=act_batch_s,
         num_envs=num_envs,
+        overlap_s=overlap_s,
       )
       throughput.record(timing)
 
@@ -573,7 +706,7 @@ def run_ppo_train(bindings: PpoTrainBindings) -> TrainRunResult:
         and int(cfg.checkpoint.checkpoint_every) > 0
         and last_update % int(cfg.checkpoint.checkpoint_every) == 0
       ):
-        paths = checkpoint.save_agent_checkpoint(
+        paths = checkpoint_writer.save(
           agent,
           run_dir=checkpoint_run_dir,
           update=last_update,
@@ -581,6 +714,7 @@ def run_ppo_train(bindings: PpoTrainBindings) -> TrainRunResult:
           episodes_finished=episode_index,
           numbered=True,
           latest=bool(cfg.checkpoint.save_latest),
+          metrics=_checkpoint_metrics(episode_metrics),
         )
         print(f"[checkpoint] saved update {last_update} -> {paths[0]}")
 
@@ -603,30 +737,66 @@ def run_ppo_train(bindings: PpoTrainBindings) -> TrainRunResult:
           total_updates=end_update,
           timing_metrics=throughput.wandb_metrics(timing),
         )
+  except BaseException:
+    training_failed = True
+    raise
   finally:
-    if updates_done_this_run > 0:
-      print(throughput.format_run_summary())
-    if (
-      checkpoint_run_dir is not None
-      and bool(cfg.checkpoint.save_final)
-      and updates_done_this_run > 0
-    ):
-      paths = checkpoint.save_agent_checkpoint(
-        agent,
-        run_dir=checkpoint_run_dir,
-        update=last_update,
-        total_env_steps=total_env_steps,
-        episodes_finished=episode_index,
-        numbered=False,
-        latest=False,
-        final=True,
-      )
-      final_checkpoint_path = paths[0]
-      print(f"[checkpoint] saved final -> {final_checkpoint_path}")
-    if tel is not None:
-      tel.stop()
-    if vec_env is not None:
-      vec_env.close()
+    # final 保存や close が失敗しても env / telemetry の後始末は必ず行い、
+    # 学習中の例外があればそちらを伝える（保存の失敗はログに残すだけにする）
+    checkpoint_error: BaseException | None = None
+    try:
+      if updates_done_this_run > 0:
+        print(throughput.format_run_summary())
+      try:
+        if (
+          checkpoint_run_dir is not None
+          and bool(cfg.checkpoint.save_final)
+          and updates_done_this_run > 0
+        ):
+          paths = checkpoint_writer.save(
+            agent,
+            run_dir=checkpoint_run_dir,
+            update=last_update,
+            total_env_steps=total_env_steps,
+            episodes_finished=episode_index,
+            numbered=False,
+            latest=False,
+            final=True,
+            metrics=_checkpoint_metrics(episode_metrics),
+          )
+          final_checkpoint_path = paths[0]
+      finally:
+        checkpoint_writer.close()
+      if final_checkpoint_path is not None:
+        print(f"[checkpoint] saved final -> {final_checkpoint_path}")
+      if (
+        checkpoint_run_dir is not None
+        and bool(bindings.training_dr_enabled)
+        and bindings.training_seed_resolved is not None
+        and updates_done_this_run > 0
+      ):
+        # DR パラメータは seed から再生成できるので、実行後にまとめて書く。
+        # vec env は env ごとに実行中のエピソードに加えて次のエピソード番号も割り当て済みで
+        # （初期 state の先読み用）、番号は episode_index より最大 2 * num_envs 先まで進んでいる
+        dr_log = write_dr_episode_log(
+          checkpoint_run_dir / f"dr_episodes_{start_episode_index:08d}.npz",
+          bindings.ctx,
+          training_seed=int(bindings.training_seed_resolved),
+          start=start_episode_index,
+          stop=episode_index + 2 * num_envs,
+        )
+        print(f"[dr] episode parameter log -> {dr_log}")
+    except Exception as exc:
+      if not training_failed:
+        checkpoint_error = exc
+      print(f"[checkpoint] finalize failed: {exc!r}")
+    finally:
+      if tel is not None:
+        tel.stop()
+      if vec_env is not None:
+        vec_env.close()
+    if checkpoint_error is not None:
+      raise checkpoint_error
 
   return TrainRunResult(
     checkpoint_run_dir=checkpoint_run_dir,
@@ -0,0 +1,129 @@
+"""eval 試行結果のキャッシュ（チェックポイント内容・評価仕様・環境設定で引く）。
+
+1 エントリ = (ckpt ファイルの sha256, ``EVAL_SPEC_ID``, 環境設定ハッシュ) の組。
+エントリには (eval_seed, ep_index) ごとの ``EpisodeEvalRecord`` を貯める。
+試行の結果は (seed, ep) と上の 3 つで決まるので、seed や ep 数を増やした評価では
+足りない試行だけを回せばよい（``trial_index`` は読み出し時に計画から付け直す）。
+
+保存先は既定で ``mujoco_rl_sim/runs/_eval_cache/<EXP_NAME>/<key>.json``
+（run ディレクトリの外。``eval_compare`` の走査対象にならない）。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, replace
+from pathlib import Path
+from typing import Any, Sequence
+
+from conf.schema import AppConfig
+from eval.metrics import EpisodeEvalRecord, episode_from_dict, episode_to_dict
+from eval.spec import EVAL_SPEC_ID, EvalTrialPlan
+from package_meta import EXP_NAME, MUJOCO_RL_SIM_ROOT
+
+DEFAULT_EVAL_CACHE_DIR = MUJOCO_RL_SIM_ROOT / "runs" / "_eval_cache" / EXP_NAME
+
+# 試行記録の意味（指標の定義など）を変えたら上げる。キーに入るので古いエントリは使われない
+_CACHE_SCHEMA_VERSION = 1
+_HASH_CHUNK_BYTES = 1 << 20
+
+
+def _canonical_json(obj: Any) -> str:
+  return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def file_sha256(path: Path) -> str:
+  """ファイル内容の sha256（hex）。"""
+  digest = hashlib.sha256()
+  with path.open("rb") as fh:
+    while chunk := fh.read(_HASH_CHUNK_BYTES):
+      digest.update(chunk)
+  return digest.hexdigest()
+
+
+def env_config_hash(cfg: AppConfig) -> str:
+  """eval の結果に効く環境設定（モデル XML・sim・報酬・終了・エピソード長など）のハッシュ。
+
+  wandb・チェックポイント保存先・並列数など、結果を変えない設定は含めない。
+  """
+  payload = {
+    "model_xml_sha256": file_sha256(Path(cfg.xml_path)),
+    "sim": asdict(cfg.sim),
+    "reward": asdict(cfg.reward),
+    "termination": asdict(cfg.termination),
+    "warmup_enabled": bool(cfg.training.warmup_enabled),
+    "warmup_duration_s": float(cfg.training.warmup_duration_s),
+    "max_steps_per_episode": int(cfg.training.max_steps_per_episode),
+    "physics_rollout": bool(cfg.runtime.physics_rollout),
+  }
+  return hashlib.sha256(_canonical_json(payload).encode("utf-8")).hexdigest()
+
+
+def eval_cache_key(*, checkpoint_sha256: str, env_sha256: str, eval_spec_id: str = EVAL_SPEC_ID) -> str:
+  payload = {
+    "schema_version": _CACHE_SCHEMA_VERSION,
+    "checkpoint_sha256": checkpoint_sha256,
+    "eval_spec_id": eval_spec_id,
+    "env_config_sha256": env_sha256,
+  }
+  return hashlib.sha256(_canonical_json(payload).encode("utf-8")).hexdigest()
+
+
+def _trial_key(eval_seed: int, ep_index: int) -> str:
+  return f"{int(eval_seed)}:{int(ep_index)}"
+
+
+class EvalCache:
+  """キー 1 つにつき JSON 1 ファイル。書き込みは一時ファイル経由で置き換える。"""
+
+  def __init__(self, root: Path = DEFAULT_EVAL_CACHE_DIR):
+    self.root = Path(root)
+
+  def _path(self, key: str) -> Path:
+    return self.root / f"{key}.json"
+
+  def _load_trials(self, key: str) -> dict[str, dict[str, Any]]:
+    path = self._path(key)
+    if not path.is_file():
+      return {}
+    try:
+      data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as exc:
+      print(f"[eval-cache] warning: ignoring unreadable cache entry {path}: {exc}")
+      return {}
+    trials = data.get("trials") if isinstance(data, dict) else None
+    return trials if isinstance(trials, dict) else {}
+
+  def lookup(
+    self,
+    key: str,
+    plans: Sequence[EvalTrialPlan],
+  ) -> tuple[list[EpisodeEvalRecord], list[EvalTrialPlan]]:
+    """(キャッシュにあった記録, 未評価の試行計画) を返す。記録の ``trial_index`` は計画のもの。"""
+    trials = self._load_trials(key)
+    hits: list[EpisodeEvalRecord] = []
+    missing: list[EvalTrialPlan] = []
+    for plan in plans:
+      cached = trials.get(_trial_key(plan.eval_seed, plan.ep_index))
+      if cached is None:
+        missing.append(plan)
+      else:
+        hits.append(replace(episode_from_dict(cached), trial_index=plan.trial_index))
+    return hits, missing
+
+  def store(self, key: str, records: Sequence[EpisodeEvalRecord], *, meta: dict[str, Any]) -> Path:
+    """``records`` を既存エントリに追記し、エントリのパスを返す。"""
+    trials = self._load_trials(key)
+    for record in records:
+      trials[_trial_key(record.eval_seed, record.ep_index)] = episode_to_dict(record)
+    path = self._path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".tmp{os.getpid()}")
+    tmp.write_text(
+      json.dumps({**meta, "trials": trials}, ensure_ascii=False, sort_keys=True),
+      encoding="utf-8",
+    )
+    os.replace(tmp, path)
+    return path
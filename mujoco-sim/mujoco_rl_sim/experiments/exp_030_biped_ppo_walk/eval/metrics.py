@@ -159,3 +159,23 @@ def episode_to_dict(record: EpisodeEvalRecord) -> dict[str, Any]:
     "episode_return": record.episode_return,
     "noise_applied": record.noise_applied,
   }
+
+
+def episode_from_dict(data: dict[str, Any]) -> EpisodeEvalRecord:
+  """``episode_to_dict`` の逆（eval キャッシュ・eval_report.json の読み戻し用）。"""
+  return EpisodeEvalRecord(
+    trial_index=int(data["trial_index"]),
+    eval_seed=int(data["eval_seed"]),
+    ep_index=int(data["ep_index"]),
+    displacement_x=float(data["displacement_x"]),
+    origin_imu_x=float(data["origin_imu_x"]),
+    final_imu_x=float(data["final_imu_x"]),
+    episode_length=int(data["episode_length"]),
+    truncated=bool(data["truncated"]),
+    termination_reason=str(data["termination_reason"]),
+    alternating_landing_rate=float(data["alternating_landing_rate"]),
+    single_support_ratio=float(data["single_support_ratio"]),
+    double_support_ratio=float(data["double_support_ratio"]),
+    episode_return=float(data["episode_return"]),
+    noise_applied=dict(data["noise_applied"]),
+  )
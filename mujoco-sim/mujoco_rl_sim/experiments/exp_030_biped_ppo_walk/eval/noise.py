@@ -1,10 +1,13 @@
 """Eval 用初期姿勢ノイズ（stand keyframe 適用後に加算）。
 
-eval は ``reset_eval`` から呼ぶ。学習 DR の姿勢項は同関数を ``scale`` 付きで再利用する。
+eval は ``reset_eval`` から ``apply_initial_pose_noise`` を呼ぶ。学習 DR の姿勢項は
+同じレンジ（× ``scale``）でまとめてサンプルした値を ``apply_pose_noise`` で書き込む。
 """
 
 from __future__ import annotations
 
+from dataclasses import dataclass
+
 import mujoco
 import numpy as np
 
@@ -13,6 +16,7 @@ from eval.spec import (
   JOINT_NOISE_RAD,
   ROOT_ANG_VEL_NOISE_RAD_S,
   ROOT_LIN_VEL_NOISE_M_S,
+  ROOT_XY_NOISE_M,
   ROOT_YAW_NOISE_RAD,
 )
 from lib.actuators import JOINT_NAMES
@@ -48,6 +52,54 @@ def _quat_from_yaw(yaw_rad: float) -> np.ndarray:
   return np.array([np.cos(half), 0.0, 0.0, np.sin(half)], dtype=np.float64)
 
 
+@dataclass(frozen=True)
+class PoseNoiseAddresses:
+  """初期姿勢ノイズの書き込み先（model ごとに 1 回解決する）。"""
+
+  root_qpos_adr: int
+  root_qvel_adr: int
+  joint_qpos_adr: np.ndarray
+  joint_range: np.ndarray
+
+
+def pose_noise_addresses(model: mujoco.MjModel) -> PoseNoiseAddresses:
+  root_jnt_id = mujoco.mj_name2id(model, mujoco.mjtObj.mjOBJ_JOINT, _ROOT_JOINT_NAME)
+  if root_jnt_id < 0:
+    raise ValueError(f"joint not found: {_ROOT_JOINT_NAME!r}")
+  joint_ids = [mujoco.mj_name2id(model, mujoco.mjtObj.mjOBJ_JOINT, name) for name in JOINT_NAMES]
+  return PoseNoiseAddresses(
+    root_qpos_adr=int(model.jnt_qposadr[root_jnt_id]),
+    root_qvel_adr=int(model.jnt_dofadr[root_jnt_id]),
+    joint_qpos_adr=np.asarray(model.jnt_qposadr[joint_ids], dtype=np.intp),
+    joint_range=np.array(model.jnt_range[joint_ids], dtype=np.float64),
+  )
+
+
+def apply_pose_noise(
+  model: mujoco.MjModel,
+  data: mujoco.MjData,
+  adr: PoseNoiseAddresses,
+  *,
+  yaw_rad: float,
+  joint_delta_rad: np.ndarray,
+  root_lin_vel: np.ndarray,
+  root_ang_vel: np.ndarray,
+  root_xy: np.ndarray | None = None,
+) -> None:
+  """サンプル済みの初期姿勢ノイズを stand 適用済み state に書き込み、``mj_forward`` する。"""
+  q0 = adr.root_qpos_adr
+  quat = data.qpos[q0 + 3 : q0 + 7].copy()
+  data.qpos[q0 + 3 : q0 + 7] = _quat_normalize(_quat_mul(_quat_from_yaw(yaw_rad), quat))
+  if root_xy is not None:
+    data.qpos[q0 : q0 + 2] += root_xy
+  joints = adr.joint_qpos_adr
+  data.qpos[joints] = np.clip(data.qpos[joints] + joint_delta_rad, adr.joint_range[:, 0], adr.joint_range[:, 1])
+  v0 = adr.root_qvel_adr
+  data.qvel[v0 : v0 + 3] += root_lin_vel
+  data.qvel[v0 + 3 : v0 + 6] += root_ang_vel
+  mujoco.mj_forward(model, data)
+
+
 def apply_initial_pose_noise(
   model: mujoco.MjModel,
   data: mujoco.MjData,
@@ -58,45 +110,26 @@ def apply_initial_pose_noise(
   """stand 適用済み state に初期ノイズを加える。適用値のサマリを返す。
 
   Args:
-    scale: ノイズレンジ全体の倍率（学習 DR は ``TRAINING_DR_POSE_SCALE``、eval は 1.0）。
+    scale: ノイズレンジ全体の倍率（eval は 1.0）。学習 DR は
+      ``sim/domain_randomization.py`` が同じレンジでまとめてサンプルし ``apply_pose_noise`` する。
   """
   scale = float(scale)
-  root_jnt_id = mujoco.mj_name2id(model, mujoco.mjtObj.mjOBJ_JOINT, _ROOT_JOINT_NAME)
-  if root_jnt_id < 0:
-    raise ValueError(f"joint not found: {_ROOT_JOINT_NAME!r}")
-
-  root_qpos_adr = int(model.jnt_qposadr[root_jnt_id])
-  root_qvel_adr = int(model.jnt_dofadr[root_jnt_id])
-
   applied: dict[str, float | list[float]] = {}
 
-  # --- ルートヨー（クォータニオン左乗算）---
+  # RNG の消費順: ヨー → (X/Y) → 関節 12 → 並進速度 3 → 角速度 3
   yaw = float(
     rng.uniform(-ROOT_YAW_NOISE_RAD * scale, ROOT_YAW_NOISE_RAD * scale)
   )
-  quat = data.qpos[root_qpos_adr + 3 : root_qpos_adr + 7].copy()
-  quat_new = _quat_normalize(_quat_mul(_quat_from_yaw(yaw), quat))
-  data.qpos[root_qpos_adr + 3 : root_qpos_adr + 7] = quat_new
   applied["root_yaw_noise_deg"] = float(np.degrees(yaw))
 
   # --- ルート X/Y 位置（v0 では無効）---
+  root_xy = None
   if APPLY_ROOT_XY_POSITION_NOISE:
-    dx = float(rng.uniform(-0.02, 0.02))
-    dy = float(rng.uniform(-0.02, 0.02))
-    data.qpos[root_qpos_adr] += dx
-    data.qpos[root_qpos_adr + 1] += dy
-    applied["root_xy_noise_m"] = [dx, dy]
-
-  # --- 関節角（12 DOF）---
-  joint_noise_deg: list[float] = []
-  for joint_name in JOINT_NAMES:
-    jnt_id = mujoco.mj_name2id(model, mujoco.mjtObj.mjOBJ_JOINT, joint_name)
-    qpos_adr = int(model.jnt_qposadr[jnt_id])
-    delta = float(rng.uniform(-JOINT_NOISE_RAD * scale, JOINT_NOISE_RAD * scale))
-    lo, hi = model.jnt_range[jnt_id]
-    data.qpos[qpos_adr] = float(np.clip(data.qpos[qpos_adr] + delta, lo, hi))
-    joint_noise_deg.append(float(np.degrees(delta)))
-  applied["joint_noise_deg"] = joint_noise_deg
+    root_xy = rng.uniform(-ROOT_XY_NOISE_M, ROOT_XY_NOISE_M, size=2)
+    applied["root_xy_noise_m"] = [float(v) for v in root_xy]
+
+  joint_delta = rng.uniform(-JOINT_NOISE_RAD * scale, JOINT_NOISE_RAD * scale, size=len(JOINT_NAMES))
+  applied["joint_noise_deg"] = [float(v) for v in np.degrees(joint_delta)]
 
   # --- ルート初速度（freejoint 6 DOF）---
   lin_noise = rng.uniform(
@@ -109,10 +142,17 @@ def apply_initial_pose_noise(
     ROOT_ANG_VEL_NOISE_RAD_S * scale,
     size=3,
   )
-  data.qvel[root_qvel_adr : root_qvel_adr + 3] += lin_noise
-  data.qvel[root_qvel_adr + 3 : root_qvel_adr + 6] += ang_noise
   applied["root_lin_vel_noise_m_s"] = [float(v) for v in lin_noise]
   applied["root_ang_vel_noise_rad_s"] = [float(v) for v in ang_noise]
 
-  mujoco.mj_forward(model, data)
+  apply_pose_noise(
+    model,
+    data,
+    pose_noise_addresses(model),
+    yaw_rad=yaw,
+    joint_delta_rad=joint_delta,
+    root_lin_vel=lin_noise,
+    root_ang_vel=ang_noise,
+    root_xy=root_xy,
+  )
   return applied
@@ -8,6 +8,7 @@ from typing import Any
 from eval.report import build_eval_report, write_eval_report
 from eval.runner import run_checkpoint_eval
 from eval.spec import EPISODES_PER_SEED, EVAL_SEEDS, PRIMARY_METRIC_NAME
+from rl.checkpoint_retention import manifest_checkpoint_paths, record_eval_metrics
 
 
 def run_post_train_eval(
@@ -15,11 +16,16 @@ def run_post_train_eval(
   *,
   device: str = "cpu",
   out_path: Path | None = None,
+  num_workers: int | None = None,
+  envs_per_worker: int | None = None,
+  use_cache: bool | None = None,
 ) -> tuple[Path, dict[str, Any]]:
   """``final.pt`` 等に対して eval を実行し ``eval_report.json`` を書き出す。
 
   Args:
     out_path: 省略時は ``<checkpoint 親>/eval_report.json``。
+    num_workers / envs_per_worker / use_cache: 並列 eval・結果キャッシュの設定
+      （省略時は ckpt run の ``cfg.eval``）。
 
   Returns:
     (書き出した ``eval_report.json`` のパス, report dict)
@@ -35,9 +41,17 @@ def run_post_train_eval(
     f"= {len(EVAL_SEEDS) * EPISODES_PER_SEED}"
   )
 
-  records = run_checkpoint_eval(ckpt, device=device)
+  records = run_checkpoint_eval(
+    ckpt,
+    device=device,
+    num_workers=num_workers,
+    envs_per_worker=envs_per_worker,
+    use_cache=use_cache,
+  )
   report = build_eval_report(checkpoint_path=ckpt, records=records)
   write_eval_report(out_path, report)
+  # keep_best_metric に eval の主指標を使う保持ポリシー用（マニフェストがある run のみ）
+  record_eval_metrics(ckpt, {PRIMARY_METRIC_NAME: float(report["primary_metric_value"])})
 
   disp = report["summary"]["metrics"]["displacement_x"]
   print(f"[eval] wrote: {out_path}")
@@ -50,3 +64,43 @@ def run_post_train_eval(
     f"[eval] truncated_rate={report['summary']['metrics']['truncated_rate']:.3f}"
   )
   return out_path, report
+
+
+def run_dir_checkpoint_eval(
+  run_dir: Path,
+  *,
+  device: str = "cpu",
+  num_workers: int | None = None,
+  envs_per_worker: int | None = None,
+  use_cache: bool | None = None,
+) -> list[tuple[Path, Path, dict[str, Any]]]:
+  """run ディレクトリの全チェックポイントを評価する（キャッシュ済みの試行は回さない）。
+
+  対象はマニフェスト（``checkpoints.json``）に載っている .pt。マニフェストの無い run は ``*.pt``。
+
+  ``final.pt`` の report は従来どおり ``<run>/eval_report.json``、それ以外は
+  ``<run>/eval_reports/<ckpt 名>.json`` に書く。
+
+  Returns:
+    (checkpoint, 書き出した report のパス, report dict) のリスト（ckpt 名順）
+  """
+  run_dir = run_dir.resolve()
+  checkpoints = manifest_checkpoint_paths(run_dir)
+  if checkpoints is None:
+    checkpoints = sorted(run_dir.glob("*.pt"))
+  if not checkpoints:
+    raise FileNotFoundError(f"run dir eval: no *.pt in {run_dir}")
+
+  results: list[tuple[Path, Path, dict[str, Any]]] = []
+  for ckpt in checkpoints:
+    out_path = None if ckpt.name == "final.pt" else run_dir / "eval_reports" / f"{ckpt.stem}.json"
+    out, report = run_post_train_eval(
+      ckpt,
+      device=device,
+      out_path=out_path,
+      num_workers=num_workers,
+      envs_per_worker=envs_per_worker,
+      use_cache=use_cache,
+    )
+    results.append((ckpt, out, report))
+  return results
@@ -1,17 +1,33 @@
-"""チェックポイント評価の rollout 実行。"""
+"""チェックポイント評価の rollout 実行。
+
+``cfg.eval.num_workers > 0`` では試行をプロセスプールへ分配する。worker は起動時に
+ckpt から方策を 1 回読み込み（以後読み取り専用）、``envs_per_worker`` 個の env で
+試行を同時に進めて行動をまとめて推論する（``AgentPPO.act_eval_batch``）。
+試行ごとの RNG・行動は直列実行と同じなので、記録の順序・値は変わらない。
+"""
 
 from __future__ import annotations
 
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Sequence
+
+import numpy as np
+import torch
 
+from eval.cache import DEFAULT_EVAL_CACHE_DIR, EvalCache, env_config_hash, eval_cache_key, file_sha256
 from eval.metrics import EpisodeEvalRecord
 from eval.spec import (
   EPISODES_PER_SEED,
   EVAL_SEEDS,
+  EVAL_SPEC_ID,
+  EvalTrialPlan,
   make_episode_rng,
   iter_eval_trials,
 )
+from lib.experiment_context import ExperimentContext
 from lib.load_run_context import build_eval_context, ctx_from_checkpoint
 from rl.agent import AgentPPO
 from sim.env import EnvBipedPPO
@@ -34,46 +50,49 @@ def _episode_stop_state(
   return False, "", False
 
 
-def run_eval_episode(
-  env: EnvBipedPPO,
-  act_eval: Callable,
-  *,
-  eval_seed: int,
-  ep_index: int,
-  trial_index: int,
-  max_steps_per_episode: int,
-) -> EpisodeEvalRecord:
-  """1 試行分の eval rollout。"""
-  rng = make_episode_rng(eval_seed, ep_index)
-  obs, origin_imu_x, noise_applied = env.reset_eval(rng)
+class _EpisodeAccumulator:
+  """1 試行分の step 結果を積算し ``EpisodeEvalRecord`` にする（直列・並列 eval で共有）。"""
 
-  ep_return = 0.0
-  policy_steps = 0
-  single_support_steps = 0
-  double_support_steps = 0
-  alternating_landings = 0
-  landing_events = 0
-  final_imu_x = origin_imu_x
-  termination_reason = REASON_TRUNCATED
-  truncated = False
-  episode_length = 0
+  def __init__(self, *, eval_seed: int, ep_index: int, trial_index: int, origin_imu_x: float, noise_applied: dict):
+    self.eval_seed = int(eval_seed)
+    self.ep_index = int(ep_index)
+    self.trial_index = int(trial_index)
+    self.origin_imu_x = float(origin_imu_x)
+    self.noise_applied = noise_applied
+    self.ep_return = 0.0
+    self.policy_steps = 0
+    self.single_support_steps = 0
+    self.double_support_steps = 0
+    self.alternating_landings = 0
+    self.landing_events = 0
+    self.final_imu_x = self.origin_imu_x
+    self.termination_reason = REASON_TRUNCATED
+    self.truncated = False
+    self.episode_length = 0
 
-  for step in range(int(max_steps_per_episode)):
-    action = act_eval(obs)
-    obs, reward, terminated, step_info = env.step(action, episode_step=step)
-    ep_return += float(reward)
-    policy_steps += 1
-    episode_length = step + 1
-    final_imu_x = float(step_info.get("imu_x", final_imu_x))
+  def on_step(
+    self,
+    *,
+    step: int,
+    reward: float,
+    terminated: bool,
+    step_info: dict,
+    max_steps_per_episode: int,
+  ) -> bool:
+    """1 制御ステップ分を積算し、エピソードを終了すべきなら True。"""
+    self.ep_return += float(reward)
+    self.policy_steps += 1
+    self.episode_length = step + 1
+    self.final_imu_x = float(step_info.get("imu_x", self.final_imu_x))
 
     if float(step_info.get("single_support", 0.0)) > 0.5:
-      single_support_steps += 1
+      self.single_support_steps += 1
     if float(step_info.get("both_feet_on_floor", 0.0)) > 0.5:
-      double_support_steps += 1
+      self.double_support_steps += 1
     if float(step_info.get("landed", 0.0)) > 0.5:
-      landing_events += 1
+      self.landing_events += 1
     if float(step_info.get("alternating_landing", 0.0)) > 0.5:
-      alternating_landings += 1
+      self.alternating_landings += 1
 
     should_stop, stop_reason, stop_truncated = _episode_stop_state(
       terminated=bool(terminated),
@@ -82,66 +101,293 @@ def run_eval_episode(
       max_steps_per_episode=max_steps_per_episode,
     )
     if should_stop:
-      termination_reason = stop_reason
-      truncated = stop_truncated
-      break
+      self.termination_reason = stop_reason
+      self.truncated = stop_truncated
+    return should_stop
+
+  def record(self) -> EpisodeEvalRecord:
+    denom_policy = max(self.policy_steps, 1)
+    denom_landings = max(self.landing_events, 1)
 
-  denom_policy = max(policy_steps, 1)
-  denom_landings = max(landing_events, 1)
-
-  return EpisodeEvalRecord(
-    trial_index=int(trial_index),
-    eval_seed=int(eval_seed),
-    ep_index=int(ep_index),
-    displacement_x=float(final_imu_x - origin_imu_x),
-    origin_imu_x=float(origin_imu_x),
-    final_imu_x=float(final_imu_x),
-    episode_length=int(episode_length),
-    truncated=bool(truncated),
-    termination_reason=str(termination_reason),
-    alternating_landing_rate=float(alternating_landings / denom_landings),
-    single_support_ratio=float(single_support_steps / denom_policy),
-    double_support_ratio=float(double_support_steps / denom_policy),
-    episode_return=float(ep_return),
+    return EpisodeEvalRecord(
+      trial_index=self.trial_index,
+      eval_seed=self.eval_seed,
+      ep_index=self.ep_index,
+      displacement_x=float(self.final_imu_x - self.origin_imu_x),
+      origin_imu_x=self.origin_imu_x,
+      final_imu_x=float(self.final_imu_x),
+      episode_length=int(self.episode_length),
+      truncated=bool(self.truncated),
+      termination_reason=str(self.termination_reason),
+      alternating_landing_rate=float(self.alternating_landings / denom_landings),
+      single_support_ratio=float(self.single_support_steps / denom_policy),
+      double_support_ratio=float(self.double_support_steps / denom_policy),
+      episode_return=float(self.ep_return),
+      noise_applied=self.noise_applied,
+    )
+
+
+def _start_episode(env: EnvBipedPPO, plan: EvalTrialPlan) -> tuple[np.ndarray, _EpisodeAccumulator]:
+  rng = make_episode_rng(plan.eval_seed, plan.ep_index)
+  obs, origin_imu_x, noise_applied = env.reset_eval(rng)
+  return obs, _EpisodeAccumulator(
+    eval_seed=plan.eval_seed,
+    ep_index=plan.ep_index,
+    trial_index=plan.trial_index,
+    origin_imu_x=origin_imu_x,
     noise_applied=noise_applied,
   )
 
 
-def run_checkpoint_eval(
-  checkpoint_path: Path,
+def run_eval_episode(
+  env: EnvBipedPPO,
+  act_eval: Callable,
   *,
-  device: str = "cpu",
-  eval_seeds: tuple[int, ...] = EVAL_SEEDS,
-  episodes_per_seed: int = EPISODES_PER_SEED,
+  eval_seed: int,
+  ep_index: int,
+  trial_index: int,
+  max_steps_per_episode: int,
+) -> EpisodeEvalRecord:
+  """1 試行分の eval rollout。"""
+  plan = EvalTrialPlan(eval_seed=int(eval_seed), ep_index=int(ep_index), trial_index=int(trial_index))
+  obs, episode = _start_episode(env, plan)
+  for step in range(int(max_steps_per_episode)):
+    action = act_eval(obs)
+    obs, reward, terminated, step_info = env.step(action, episode_step=step)
+    if episode.on_step(
+      step=step,
+      reward=reward,
+      terminated=terminated,
+      step_info=step_info,
+      max_steps_per_episode=max_steps_per_episode,
+    ):
+      break
+  return episode.record()
+
+
+def run_eval_trials_lockstep(
+  envs: Sequence[EnvBipedPPO],
+  act_eval_batch: Callable[[np.ndarray], np.ndarray],
+  plans: Sequence[EvalTrialPlan],
+  *,
+  max_steps_per_episode: int,
 ) -> list[EpisodeEvalRecord]:
-  """全 eval 試行を実行して per-episode 記録を返す。"""
+  """``plans`` を ``envs`` に割り振って同時に進め、行動は進行中の試行分をまとめて推論する。
+
+  終わった env は次の未着手試行を reset して続ける。各試行は ``run_eval_episode`` と
+  同じ手順（同じ RNG・同じ行動）で進むので、記録は直列実行と一致する（``trial_index`` 順で返す）。
+  """
+  pending = list(plans)[::-1]
+  active: dict[int, tuple[int, _EpisodeAccumulator]] = {}
+  obs_rows: list[np.ndarray | None] = [None] * len(envs)
+  records: list[EpisodeEvalRecord] = []
+
+  def start(slot: int) -> None:
+    obs, episode = _start_episode(envs[slot], pending.pop())
+    obs_rows[slot] = obs
+    active[slot] = (0, episode)
+
+  for slot in range(min(len(envs), len(pending))):
+    start(slot)
+  while active:
+    slots = sorted(active)
+    actions = act_eval_batch(np.stack([obs_rows[slot] for slot in slots]))
+    for slot, action in zip(slots, actions, strict=True):
+      step, episode = active[slot]
+      obs, reward, terminated, step_info = envs[slot].step(action, episode_step=step)
+      obs_rows[slot] = obs
+      if episode.on_step(
+        step=step,
+        reward=reward,
+        terminated=terminated,
+        step_info=step_info,
+        max_steps_per_episode=max_steps_per_episode,
+      ):
+        records.append(episode.record())
+        del active[slot]
+        if pending:
+          start(slot)
+      else:
+        active[slot] = (step + 1, episode)
+  return sorted(records, key=lambda r: r.trial_index)
+
+
+# --- プロセスプール（worker ごとに方策 1 つと env ``envs_per_worker`` 個）---
+
+_worker_envs: list[EnvBipedPPO] = []
+_worker_agent: AgentPPO | None = None
+_worker_max_steps = 0
+
+
+def _eval_contexts(checkpoint_path: Path) -> tuple[ExperimentContext, ExperimentContext]:
+  """(方策の復元に使う ckpt run のコンテキスト, eval 用コンテキスト)。"""
   # 重み・環境とも ckpt run の学習設定を引き継ぎ、eval 向け override のみ適用
   policy_ctx = ctx_from_checkpoint(checkpoint_path)
-  eval_context = build_eval_context(policy_ctx.cfg)
+  return policy_ctx, build_eval_context(policy_ctx.cfg)
+
+
+def _load_eval_policy(
+  checkpoint_path: Path,
+  device: str,
+  *,
+  contexts: tuple[ExperimentContext, ExperimentContext] | None = None,
+) -> tuple[ExperimentContext, AgentPPO]:
+  """ckpt run の学習設定を引き継いだ eval コンテキストと方策（``contexts`` は ``_eval_contexts`` の結果）。"""
+  policy_ctx, eval_context = contexts if contexts is not None else _eval_contexts(checkpoint_path)
   agent = AgentPPO.from_checkpoint(policy_ctx, checkpoint_path, map_location=device)
-  act_eval = agent.act_eval
+  return eval_context, agent
 
+
+def _make_eval_env(eval_context: ExperimentContext) -> EnvBipedPPO:
   env = EnvBipedPPO(
     eval_context,
     enable_viewer=False,
     training_dr_enabled=False,
   )
   env.set_step_wall_sleep_sec(0.0)
-  max_steps = int(eval_context.cfg.training.max_steps_per_episode)
+  return env
 
-  records: list[EpisodeEvalRecord] = []
-  for plan in iter_eval_trials(
+
+def _init_eval_worker(checkpoint_path: str, device: str, envs_per_worker: int) -> None:
+  """worker 起動時に 1 回だけ方策（読み取り専用）と env を用意する（spawn なのでコンテキストも worker で組み立てる）。"""
+  global _worker_agent, _worker_max_steps
+
+  # worker 数 × intra-op スレッドで CPU を奪い合わないよう 1 スレッドで推論する
+  torch.set_num_threads(1)
+  eval_context, agent = _load_eval_policy(Path(checkpoint_path), device)
+  agent.actor.eval()
+  agent.critic.eval()
+  _worker_agent = agent
+  _worker_envs[:] = [_make_eval_env(eval_context) for _ in range(envs_per_worker)]
+  _worker_max_steps = int(eval_context.cfg.training.max_steps_per_episode)
+
+
+def _eval_worker_chunk(plans: tuple[EvalTrialPlan, ...]) -> list[EpisodeEvalRecord]:
+  assert _worker_agent is not None
+  return run_eval_trials_lockstep(
+    _worker_envs,
+    _worker_agent.act_eval_batch,
+    plans,
+    max_steps_per_episode=_worker_max_steps,
+  )
+
+
+def _run_checkpoint_eval_pool(
+  checkpoint_path: Path,
+  plans: tuple[EvalTrialPlan, ...],
+  *,
+  device: str,
+  num_workers: int,
+  envs_per_worker: int,
+) -> list[EpisodeEvalRecord]:
+  """試行を ``envs_per_worker`` 件ずつの塊にしてプロセスプールへ流す。"""
+  chunks = [plans[i : i + envs_per_worker] for i in range(0, len(plans), envs_per_worker)]
+  # 学習後の親プロセスは torch のスレッドを抱えているので fork せず spawn する
+  with ProcessPoolExecutor(
+    max_workers=num_workers,
+    mp_context=multiprocessing.get_context("spawn"),
+    initializer=_init_eval_worker,
+    initargs=(str(checkpoint_path), device, envs_per_worker),
+  ) as pool:
+    records = [r for chunk_records in pool.map(_eval_worker_chunk, chunks) for r in chunk_records]
+  return sorted(records, key=lambda r: r.trial_index)
+
+
+def _run_trials(
+  checkpoint_path: Path,
+  plans: tuple[EvalTrialPlan, ...],
+  *,
+  contexts: tuple[ExperimentContext, ExperimentContext],
+  device: str,
+  num_workers: int,
+  envs_per_worker: int,
+) -> list[EpisodeEvalRecord]:
+  # worker 1 つでは spawn の分だけ遅くなるので、CPU が足りなければこのプロセスで回す
+  num_workers = min(num_workers, -(-len(plans) // envs_per_worker), os.cpu_count() or 1)
+  if num_workers > 1:
+    return _run_checkpoint_eval_pool(
+      checkpoint_path,
+      plans,
+      device=device,
+      num_workers=num_workers,
+      envs_per_worker=envs_per_worker,
+    )
+
+  eval_context, agent = _load_eval_policy(checkpoint_path, device, contexts=contexts)
+  envs = [_make_eval_env(eval_context) for _ in range(min(envs_per_worker, len(plans)))]
+  return run_eval_trials_lockstep(
+    envs,
+    agent.act_eval_batch,
+    plans,
+    max_steps_per_episode=int(eval_context.cfg.training.max_steps_per_episode),
+  )
+
+
+def run_checkpoint_eval(
+  checkpoint_path: Path,
+  *,
+  device: str = "cpu",
+  eval_seeds: tuple[int, ...] = EVAL_SEEDS,
+  episodes_per_seed: int = EPISODES_PER_SEED,
+  num_workers: int | None = None,
+  envs_per_worker: int | None = None,
+  use_cache: bool | None = None,
+) -> list[EpisodeEvalRecord]:
+  """全 eval 試行を実行して per-episode 記録を返す。
+
+  ``num_workers`` / ``envs_per_worker`` / ``use_cache`` の省略時は ckpt run の ``cfg.eval`` の値。
+  ``num_workers`` は試行の塊数・CPU 数で頭打ちにし、1 以下ならプロセスを使わず
+  このプロセスの ``envs_per_worker`` 個の env で回す。
+  キャッシュ（``eval/cache.py``）有効時は、同じ ckpt 内容・評価仕様・環境設定で評価済みの
+  試行を読み出し、足りない試行だけを回して書き足す。
+  どの設定でも記録（順序・値）は ``run_eval_episode`` を 1 試行ずつ回した場合と同じ。
+  """
+  plans = iter_eval_trials(
     eval_seeds=eval_seeds,
     episodes_per_seed=episodes_per_seed,
-  ):
-    records.append(
-      run_eval_episode(
-        env,
-        act_eval,
-        eval_seed=plan.eval_seed,
-        ep_index=plan.ep_index,
-        trial_index=plan.trial_index,
-        max_steps_per_episode=max_steps,
-      )
+  )
+  contexts = _eval_contexts(checkpoint_path)
+  eval_context = contexts[1]
+  eval_cfg = eval_context.cfg.eval
+  num_workers = int(eval_cfg.num_workers if num_workers is None else num_workers)
+  envs_per_worker = int(eval_cfg.envs_per_worker if envs_per_worker is None else envs_per_worker)
+  use_cache = bool(eval_cfg.cache if use_cache is None else use_cache)
+  if num_workers < 0 or envs_per_worker < 1:
+    raise ValueError(
+      f"eval num_workers must be >= 0 and envs_per_worker >= 1 "
+      f"(got {num_workers}, {envs_per_worker})"
+    )
+
+  cached: list[EpisodeEvalRecord] = []
+  pending = plans
+  if use_cache:
+    cache = EvalCache(Path(eval_cfg.cache_dir) if eval_cfg.cache_dir else DEFAULT_EVAL_CACHE_DIR)
+    checkpoint_sha256 = file_sha256(checkpoint_path)
+    env_sha256 = env_config_hash(eval_context.cfg)
+    key = eval_cache_key(checkpoint_sha256=checkpoint_sha256, env_sha256=env_sha256)
+    cached, missing = cache.lookup(key, plans)
+    pending = tuple(missing)
+    print(f"[eval] cache: {len(cached)} cached / {len(pending)} to run (key={key[:12]})")
+
+  if not pending:
+    return cached
+  records = _run_trials(
+    checkpoint_path,
+    pending,
+    contexts=contexts,
+    device=device,
+    num_workers=num_workers,
+    envs_per_worker=envs_per_worker,
+  )
+  if use_cache:
+    cache.store(
+      key,
+      records,
+      meta={
+        "checkpoint_sha256": checkpoint_sha256,
+        "eval_spec_id": EVAL_SPEC_ID,
+        "env_config_sha256": env_sha256,
+        "checkpoint": str(Path(checkpoint_path).resolve()),
+      },
     )
-  return records
+  return sorted([*cached, *records], key=lambda r: r.trial_index)
@@ -25,6 +25,8 @@ ROOT_ANG_VEL_NOISE_RAD_S = 0.1
 
 # ルート X/Y 位置ノイズは平面タスクのため意図的に無し
 APPLY_ROOT_XY_POSITION_NOISE = False
+# 有効時のレンジ（学習 DR の pose_scale は掛けない）
+ROOT_XY_NOISE_M = 0.02
 
 DEG2RAD = float(np.pi / 180.0)
 ROOT_YAW_NOISE_RAD = ROOT_YAW_NOISE_DEG * DEG2RAD
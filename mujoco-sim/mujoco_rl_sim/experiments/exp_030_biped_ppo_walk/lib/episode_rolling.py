@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
+import math
 from collections import deque
 from dataclasses import dataclass
-from statistics import mean
+
+import numpy as np
 
 
 @dataclass(frozen=True)
@@ -16,62 +18,120 @@ class EpisodeSnapshot:
   net_imu_x: float
 
 
-def _episode_batch_summary(eps: list[EpisodeSnapshot]) -> dict[str, float]:
-  """エピソードリストから平均・最大を算出（rolling / interval 共通）。"""
-  returns = [e.return_ for e in eps]
-  lengths = [e.length for e in eps]
-  forwards = [e.forward_reward_sum for e in eps]
-  dx_sums = [e.total_dx_imu for e in eps]
-  net_x = [e.net_imu_x for e in eps]
+# 集計列（EpisodeSnapshot のフィールド順）と、最大値も出す列
+_COL_RETURN = 0
+_COL_LENGTH = 1
+_COL_FORWARD = 2
+_COL_DX = 3
+_COL_NET_X = 4
+_NUM_COLS = 5
+_MAX_COLS = (_COL_RETURN, _COL_DX, _COL_NET_X)
+
+
+def _snapshot_row(snapshot: EpisodeSnapshot) -> tuple[float, ...]:
+  return (
+    float(snapshot.return_),
+    float(snapshot.length),
+    float(snapshot.forward_reward_sum),
+    float(snapshot.total_dx_imu),
+    float(snapshot.net_imu_x),
+  )
+
+
+def _episode_batch_summary(
+  count: int,
+  sums: np.ndarray,
+  maxima: dict[int, float],
+) -> dict[str, float]:
+  """件数・列和・列最大から平均・最大を算出（rolling / interval 共通）。"""
+  means = sums / count
   return {
-    "ep_roll_n": float(len(eps)),
-    "ep_ret_mean": mean(returns),
-    "ep_ret_max": max(returns),
-    "ep_len_mean": mean(lengths),
-    "ep_fwd_rw_mean": mean(forwards),
-    "ep_dx_mean": mean(dx_sums),
-    "ep_dx_max": max(dx_sums),
-    "ep_net_x_mean": mean(net_x),
-    "ep_net_x_max": max(net_x),
+    "ep_roll_n": float(count),
+    "ep_ret_mean": float(means[_COL_RETURN]),
+    "ep_ret_max": maxima[_COL_RETURN],
+    "ep_len_mean": float(means[_COL_LENGTH]),
+    "ep_fwd_rw_mean": float(means[_COL_FORWARD]),
+    "ep_dx_mean": float(means[_COL_DX]),
+    "ep_dx_max": maxima[_COL_DX],
+    "ep_net_x_mean": float(means[_COL_NET_X]),
+    "ep_net_x_max": maxima[_COL_NET_X],
   }
 
 
 class EpisodeRollingWindow:
-  """直近 window 本のエピソード指標を保持する（wandb 用）。"""
+  """直近 window 本のエピソード指標を保持する（wandb 用）。
+
+  平均は列和を push ごとに差分更新し、最大は列ごとの単調減少 deque で保つ
+  （push / summary とも償却 O(1)）。差分更新の丸め誤差が溜まらないよう、
+  window 本ごとにリングバッファから列和を取り直す。
+  """
 
   def __init__(self, *, window: int) -> None:
     if window < 1:
       raise ValueError("window は 1 以上")
     self._window = window
-    self._episodes: deque[EpisodeSnapshot] = deque(maxlen=window)
+    self._ring = np.zeros((window, _NUM_COLS), dtype=np.float64)
+    self._sums = np.zeros(_NUM_COLS, dtype=np.float64)
+    # 列ごとの (push 通番, 値)。値は先頭ほど大きい
+    self._max_queues: dict[int, deque[tuple[int, float]]] = {
+      col: deque() for col in _MAX_COLS
+    }
+    self._pushed = 0
 
   def push(self, snapshot: EpisodeSnapshot) -> None:
-    self._episodes.append(snapshot)
+    row = _snapshot_row(snapshot)
+    slot = self._pushed % self._window
+    if self._pushed >= self._window:
+      self._sums -= self._ring[slot]
+    self._ring[slot] = row
+    self._sums += self._ring[slot]
+    for col, queue in self._max_queues.items():
+      while queue and queue[-1][1] <= row[col]:
+        queue.pop()
+      queue.append((self._pushed, row[col]))
+      if queue[0][0] <= self._pushed - self._window:
+        queue.popleft()
+    self._pushed += 1
+    if self._pushed % self._window == 0:
+      self._sums = self._ring.sum(axis=0)
 
   def count(self) -> int:
-    return len(self._episodes)
+    return min(self._pushed, self._window)
 
   def summary(self) -> dict[str, float] | None:
-    if not self._episodes:
+    count = self.count()
+    if count == 0:
       return None
-    return _episode_batch_summary(list(self._episodes))
+    maxima = {col: queue[0][1] for col, queue in self._max_queues.items()}
+    return _episode_batch_summary(count, self._sums, maxima)
 
 
 class EpisodeIntervalBuffer:
-  """前回コンソールログ以降に終了したエピソードを保持する。"""
+  """前回コンソールログ以降に終了したエピソードの件数・列和・列最大を保持する。"""
 
   def __init__(self) -> None:
-    self._episodes: list[EpisodeSnapshot] = []
+    self._sums = np.zeros(_NUM_COLS, dtype=np.float64)
+    self._reset()
+
+  def _reset(self) -> None:
+    self._count = 0
+    self._sums[:] = 0.0
+    self._maxima = {col: -math.inf for col in _MAX_COLS}
 
   def push(self, snapshot: EpisodeSnapshot) -> None:
-    self._episodes.append(snapshot)
+    row = _snapshot_row(snapshot)
+    self._count += 1
+    self._sums += row
+    for col in _MAX_COLS:
+      if row[col] > self._maxima[col]:
+        self._maxima[col] = row[col]
 
   def take_summary(self) -> dict[str, float] | None:
     """集計してバッファを空にする（ログ 1 行 = 前回ログから今回まで）。"""
-    if not self._episodes:
+    if self._count == 0:
       return None
-    summary = _episode_batch_summary(self._episodes)
-    self._episodes.clear()
+    summary = _episode_batch_summary(self._count, self._sums, self._maxima)
+    self._reset()
     return summary
 
 
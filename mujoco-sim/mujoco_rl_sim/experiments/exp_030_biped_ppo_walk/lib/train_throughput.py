@@ -19,6 +19,8 @@ class UpdateTiming:
   ipc_s: float = 0.0
   act_batch_s: float = 0.0
   num_envs: int = 1
+  # act_batch_s のうち、別 group の物理 step と並行して走った時間（パイプライン収集時）
+  overlap_s: float = 0.0
 
   @property
   def total_s(self) -> float:
@@ -39,6 +41,13 @@ class UpdateTiming:
       return 0.0
     return float(self.rollout_steps / self.rollout_s)
 
+  @property
+  def overlap_fraction(self) -> float:
+    """方策推論のうち物理 step の裏に隠れた割合（0〜1）。"""
+    if self.act_batch_s <= 0.0:
+      return 0.0
+    return float(min(1.0, self.overlap_s / self.act_batch_s))
+
 
 @dataclass
 class ThroughputTracker:
@@ -88,6 +97,8 @@ class ThroughputTracker:
       "train/avg_steps_per_sec": self.avg_steps_per_sec,
       "train/ipc_wall_s": timing.ipc_s,
       "train/act_batch_wall_s": timing.act_batch_s,
+      "train/act_overlap_wall_s": timing.overlap_s,
+      "train/act_overlap_fraction": timing.overlap_fraction,
       "train/num_envs": float(timing.num_envs),
     }
 
@@ -104,6 +115,8 @@ class ThroughputTracker:
         f" | num_envs: {timing.num_envs}"
         f" ipc_s: {timing.ipc_s:6.3f}"
       )
+    if timing.overlap_s > 0.0:
+      suffix += f" overlap: {timing.overlap_fraction:4.2f}"
     return suffix
 
   def format_run_summary(self) -> str:
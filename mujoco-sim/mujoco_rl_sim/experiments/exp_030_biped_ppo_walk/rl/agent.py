@@ -20,6 +20,7 @@
 
 from __future__ import annotations
 
+import math
 from pathlib import Path
 
 import numpy as np
@@ -30,6 +31,8 @@ from torch.distributions import Normal, TransformedDistribution
 from torch.distributions.transforms import TanhTransform
 
 from lib.experiment_context import ExperimentContext
+from rl.rollout_buffer import RolloutBuffer
+from rl.running_norm import ObsNormalizer, ReturnNormalizer
 
 
 def _build_mlp(
@@ -116,28 +119,94 @@ def _compute_gae(
   TD 誤差 δ_t = r_t + γ V(s_{t+1}) - V(s_t) を、λ で平滑化して足し合わせる。
   λ=0 なら 1 ステップ先だけ、λ→1 なら長いリターンに近づく（config.GAE_LAMBDA=0.95）。
 
+  入力は ``[T, num_envs]``（``last_v`` は ``[num_envs]``）。時間方向の再帰だけをループし、
+  env 列はまとめて計算する（env ごとに独立した系列として扱う）。
+
   returns = advantages + values … Critic の MSE ターゲット（価値関数を当てはめる用）
   """
   t_len = rewards.shape[0]
-  advantages = torch.zeros(t_len, dtype=torch.float32)
-  last_gae = 0.0
+  # done=1 のときは次価値を使わない（転倒・終了で打ち切り）
+  non_terminal = 1.0 - dones
+  # ロールアウト最後の次状態: まだエピソードが続くなら V(s_{T+1}) でブートストラップ
+  next_values = torch.cat([values[1:], last_v.reshape(1, *values.shape[1:])], dim=0)
+  deltas = rewards + float(gamma) * next_values * non_terminal - values
+  decay = float(gamma) * float(gae_lambda) * non_terminal
+  advantages = torch.empty_like(deltas)
+  last_gae = torch.zeros_like(deltas[0])
   for t in reversed(range(t_len)):
-    if t == t_len - 1:
-      # ロールアウト最後の次状態: まだエピソードが続くなら V(s_{T+1}) でブートストラップ
-      next_v = last_v
-    else:
-      next_v = values[t + 1]
-    # done=1 のときは次価値を使わない（転倒・終了で打ち切り）
-    non_terminal = 1.0 - dones[t]
-    delta = rewards[t] + float(gamma) * next_v * non_terminal - values[t]
-    last_gae = float(
-      delta + float(gamma) * float(gae_lambda) * non_terminal * last_gae
-    )
+    last_gae = deltas[t] + decay[t] * last_gae
     advantages[t] = last_gae
   returns = advantages + values
   return advantages, returns
 
 
+_LOG_2 = math.log(2.0)
+_HALF_LOG_2PI = 0.5 * math.log(2.0 * math.pi)
+
+
+def _tanh_log_abs_det_jacobian(pre_tanh: torch.Tensor) -> torch.Tensor:
+  """log |d tanh(u) / du| を行動次元で合計する（``TanhTransform`` と同じ安定な式）。"""
+  return (
+    2.0 * (_LOG_2 - pre_tanh - nn.functional.softplus(-2.0 * pre_tanh))
+  ).sum(dim=-1)
+
+
+def _ppo_minibatch_losses(
+  actor: Actor,
+  critic: Critic,
+  obs: torch.Tensor,
+  pre_tanh_actions: torch.Tensor,
+  action_log_det: torch.Tensor,
+  advantages: torch.Tensor,
+  returns: torch.Tensor,
+  old_log_probs: torch.Tensor,
+  *,
+  clip_eps: float,
+  value_coef: float,
+  entropy_coef: float,
+  log_prob_clip: float,
+) -> tuple[torch.Tensor, torch.Tensor]:
+  """1 ミニバッチ分の PPO 損失と監視用統計を求める（``torch.compile`` 対象）。
+
+  actor の forward は 1 回だけ行い、tanh 付きガウスの log π(a|s) は
+  ``TransformedDistribution`` を作らず閉形式で計算する。
+  ``pre_tanh_actions = atanh(a)`` と ``action_log_det`` は行動だけで決まるため update 前に 1 回求めておく。
+  戻り値は ``(loss, [policy_loss, value_loss, entropy, approx_kl, clip_fraction])``。
+  """
+  loc, std = actor(obs)
+  log_std = std.log()
+  # いまのネットワーク（π_new）で、バッファに入っている **同じ行動** の log_prob を再計算
+  z = (pre_tanh_actions - loc) / std
+  gaussian_log_prob = (-0.5 * z * z - log_std - _HALF_LOG_2PI).sum(dim=-1)
+  new_log_probs = (gaussian_log_prob - action_log_det).clamp(-log_prob_clip, log_prob_clip)
+
+  # 方策比 r = π_new(a|s) / π_old(a|s)  （log 空間では exp(new - old)）
+  ratio = torch.exp(new_log_probs - old_log_probs)
+
+  # PPO-Clip の核心:
+  #   L = -min( r * A,  clip(r, 1-ε, 1+ε) * A )
+  # A>0（良い行動）: r を大きくしすぎない（1+ε で頭打ち）
+  # A<0（悪い行動）: r を小さくしすぎない（1-ε で床）
+  surr1 = ratio * advantages
+  surr2 = torch.clamp(ratio, 1.0 - clip_eps, 1.0 + clip_eps) * advantages
+  policy_loss = -torch.min(surr1, surr2).mean()
+
+  # Critic: V(s) が GAE の return に近づくよう MSE（方策とは別の頭）
+  value_loss = nn.functional.mse_loss(critic(obs), returns)
+
+  # Entropy ボーナス: 探索を残す（Tanh 変換前の Normal のエントロピー）
+  entropy = (0.5 + _HALF_LOG_2PI + log_std).sum(dim=-1).mean()
+
+  loss = policy_loss + value_coef * value_loss - entropy_coef * entropy
+
+  # 監視用（wandb）: 方策がどれだけ変わったかの近似 KL、clip が効いた割合
+  with torch.no_grad():
+    approx_kl = (old_log_probs - new_log_probs).mean()
+    clip_fraction = (torch.abs(ratio - 1.0) > clip_eps).float().mean()
+    stats = torch.stack([policy_loss, value_loss, entropy, approx_kl, clip_fraction])
+  return loss, stats
+
+
 class AgentPPO:
   """Proximal Policy Optimization（PPO）エージェント。
 
@@ -181,25 +250,43 @@ class AgentPPO:
     self._device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     self.actor.to(self._device)
     self.critic.to(self._device)
-    # 1 ロールアウト分の一時バッファ（update の最後でクリア）
-    self._reset_rollout_storage()
+    self._params = list(self.actor.parameters()) + list(self.critic.parameters())
+    # ppo.compile_update=true なら損失計算を torch.compile する（初回 update でコンパイル）
+    self._minibatch_losses = (
+      torch.compile(_ppo_minibatch_losses)
+      if bool(ppo_cfg.compile_update)
+      else _ppo_minibatch_losses
+    )
+    # 1 ロールアウト分のバッファ（env ごとに ceil(rollout_steps / num_envs) step を事前確保）
+    num_envs = max(1, int(self._ctx.cfg.runtime.num_envs))
+    self.num_envs = num_envs
+    self.rollout = RolloutBuffer.allocate(
+      -(-int(ppo_cfg.rollout_steps) // num_envs),
+      num_envs,
+      obs_dim=obs_dim,
+      action_dim=action_dim,
+    )
+    # ppo.obs_norm / ppo.reward_norm: 観測・報酬の逐次正規化（統計は update ごとに更新し、ckpt に保存）
+    self.obs_normalizer = (
+      ObsNormalizer(obs_dim, clip=float(ppo_cfg.obs_norm_clip)) if bool(ppo_cfg.obs_norm) else None
+    )
+    self.reward_normalizer = (
+      ReturnNormalizer(num_envs, gamma=float(ppo_cfg.gamma)) if bool(ppo_cfg.reward_norm) else None
+    )
 
   def set_learning_rate(self, lr: float) -> None:
     """全 param_group の学習率を更新する（再開時の微調整用）。"""
     for group in self.optimizer.param_groups:
       group["lr"] = float(lr)
 
-  def _reset_rollout_storage(self):
-    self._obs = []
-    self._actions = []
-    self._rewards = []
-    self._values = []
-    self._dones = []
-    # PPO 専用: 行動を取った瞬間の log π_old(a|s)。更新中は「古い方策」の確率として固定
-    self._log_probs = []
+  def _policy_input(self, obs_batch) -> np.ndarray:
+    """観測 ``[N, obs_dim]`` をネットワーク入力（float32。obs_norm 有効時は正規化済み）にする。"""
+    x = np.asarray(obs_batch, dtype=np.float32)
+    return x if self.obs_normalizer is None else self.obs_normalizer(x)
 
   def _obs_tensor(self, obs):
-    return torch.tensor([list(obs)], dtype=torch.float32, device=self._device)
+    x = self._policy_input(np.asarray(obs, dtype=np.float32).reshape(1, -1))
+    return torch.as_tensor(x, device=self._device)
 
   @staticmethod
   def _action_tuple(action_tensor: torch.Tensor) -> tuple[float, ...]:
@@ -240,7 +327,7 @@ class AgentPPO:
 
   def act_batch(self, obs_batch: np.ndarray):
     """Subproc VecEnv 用: ``[N, obs_dim]`` をまとめて推論する。"""
-    o = torch.as_tensor(obs_batch, dtype=torch.float32, device=self._device)
+    o = torch.as_tensor(self._policy_input(obs_batch), device=self._device)
     dist = self.actor.squashed_dist(o)
     action = dist.rsample()
     log_prob = self._squashed_log_prob(dist, action)
@@ -263,39 +350,92 @@ class AgentPPO:
     self.critic.train()
     return self._action_tuple(action)
 
-  def store(self, obs, action, reward, value, done, log_prob):
-    """ロールアウト 1 ステップ分をバッファへ追加。update() 後にまとめてクリア。"""
-    self._obs.append(obs)
-    self._actions.append(action)
-    self._rewards.append(float(reward))
-    self._values.append(value.detach())
-    self._dones.append(float(done))
-    self._log_probs.append(log_prob.detach())
+  def act_eval_batch(self, obs_batch: np.ndarray) -> np.ndarray:
+    """``[N, obs_dim]`` の平均行動 tanh(loc) を ``[N, action_dim]`` で返す（並列 eval 用）。
+
+    各行は ``act_eval`` と bit 単位で一致する。行列積を 1 行ずつの batched matmul
+    （``baddbmm``）で計算し、バッチ幅で BLAS の縮約順が変わらないようにする。
+    train/eval は切り替えない（actor は Linear と要素ごとの活性化だけ）。
+    """
+    with torch.no_grad():
+      x = torch.as_tensor(self._policy_input(obs_batch), device=self._device).unsqueeze(1)
+      n = x.shape[0]
+      for layer in self.actor.net:
+        if isinstance(layer, nn.Linear):
+          weight_t = layer.weight.t().expand(n, -1, -1)
+          x = torch.baddbmm(layer.bias.expand(n, 1, -1), x, weight_t)
+        else:
+          x = layer(x)
+      return torch.tanh(x.squeeze(1)).cpu().numpy()
+
+  def store(self, obs, action, reward, value, done, log_prob, *, env_id: int = 0):
+    """ロールアウト 1 ステップ分を env ``env_id`` の列へ書き込む。update() 後にまとめてクリア。
+
+    log_prob は行動を取った瞬間の log π_old(a|s)。更新中は「古い方策」の確率として固定する。
+    """
+    self.rollout.store(
+      env_id,
+      obs,
+      action,
+      float(reward),
+      float(value),
+      bool(done),
+      float(log_prob),
+    )
+
+  def store_batch(
+    self,
+    obs_batch: np.ndarray,
+    actions: np.ndarray,
+    rewards: np.ndarray,
+    values: torch.Tensor,
+    dones: np.ndarray,
+    log_probs: torch.Tensor,
+    *,
+    env_slice: slice | None = None,
+  ):
+    """Subproc VecEnv 用: ``act_batch`` の結果と同じ step の遷移を env 列へまとめて書き込む。"""
+    self.rollout.store_batch(
+      obs_batch,
+      actions,
+      rewards,
+      values.detach().numpy(),
+      dones,
+      log_probs.detach().numpy(),
+      env_slice=env_slice,
+    )
 
   def update(self, last_obs):
     """ロールアウト 1 本分の PPO 更新（train.py が ROLLOUT_STEPS ごとに 1 回呼ぶ）。
 
-    last_obs: ロールアウト直後の観測（エピソード続行時の V(s') ブートストラップ用）
+    last_obs: ロールアウト直後の観測（エピソード続行時の V(s') ブートストラップ用）。
+      ``[obs_dim]``（単一 env）または ``[num_envs, obs_dim]``。
     """
+    buf = self.rollout
+    last_obs_batch = torch.as_tensor(
+      self._policy_input(np.asarray(last_obs, dtype=np.float32).reshape(buf.num_envs, self.obs_dim)),
+      device=self._device,
+    )
     with torch.no_grad():
-      last_v = self.critic(self._obs_tensor(last_obs)).squeeze(0)
+      last_v = self.critic(last_obs_batch).cpu()
 
-    obs_list = self._obs
-    t_len = len(obs_list)
-    if t_len == 0:
-      self._reset_rollout_storage()
+    steps = buf.filled_steps
+    if steps == 0:
+      buf.clear()
       return self._empty_stats()
 
-    # --- フェーズ A: テンソル化・GAE ---
+    # --- フェーズ A: テンソル化・GAE（env 列ごと） ---
+    # バッファの numpy 配列をコピーせずにテンソルとして参照する
     ppo_cfg = self._ctx.cfg.ppo
-    rewards = torch.tensor(self._rewards, dtype=torch.float32).clamp(
+    raw_rewards = buf.rewards[:steps]
+    if self.reward_normalizer is not None:
+      raw_rewards = self.reward_normalizer.scale_rollout(raw_rewards, buf.dones[:steps])
+    rewards = torch.from_numpy(raw_rewards).clamp(
       -float(ppo_cfg.reward_clip),
       float(ppo_cfg.reward_clip),
     )
-    values = torch.stack(self._values).squeeze(-1)
-    dones = torch.tensor(self._dones, dtype=torch.float32)
-    # 収集時に保存した log π_old（この update 中は定数として扱う）
-    old_log_probs = torch.stack(self._log_probs).squeeze(-1)
+    values = torch.from_numpy(buf.values[:steps])
+    dones = torch.from_numpy(buf.dones[:steps])
 
     advantages, returns = _compute_gae(
       rewards,
@@ -305,20 +445,23 @@ class AgentPPO:
       gamma=float(ppo_cfg.gamma),
       gae_lambda=float(ppo_cfg.gae_lambda),
     )
+    # ミニバッチ学習では [T, num_envs] を平坦化する（GAE 後なので env の並びは問わない）
+    t_len = steps * buf.num_envs
+    advantages = advantages.reshape(t_len)
+    returns = returns.reshape(t_len).to(self._device)
+    # 収集時に保存した log π_old（この update 中は定数として扱う）
+    old_log_probs = torch.from_numpy(buf.log_probs[:steps]).reshape(t_len).to(self._device)
     # advantage を正規化すると学習が安定しやすい（平均 0・分散 ≈ 1）
     adv_std = max(float(advantages.std().item()), float(ppo_cfg.adv_std_min))
     adv = (advantages - advantages.mean()) / adv_std
-    adv = adv.clamp(-float(ppo_cfg.adv_clip), float(ppo_cfg.adv_clip))
-
-    obs_batch = torch.tensor(
-      [list(o) for o in obs_list],
-      dtype=torch.float32,
-      device=self._device,
-    )
-    actions_batch = torch.tensor(
-      self._actions,
-      dtype=torch.float32,
-      device=self._device,
+    adv = adv.clamp(-float(ppo_cfg.adv_clip), float(ppo_cfg.adv_clip)).to(self._device)
+
+    # 収集時と同じ（この update までは固定の）統計で正規化する
+    obs_batch = torch.from_numpy(
+      self._policy_input(buf.obs[:steps].reshape(t_len, self.obs_dim))
+    ).to(self._device)
+    actions_batch = torch.from_numpy(buf.actions[:steps]).reshape(t_len, self.action_dim).to(
+      self._device
     )
     # tanh の端 (+/-1) 付近では log_prob が発散しやすいので少し内側に寄せる
     mb_actions = actions_batch.clamp(
@@ -326,107 +469,56 @@ class AgentPPO:
       1.0 - float(ppo_cfg.action_log_prob_eps),
     )
 
-    with torch.no_grad():
-      probe_loc, _ = self.actor(obs_batch[: min(8, t_len)])
-      if not torch.isfinite(probe_loc).all():
-        print("[PPO] actor output is non-finite; skipping this update")
-        self._reset_rollout_storage()
-        return self._empty_stats()
-
-    total_policy_loss = 0.0
-    total_value_loss = 0.0
-    total_entropy = 0.0
-    total_approx_kl = 0.0
-    total_clip_fraction = 0.0
+    pre_tanh_actions = torch.atanh(mb_actions)
+    action_log_det = _tanh_log_abs_det_jacobian(pre_tanh_actions)
+    # 観測が非有限の行は学習に使わない（判定は update ごとに 1 回）
+    finite_rows = torch.isfinite(obs_batch).all(dim=-1).cpu().numpy()
+
+    clip_eps = float(ppo_cfg.clip_eps)
+    value_coef = float(ppo_cfg.value_coef)
+    entropy_coef = float(ppo_cfg.entropy_coef)
+    log_prob_clip = float(ppo_cfg.log_prob_clip)
+    max_grad_norm = float(ppo_cfg.max_grad_norm)
+    minibatch_size = int(ppo_cfg.minibatch_size)
+    # [policy_loss, value_loss, entropy, approx_kl, clip_fraction] の合計
+    totals = torch.zeros(5, device=self._device)
     n_mb = 0
 
     # --- フェーズ B: 同じロールアウトを PPO_EPOCHS 回学習（データ効率と clip のため）---
     for _epoch in range(int(ppo_cfg.ppo_epochs)):
-      idx = np.arange(t_len)
+      idx = np.flatnonzero(finite_rows)
       np.random.shuffle(idx)
-      epoch_kl = 0.0
+      epoch_kl = torch.zeros((), device=self._device)
       epoch_mb = 0
 
-      minibatch_size = int(ppo_cfg.minibatch_size)
-      for start in range(0, t_len, minibatch_size):
-        mb = idx[start : start + minibatch_size]
-        mb_obs = obs_batch[mb]
-        if not torch.isfinite(mb_obs).all():
-          continue
-
-        mb_adv = adv[mb].detach()
-        mb_returns = returns[mb].detach()
-        mb_old_log_probs = old_log_probs[mb].detach()
-        mb_actions_sel = mb_actions[mb]
-
-        # いまのネットワーク（π_new）で、バッファに入っている **同じ行動** の log_prob を再計算
-        dist = self.actor.squashed_dist(mb_obs)
-        new_log_probs = self._squashed_log_prob(dist, mb_actions_sel)
-        if not torch.isfinite(new_log_probs).all():
-          continue
-
-        # 方策比 r = π_new(a|s) / π_old(a|s)  （log 空間では exp(new - old)）
-        ratio = torch.exp(new_log_probs - mb_old_log_probs)
-
-        # PPO-Clip の核心:
-        #   L = -min( r * A,  clip(r, 1-ε, 1+ε) * A )
-        # A>0（良い行動）: r を大きくしすぎない（1+ε で頭打ち）
-        # A<0（悪い行動）: r を小さくしすぎない（1-ε で床）
-        surr1 = ratio * mb_adv
-        surr2 = (
-          torch.clamp(
-            ratio,
-            1.0 - float(ppo_cfg.clip_eps),
-            1.0 + float(ppo_cfg.clip_eps),
-          )
-          * mb_adv
-        )
-        policy_loss = -torch.min(surr1, surr2).mean()
-
-        # Critic: V(s) が GAE の return に近づくよう MSE（方策とは別の頭）
-        new_values = self.critic(mb_obs)
-        value_loss = nn.functional.mse_loss(new_values, mb_returns)
-
-        # Entropy ボーナス: 探索を残す（係数 ENTROPY_COEF で減算＝最大化）
-        loc, std = self.actor(mb_obs)
-        entropy = self.actor.gaussian_entropy(loc, std)
-
-        loss = (
-          policy_loss
-          + float(ppo_cfg.value_coef) * value_loss
-          - float(ppo_cfg.entropy_coef) * entropy
+      for start in range(0, len(idx), minibatch_size):
+        mb = torch.from_numpy(idx[start : start + minibatch_size]).to(self._device)
+        loss, mb_stats = self._minibatch_losses(
+          self.actor,
+          self.critic,
+          obs_batch[mb],
+          pre_tanh_actions[mb],
+          action_log_det[mb],
+          adv[mb],
+          returns[mb],
+          old_log_probs[mb],
+          clip_eps=clip_eps,
+          value_coef=value_coef,
+          entropy_coef=entropy_coef,
+          log_prob_clip=log_prob_clip,
         )
-        if not torch.isfinite(loss):
-          continue
 
         self.optimizer.zero_grad()
         loss.backward()
-        nn.utils.clip_grad_norm_(
-          list(self.actor.parameters()) + list(self.critic.parameters()),
-          float(ppo_cfg.max_grad_norm),
-        )
-        if not all(
-          torch.isfinite(p.grad).all()
-          for p in list(self.actor.parameters()) + list(self.critic.parameters())
-          if p.grad is not None
-        ):
+        # 損失・勾配のどこかが非有限ならノルムも非有限になるので、判定はこの 1 回にまとめる
+        grad_norm = nn.utils.clip_grad_norm_(self._params, max_grad_norm)
+        if not bool(torch.isfinite(grad_norm)):
           self.optimizer.zero_grad()
           continue
         self.optimizer.step()
 
-        # 監視用（wandb）: 方策がどれだけ変わったかの近似 KL、clip が効いた割合
-        with torch.no_grad():
-          approx_kl = (mb_old_log_probs - new_log_probs).mean().item()
-          clip_fraction = (
-            (torch.abs(ratio - 1.0) > float(ppo_cfg.clip_eps)).float().mean().item()
-          )
-
-        total_policy_loss += policy_loss.item()
-        total_value_loss += value_loss.item()
-        total_entropy += entropy.item()
-        total_approx_kl += approx_kl
-        total_clip_fraction += clip_fraction
-        epoch_kl += approx_kl
+        totals += mb_stats
+        epoch_kl += mb_stats[3]
         n_mb += 1
         epoch_mb += 1
 
@@ -434,20 +526,28 @@ class AgentPPO:
       if (
         float(ppo_cfg.target_kl) > 0.0
         and epoch_mb > 0
-        and (epoch_kl / epoch_mb) > float(ppo_cfg.target_kl)
+        and float(epoch_kl) / epoch_mb > float(ppo_cfg.target_kl)
       ):
         break
 
-    self._reset_rollout_storage()
+    if n_mb == 0:
+      print("[PPO] no finite minibatch in this update; parameters unchanged")
+
+    # 観測統計は次のロールアウトから使う（ロールアウト 1 本分をまとめて取り込む）
+    if self.obs_normalizer is not None:
+      self.obs_normalizer.update(buf.obs[:steps])
+    buf.clear()
 
-    denom = max(n_mb, 1)
+    policy_loss, value_loss, entropy, approx_kl, clip_fraction = (
+      totals / max(n_mb, 1)
+    ).tolist()
     return {
-      "policy_loss": total_policy_loss / denom,
-      "value_loss": total_value_loss / denom,
-      "entropy": total_entropy / denom,
+      "policy_loss": policy_loss,
+      "value_loss": value_loss,
+      "entropy": entropy,
       "mean_target": returns.mean().item(),
-      "approx_kl": total_approx_kl / denom,
-      "clip_fraction": total_clip_fraction / denom,
+      "approx_kl": approx_kl,
+      "clip_fraction": clip_fraction,
     }
 
   @staticmethod
@@ -474,7 +574,9 @@ class AgentPPO:
     """保存済みチェックポイントからエージェントを復元する。"""
     import rl.checkpoint as checkpoint
 
-    payload = checkpoint.load_checkpoint(path, map_location=map_location)
+    payload = checkpoint.load_checkpoint(
+      path, map_location=map_location, include_optimizer=load_optimizer and lr is None
+    )
     fmt = payload.get("format", "")
     if fmt and fmt not in checkpoint.COMPATIBLE_CHECKPOINT_FORMATS:
       raise ValueError(
@@ -508,6 +610,17 @@ class AgentPPO:
     agent = cls(ctx)
     agent.actor.load_state_dict(payload["actor"])
     agent.critic.load_state_dict(payload["critic"])
+    # 観測正規化で学習した方策は、cfg に関わらず保存された統計で入力を正規化する
+    obs_norm_state = payload.get("obs_norm")
+    if obs_norm_state is not None:
+      if agent.obs_normalizer is None:
+        agent.obs_normalizer = ObsNormalizer(agent.obs_dim, clip=float(obs_norm_state["clip"]))
+      agent.obs_normalizer.load_state_dict(obs_norm_state)
+    elif agent.obs_normalizer is not None:
+      print("[PPO] checkpoint has no obs_norm statistics; starting from mean 0 / var 1")
+    reward_norm_state = payload.get("reward_norm")
+    if reward_norm_state is not None and agent.reward_normalizer is not None:
+      agent.reward_normalizer.load_state_dict(reward_norm_state)
     if lr is not None:
       agent.set_learning_rate(lr)
     elif load_optimizer and "optimizer" in payload:
@@ -2,6 +2,12 @@
 
 from __future__ import annotations
 
+import functools
+import hashlib
+import io
+import os
+import shutil
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, TYPE_CHECKING
 
@@ -15,6 +21,8 @@ from lib.run_dir import (
 
 from lib.experiment_context import ExperimentContext
 from package_meta import CHECKPOINT_FORMAT, CHECKPOINT_ROOT
+from rl.checkpoint_file import encode_tensor_checkpoint, is_tensor_checkpoint, load_tensor_checkpoint
+from rl.checkpoint_retention import RetentionPolicy, record_checkpoint
 
 if TYPE_CHECKING:
   from rl.agent import AgentPPO
@@ -66,7 +74,10 @@ def build_payload(
   total_env_steps: int,
   episodes_finished: int,
 ) -> dict[str, Any]:
-  """torch.save 用の辞書。actor / critic / optimizer の state_dict を含む。"""
+  """チェックポイントに保存する辞書。actor / critic / optimizer の state_dict と正規化統計を含む。
+
+  ``obs_norm`` / ``reward_norm`` は ``ppo.obs_norm`` / ``ppo.reward_norm`` 無効時は ``None``。
+  """
   return {
     "format": CHECKPOINT_FORMAT,
     "algorithm": "ppo",
@@ -79,9 +90,197 @@ def build_payload(
     "actor": agent.actor.state_dict(),
     "critic": agent.critic.state_dict(),
     "optimizer": agent.optimizer.state_dict(),
+    "obs_norm": agent.obs_normalizer.state_dict() if agent.obs_normalizer is not None else None,
+    "reward_norm": (
+      agent.reward_normalizer.state_dict() if agent.reward_normalizer is not None else None
+    ),
   }
 
 
+def _checkpoint_names(update: int, *, numbered: bool, latest: bool, final: bool) -> list[str]:
+  names: list[str] = []
+  if numbered:
+    names.append(f"update_{update:06d}.pt")
+  if latest:
+    names.append("latest.pt")
+  if final:
+    names.append("final.pt")
+  return names
+
+
+def serialize_payload(payload: dict[str, Any], *, file_format: str = "tensors") -> list[bytes | memoryview]:
+  """payload をファイルに書くバイト列にする（テンソルの値はこの時点で確定する）。
+
+  ``file_format``: ``"tensors"``（rl/checkpoint_file.py の mmap 形式）/ ``"torch"``（torch.save）。
+  """
+  if file_format == "tensors":
+    return encode_tensor_checkpoint(payload)
+  if file_format == "torch":
+    buf = io.BytesIO()
+    torch.save(payload, buf)
+    return [buf.getbuffer()]
+  raise ValueError(f"checkpoint.file_format must be 'tensors' or 'torch', got {file_format!r}")
+
+
+def _write_atomic(path: Path, chunks: list[bytes | memoryview]) -> None:
+  tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+  try:
+    with tmp.open("wb") as fh:
+      for chunk in chunks:
+        fh.write(chunk)
+      fh.flush()
+      os.fsync(fh.fileno())
+    os.replace(tmp, path)
+  finally:
+    tmp.unlink(missing_ok=True)
+
+
+def _link_atomic(src: Path, dst: Path) -> None:
+  """``dst`` を ``src`` と同じ中身にする（ハードリンク。使えないファイルシステムではコピー）。"""
+  tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+  tmp.unlink(missing_ok=True)
+  try:
+    try:
+      os.link(src, tmp)
+    except OSError:
+      shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+  finally:
+    tmp.unlink(missing_ok=True)
+
+
+def write_checkpoint_files(chunks: list[bytes | memoryview], paths: list[Path]) -> None:
+  """先頭のパスに 1 回だけ書き、残り（latest / final）はそれへのリンクにする。"""
+  _write_atomic(paths[0], chunks)
+  for path in paths[1:]:
+    _link_atomic(paths[0], path)
+
+
+def _chunks_sha256(chunks: list[bytes | memoryview]) -> str:
+  digest = hashlib.sha256()
+  for chunk in chunks:
+    digest.update(chunk)
+  return digest.hexdigest()
+
+
+class CheckpointWriter:
+  """チェックポイントを 1 回だけシリアライズし、書き込みはバックグラウンドスレッドで行う。
+
+  ``save`` は重みのコピーとシリアライズだけを呼び出し側で行い、書き込み予定のパスを
+  すぐ返す。書き込み中の例外は次の ``save`` / ``wait`` / ``close`` で送出する。
+  ``async_save=False`` なら ``save`` の中で書き終える。
+
+  ``retention`` を渡すと、書き込み後（同じスレッド）に run ディレクトリのマニフェストを
+  更新して保持ポリシーを適用する（rl/checkpoint_retention.py）。直前に書いた ckpt と
+  中身が同じ保存（最後の update の ``final.pt`` など）は書かずにリンクする。
+  """
+
+  def __init__(
+    self,
+    *,
+    file_format: str = "tensors",
+    async_save: bool = True,
+    retention: RetentionPolicy | None = None,
+  ):
+    self.file_format = str(file_format)
+    self.retention = retention
+    self._executor = (
+      ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint-writer") if async_save else None
+    )
+    self._pending: Future | None = None
+    # 直前に書いた ckpt の (sha256, パス)。書き込みスレッドだけが触る
+    self._last_written: tuple[str, Path] | None = None
+
+  def save(
+    self,
+    agent: AgentPPO,
+    *,
+    run_dir: Path,
+    update: int,
+    total_env_steps: int,
+    episodes_finished: int,
+    numbered: bool = True,
+    latest: bool = False,
+    final: bool = False,
+    metrics: dict[str, float] | None = None,
+  ) -> list[Path]:
+    """``metrics``: マニフェストに残す指標（``train/ep_return_mean`` など。``keep_best`` で使う）。"""
+    paths = [
+      Path(run_dir) / name
+      for name in _checkpoint_names(update, numbered=numbered, latest=latest, final=final)
+    ]
+    if not paths:
+      return []
+    payload = build_payload(
+      agent,
+      update=update,
+      total_env_steps=total_env_steps,
+      episodes_finished=episodes_finished,
+    )
+    chunks = serialize_payload(payload, file_format=self.file_format)
+    # 前回分は checkpoint_every 回の update の間に書き終わっているはず（溜め込まない）
+    self.wait()
+    job = functools.partial(
+      self._write,
+      chunks,
+      paths,
+      update=update,
+      total_env_steps=total_env_steps,
+      metrics=dict(metrics or {}),
+    )
+    if self._executor is None:
+      job()
+    else:
+      self._pending = self._executor.submit(job)
+    return paths
+
+  def _write(
+    self,
+    chunks: list[bytes | memoryview],
+    paths: list[Path],
+    *,
+    update: int,
+    total_env_steps: int,
+    metrics: dict[str, float],
+  ) -> None:
+    digest = _chunks_sha256(chunks)
+    linked_from: Path | None = None
+    last = self._last_written
+    if last is not None and last[0] == digest and last[1].is_file() and last[1] not in paths:
+      linked_from = last[1]
+      for path in paths:
+        _link_atomic(linked_from, path)
+    else:
+      write_checkpoint_files(chunks, paths)
+    self._last_written = (digest, linked_from or paths[0])
+    if self.retention is not None:
+      removed = record_checkpoint(
+        paths,
+        update=update,
+        total_env_steps=total_env_steps,
+        sha256=digest,
+        metrics=metrics,
+        policy=self.retention,
+        linked_from=linked_from,
+      )
+      if removed:
+        print(f"[checkpoint] retention removed {', '.join(p.name for p in removed)}")
+
+  def wait(self) -> None:
+    """書き込み中のチェックポイントを待つ。"""
+    pending, self._pending = self._pending, None
+    if pending is not None:
+      pending.result()
+
+  def close(self) -> None:
+    try:
+      self.wait()
+    finally:
+      if self._executor is not None:
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+
 def save_agent_checkpoint(
   agent: AgentPPO,
   *,
@@ -92,30 +291,33 @@ def save_agent_checkpoint(
   numbered: bool = True,
   latest: bool = False,
   final: bool = False,
+  file_format: str = "tensors",
 ) -> list[Path]:
-  """agent の重み（と optimizer）を保存。書き込んだパスの一覧を返す。"""
-  payload = build_payload(
+  """agent の重み（と optimizer）を同期で保存。書き込んだパスの一覧を返す。"""
+  return CheckpointWriter(file_format=file_format, async_save=False).save(
     agent,
+    run_dir=run_dir,
     update=update,
     total_env_steps=total_env_steps,
     episodes_finished=episodes_finished,
+    numbered=numbered,
+    latest=latest,
+    final=final,
   )
-  written: list[Path] = []
-  if numbered:
-    path = run_dir / f"update_{update:06d}.pt"
-    torch.save(payload, path)
-    written.append(path)
-  if latest:
-    path = run_dir / "latest.pt"
-    torch.save(payload, path)
-    written.append(path)
-  if final:
-    path = run_dir / "final.pt"
-    torch.save(payload, path)
-    written.append(path)
-  return written
 
 
-def load_checkpoint(path: str | Path, *, map_location: str | torch.device = "cpu") -> dict[str, Any]:
-  """.pt を読み込む。AgentPPO.from_checkpoint が利用。"""
+def load_checkpoint(
+  path: str | Path,
+  *,
+  map_location: str | torch.device = "cpu",
+  include_optimizer: bool = True,
+) -> dict[str, Any]:
+  """.pt を読み込む。AgentPPO.from_checkpoint が利用。
+
+  mmap 形式（rl/checkpoint_file.py）ならテンソルはファイルを指したまま返し、
+  ``include_optimizer=False`` のとき optimizer の state は読まない（payload に含めない）。
+  torch.save 形式（以前の .pt）は全体を読み込む。
+  """
+  if is_tensor_checkpoint(path):
+    return load_tensor_checkpoint(path, map_location=map_location, include_optimizer=include_optimizer)
   return torch.load(path, map_location=map_location, weights_only=False)
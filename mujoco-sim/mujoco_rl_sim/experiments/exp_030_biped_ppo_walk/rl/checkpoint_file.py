@@ -0,0 +1,177 @@
+"""テンソルを mmap で遅延読み込みできるチェックポイントファイル（safetensors 互換の配置）。
+
+ファイルは ``[u64 LE: ヘッダ長][JSON ヘッダ][テンソルの生バイト列]``。ヘッダは
+``{名前: {"dtype", "shape", "data_offsets"}}`` と ``__metadata__``（文字列のみ）で、
+safetensors のツールでもテンソルを読める。テンソル以外の値（update 数・optimizer の
+param_groups など）は、テンソルの位置を ``{"__tensor__": 名前}`` で示した JSON として
+``__metadata__["payload"]`` に入れる。
+
+読み込みは ``np.memmap``（copy-on-write）の切り出しで、触ったテンソルのページだけが
+ディスクから読まれる。``include_optimizer=False`` なら optimizer のテンソルは作らない。
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import torch
+
+TENSOR_CHECKPOINT_FORMAT = "mmap_tensor_checkpoint_v1"
+
+_DTYPE_CODES = {
+  np.dtype(np.float64): "F64",
+  np.dtype(np.float32): "F32",
+  np.dtype(np.float16): "F16",
+  np.dtype(np.int64): "I64",
+  np.dtype(np.int32): "I32",
+  np.dtype(np.int16): "I16",
+  np.dtype(np.int8): "I8",
+  np.dtype(np.uint8): "U8",
+  np.dtype(np.bool_): "BOOL",
+}
+_CODE_DTYPES = {code: dtype for dtype, code in _DTYPE_CODES.items()}
+# ヘッダが極端に大きいファイルは torch.save 形式などの別物とみなす
+_MAX_HEADER_BYTES = 100 * 1024 * 1024
+
+
+def _encode(obj: Any, key: str, arrays: dict[str, np.ndarray]) -> Any:
+  """payload を JSON 化できる骨格に変換し、テンソル・配列は ``arrays`` に（コピーして）集める。"""
+  if isinstance(obj, torch.Tensor):
+    # 学習は保存中も重みを上書きするので、この時点の値をコピーしておく
+    arrays[key] = np.array(obj.detach().cpu().numpy(), copy=True)
+    return {"__tensor__": key}
+  if isinstance(obj, np.ndarray):
+    arrays[key] = np.array(obj, copy=True)
+    return {"__ndarray__": key}
+  if isinstance(obj, dict):
+    if all(isinstance(k, str) for k in obj):
+      return {k: _encode(v, f"{key}.{k}" if key else k, arrays) for k, v in obj.items()}
+    # optimizer.state のような int キーの辞書
+    return {
+      "__items__": [
+        [_encode(k, "", arrays), _encode(v, f"{key}.{k}", arrays)] for k, v in obj.items()
+      ]
+    }
+  if isinstance(obj, tuple):
+    return {"__tuple__": [_encode(v, f"{key}.{i}", arrays) for i, v in enumerate(obj)]}
+  if isinstance(obj, list):
+    return [_encode(v, f"{key}.{i}", arrays) for i, v in enumerate(obj)]
+  if isinstance(obj, np.generic):
+    return obj.item()
+  if obj is None or isinstance(obj, (bool, int, float, str)):
+    return obj
+  raise TypeError(f"cannot store {type(obj).__name__} at {key!r} in a tensor checkpoint")
+
+
+def _decode(skel: Any, load_array: Callable[[str], np.ndarray], as_tensor: Callable[[np.ndarray], Any]) -> Any:
+  if isinstance(skel, dict):
+    if "__tensor__" in skel:
+      return as_tensor(load_array(skel["__tensor__"]))
+    if "__ndarray__" in skel:
+      return load_array(skel["__ndarray__"])
+    if "__items__" in skel:
+      return {
+        _decode(k, load_array, as_tensor): _decode(v, load_array, as_tensor) for k, v in skel["__items__"]
+      }
+    if "__tuple__" in skel:
+      return tuple(_decode(v, load_array, as_tensor) for v in skel["__tuple__"])
+    return {k: _decode(v, load_array, as_tensor) for k, v in skel.items()}
+  if isinstance(skel, list):
+    return [_decode(v, load_array, as_tensor) for v in skel]
+  return skel
+
+
+def encode_tensor_checkpoint(payload: dict[str, Any]) -> list[bytes | memoryview]:
+  """payload をファイルに書くバイト列の並びにする（テンソルはこの時点でコピー済み）。"""
+  arrays: dict[str, np.ndarray] = {}
+  skeleton = _encode(payload, "", arrays)
+  # 要素サイズの大きい順に並べると、各テンソルの先頭が自分の要素サイズの倍数に揃う
+  names = sorted(arrays, key=lambda name: -arrays[name].dtype.itemsize)
+  header: dict[str, Any] = {
+    "__metadata__": {"format": TENSOR_CHECKPOINT_FORMAT, "payload": json.dumps(skeleton)},
+  }
+  chunks: list[bytes | memoryview] = []
+  offset = 0
+  for name in names:
+    arr = arrays[name]  # _encode でコピー済み（C 連続）。0 次元のまま扱う
+    if arr.dtype not in _DTYPE_CODES:
+      raise TypeError(f"unsupported dtype {arr.dtype} for tensor {name!r}")
+    header[name] = {
+      "dtype": _DTYPE_CODES[arr.dtype],
+      "shape": list(arr.shape),
+      "data_offsets": [offset, offset + arr.nbytes],
+    }
+    offset += arr.nbytes
+    if arr.nbytes:
+      chunks.append(memoryview(arr.reshape(-1)).cast("B"))
+  header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+  # データ部の先頭を 8 バイト境界に揃える（safetensors と同じく空白で詰める）
+  header_bytes += b" " * (-(8 + len(header_bytes)) % 8)
+  return [struct.pack("<Q", len(header_bytes)), header_bytes, *chunks]
+
+
+def _read_header(path: Path) -> tuple[int, dict[str, Any]] | None:
+  with path.open("rb") as fh:
+    head = fh.read(8)
+    if len(head) < 8:
+      return None
+    (n,) = struct.unpack("<Q", head)
+    if n == 0 or n > _MAX_HEADER_BYTES:
+      return None
+    raw = fh.read(n)
+  if len(raw) != n or not raw.startswith(b"{"):
+    return None
+  try:
+    header = json.loads(raw)
+  except ValueError:
+    return None
+  if header.get("__metadata__", {}).get("format") != TENSOR_CHECKPOINT_FORMAT:
+    return None
+  return 8 + n, header
+
+
+def is_tensor_checkpoint(path: str | Path) -> bool:
+  """``path`` がこの形式なら True（torch.save の zip / pickle なら False）。"""
+  return _read_header(Path(path)) is not None
+
+
+def load_tensor_checkpoint(
+  path: str | Path,
+  *,
+  map_location: str | torch.device = "cpu",
+  include_optimizer: bool = True,
+) -> dict[str, Any]:
+  """payload を復元する。テンソルはファイルの mmap を指す（書き換えてもファイルは変わらない）。"""
+  path = Path(path)
+  parsed = _read_header(path)
+  if parsed is None:
+    raise ValueError(f"not a {TENSOR_CHECKPOINT_FORMAT} file: {path}")
+  data_start, header = parsed
+  skeleton = json.loads(header["__metadata__"]["payload"])
+  if not include_optimizer:
+    skeleton.pop("optimizer", None)
+
+  data: np.ndarray | None = None
+
+  def load_array(name: str) -> np.ndarray:
+    nonlocal data
+    entry = header[name]
+    dtype = _CODE_DTYPES[entry["dtype"]]
+    start, end = entry["data_offsets"]
+    if start == end:
+      return np.empty(entry["shape"], dtype=dtype)
+    if data is None:
+      data = np.memmap(path, dtype=np.uint8, mode="c", offset=data_start)
+    return data[start:end].view(dtype).reshape(entry["shape"])
+
+  device = torch.device(map_location)
+
+  def as_tensor(arr: np.ndarray) -> torch.Tensor:
+    tensor = torch.from_numpy(arr)
+    return tensor if device.type == "cpu" else tensor.to(device)
+
+  return _decode(skeleton, load_array, as_tensor)
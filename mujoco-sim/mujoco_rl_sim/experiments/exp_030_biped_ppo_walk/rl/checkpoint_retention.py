@@ -0,0 +1,314 @@
+"""run ディレクトリのチェックポイント保持ポリシーとマニフェスト（``checkpoints.json``）。
+
+``update_*.pt`` のうち次のどれかに当たるものだけを残し、それ以外は削除する
+（``latest.pt`` / ``final.pt`` は常に残す。ハードリンクなので元の update を消しても残る）:
+
+- ``keep_last``: 最新 N 個
+- ``keep_every``: update 数が K の倍数
+- ``keep_best``: ``best_metric``（大きいほど良い。学習中の ``train/ep_return_mean`` や
+  ``eval_reports`` の主指標 ``eval/displacement_x_mean``）の上位 N 個
+
+3 つとも 0 なら削除しない（マニフェストだけ書く）。マニフェストは残っている .pt の一覧
+（update・sha256・サイズ・指標・残した理由）で、dispatch の checkpoint 一覧や
+``eval_compare`` / run ディレクトリ eval はファイル走査の代わりにこれを読む。
+学習中の ``CheckpointWriter`` と post-train eval（別プロセスのこともある）が同じマニフェストを
+読み書きするので、読んでから書くまでを ``manifest_lock`` で囲む。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+try:
+  import fcntl
+except ImportError:  # Windows
+  fcntl = None
+
+# dispatch/coordinator/services/checkpoint_catalog.py も同じファイル名・形式を読む
+CHECKPOINT_MANIFEST_FILENAME = "checkpoints.json"
+CHECKPOINT_MANIFEST_FORMAT = "checkpoint_manifest_v1"
+_NUMBERED_PREFIX = "update_"
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+  keep_last: int = 0
+  keep_every: int = 0
+  keep_best: int = 0
+  best_metric: str = "train/ep_return_mean"
+
+  @classmethod
+  def from_cfg(cls, checkpoint_cfg: Any) -> RetentionPolicy:
+    return cls(
+      keep_last=int(checkpoint_cfg.keep_last),
+      keep_every=int(checkpoint_cfg.keep_every),
+      keep_best=int(checkpoint_cfg.keep_best),
+      best_metric=str(checkpoint_cfg.keep_best_metric),
+    )
+
+  @property
+  def prunes(self) -> bool:
+    return self.keep_last > 0 or self.keep_every > 0 or self.keep_best > 0
+
+
+def manifest_path(run_dir: Path) -> Path:
+  return Path(run_dir) / CHECKPOINT_MANIFEST_FILENAME
+
+
+@contextmanager
+def manifest_lock(run_dir: Path) -> Iterator[None]:
+  """マニフェストの読み書きを他のスレッド・プロセスと直列化する（``.checkpoints.json.lock`` の flock）。
+
+  同じプロセス内でも開くたびに別のロックになるので入れ子にしないこと。fcntl が無い環境では何もしない。
+  """
+  if fcntl is None:
+    yield
+    return
+  lock_path = Path(run_dir) / f".{CHECKPOINT_MANIFEST_FILENAME}.lock"
+  with lock_path.open("a") as fh:
+    fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+    try:
+      yield
+    finally:
+      fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def load_manifest(run_dir: Path) -> dict[str, Any] | None:
+  """マニフェストを読む（無い・壊れている・形式違いなら None）。"""
+  path = manifest_path(run_dir)
+  try:
+    data = json.loads(path.read_text(encoding="utf-8"))
+  except (OSError, ValueError):
+    return None
+  if not isinstance(data, dict) or data.get("format") != CHECKPOINT_MANIFEST_FORMAT:
+    return None
+  return data
+
+
+def _empty_manifest() -> dict[str, Any]:
+  return {"format": CHECKPOINT_MANIFEST_FORMAT, "checkpoints": []}
+
+
+def write_manifest(run_dir: Path, manifest: dict[str, Any]) -> Path:
+  path = manifest_path(run_dir)
+  manifest["updated_utc"] = datetime.now(timezone.utc).isoformat()
+  tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+  tmp.write_text(json.dumps(manifest, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+  os.replace(tmp, path)
+  return path
+
+
+def manifest_checkpoint_paths(run_dir: Path) -> list[Path] | None:
+  """マニフェストにある .pt のパス（ファイル名順）。マニフェストが無ければ None。"""
+  manifest = load_manifest(run_dir)
+  if manifest is None:
+    return None
+  return [Path(run_dir) / e["filename"] for e in sorted(manifest["checkpoints"], key=lambda e: e["filename"])]
+
+
+def _metric_value(entry: dict[str, Any], name: str) -> float | None:
+  value = (entry.get("metrics") or {}).get(name)
+  if value is None:
+    return None
+  value = float(value)
+  return value if math.isfinite(value) else None
+
+
+def select_kept(entries: list[dict[str, Any]], policy: RetentionPolicy) -> dict[str, list[str]]:
+  """残すファイル名 → 理由（``last`` / ``every`` / ``best`` / ``alias``）。"""
+  kept: dict[str, list[str]] = {}
+  numbered = sorted(
+    (e for e in entries if e["filename"].startswith(_NUMBERED_PREFIX)), key=lambda e: int(e["update"])
+  )
+  for e in entries:
+    if not e["filename"].startswith(_NUMBERED_PREFIX):
+      kept.setdefault(e["filename"], []).append("alias")
+  if not policy.prunes:
+    for e in numbered:
+      kept.setdefault(e["filename"], []).append("all")
+    return kept
+  if policy.keep_last > 0:
+    for e in numbered[-policy.keep_last :]:
+      kept.setdefault(e["filename"], []).append("last")
+  if policy.keep_every > 0:
+    for e in numbered:
+      if int(e["update"]) % policy.keep_every == 0:
+        kept.setdefault(e["filename"], []).append("every")
+  if policy.keep_best > 0:
+    scored = [(v, e) for e in numbered if (v := _metric_value(e, policy.best_metric)) is not None]
+    scored.sort(key=lambda ve: (ve[0], int(ve[1]["update"])), reverse=True)
+    for _, e in scored[: policy.keep_best]:
+      kept.setdefault(e["filename"], []).append("best")
+  return kept
+
+
+def apply_retention(
+  run_dir: Path,
+  manifest: dict[str, Any],
+  policy: RetentionPolicy,
+) -> list[Path]:
+  """ポリシー外の ``update_*.pt`` を削除し、マニフェストを書き直す。削除したパスを返す。
+
+  ``manifest`` を読んだときから ``manifest_lock`` を持ったまま呼ぶこと。
+  """
+  run_dir = Path(run_dir)
+  entries = [e for e in manifest["checkpoints"] if (run_dir / e["filename"]).is_file()]
+  kept = select_kept(entries, policy)
+  removed: list[Path] = []
+  survivors: list[dict[str, Any]] = []
+  for e in entries:
+    reasons = kept.get(e["filename"])
+    if reasons is None:
+      path = run_dir / e["filename"]
+      path.unlink(missing_ok=True)
+      removed.append(path)
+      continue
+    survivors.append({**e, "keep": reasons})
+  manifest["checkpoints"] = survivors
+  manifest["policy"] = asdict(policy)
+  write_manifest(run_dir, manifest)
+  return removed
+
+
+def _checkpoint_entry(
+  path: Path,
+  *,
+  update: int,
+  total_env_steps: int,
+  sha256: str,
+  metrics: dict[str, float] | None,
+  alias_of: str | None,
+) -> dict[str, Any]:
+  stat = path.stat()
+  return {
+    "filename": path.name,
+    "update": int(update),
+    "total_env_steps": int(total_env_steps),
+    "sha256": sha256,
+    "size_bytes": int(stat.st_size),
+    "mtime_utc": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat(),
+    "metrics": {k: float(v) for k, v in (metrics or {}).items()},
+    # latest / final と同じ中身（ハードリンク）の update_*.pt
+    "alias_of": alias_of if alias_of != path.name else None,
+  }
+
+
+def record_checkpoint(
+  paths: list[Path],
+  *,
+  update: int,
+  total_env_steps: int,
+  sha256: str,
+  metrics: dict[str, float] | None,
+  policy: RetentionPolicy,
+  linked_from: Path | None = None,
+) -> list[Path]:
+  """書き終えた（同じ中身の）``paths`` をマニフェストに足してから保持ポリシーを適用する。
+
+  ``linked_from``: 中身が同じだったため ``paths`` をリンクした既存の ckpt。
+  """
+  run_dir = paths[0].parent
+  if linked_from is not None:
+    alias_of = linked_from.name
+  else:
+    alias_of = next((p.name for p in paths if p.name.startswith(_NUMBERED_PREFIX)), None)
+  with manifest_lock(run_dir):
+    manifest = load_manifest(run_dir) or _empty_manifest()
+    by_name = {e["filename"]: e for e in manifest["checkpoints"]}
+    for path in paths:
+      by_name[path.name] = _checkpoint_entry(
+        path,
+        update=update,
+        total_env_steps=total_env_steps,
+        sha256=sha256,
+        metrics=metrics,
+        alias_of=alias_of,
+      )
+    manifest["checkpoints"] = list(by_name.values())
+    return apply_retention(run_dir, manifest, policy)
+
+
+def _file_sha256(path: Path) -> str:
+  digest = hashlib.sha256()
+  with path.open("rb") as fh:
+    while chunk := fh.read(1 << 20):
+      digest.update(chunk)
+  return digest.hexdigest()
+
+
+def _report_metrics(run_dir: Path, filename: str) -> dict[str, float]:
+  """``eval/post_train.py`` が書いた report の主指標（``final.pt`` は run 直下、他は eval_reports/）。"""
+  stem = Path(filename).stem
+  report_path = run_dir / ("eval_report.json" if filename == "final.pt" else f"eval_reports/{stem}.json")
+  try:
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    return {str(report["primary_metric_name"]): float(report["primary_metric_value"])}
+  except (OSError, ValueError, KeyError, TypeError):
+    return {}
+
+
+def rebuild_manifest(run_dir: Path) -> dict[str, Any]:
+  """run ディレクトリの ``*.pt`` を読み直してマニフェストを作る（既存の指標は引き継ぐ）。
+
+  マニフェスト導入前の run や、手で .pt を消した run 用。update 数はファイル名
+  （``update_XXXXXX.pt``）から、それ以外は ckpt の payload から読む。
+  """
+  from rl.checkpoint import load_checkpoint
+
+  run_dir = Path(run_dir)
+  previous = {e["filename"]: e for e in (load_manifest(run_dir) or _empty_manifest())["checkpoints"]}
+  entries: list[dict[str, Any]] = []
+  numbered_by_sha: dict[str, str] = {}
+  for path in sorted(run_dir.glob("*.pt")):
+    sha = _file_sha256(path)
+    old = previous.get(path.name)
+    if old is not None and old.get("sha256") == sha:
+      update, total_env_steps = int(old["update"]), int(old["total_env_steps"])
+    else:
+      payload = load_checkpoint(path, include_optimizer=False)
+      update, total_env_steps = int(payload.get("update", 0)), int(payload.get("total_env_steps", 0))
+    metrics = {**((old or {}).get("metrics") or {}), **_report_metrics(run_dir, path.name)}
+    if path.name.startswith(_NUMBERED_PREFIX):
+      numbered_by_sha.setdefault(sha, path.name)
+    entries.append(
+      _checkpoint_entry(
+        path, update=update, total_env_steps=total_env_steps, sha256=sha, metrics=metrics, alias_of=None
+      )
+    )
+  for e in entries:
+    if not e["filename"].startswith(_NUMBERED_PREFIX):
+      e["alias_of"] = numbered_by_sha.get(e["sha256"])
+  manifest = _empty_manifest()
+  manifest["checkpoints"] = entries
+  return manifest
+
+
+def record_eval_metrics(checkpoint_path: Path, metrics: dict[str, float]) -> bool:
+  """eval 結果の指標をマニフェストの該当 ckpt に足す（ckpt が載っていなければ False）。
+
+  同じ中身の ckpt（``alias_of``）にも同じ値を入れ、``keep_best`` の候補にする。
+  """
+  checkpoint_path = Path(checkpoint_path)
+  run_dir = checkpoint_path.parent
+  with manifest_lock(run_dir):
+    manifest = load_manifest(run_dir)
+    if manifest is None:
+      return False
+    by_name = {e["filename"]: e for e in manifest["checkpoints"]}
+    entry = by_name.get(checkpoint_path.name)
+    if entry is None:
+      return False
+    targets = {checkpoint_path.name}
+    targets.update(e["filename"] for e in manifest["checkpoints"] if e.get("sha256") == entry.get("sha256"))
+    for name in targets:
+      by_name[name]["metrics"] = {**(by_name[name].get("metrics") or {}), **{k: float(v) for k, v in metrics.items()}}
+    write_manifest(run_dir, manifest)
+    return True
@@ -0,0 +1,121 @@
+"""学習済み方策を推論専用の成果物に書き出す（critic・optimizer・Hydra 設定は含めない）。
+
+- ``.policy.npz``: actor MLP の重みと観測正規化の定数。``rl/policy_runtime.py`` が numpy だけで読む
+- ``.policy.pt2``（任意）: 同じ計算（正規化 → MLP → tanh）の ``torch.export`` プログラム
+  （``torch.export.load(path).module()`` で呼べる。torch のある環境向け）
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from eval.cache import file_sha256
+from lib.load_run_context import ctx_from_checkpoint
+from rl.agent import AgentPPO
+from rl.policy_runtime import POLICY_ARTIFACT_FORMAT
+
+
+def policy_artifact_path(checkpoint_path: Path, suffix: str = ".policy.npz") -> Path:
+  """既定の書き出し先（``final.pt`` → ``final.policy.npz``）。"""
+  return checkpoint_path.with_name(checkpoint_path.stem + suffix)
+
+
+def _actor_linears(agent: AgentPPO) -> list[nn.Linear]:
+  layers = list(agent.actor.net)
+  linears = [layer for layer in layers if isinstance(layer, nn.Linear)]
+  # ランタイムは「Linear + ReLU の繰り返し、最終層は線形」だけを実装している
+  expected = [nn.Linear, nn.ReLU] * (len(linears) - 1) + [nn.Linear]
+  if [type(layer) for layer in layers] != expected:
+    raise ValueError(f"unsupported actor layout: {[type(layer).__name__ for layer in layers]}")
+  return linears
+
+
+def export_policy_npz(agent: AgentPPO, out_path: Path, *, meta: dict[str, Any] | None = None) -> Path:
+  """actor と観測正規化の定数を ``out_path``（.npz）に書く。"""
+  arrays: dict[str, np.ndarray] = {}
+  linears = _actor_linears(agent)
+  for i, layer in enumerate(linears):
+    arrays[f"w{i}"] = layer.weight.detach().cpu().numpy().astype(np.float32)
+    arrays[f"b{i}"] = layer.bias.detach().cpu().numpy().astype(np.float32)
+  norm = agent.obs_normalizer
+  if norm is not None:
+    # ObsNormalizer が推論で使う float32 の係数をそのまま持つ
+    arrays["obs_mean"], arrays["obs_inv_std"] = norm.affine()
+    arrays["obs_clip"] = np.float32(norm.clip)
+  full_meta = {
+    **(meta or {}),
+    "format": POLICY_ARTIFACT_FORMAT,
+    "obs_dim": int(agent.obs_dim),
+    "action_dim": int(agent.action_dim),
+    "hidden_sizes": [int(x) for x in agent.hidden_sizes],
+    "num_layers": len(linears),
+    "obs_norm": norm is not None,
+  }
+  out_path = Path(out_path)
+  out_path.parent.mkdir(parents=True, exist_ok=True)
+  with out_path.open("wb") as fh:
+    np.savez(fh, meta=np.asarray(json.dumps(full_meta, ensure_ascii=False)), **arrays)
+  return out_path
+
+
+class _DeterministicPolicy(nn.Module):
+  """``torch.export`` 用: 正規化 → actor MLP → tanh（``act_eval`` と同じ計算）。"""
+
+  def __init__(self, agent: AgentPPO):
+    super().__init__()
+    self.net = agent.actor.net
+    norm = agent.obs_normalizer
+    obs_dim = int(agent.obs_dim)
+    if norm is not None:
+      mean, inv_std = norm.affine()
+    else:
+      mean, inv_std = np.zeros(obs_dim, dtype=np.float32), np.ones(obs_dim, dtype=np.float32)
+    self.use_norm = norm is not None
+    self.register_buffer("obs_mean", torch.from_numpy(mean))
+    self.register_buffer("obs_inv_std", torch.from_numpy(inv_std))
+    self.obs_clip = float(norm.clip) if norm is not None else 0.0
+
+  def forward(self, obs: torch.Tensor) -> torch.Tensor:
+    if self.use_norm:
+      obs = ((obs - self.obs_mean) * self.obs_inv_std).clamp(-self.obs_clip, self.obs_clip)
+    return torch.tanh(self.net(obs))
+
+
+def export_policy_program(agent: AgentPPO, out_path: Path) -> Path:
+  """``[1, obs_dim]`` 入力で ``torch.export`` した方策を ``out_path``（.pt2）に保存する。"""
+  program = torch.export.export(
+    _DeterministicPolicy(agent).eval(),
+    (torch.zeros(1, int(agent.obs_dim), dtype=torch.float32),),
+  )
+  out_path = Path(out_path)
+  out_path.parent.mkdir(parents=True, exist_ok=True)
+  torch.export.save(program, out_path)
+  return out_path
+
+
+def export_checkpoint_policy(
+  checkpoint_path: Path,
+  *,
+  out_path: Path | None = None,
+  torch_program: bool = False,
+) -> list[Path]:
+  """チェックポイントから推論用成果物を書き出し、書いたパスの一覧を返す。"""
+  checkpoint_path = Path(checkpoint_path)
+  ctx = ctx_from_checkpoint(checkpoint_path)
+  agent = AgentPPO.from_checkpoint(ctx, checkpoint_path, load_optimizer=False)
+  meta = {
+    "exp_name": ctx.exp_name,
+    "source_checkpoint": checkpoint_path.name,
+    "source_checkpoint_sha256": file_sha256(checkpoint_path),
+  }
+  npz_path = out_path if out_path is not None else policy_artifact_path(checkpoint_path)
+  written = [export_policy_npz(agent, npz_path, meta=meta)]
+  if torch_program:
+    written.append(export_policy_program(agent, Path(npz_path).with_suffix(".pt2")))
+  return written
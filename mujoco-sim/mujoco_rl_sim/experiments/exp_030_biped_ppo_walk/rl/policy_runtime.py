@@ -0,0 +1,95 @@
+"""書き出した方策（``rl/policy_export.py`` の .npz）を numpy だけで推論するランタイム。
+
+torch・Hydra・MuJoCo を import しない（このファイルだけをロボット側にコピーしても動く）。
+中身は actor の MLP（Linear + ReLU、最終層は線形）と観測正規化の定数のみで、
+``act`` は ``AgentPPO.act_eval`` と同じ平均行動 ``tanh(loc)`` を返す
+（行列積の縮約順が違うため一致は float32 の丸め誤差程度）。
+
+例::
+
+  policy = NumpyPolicy.load("runs/.../final.policy.npz")
+  action = policy.act(obs)  # [action_dim] float32（次の act で上書きされるバッファ）
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+POLICY_ARTIFACT_FORMAT = "mlp_tanh_policy_npz_v1"
+
+
+class NumpyPolicy:
+  """1 観測ずつの決定的推論（中間バッファは構築時に確保し、step ごとに確保しない）。"""
+
+  def __init__(
+    self,
+    weights: list[np.ndarray],
+    biases: list[np.ndarray],
+    *,
+    obs_mean: np.ndarray | None = None,
+    obs_inv_std: np.ndarray | None = None,
+    obs_clip: float = 0.0,
+    meta: dict[str, Any] | None = None,
+  ):
+    if len(weights) != len(biases) or not weights:
+      raise ValueError("weights / biases must be non-empty and of equal length")
+    self.weights = [np.ascontiguousarray(w, dtype=np.float32) for w in weights]
+    self.biases = [np.ascontiguousarray(b, dtype=np.float32) for b in biases]
+    self.obs_dim = int(self.weights[0].shape[1])
+    self.action_dim = int(self.weights[-1].shape[0])
+    self.meta = dict(meta or {})
+    self._obs_mean = None if obs_mean is None else np.asarray(obs_mean, dtype=np.float32)
+    self._obs_inv_std = None if obs_inv_std is None else np.asarray(obs_inv_std, dtype=np.float32)
+    self._obs_clip = float(obs_clip)
+    self._x = np.zeros(self.obs_dim, dtype=np.float32)
+    self._hidden = [np.zeros(w.shape[0], dtype=np.float32) for w in self.weights]
+
+  @classmethod
+  def load(cls, path: str | Path) -> NumpyPolicy:
+    with np.load(Path(path), allow_pickle=False) as z:
+      meta = json.loads(str(z["meta"]))
+      if meta.get("format") != POLICY_ARTIFACT_FORMAT:
+        raise ValueError(f"unsupported policy artifact format: {meta.get('format')!r}")
+      n_layers = int(meta["num_layers"])
+      has_norm = "obs_mean" in z.files
+      return cls(
+        [z[f"w{i}"] for i in range(n_layers)],
+        [z[f"b{i}"] for i in range(n_layers)],
+        obs_mean=z["obs_mean"] if has_norm else None,
+        obs_inv_std=z["obs_inv_std"] if has_norm else None,
+        obs_clip=float(z["obs_clip"]) if has_norm else 0.0,
+        meta=meta,
+      )
+
+  def act(self, obs) -> np.ndarray:
+    """観測 ``[obs_dim]`` → 平均行動 ``tanh(loc)`` ``[action_dim]``（内部バッファを返す）。"""
+    x = self._x
+    x[:] = obs
+    if self._obs_mean is not None:
+      np.subtract(x, self._obs_mean, out=x)
+      np.multiply(x, self._obs_inv_std, out=x)
+      np.clip(x, -self._obs_clip, self._obs_clip, out=x)
+    last = len(self.weights) - 1
+    for i, (w, b, h) in enumerate(zip(self.weights, self.biases, self._hidden)):
+      np.dot(w, x, out=h)
+      np.add(h, b, out=h)
+      if i < last:
+        np.maximum(h, 0.0, out=h)
+      x = h
+    return np.tanh(x, out=x)
+
+  def act_batch(self, obs_batch: np.ndarray) -> np.ndarray:
+    """``[N, obs_dim]`` → ``[N, action_dim]``（新しい配列を返す）。"""
+    x = np.asarray(obs_batch, dtype=np.float32)
+    if self._obs_mean is not None:
+      x = np.clip((x - self._obs_mean) * self._obs_inv_std, -self._obs_clip, self._obs_clip)
+    last = len(self.weights) - 1
+    for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+      x = x @ w.T + b
+      if i < last:
+        np.maximum(x, 0.0, out=x)
+    return np.tanh(x)
@@ -0,0 +1,116 @@
+"""PPO ロールアウト用の事前確保バッファ（``[horizon, num_envs, ...]`` 固定レイアウト）。
+
+1 update 分の遷移を env ごとの列に分けて保持する（env を 1 本の系列に混ぜない）。
+書き込み位置は env ごとのカーソルで管理し、Subproc VecEnv のパイプライン収集のように
+env の一部（列範囲）だけを先に書き込むこともできる。配列は ``allocate`` で一度だけ確保し、
+``store`` / ``store_batch`` は既存配列への代入のみ（step ごとの確保をしない）。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class RolloutBuffer:
+  """遷移配列（先頭 2 次元が ``[horizon, num_envs]``）と env ごとの書き込みカーソル。"""
+
+  obs: np.ndarray
+  actions: np.ndarray
+  rewards: np.ndarray
+  values: np.ndarray
+  dones: np.ndarray
+  log_probs: np.ndarray
+  cursor: np.ndarray
+
+  @classmethod
+  def allocate(
+    cls,
+    horizon: int,
+    num_envs: int,
+    *,
+    obs_dim: int,
+    action_dim: int,
+  ) -> RolloutBuffer:
+    if horizon < 1 or num_envs < 1:
+      raise ValueError(
+        f"horizon and num_envs must be >= 1, got horizon={horizon} num_envs={num_envs}"
+      )
+    shape = (int(horizon), int(num_envs))
+    return cls(
+      obs=np.zeros((*shape, int(obs_dim)), dtype=np.float32),
+      actions=np.zeros((*shape, int(action_dim)), dtype=np.float32),
+      rewards=np.zeros(shape, dtype=np.float32),
+      values=np.zeros(shape, dtype=np.float32),
+      dones=np.zeros(shape, dtype=np.float32),
+      log_probs=np.zeros(shape, dtype=np.float32),
+      cursor=np.zeros(int(num_envs), dtype=np.int64),
+    )
+
+  @property
+  def horizon(self) -> int:
+    return int(self.rewards.shape[0])
+
+  @property
+  def num_envs(self) -> int:
+    return int(self.rewards.shape[1])
+
+  @property
+  def filled_steps(self) -> int:
+    """全 env 列で書き込み済みの step 数（GAE に使える長さ）。"""
+    return int(self.cursor.min())
+
+  def clear(self) -> None:
+    """カーソルだけを戻す（配列は次のロールアウトで上書きされる）。"""
+    self.cursor[:] = 0
+
+  def store(
+    self,
+    env_id: int,
+    obs,
+    action,
+    reward: float,
+    value: float,
+    done: bool,
+    log_prob: float,
+  ) -> None:
+    """env ``env_id`` の列に 1 遷移を書き込む。"""
+    t = int(self.cursor[env_id])
+    if t >= self.horizon:
+      raise RuntimeError(f"rollout buffer is full for env {env_id} (horizon={self.horizon})")
+    self.obs[t, env_id] = obs
+    self.actions[t, env_id] = action
+    self.rewards[t, env_id] = reward
+    self.values[t, env_id] = value
+    self.dones[t, env_id] = done
+    self.log_probs[t, env_id] = log_prob
+    self.cursor[env_id] = t + 1
+
+  def store_batch(
+    self,
+    obs: np.ndarray,
+    actions: np.ndarray,
+    rewards: np.ndarray,
+    values: np.ndarray,
+    dones: np.ndarray,
+    log_probs: np.ndarray,
+    *,
+    env_slice: slice | None = None,
+  ) -> None:
+    """``env_slice``（既定: 全 env）の列に同じ step の遷移をまとめて書き込む。"""
+    env_slice = slice(0, self.num_envs) if env_slice is None else env_slice
+    cols = self.cursor[env_slice]
+    t = int(cols[0])
+    if not (cols == t).all():
+      raise RuntimeError(f"env columns {env_slice} are not at the same step: {cols}")
+    if t >= self.horizon:
+      raise RuntimeError(f"rollout buffer is full for envs {env_slice} (horizon={self.horizon})")
+    self.obs[t, env_slice] = obs
+    self.actions[t, env_slice] = actions
+    self.rewards[t, env_slice] = rewards
+    self.values[t, env_slice] = values
+    self.dones[t, env_slice] = dones
+    self.log_probs[t, env_slice] = log_probs
+    cols += 1
@@ -0,0 +1,129 @@
+"""観測・リターンの逐次正規化（平均・分散をロールアウト単位でまとめて更新する）。
+
+``Observation.build`` の静的スケール（おおよそ [-1, 1]）の上に掛ける 2 段目の正規化。
+統計はロールアウト中は固定し、``AgentPPO.update`` の最後に 1 回だけ更新する
+（収集時と update 時で同じ正規化になり、π_old の log_prob がずれない）。
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+
+class RunningMeanStd:
+  """Welford の逐次平均・分散を、バッチの平均・分散との合算（Chan の式）で更新する。"""
+
+  def __init__(self, shape: tuple[int, ...] = (), *, epsilon: float = 1e-4):
+    self.mean = np.zeros(shape, dtype=np.float64)
+    self.var = np.ones(shape, dtype=np.float64)
+    # 初期値（平均 0・分散 1）を epsilon 個分のサンプルとして扱う
+    self.count = float(epsilon)
+
+  def update(self, batch: np.ndarray) -> None:
+    """``[..., *shape]`` のサンプルをまとめて取り込む（先頭の軸はすべてサンプル軸）。"""
+    x = np.asarray(batch, dtype=np.float64).reshape(-1, *self.mean.shape)
+    x = x[np.isfinite(x).reshape(x.shape[0], -1).all(axis=1)]
+    n = x.shape[0]
+    if n == 0:
+      return
+    batch_mean = x.mean(axis=0)
+    batch_var = x.var(axis=0)
+    total = self.count + n
+    delta = batch_mean - self.mean
+    self.mean = self.mean + delta * (n / total)
+    m2 = self.var * self.count + batch_var * n + delta * delta * (self.count * n / total)
+    self.var = m2 / total
+    self.count = total
+
+  @property
+  def std(self) -> np.ndarray:
+    return np.sqrt(self.var)
+
+  def state_dict(self) -> dict[str, Any]:
+    return {"mean": self.mean.copy(), "var": self.var.copy(), "count": self.count}
+
+  def load_state_dict(self, state: dict[str, Any]) -> None:
+    mean = np.asarray(state["mean"], dtype=np.float64)
+    if mean.shape != self.mean.shape:
+      raise ValueError(f"running stats shape {mean.shape} != {self.mean.shape}")
+    self.mean = mean.copy()
+    self.var = np.asarray(state["var"], dtype=np.float64).copy()
+    self.count = float(state["count"])
+
+
+class ObsNormalizer:
+  """``(obs - mean) / sqrt(var + eps)`` を ``[-clip, clip]`` に収める（float32 で返す）。"""
+
+  def __init__(self, obs_dim: int, *, clip: float, epsilon: float = 1e-8):
+    self.rms = RunningMeanStd((int(obs_dim),))
+    self.clip = float(clip)
+    self.epsilon = float(epsilon)
+    self._refresh()
+
+  def _refresh(self) -> None:
+    # 推論のたびに割り算しないよう、統計を更新したときに係数を作り直す
+    self._mean = self.rms.mean.astype(np.float32)
+    self._inv_std = (1.0 / np.sqrt(self.rms.var + self.epsilon)).astype(np.float32)
+
+  def __call__(self, obs: np.ndarray) -> np.ndarray:
+    x = (np.asarray(obs, dtype=np.float32) - self._mean) * self._inv_std
+    return np.clip(x, -self.clip, self.clip, out=x)
+
+  def affine(self) -> tuple[np.ndarray, np.ndarray]:
+    """推論で使う float32 の ``(mean, inv_std)``（推論用成果物の書き出し用にコピーを返す）。"""
+    return self._mean.copy(), self._inv_std.copy()
+
+  def update(self, obs_batch: np.ndarray) -> None:
+    self.rms.update(obs_batch)
+    self._refresh()
+
+  def state_dict(self) -> dict[str, Any]:
+    return {**self.rms.state_dict(), "clip": self.clip, "epsilon": self.epsilon}
+
+  def load_state_dict(self, state: dict[str, Any]) -> None:
+    self.rms.load_state_dict(state)
+    self.clip = float(state.get("clip", self.clip))
+    self.epsilon = float(state.get("epsilon", self.epsilon))
+    self._refresh()
+
+
+class ReturnNormalizer:
+  """報酬を割引リターンの標準偏差で割る（平均は引かない）。
+
+  env 列ごとの割引リターン ``R_t = r_t + γ R_{t-1}``（エピソード終了で 0 に戻す）を
+  ロールアウトをまたいで持ち続け、その分散を ``RunningMeanStd`` で推定する。
+  途中の割引リターンは ckpt に保存しない。学習の再開時は全 env を reset して
+  エピソードを始め直すので、0 から積み直すのが正しい（num_envs を変えて再開してもよい）。
+  """
+
+  def __init__(self, num_envs: int, *, gamma: float, epsilon: float = 1e-8):
+    self.rms = RunningMeanStd(())
+    self.gamma = float(gamma)
+    self.epsilon = float(epsilon)
+    self._returns = np.zeros(int(num_envs), dtype=np.float64)
+
+  def scale_rollout(self, rewards: np.ndarray, dones: np.ndarray) -> np.ndarray:
+    """``[T, num_envs]`` の報酬でリターン統計を更新し、スケール済みの報酬（float32）を返す。"""
+    rewards = np.asarray(rewards, dtype=np.float64)
+    not_done = 1.0 - np.asarray(dones, dtype=np.float64)
+    returns = np.empty_like(rewards)
+    acc = self._returns
+    # 時間方向の再帰だけをループし、env 列はまとめて計算する
+    for t in range(rewards.shape[0]):
+      acc = rewards[t] + self.gamma * acc
+      returns[t] = acc
+      acc = acc * not_done[t]
+    self._returns = acc
+    self.rms.update(returns)
+    return (rewards / np.sqrt(self.rms.var + self.epsilon)).astype(np.float32)
+
+  def state_dict(self) -> dict[str, Any]:
+    return {**self.rms.state_dict(), "epsilon": self.epsilon}
+
+  def load_state_dict(self, state: dict[str, Any]) -> None:
+    """分散の統計だけを戻し、途中の割引リターンは 0 に戻す（再開時はエピソードを始め直すため）。"""
+    self.rms.load_state_dict(state)
+    self.epsilon = float(state.get("epsilon", self.epsilon))
+    self._returns = np.zeros_like(self._returns)
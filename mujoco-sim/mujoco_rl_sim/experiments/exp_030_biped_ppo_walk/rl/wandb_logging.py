@@ -7,6 +7,8 @@ from collections import Counter, deque
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+
 from lib.experiment_context import ExperimentContext
 from lib.episode_rolling import (
   EpisodeIntervalBuffer,
@@ -18,6 +20,7 @@ from lib.episode_rolling import (
 from lib.hydra_compose import cfg_to_dict
 from lib.run_dir import wandb_active_run_name
 
+from sim.step_info_ipc import STEP_INFO_DIM, STEP_INFO_INDEX, pack_step_info
 from sim.termination import (
   REASON_BACKWARD_LEAN,
   REASON_CONTACT_BASKET,
@@ -66,89 +69,129 @@ def _require_ctx() -> ExperimentContext:
   return _ctx
 
 
+# step_info 行（STEP_INFO_FIELDS）の列 → エピソード指標。step ごとに env 別に足し込む
+_EPISODE_SUM_METRICS: tuple[tuple[str, str], ...] = (
+  ("reward_forward", "episode/forward_reward_sum"),
+  ("reward_forward_imu", "episode/forward_imu_reward_sum"),
+  ("reward_forward_foot", "episode/forward_foot_reward_sum"),
+  ("reward_effort_penalty", "episode/effort_penalty_sum"),
+  ("reward_shaping", "episode/shaping_sum"),
+  ("reward_upright", "episode/upright_bonus_sum"),
+  ("reward_push_off", "episode/push_off_bonus_sum"),
+  ("reward_landing", "episode/landing_bonus_sum"),
+  ("reward_backward_lean_penalty", "episode/backward_lean_penalty_sum"),
+  ("reward_forward_lean_penalty", "episode/forward_lean_penalty_sum"),
+  ("reward_height_penalty", "episode/height_penalty_sum"),
+  ("reward_flight_duration_penalty", "episode/flight_duration_penalty_sum"),
+  ("reward_heading_misalign_penalty", "episode/heading_misalign_penalty_sum"),
+  ("reward_lateral_tilt_penalty", "episode/lateral_tilt_penalty_sum"),
+  ("reward_shank_step_penalty", "episode/shank_step_penalty_sum"),
+  ("reward_double_support_penalty", "episode/double_support_penalty_sum"),
+  ("reward_alternating_landing", "episode/alternating_landing_bonus_sum"),
+)
+# 0.5 超の step 数を数える列 → (指標名, エピソード長で割るか)
+_EPISODE_COUNT_METRICS: tuple[tuple[str, str, bool], ...] = (
+  ("foot_on_floor", "episode/foot_contact_ratio", True),
+  ("single_support", "episode/single_support_ratio", True),
+  ("both_feet_on_floor", "episode/double_support_ratio", True),
+  ("landed", "episode/landing_count", False),
+  ("alternating_landing", "episode/alternating_landing_count", False),
+)
+_SUM_COLS = np.array([STEP_INFO_INDEX[f] for f, _ in _EPISODE_SUM_METRICS], dtype=np.intp)
+_COUNT_COLS = np.array(
+  [STEP_INFO_INDEX[f] for f, _, _ in _EPISODE_COUNT_METRICS], dtype=np.intp
+)
+_SUM_FORWARD = 0
+_COL_IMU_X = STEP_INFO_INDEX["imu_x"]
+_COL_IMU_DX = STEP_INFO_INDEX["imu_dx"]
+_COL_UPRIGHT = STEP_INFO_INDEX["upright"]
+_COL_FLIGHT = STEP_INFO_INDEX["flight_steps"]
+
+
 class EpisodeMetricsCollector:
-  def __init__(self) -> None:
+  """env ごとのエピソード集計（累積値は ``[num_envs, ...]`` の numpy 配列）。
+
+  ``on_step_batch`` / ``on_vec_batch`` は env 範囲の step_info 行（``STEP_INFO_FIELDS``）を
+  まとめて足し込む（step ごとの Python ループなし）。エピソード終了時だけ env 単位で
+  指標 dict を作る。単一 env の経路は ``on_step`` で dict を行に詰めて同じ集計に載せる。
+  """
+
+  def __init__(self, num_envs: int = 1) -> None:
     window = int(_require_ctx().cfg.wandb.episode_rolling_window)
     self._rolling = EpisodeRollingWindow(window=window)
     self._interval = EpisodeIntervalBuffer()
-    self.reset()
-
-  def reset(self) -> None:
-    self._return = 0.0
-    self._forward = 0.0
-    self._episode_dx_sum = 0.0
-    self._episode_start_imu_x: float | None = None
-    self._policy_steps_in_episode = 0
-    self._forward_imu = 0.0
-    self._forward_foot = 0.0
-    self._effort_penalty = 0.0
-    self._shaping = 0.0
-    self._upright_bonus = 0.0
-    self._push_off_bonus = 0.0
-    self._landing_bonus = 0.0
-    self._backward_lean_penalty = 0.0
-    self._forward_lean_penalty = 0.0
-    self._height_penalty = 0.0
-    self._flight_duration_penalty = 0.0
-    self._heading_misalign_penalty = 0.0
-    self._lateral_tilt_penalty = 0.0
-    self._shank_step_penalty = 0.0
-    self._upright_sum = 0.0
-    self._foot_contact_steps = 0
-    self._landing_steps = 0
-    self._alternating_landing_steps = 0
-    self._single_support_steps = 0
-    self._double_support_steps = 0
-    self._double_support_penalty = 0.0
-    self._alternating_landing_bonus = 0.0
-    self._max_flight_steps = 0
-
-  def on_step(self, reward: float, step_info: dict[str, Any]) -> None:
-    self._policy_steps_in_episode += 1
-    self._episode_dx_sum += float(step_info.get("imu_dx", 0.0))
-    if self._episode_start_imu_x is None:
-      self._episode_start_imu_x = float(step_info.get("imu_x", 0.0))
-    # コンソール interval 用（wandb 無効でも ep_* を集計）
-    self._return += reward
-    self._forward += step_info["reward_forward"]
-    if not _active:
-      return
-    self._forward_imu += step_info.get("reward_forward_imu", 0.0)
-    self._forward_foot += step_info.get("reward_forward_foot", 0.0)
-    self._effort_penalty += step_info["reward_effort_penalty"]
-    self._shaping += step_info.get("reward_shaping", 0.0)
-    self._upright_bonus += step_info.get("reward_upright", 0.0)
-    self._push_off_bonus += step_info.get("reward_push_off", 0.0)
-    self._landing_bonus += step_info.get("reward_landing", 0.0)
-    self._backward_lean_penalty += step_info.get("reward_backward_lean_penalty", 0.0)
-    self._forward_lean_penalty += step_info.get("reward_forward_lean_penalty", 0.0)
-    self._height_penalty += step_info.get("reward_height_penalty", 0.0)
-    self._flight_duration_penalty += step_info.get(
-      "reward_flight_duration_penalty", 0.0
-    )
-    self._heading_misalign_penalty += step_info.get(
-      "reward_heading_misalign_penalty", 0.0
-    )
-    self._lateral_tilt_penalty += step_info.get("reward_lateral_tilt_penalty", 0.0)
-    self._shank_step_penalty += step_info.get("reward_shank_step_penalty", 0.0)
-    self._upright_sum += step_info["upright"]
-    self._foot_contact_steps += int(step_info["foot_on_floor"] > 0.5)
-    self._landing_steps += int(step_info.get("landed", 0.0) > 0.5)
-    self._alternating_landing_steps += int(
-      step_info.get("alternating_landing", 0.0) > 0.5
-    )
-    self._single_support_steps += int(step_info.get("single_support", 0.0) > 0.5)
-    self._double_support_steps += int(
-      step_info.get("both_feet_on_floor", 0.0) > 0.5
-    )
-    self._double_support_penalty += step_info.get(
-      "reward_double_support_penalty", 0.0
-    )
-    self._alternating_landing_bonus += step_info.get(
-      "reward_alternating_landing", 0.0
-    )
-    flight = int(step_info.get("flight_steps", 0.0))
-    self._max_flight_steps = max(self._max_flight_steps, flight)
+    self.num_envs = int(num_envs)
+    n = self.num_envs
+    self._returns = np.zeros(n, dtype=np.float64)
+    self._steps = np.zeros(n, dtype=np.int64)
+    self._start_imu_x = np.zeros(n, dtype=np.float64)
+    self._dx_sums = np.zeros(n, dtype=np.float64)
+    self._upright_sums = np.zeros(n, dtype=np.float64)
+    self._sums = np.zeros((n, len(_SUM_COLS)), dtype=np.float64)
+    self._counts = np.zeros((n, len(_COUNT_COLS)), dtype=np.int64)
+    self._max_flight = np.zeros(n, dtype=np.float64)
+    # on_step（単一 env の dict 経路）用の作業行
+    self._row = np.zeros((1, STEP_INFO_DIM), dtype=np.float32)
+    self._reward = np.zeros(1, dtype=np.float64)
+
+  def reset(self, env_id: int | None = None) -> None:
+    """``env_id``（既定: 全 env）の累積値を 0 に戻す。"""
+    sl = slice(None) if env_id is None else env_id
+    self._returns[sl] = 0.0
+    self._steps[sl] = 0
+    self._start_imu_x[sl] = 0.0
+    self._dx_sums[sl] = 0.0
+    self._upright_sums[sl] = 0.0
+    self._sums[sl] = 0.0
+    self._counts[sl] = 0
+    self._max_flight[sl] = 0.0
+
+  def on_step_batch(
+    self,
+    rewards: np.ndarray,
+    info: np.ndarray,
+    *,
+    env_slice: slice | None = None,
+  ) -> None:
+    """``env_slice``（既定: 全 env）の 1 step 分を足し込む。``info`` は ``[n, STEP_INFO_DIM]``。"""
+    sl = slice(0, self.num_envs) if env_slice is None else env_slice
+    steps = self._steps[sl]
+    start_imu_x = self._start_imu_x[sl]
+    fresh = steps == 0
+    start_imu_x[fresh] = info[fresh, _COL_IMU_X]
+    self._returns[sl] += rewards
+    self._dx_sums[sl] += info[:, _COL_IMU_DX]
+    self._upright_sums[sl] += info[:, _COL_UPRIGHT]
+    self._sums[sl] += info[:, _SUM_COLS]
+    self._counts[sl] += info[:, _COUNT_COLS] > 0.5
+    max_flight = self._max_flight[sl]
+    np.maximum(max_flight, info[:, _COL_FLIGHT], out=max_flight)
+    steps += 1
+
+  def on_step(self, reward: float, step_info: dict[str, Any], *, env_id: int = 0) -> None:
+    pack_step_info(step_info, out=self._row[0])
+    self._reward[0] = reward
+    self.on_step_batch(self._reward, self._row, env_slice=slice(env_id, env_id + 1))
+
+  def on_vec_batch(self, batch: Any, *, env_slice: slice, env_step: int) -> int:
+    """``VecStepBatch``（``env_slice`` の行）を集計し、終了したエピソード数を返す。
+
+    ``env_step`` はこの batch の直前までの総 env step 数。終了行の wandb step は
+    行順に 1 ずつ進めた値（env を 1 行ずつ処理していた頃と同じ）。
+    """
+    self.on_step_batch(batch.rewards, batch.info, env_slice=env_slice)
+    done_rows = np.flatnonzero(batch.terminated | batch.truncated)
+    for row in done_rows:
+      env_id = env_slice.start + int(row)
+      self.on_episode_end(
+        episode_step=int(self._steps[env_id]),
+        terminated=bool(batch.terminated[row]),
+        truncated=bool(batch.truncated[row]),
+        step_info=batch.step_info(int(row)),
+        env_step=env_step + int(row) + 1,
+        env_id=env_id,
+      )
+    return len(done_rows)
 
   def on_episode_end(
     self,
@@ -158,26 +201,26 @@ class EpisodeMetricsCollector:
     truncated: bool,
     step_info: dict[str, Any],
     env_step: int,
+    env_id: int = 0,
   ) -> None:
     ep_len = float(episode_step)
     termination_reason = step_info.get("termination_reason")
     basket_force_n = step_info.get("basket_contact_normal_force_n")
     thigh_force_n = step_info.get("thigh_contact_normal_force_n")
 
+    policy_steps = int(self._steps[env_id])
+    ep_return = float(self._returns[env_id])
+    forward_sum = float(self._sums[env_id, _SUM_FORWARD])
     end_imu_x = float(step_info.get("imu_x", 0.0))
-    start_imu_x = (
-      self._episode_start_imu_x
-      if self._episode_start_imu_x is not None
-      else end_imu_x
-    )
+    start_imu_x = float(self._start_imu_x[env_id]) if policy_steps > 0 else end_imu_x
     net_imu_x = end_imu_x - start_imu_x
-    total_dx_imu = self._episode_dx_sum
+    total_dx_imu = float(self._dx_sums[env_id])
 
-    if self._policy_steps_in_episode > 0:
+    if policy_steps > 0:
       snapshot = EpisodeSnapshot(
-        return_=self._return,
+        return_=ep_return,
         length=ep_len,
-        forward_reward_sum=self._forward,
+        forward_reward_sum=forward_sum,
         total_dx_imu=total_dx_imu,
         net_imu_x=net_imu_x,
       )
@@ -186,77 +229,65 @@ class EpisodeMetricsCollector:
         self._rolling.push(snapshot)
 
     if not _active:
-      self.reset()
+      self.reset(env_id)
       return
 
     metrics: dict[str, float] = {
-      "episode/return": self._return,
+      "episode/return": ep_return,
       "episode/length": ep_len,
       "episode/total_dx_imu": total_dx_imu,
       "episode/net_imu_x": net_imu_x,
       "episode/terminated": float(terminated),
       "episode/truncated": float(truncated and not terminated),
-      "episode/mean_upright": self._upright_sum / ep_len,
-      "episode/foot_contact_ratio": self._foot_contact_steps / ep_len,
-      "episode/single_support_ratio": self._single_support_steps / ep_len,
-      "episode/double_support_ratio": self._double_support_steps / ep_len,
-      "episode/landing_count": float(self._landing_steps),
-      "episode/alternating_landing_count": float(self._alternating_landing_steps),
-      "episode/double_support_penalty_sum": self._double_support_penalty,
-      "episode/alternating_landing_bonus_sum": self._alternating_landing_bonus,
-      "episode/max_flight_steps": float(self._max_flight_steps),
-      "episode/forward_reward_sum": self._forward,
-      "episode/forward_imu_reward_sum": self._forward_imu,
-      "episode/forward_foot_reward_sum": self._forward_foot,
-      "episode/effort_penalty_sum": self._effort_penalty,
-      "episode/shaping_sum": self._shaping,
-      "episode/upright_bonus_sum": self._upright_bonus,
-      "episode/push_off_bonus_sum": self._push_off_bonus,
-      "episode/landing_bonus_sum": self._landing_bonus,
-      "episode/backward_lean_penalty_sum": self._backward_lean_penalty,
-      "episode/forward_lean_penalty_sum": self._forward_lean_penalty,
-      "episode/height_penalty_sum": self._height_penalty,
-      "episode/flight_duration_penalty_sum": self._flight_duration_penalty,
-      "episode/heading_misalign_penalty_sum": self._heading_misalign_penalty,
-      "episode/lateral_tilt_penalty_sum": self._lateral_tilt_penalty,
-      "episode/shank_step_penalty_sum": self._shank_step_penalty,
-      "episode/pose_penalty": float(step_info.get("reward_pose_penalty", 0.0)),
-      "episode/pose_terminated": float(
-        termination_reason
-        in (REASON_IMU_Z, REASON_LOW_UPRIGHT, REASON_BACKWARD_LEAN)
-      ),
-      "episode/terminate_imu_z": float(termination_reason == REASON_IMU_Z),
-      "episode/terminate_low_upright": float(
-        termination_reason == REASON_LOW_UPRIGHT
-      ),
-      "episode/terminate_backward_lean": float(
-        termination_reason == REASON_BACKWARD_LEAN
-      ),
-      "episode/contact_basket_penalty": float(
-        step_info.get("reward_contact_basket_penalty", 0.0)
-      ),
-      "episode/contact_basket_normal_force_n": (
-        float(basket_force_n) if basket_force_n is not None else 0.0
-      ),
-      "episode/contact_basket_terminated": float(
-        termination_reason == REASON_CONTACT_BASKET
-      ),
-      "episode/contact_thigh_penalty": float(
-        step_info.get("reward_contact_thigh_penalty", 0.0)
-      ),
-      "episode/contact_thigh_normal_force_n": (
-        float(thigh_force_n) if thigh_force_n is not None else 0.0
-      ),
-      "episode/contact_thigh_terminated": float(
-        termination_reason == REASON_CONTACT_THIGH
-      ),
-      "episode/contact_shank_penalty": float(
-        step_info.get("reward_contact_shank_penalty", 0.0)
-      ),
-      "episode/contact_shank_terminated": float(
-        termination_reason == REASON_CONTACT_SHANK
-      ),
+      "episode/mean_upright": float(self._upright_sums[env_id]) / ep_len,
+      "episode/max_flight_steps": float(self._max_flight[env_id]),
     }
+    for (_, key), value in zip(_EPISODE_SUM_METRICS, self._sums[env_id].tolist(), strict=True):
+      metrics[key] = value
+    for (_, key, per_step), count in zip(
+      _EPISODE_COUNT_METRICS, self._counts[env_id].tolist(), strict=True
+    ):
+      metrics[key] = count / ep_len if per_step else float(count)
+    metrics.update(
+      {
+        "episode/pose_penalty": float(step_info.get("reward_pose_penalty", 0.0)),
+        "episode/pose_terminated": float(
+          termination_reason
+          in (REASON_IMU_Z, REASON_LOW_UPRIGHT, REASON_BACKWARD_LEAN)
+        ),
+        "episode/terminate_imu_z": float(termination_reason == REASON_IMU_Z),
+        "episode/terminate_low_upright": float(
+          termination_reason == REASON_LOW_UPRIGHT
+        ),
+        "episode/terminate_backward_lean": float(
+          termination_reason == REASON_BACKWARD_LEAN
+        ),
+        "episode/contact_basket_penalty": float(
+          step_info.get("reward_contact_basket_penalty", 0.0)
+        ),
+        "episode/contact_basket_normal_force_n": (
+          float(basket_force_n) if basket_force_n is not None else 0.0
+        ),
+        "episode/contact_basket_terminated": float(
+          termination_reason == REASON_CONTACT_BASKET
+        ),
+        "episode/contact_thigh_penalty": float(
+          step_info.get("reward_contact_thigh_penalty", 0.0)
+        ),
+        "episode/contact_thigh_normal_force_n": (
+          float(thigh_force_n) if thigh_force_n is not None else 0.0
+        ),
+        "episode/contact_thigh_terminated": float(
+          termination_reason == REASON_CONTACT_THIGH
+        ),
+        "episode/contact_shank_penalty": float(
+          step_info.get("reward_contact_shank_penalty", 0.0)
+        ),
+        "episode/contact_shank_terminated": float(
+          termination_reason == REASON_CONTACT_SHANK
+        ),
+      }
+    )
     metrics.update(
       episode_termination_metrics(
         terminated=terminated,
@@ -265,7 +296,7 @@ class EpisodeMetricsCollector:
       )
     )
     log(metrics, step=env_step)
-    self.reset()
+    self.reset(env_id)
 
   def rolling_summary(self) -> dict[str, float] | None:
     return self._rolling.summary()
@@ -394,8 +425,8 @@ def init(
   return True
 
 
-def episode_collector() -> EpisodeMetricsCollector:
-  return EpisodeMetricsCollector()
+def episode_collector(num_envs: int = 1) -> EpisodeMetricsCollector:
+  return EpisodeMetricsCollector(num_envs)
 
 
 def episode_termination_metrics(
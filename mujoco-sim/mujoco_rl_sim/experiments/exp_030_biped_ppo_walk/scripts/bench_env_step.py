@@ -0,0 +1,133 @@
+"""``EnvBipedPPO.step`` 1 制御ステップあたりの所要時間（µs）と内訳を測る。
+
+乱数 action（固定 seed）で ``--steps`` 制御ステップ回し、終了したら reset する。
+``--profile`` では cProfile を掛け、物理ステップ内側のループ（``mj_step`` と
+その後の Python 処理）の 1 制御ステップあたり時間を関数ごとに出す
+（cProfile 自体のオーバーヘッドを含むので、合計は素の計測より大きくなる）。
+
+例::
+
+  python scripts/bench_env_step.py
+  python scripts/bench_env_step.py --steps 5000 --profile
+  python scripts/bench_env_step.py --step-info-level scalars
+  python scripts/bench_env_step.py --physics-rollout --profile
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parent.parent
+if str(_ROOT) not in sys.path:
+  sys.path.insert(0, str(_ROOT))
+
+from _paths import install
+
+install()
+
+import argparse
+import cProfile
+import pstats
+import time
+
+import numpy as np
+
+from conf.schema import build_app_config
+from lib.experiment_context import build_experiment_context
+from lib.hydra_compose import compose_cfg
+from sim.env import EnvBipedPPO
+from sim.step_info_ipc import STEP_INFO_FULL, STEP_INFO_LEVELS
+
+# プロファイル表に出す関数名（pstats のキー末尾）。物理ステップごとに呼ばれるもの
+_INNER_LOOP_FUNCS = (
+  "mj_step",
+  "record_physics_step",
+  "update",
+  "done_reason_contact",
+  "shank_contact_step_penalty",
+  "contact_substep",
+  "run",
+  "record_physics_steps",
+)
+# 名前が汎用的な関数は定義ファイルで絞り、表示名を付ける
+_QUALIFIED = {
+  "update": ("contacts.py", "FloorContacts.update"),
+  "run": ("substep_rollout.py", "SubstepRollout.run"),
+}
+
+
+def _run(env: EnvBipedPPO, rng: np.random.Generator, steps: int, action_dim: int) -> None:
+  for _ in range(steps):
+    _, _, terminated, _ = env.step(rng.uniform(-1.0, 1.0, size=action_dim))
+    if terminated:
+      env.reset()
+
+
+def _inner_loop_table(profile: cProfile.Profile, steps: int) -> list[tuple[str, int, float]]:
+  """(関数, 呼び出し回数, 1 制御ステップあたり µs) を内側ループの関数だけ返す。"""
+  rows = []
+  for (filename, _, funcname), (_, ncalls, tottime, cumtime, _) in pstats.Stats(profile).stats.items():
+    name = funcname.removeprefix("<built-in method mujoco._functions.").removesuffix(">")
+    if name not in _INNER_LOOP_FUNCS:
+      continue
+    label = name
+    if name in _QUALIFIED:
+      suffix, label = _QUALIFIED[name]
+      if not filename.endswith(suffix):
+        continue
+    rows.append((label, ncalls, cumtime / steps * 1e6))
+  return sorted(rows, key=lambda r: -r[2])
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--steps", type=int, default=3000, help="計測する制御ステップ数")
+  parser.add_argument("--warmup-steps", type=int, default=200)
+  parser.add_argument("--step-info-level", choices=STEP_INFO_LEVELS, default=STEP_INFO_FULL)
+  parser.add_argument(
+    "--physics-rollout",
+    action="store_true",
+    help="runtime.physics_rollout=true（mujoco.rollout で物理ステップをまとめて積分）で計測する",
+  )
+  parser.add_argument("--profile", action="store_true", help="cProfile で内側ループの内訳を出す")
+  args = parser.parse_args()
+
+  overrides = ["wandb=disabled", "runtime=fast"]
+  if args.physics_rollout:
+    overrides.append("runtime.physics_rollout=true")
+  ctx = build_experiment_context(build_app_config(compose_cfg(overrides)))
+  env = EnvBipedPPO(
+    ctx,
+    enable_viewer=False,
+    training_dr_enabled=False,
+    step_info_level=args.step_info_level,
+  )
+  env.set_step_wall_sleep_sec(0.0)
+  action_dim = int(ctx.cfg.sim.action_dim)
+  env.reset()
+  _run(env, np.random.default_rng(1), args.warmup_steps, action_dim)
+
+  env.reset()
+  t0 = time.perf_counter()
+  _run(env, np.random.default_rng(0), args.steps, action_dim)
+  elapsed = time.perf_counter() - t0
+  print(
+    f"EnvBipedPPO.step: {elapsed / args.steps * 1e6:.1f} us/step "
+    f"({args.steps} steps, frame_skip={ctx.cfg.sim.frame_skip}, step_info={args.step_info_level}, "
+    f"physics_rollout={args.physics_rollout})"
+  )
+
+  if args.profile:
+    env.reset()
+    profile = cProfile.Profile()
+    profile.enable()
+    _run(env, np.random.default_rng(0), args.steps, action_dim)
+    profile.disable()
+    print(f"{'inner loop (cProfile)':<28} {'calls':>8} {'us/step':>9}")
+    for label, ncalls, us in _inner_loop_table(profile, args.steps):
+      print(f"{label:<28} {ncalls:>8} {us:>9.1f}")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,78 @@
+"""``Observation.build`` 1 回あたりの所要時間（µs）を測る。
+
+物理状態は乱数 action で数 step 進めた後のものを固定して使う（build だけを計測し、
+床接触の分類 ``FloorContacts.update`` は含めない）。
+
+例::
+
+  python scripts/bench_observation.py
+  python scripts/bench_observation.py --iters 20000 --check-contract
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parent.parent
+if str(_ROOT) not in sys.path:
+  sys.path.insert(0, str(_ROOT))
+
+from _paths import install
+
+install()
+
+import argparse
+import time
+
+import numpy as np
+
+from lib.hydra_compose import compose_cfg
+from lib.experiment_context import build_experiment_context
+from conf.schema import build_app_config
+from sim.contacts import FloorContacts
+from sim.env import EnvBipedPPO
+from sim.observation import Observation
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--iters", type=int, default=10000, help="計測する build 回数")
+  parser.add_argument("--warmup-steps", type=int, default=20, help="計測前に進める env step 数")
+  parser.add_argument(
+    "--check-contract",
+    action="store_true",
+    help="runtime.check_obs_contract=true（毎 build で契約チェック）で計測する",
+  )
+  args = parser.parse_args()
+
+  overrides = ["wandb=disabled", "runtime=fast"]
+  if args.check_contract:
+    overrides.append("runtime.check_obs_contract=true")
+  ctx = build_experiment_context(build_app_config(compose_cfg(overrides)))
+  env = EnvBipedPPO(ctx, enable_viewer=False, training_dr_enabled=False)
+  rng = np.random.default_rng(0)
+  env.reset()
+  for _ in range(args.warmup_steps):
+    env.step(rng.uniform(-1.0, 1.0, size=int(ctx.cfg.sim.action_dim)))
+
+  observation = Observation(env.model, ctx)
+  contacts = FloorContacts(env.model).update(env.data)
+  episode = env._episode
+  t0 = time.perf_counter()
+  for _ in range(args.iters):
+    observation.build(
+      env.model,
+      env.data,
+      episode,
+      contacts=contacts,
+      dx=0.001,
+      left_foot_dx=0.0,
+      right_foot_dx=0.0,
+    )
+  elapsed = time.perf_counter() - t0
+  print(f"Observation.build: {elapsed / args.iters * 1e6:.1f} us/build ({args.iters} iters)")
+
+
+if __name__ == "__main__":
+  main()
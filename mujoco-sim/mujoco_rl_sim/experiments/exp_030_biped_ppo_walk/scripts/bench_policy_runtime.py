@@ -0,0 +1,121 @@
+"""推論経路ごとの起動時間（import + 読み込み）と 1 行動あたりの時間（µs）を測る。
+
+- ``torch``: ``AgentPPO.from_checkpoint`` + ``act_eval``（visualize / eval の経路）
+- ``numpy``: ``scripts/export_policy.py`` の ``.policy.npz`` + ``NumpyPolicy.act``（torch なし）
+- ``torch.export``: ``--torch-export`` で書いた ``.pt2`` があれば（no_grad で呼ぶ）
+
+起動時間は経路ごとに新しいプロセスで測る（import キャッシュの影響を除く）。
+``.policy.npz`` が無ければ一時ディレクトリへ書き出して使う。
+
+例::
+
+  python scripts/bench_policy_runtime.py --checkpoint run_YYYYMMDD_HHMMSS/final.pt
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parent.parent
+if str(_ROOT) not in sys.path:
+  sys.path.insert(0, str(_ROOT))
+
+from _paths import install
+
+install()
+
+import argparse
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+# 子プロセスで実行するスニペット（最後に経過秒を出力する）
+_STARTUP_SNIPPETS = {
+  "torch": (
+    "from lib.load_run_context import ctx_from_checkpoint\n"
+    "from rl.agent import AgentPPO\n"
+    "agent = AgentPPO.from_checkpoint(ctx_from_checkpoint(Path(PATH)), PATH, load_optimizer=False)\n"
+    "agent.act_eval([0.0] * agent.obs_dim)\n"
+  ),
+  "numpy": (
+    "from rl.policy_runtime import NumpyPolicy\n"
+    "policy = NumpyPolicy.load(PATH)\n"
+    "policy.act(np.zeros(policy.obs_dim, dtype=np.float32))\n"
+  ),
+  "torch.export": (
+    "import torch\n"
+    "program = torch.export.load(PATH).module()\n"
+    "program(torch.zeros(1, program.obs_mean.shape[0]))\n"
+  ),
+}
+
+
+def _startup_s(label: str, path: Path) -> float:
+  setup = "import sys, time; t0 = time.perf_counter(); from pathlib import Path; import numpy as np\n"
+  if label != "numpy":
+    setup += "from _paths import install; install()\n"
+  code = setup + f"PATH = {str(path)!r}\n" + _STARTUP_SNIPPETS[label] + "print(time.perf_counter() - t0)\n"
+  result = subprocess.run(
+    [sys.executable, "-c", code], cwd=_ROOT, capture_output=True, text=True, check=True
+  )
+  return float(result.stdout.strip().splitlines()[-1])
+
+
+def _per_action_us(act, obs_rows: np.ndarray) -> float:
+  for obs in obs_rows[:50]:
+    act(obs)
+  t0 = time.perf_counter()
+  for obs in obs_rows:
+    act(obs)
+  return (time.perf_counter() - t0) / len(obs_rows) * 1e6
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--checkpoint", type=str, required=True)
+  parser.add_argument("--actions", type=int, default=5000, help="計測する行動数")
+  args = parser.parse_args()
+
+  import torch
+
+  import rl.checkpoint as checkpoint
+  from lib.load_run_context import ctx_from_checkpoint
+  from rl.agent import AgentPPO
+  from rl.policy_export import export_checkpoint_policy, policy_artifact_path
+  from rl.policy_runtime import NumpyPolicy
+
+  ckpt = checkpoint.resolve_checkpoint_path(args.checkpoint)
+  with tempfile.TemporaryDirectory() as tmp:
+    npz_path = policy_artifact_path(ckpt)
+    if not npz_path.is_file():
+      (npz_path,) = export_checkpoint_policy(ckpt, out_path=Path(tmp) / npz_path.name)
+    program_path = npz_path.with_suffix(".pt2")
+    paths = {"torch": ckpt, "numpy": npz_path}
+    if program_path.is_file():
+      paths["torch.export"] = program_path
+
+    agent = AgentPPO.from_checkpoint(ctx_from_checkpoint(ckpt), ckpt, load_optimizer=False)
+    policy = NumpyPolicy.load(npz_path)
+    obs_rows = np.random.default_rng(0).uniform(-1.0, 1.0, size=(int(args.actions), agent.obs_dim))
+    actors = {"torch": agent.act_eval, "numpy": policy.act}
+    if "torch.export" in paths:
+      program = torch.export.load(program_path).module()
+
+      def program_act(obs):
+        with torch.no_grad():
+          return program(torch.as_tensor(obs, dtype=torch.float32).unsqueeze(0))
+
+      actors["torch.export"] = program_act
+
+    print(f"{'path':<14} {'startup_s':>10} {'us/action':>10}   (torch threads={torch.get_num_threads()})")
+    for label, path in paths.items():
+      print(f"{label:<14} {_startup_s(label, path):>10.3f} {_per_action_us(actors[label], obs_rows):>10.1f}")
+    diff = np.max(np.abs(policy.act_batch(obs_rows) - agent.act_eval_batch(obs_rows)))
+    print(f"max |numpy - act_eval| = {diff:.2e}")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,101 @@
+"""``AgentPPO.update`` 1 回あたりの所要時間（ms）を測る。
+
+ロールアウトは乱数で埋める（環境は回さない）。``--compile`` で ``ppo.compile_update=true``
+と比較できる。既定の ``rollout_steps`` / ``minibatch_size`` は本番設定（conf/ppo/default.yaml）。
+
+例::
+
+  python scripts/bench_ppo_update.py
+  python scripts/bench_ppo_update.py --compile --updates 20
+  python scripts/bench_ppo_update.py --num-envs 8 --rollout-steps 2048
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parent.parent
+if str(_ROOT) not in sys.path:
+  sys.path.insert(0, str(_ROOT))
+
+from _paths import install
+
+install()
+
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from conf.schema import build_app_config
+from lib.experiment_context import build_experiment_context
+from lib.hydra_compose import compose_cfg
+from rl.agent import AgentPPO
+
+
+def _fill_rollout(agent: AgentPPO, rng: np.random.Generator) -> np.ndarray:
+  """act_batch → store_batch でバッファを埋め、最後の観測を返す。"""
+  buf = agent.rollout
+  obs = rng.normal(size=(buf.num_envs, agent.obs_dim))
+  for _ in range(buf.horizon):
+    actions, values, log_probs = agent.act_batch(obs)
+    agent.store_batch(
+      obs,
+      actions,
+      rng.normal(size=buf.num_envs),
+      values,
+      rng.uniform(size=buf.num_envs) < 0.02,
+      log_probs,
+    )
+    obs = rng.normal(size=(buf.num_envs, agent.obs_dim))
+  return obs
+
+
+def _bench(overrides: list[str], *, updates: int, warmup_updates: int) -> float:
+  """``updates`` 回の update の平均 ms（ロールアウトの埋め直しは含めない）。"""
+  torch.manual_seed(0)
+  rng = np.random.default_rng(0)
+  cfg = compose_cfg(["wandb=disabled", "runtime=fast", *overrides])
+  agent = AgentPPO(build_experiment_context(build_app_config(cfg)))
+  for _ in range(warmup_updates):
+    agent.update(_fill_rollout(agent, rng))
+  elapsed = 0.0
+  for _ in range(updates):
+    last_obs = _fill_rollout(agent, rng)
+    t0 = time.perf_counter()
+    agent.update(last_obs)
+    elapsed += time.perf_counter() - t0
+  return elapsed / updates * 1e3
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--updates", type=int, default=10, help="計測する update 回数")
+  parser.add_argument("--warmup-updates", type=int, default=2, help="計測前の update 回数（compile 込み）")
+  parser.add_argument("--num-envs", type=int, default=None)
+  parser.add_argument("--rollout-steps", type=int, default=None)
+  parser.add_argument("--minibatch-size", type=int, default=None)
+  parser.add_argument("--compile", action="store_true", help="ppo.compile_update=true も計測する")
+  args = parser.parse_args()
+
+  overrides: list[str] = []
+  if args.num_envs is not None:
+    overrides.append(f"runtime.num_envs={args.num_envs}")
+  if args.rollout_steps is not None:
+    overrides.append(f"ppo.rollout_steps={args.rollout_steps}")
+  if args.minibatch_size is not None:
+    overrides.append(f"ppo.minibatch_size={args.minibatch_size}")
+
+  variants = [("eager", overrides)]
+  if args.compile:
+    variants.append(("compile", [*overrides, "ppo.compile_update=true"]))
+  print(f"{'variant':>8} {'ms/update':>10}")
+  for name, variant_overrides in variants:
+    ms = _bench(variant_overrides, updates=args.updates, warmup_updates=args.warmup_updates)
+    print(f"{name:>8} {ms:>10.1f}")
+
+
+if __name__ == "__main__":
+  main()
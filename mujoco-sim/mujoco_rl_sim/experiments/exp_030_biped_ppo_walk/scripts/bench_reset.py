@@ -0,0 +1,90 @@
+"""``EnvBipedPPO.reset`` 1 回あたりの所要時間（µs）を経路ごとに測る。
+
+- ``keyframe``: キャッシュなしの reset（``mj_resetDataKeyframe`` + ``mj_forward`` → DR → 観測）
+- ``cached``: stand 名目 state をコピーして DR を適用（``runtime.reset_prefetch=0`` 相当）
+- ``prefetched``: 先読み済みの DR 初期 state をコピーするだけ（先読み自体の時間は ``(prefetch)`` 行に別に出す）
+
+学習 DR 有効・固定 seed で ``--episodes`` 個の episode_index を順に reset する。
+
+例::
+
+  python scripts/bench_reset.py
+  python scripts/bench_reset.py --episodes 5000 --no-dr
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parent.parent
+if str(_ROOT) not in sys.path:
+  sys.path.insert(0, str(_ROOT))
+
+from _paths import install
+
+install()
+
+import argparse
+import time
+
+import mujoco
+
+from conf.schema import build_app_config
+from lib.experiment_context import build_experiment_context
+from lib.hydra_compose import compose_cfg
+from sim.env import EnvBipedPPO
+
+
+def _keyframe_reset(env: EnvBipedPPO, episode_index: int, dr: bool) -> None:
+  env._training_dr.restore_nominal(env.model)
+  mujoco.mj_resetDataKeyframe(env.model, env.data, env._stand_key_id)
+  mujoco.mj_forward(env.model, env.data)
+  if dr:
+    env._training_dr.apply_for_episode(env.model, env.data, episode_index=episode_index)
+  env._finalize_reset()
+
+
+def _time_us(fn, episodes: int) -> float:
+  t0 = time.perf_counter()
+  for e in range(episodes):
+    fn(e)
+  return (time.perf_counter() - t0) / episodes * 1e6
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--episodes", type=int, default=2000, help="計測する reset 回数")
+  parser.add_argument("--no-dr", action="store_true", help="学習 DR 無効で計測する（prefetched は省略）")
+  args = parser.parse_args()
+
+  dr = not args.no_dr
+  ctx = build_experiment_context(build_app_config(compose_cfg(["wandb=disabled", "runtime=fast"])))
+  env = EnvBipedPPO(ctx, enable_viewer=False, training_dr_enabled=dr, training_seed=0)
+  episodes = int(args.episodes)
+  # ブロック表のサンプル・import などの初回コストを除く
+  _time_us(lambda e: env.reset(episode_index=e), 50)
+
+  rows = [
+    ("keyframe", _time_us(lambda e: _keyframe_reset(env, e, dr), episodes)),
+    ("cached", _time_us(lambda e: env.reset(episode_index=e), episodes)),
+  ]
+  if dr and env._reset_cache.pool_size > 0:
+    prefetch_s = reset_s = 0.0
+    for e in range(episodes, 2 * episodes):
+      t0 = time.perf_counter()
+      env.prefetch_reset(e)
+      t1 = time.perf_counter()
+      env.reset(episode_index=e)
+      reset_s += time.perf_counter() - t1
+      prefetch_s += t1 - t0
+    rows.append(("prefetched", reset_s / episodes * 1e6))
+    rows.append(("(prefetch)", prefetch_s / episodes * 1e6))
+
+  print(f"{'reset path':<12} {'us/reset':>9}   (episodes={episodes}, dr={dr})")
+  for label, us in rows:
+    print(f"{label:<12} {us:>9.1f}")
+
+
+if __name__ == "__main__":
+  main()
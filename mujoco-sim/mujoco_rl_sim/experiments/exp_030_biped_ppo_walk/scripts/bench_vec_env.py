@@ -0,0 +1,127 @@
+"""Subproc VecEnv の転送路（pipe / shm）ごとの step スループットを測る。
+
+例::
+
+  python scripts/bench_vec_env.py --num-envs 1 4 8 16 --steps 500
+  python scripts/bench_vec_env.py --num-envs 16 --envs-per-worker 1 2 4 --transports shm
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parent.parent
+if str(_ROOT) not in sys.path:
+  sys.path.insert(0, str(_ROOT))
+
+from _paths import install
+
+install()
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from lib.hydra_checkpoint import save_hydra_config
+from lib.hydra_compose import compose_cfg
+from sim.subproc_vec_env import VEC_ENV_TRANSPORTS, SubprocVecEnvBiped
+
+
+def _bench_one(
+  *,
+  transport: str,
+  num_envs: int,
+  envs_per_worker: int,
+  steps: int,
+  warmup_steps: int,
+  hydra_path: str,
+  obs_dim: int,
+  action_dim: int,
+  max_episode_steps: int,
+) -> float:
+  """``steps`` 回の ``vec_env.step`` に掛かった秒数（reset は含めない）。"""
+  vec = SubprocVecEnvBiped(
+    num_envs,
+    training_dr_enabled=False,
+    training_seed=0,
+    step_wall_sleep_sec=0.0,
+    hydra_config_path=hydra_path,
+    transport=transport,
+    envs_per_worker=envs_per_worker,
+    obs_dim=obs_dim,
+    action_dim=action_dim,
+    max_episode_steps=max_episode_steps,
+  )
+  rng = np.random.default_rng(0)
+  try:
+    vec.reset_all(start_episode_index=0)
+    for _ in range(warmup_steps):
+      vec.step(rng.uniform(-1.0, 1.0, size=(num_envs, action_dim)))
+    t0 = time.perf_counter()
+    # 終了 env は worker 側で auto-reset されるため、常に全 env が動いている
+    for _ in range(steps):
+      vec.step(rng.uniform(-1.0, 1.0, size=(num_envs, action_dim)))
+    return time.perf_counter() - t0
+  finally:
+    vec.close()
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--num-envs", type=int, nargs="+", default=[1, 4, 8, 16])
+  parser.add_argument(
+    "--envs-per-worker",
+    type=int,
+    nargs="+",
+    default=[1],
+    help="1 worker プロセスあたりの env 数（複数指定で比較）",
+  )
+  parser.add_argument("--steps", type=int, default=500, help="計測する vec step 回数")
+  parser.add_argument("--warmup-steps", type=int, default=20)
+  parser.add_argument(
+    "--transports",
+    nargs="+",
+    choices=VEC_ENV_TRANSPORTS,
+    default=["pipe", "shm"],
+  )
+  args = parser.parse_args()
+
+  cfg = compose_cfg(["wandb=disabled", "runtime=fast"])
+  obs_dim = int(cfg.sim.obs_dim)
+  action_dim = int(cfg.sim.action_dim)
+  max_episode_steps = int(cfg.training.max_steps_per_episode)
+  with tempfile.TemporaryDirectory() as tmp:
+    hydra_path = str(save_hydra_config(tmp, cfg))
+    print(
+      f"{'num_envs':>8} {'per_wkr':>7} {'transport':>9} "
+      f"{'env_steps/s':>12} {'us/vec_step':>12}"
+    )
+    for num_envs in args.num_envs:
+      for envs_per_worker in args.envs_per_worker:
+        if envs_per_worker > num_envs:
+          continue
+        for transport in args.transports:
+          elapsed = _bench_one(
+            transport=transport,
+            num_envs=num_envs,
+            envs_per_worker=envs_per_worker,
+            steps=args.steps,
+            warmup_steps=args.warmup_steps,
+            hydra_path=hydra_path,
+            obs_dim=obs_dim,
+            action_dim=action_dim,
+            max_episode_steps=max_episode_steps,
+          )
+          env_steps_per_s = num_envs * args.steps / elapsed
+          us_per_step = elapsed / args.steps * 1e6
+          print(
+            f"{num_envs:>8} {envs_per_worker:>7} {transport:>9} "
+            f"{env_steps_per_s:>12.0f} {us_per_step:>12.1f}"
+          )
+
+
+if __name__ == "__main__":
+  main()
@@ -1,6 +1,8 @@
 """学習済みチェックポイントの公式評価（eval_report.json を出力）。
 
 仕様の正本: README「評価仕様」節、``eval/spec.py``。
+試行結果は ``eval/cache.py`` にキャッシュされ、同じ ckpt・設定の再評価では回さない。
+``--run-dir`` で run 内の全 .pt をまとめて評価する。
 デバッグ用の時系列・フレーム保存は ``scripts/analyze_rollout.py`` を使用する。
 """
 
@@ -19,33 +21,71 @@ install()
 
 import argparse
 
-from eval.post_train import run_post_train_eval
+from eval.post_train import run_dir_checkpoint_eval, run_post_train_eval
+from eval.spec import PRIMARY_METRIC_NAME
 import rl.checkpoint as checkpoint
 
 
 def _parse_args() -> argparse.Namespace:
   p = argparse.ArgumentParser(description=__doc__)
-  p.add_argument(
+  target = p.add_mutually_exclusive_group(required=True)
+  target.add_argument(
     "--checkpoint",
     type=str,
-    required=True,
     help="評価する .pt（runs/<exp>/<run>/final.pt 等）",
   )
+  target.add_argument(
+    "--run-dir",
+    type=str,
+    help="run ディレクトリ内の全 .pt を評価する（final.pt 以外は <run>/eval_reports/<名前>.json）",
+  )
   p.add_argument(
     "--out",
     type=str,
     default=None,
-    help="出力 JSON（省略時は <checkpoint 親>/eval_report.json）",
+    help="出力 JSON（--checkpoint 時のみ。省略時は <checkpoint 親>/eval_report.json）",
   )
   p.add_argument("--device", type=str, default="cpu")
+  p.add_argument(
+    "--workers",
+    type=int,
+    default=None,
+    help="並列 eval のプロセス数（0 でプロセスを使わない。省略時は ckpt run の eval.num_workers）",
+  )
+  p.add_argument(
+    "--envs-per-worker",
+    type=int,
+    default=None,
+    help="worker 1 つが同時に進める試行数（省略時は eval.envs_per_worker）",
+  )
+  p.add_argument(
+    "--no-cache",
+    action="store_true",
+    help="eval キャッシュ（eval/cache.py）を使わず全試行を回す",
+  )
   return p.parse_args()
 
 
 def main() -> None:
   args = _parse_args()
+  options = {
+    "device": args.device,
+    "num_workers": args.workers,
+    "envs_per_worker": args.envs_per_worker,
+    "use_cache": False if args.no_cache else None,
+  }
+  if args.run_dir:
+    if args.out:
+      raise SystemExit("--out は --checkpoint と一緒にだけ指定できます")
+    results = run_dir_checkpoint_eval(Path(args.run_dir).expanduser(), **options)
+    print()
+    for ckpt, out, report in results:
+      print(f"[eval] {ckpt.name:<24} {PRIMARY_METRIC_NAME}={report['primary_metric_value']:+.4f}  -> {out}")
+    return
+
   ckpt = checkpoint.resolve_checkpoint_path(args.checkpoint)
   out_path = Path(args.out).expanduser().resolve() if args.out else None
-  run_post_train_eval(ckpt, device=args.device, out_path=out_path)
+  run_post_train_eval(ckpt, out_path=out_path, **options)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,8 @@
 """複数 run の eval_report.json を横断比較する CLI。
 
 ``runs/<exp>/<run>/eval_report.json`` を読み、主指標で並べ替えて表表示する。
+``--eval-missing`` では eval_report.json が無く final.pt がある run を先に評価する
+（試行結果は ``eval/cache.py`` のキャッシュを使う）。
 仕様の正本: README「評価仕様」節、``eval/spec.py``。
 """
 
@@ -56,9 +58,31 @@ def _parse_args() -> argparse.Namespace:
     default=EVAL_SPEC_ID,
     help=f"期待する eval_spec_id（不一致は警告。既定: {EVAL_SPEC_ID}）",
   )
+  p.add_argument(
+    "--eval-missing",
+    action="store_true",
+    help="eval_report.json が無い run の final.pt を先に評価する（--runs-dir 走査時）",
+  )
   return p.parse_args()
 
 
+def _eval_missing_reports(runs_dir: Path) -> None:
+  """eval_report.json が無く final.pt がある run を評価して report を書く。
+
+  final.pt の有無はマニフェスト（``checkpoints.json``）があればそれで判断する。
+  """
+  from eval.post_train import run_post_train_eval
+  from rl.checkpoint_retention import manifest_checkpoint_paths
+
+  for run_dir in sorted(p for p in runs_dir.resolve().iterdir() if p.is_dir()):
+    if (run_dir / "eval_report.json").is_file():
+      continue
+    final_ckpt = run_dir / "final.pt"
+    listed = manifest_checkpoint_paths(run_dir)
+    if (final_ckpt in listed) if listed is not None else final_ckpt.is_file():
+      run_post_train_eval(final_ckpt)
+
+
 def _collect_report_paths(args: argparse.Namespace) -> tuple[int, list[Path]]:
   """位置引数または --runs-dir から eval_report パス一覧を得る。"""
   if args.targets:
@@ -67,6 +91,8 @@ def _collect_report_paths(args: argparse.Namespace) -> tuple[int, list[Path]]:
     return len(paths), paths
 
   runs_dir = Path(args.runs_dir or CHECKPOINT_ROOT).expanduser()
+  if args.eval_missing:
+    _eval_missing_reports(runs_dir)
   return discover_reports_in_runs_dir(runs_dir)
 
 
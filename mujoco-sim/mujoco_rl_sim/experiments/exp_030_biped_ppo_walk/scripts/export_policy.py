@@ -0,0 +1,54 @@
+"""学習済みチェックポイントから推論専用の方策成果物を書き出す。
+
+``<ckpt>.policy.npz`` は actor MLP と観測正規化の定数だけを持ち、``rl/policy_runtime.py``
+（numpy のみ）で読める。ロボット側では torch を入れずに
+``NumpyPolicy.load(path).act(obs)`` で平均行動を得る。
+
+例::
+
+  python scripts/export_policy.py --checkpoint run_YYYYMMDD_HHMMSS/final.pt
+  python scripts/export_policy.py --checkpoint .../final.pt --torch-export
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parent.parent
+if str(_ROOT) not in sys.path:
+  sys.path.insert(0, str(_ROOT))
+
+from _paths import install
+
+install()
+
+import argparse
+
+import rl.checkpoint as checkpoint
+from rl.policy_export import export_checkpoint_policy
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--checkpoint", type=str, required=True, help="書き出す .pt（runs/<exp>/ 基準の相対パス可）")
+  parser.add_argument("--out", type=str, default=None, help="出力 .npz（省略時は <ckpt 名>.policy.npz）")
+  parser.add_argument(
+    "--torch-export",
+    action="store_true",
+    help="同じ方策を torch.export したプログラム（.pt2）も書く",
+  )
+  args = parser.parse_args()
+
+  ckpt = checkpoint.resolve_checkpoint_path(args.checkpoint)
+  written = export_checkpoint_policy(
+    ckpt,
+    out_path=Path(args.out) if args.out else None,
+    torch_program=bool(args.torch_export),
+  )
+  for path in written:
+    print(f"[export] {path} ({path.stat().st_size / 1024:.1f} KiB)")
+
+
+if __name__ == "__main__":
+  main()
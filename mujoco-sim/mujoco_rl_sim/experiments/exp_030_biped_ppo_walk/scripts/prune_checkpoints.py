@@ -0,0 +1,84 @@
+"""run ディレクトリの ``update_*.pt`` を保持ポリシーで間引き、マニフェスト（checkpoints.json）を書く。
+
+学習中は ``checkpoint.keep_*`` の設定で自動的に間引く。このスクリプトは、マニフェストの
+無い旧 run の一覧作成や、全 ckpt を eval した後に eval 指標の上位だけ残す場合に使う
+（``latest.pt`` / ``final.pt`` は消さない）。
+
+例::
+
+  python scripts/prune_checkpoints.py --run-dir run_YYYYMMDD_HHMMSS --rebuild
+  python scripts/eval.py --run-dir ../../runs/exp_030_biped_ppo_walk/run_YYYYMMDD_HHMMSS
+  python scripts/prune_checkpoints.py --run-dir run_YYYYMMDD_HHMMSS \\
+    --keep-best 3 --metric eval/displacement_x_mean --dry-run
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parent.parent
+if str(_ROOT) not in sys.path:
+  sys.path.insert(0, str(_ROOT))
+
+from _paths import install
+
+install()
+
+import argparse
+
+from package_meta import CHECKPOINT_ROOT
+from rl.checkpoint_retention import (
+  RetentionPolicy,
+  apply_retention,
+  load_manifest,
+  manifest_lock,
+  rebuild_manifest,
+  select_kept,
+)
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--run-dir", type=str, required=True, help=f"run ディレクトリ（相対なら {CHECKPOINT_ROOT} 基準）")
+  parser.add_argument("--keep-last", type=int, default=0)
+  parser.add_argument("--keep-every", type=int, default=0)
+  parser.add_argument("--keep-best", type=int, default=0)
+  parser.add_argument("--metric", type=str, default="train/ep_return_mean", help="--keep-best の指標（大きいほど良い）")
+  parser.add_argument("--rebuild", action="store_true", help="*.pt と eval report からマニフェストを作り直す")
+  parser.add_argument("--dry-run", action="store_true", help="削除せず、残す・消すファイルを表示する")
+  args = parser.parse_args()
+
+  run_dir = Path(args.run_dir).expanduser()
+  if not run_dir.is_absolute():
+    run_dir = CHECKPOINT_ROOT / run_dir
+  run_dir = run_dir.resolve()
+  if not run_dir.is_dir():
+    raise SystemExit(f"run dir not found: {run_dir}")
+
+  policy = RetentionPolicy(
+    keep_last=args.keep_last, keep_every=args.keep_every, keep_best=args.keep_best, best_metric=args.metric
+  )
+  # 学習中・eval 中の run でも書き込みが重ならないよう、読み直しから書き込みまでロックする
+  with manifest_lock(run_dir):
+    manifest = None if args.rebuild else load_manifest(run_dir)
+    if manifest is None:
+      manifest = rebuild_manifest(run_dir)
+
+    if args.dry_run:
+      kept = select_kept(manifest["checkpoints"], policy)
+      for entry in sorted(manifest["checkpoints"], key=lambda e: e["filename"]):
+        reasons = kept.get(entry["filename"])
+        metric = (entry.get("metrics") or {}).get(policy.best_metric)
+        label = f"keep ({', '.join(reasons)})" if reasons else "remove"
+        print(f"{entry['filename']:<22} {label:<24} {policy.best_metric}={metric}")
+      return
+
+    removed = apply_retention(run_dir, manifest, policy)
+  print(f"[prune] removed {len(removed)} checkpoint(s); manifest -> {run_dir / 'checkpoints.json'}")
+  for path in removed:
+    print(f"  - {path.name}")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,107 @@
+"""床接触の分類（1 物理 step につき ``data.contact`` を 1 回だけ走査する）。
+
+足・大腿・すね・バスケットと床の接触を、構築時に作った (geom1, geom2) → 部位スロットの表で
+まとめて分類する（接触 1 件あたり表引き 1 回、接触全体で numpy 演算数回）。法線力
+（``mj_contactForce``）は終了判定・すねペナルティに使う部位の接触だけ求める。
+観測・報酬・終了判定はすべてこの結果を参照する。
+"""
+
+from __future__ import annotations
+
+import mujoco
+import numpy as np
+
+from lib.actuators import LEFT_FOOT_GEOM, RIGHT_FOOT_GEOM, SHANK_GEOM_IDS, THIGH_GEOM_IDS
+
+# 部位スロット（``FloorContacts.on_floor`` / ``normal_force_n`` の添字）
+SLOT_LEFT_FOOT = 0
+SLOT_RIGHT_FOOT = 1
+SLOT_BASKET = 2
+SLOT_THIGHS = (3, 4)
+SLOT_SHANKS = (5, 6)
+NUM_SLOTS = 7
+# 法線力を求めるスロットの下限（足は接地有無だけ使う）
+_FIRST_FORCE_SLOT = SLOT_BASKET
+
+# 床と無関係な接触の行き先（``on_floor`` の外側にある捨てスロット）
+_NO_SLOT = NUM_SLOTS
+
+
+class FloorContacts:
+  """床接触の分類結果（``update`` のたびに配列を上書きする）。
+
+  ``on_floor[slot]`` … その部位が床に触れているか
+  ``normal_force_n[slot]`` … 床との接触の法線力 |force[0]| の最大値 [N]（足は常に 0）
+  ``body_on_floor`` … 足以外（バスケット・大腿・すね）のどれかが床に触れているか
+  """
+
+  def __init__(self, model: mujoco.MjModel):
+    self._model = model
+    self._floor_geom_id = model.geom("floor").id
+    slot_geoms = {
+      SLOT_LEFT_FOOT: LEFT_FOOT_GEOM,
+      SLOT_RIGHT_FOOT: RIGHT_FOOT_GEOM,
+      SLOT_BASKET: "basket",
+      **dict(zip(SLOT_THIGHS, THIGH_GEOM_IDS, strict=True)),
+      **dict(zip(SLOT_SHANKS, SHANK_GEOM_IDS, strict=True)),
+    }
+    # geom1 * ngeom + geom2 → スロット（MuJoCo は geom1/geom2 の順序を入れ替えることがあるので両順で引く）
+    ngeom = int(model.ngeom)
+    slot_of_pair = np.full((ngeom, ngeom), _NO_SLOT, dtype=np.intp)
+    for slot, name in slot_geoms.items():
+      geom_id = model.geom(name).id
+      slot_of_pair[self._floor_geom_id, geom_id] = slot
+      slot_of_pair[geom_id, self._floor_geom_id] = slot
+    self._slot_of_pair = slot_of_pair.ravel()
+    self._pair_stride = np.array([ngeom, 1], dtype=np.intp)
+    # 末尾 1 要素は _NO_SLOT の捨て先。公開するのは先頭 NUM_SLOTS 要素のビュー
+    self._hits = np.zeros(NUM_SLOTS + 1, dtype=bool)
+    self.on_floor = self._hits[:NUM_SLOTS]
+    self.normal_force_n = np.zeros(NUM_SLOTS, dtype=np.float64)
+    self.body_on_floor = False
+    # mj_contactForce の出力先（ループ内で再利用）
+    self._contact_wrench = np.zeros(6)
+
+  def update(self, data: mujoco.MjData) -> FloorContacts:
+    """現在の ``data.contact`` を分類し、自身を返す。"""
+    self._hits[:] = False
+    if self.body_on_floor:
+      self.normal_force_n[:] = 0.0
+      self.body_on_floor = False
+    if data.ncon == 0:
+      return self
+
+    slots = self._slot_of_pair[data.contact.geom @ self._pair_stride]
+    self._hits[slots] = True
+    if np.count_nonzero(self.on_floor[_FIRST_FORCE_SLOT:]) == 0:
+      return self
+
+    self.body_on_floor = True
+    for contact_index in np.flatnonzero((slots >= _FIRST_FORCE_SLOT) & (slots < NUM_SLOTS)):
+      mujoco.mj_contactForce(
+        self._model, data, int(contact_index), self._contact_wrench
+      )
+      slot = slots[contact_index]
+      self.normal_force_n[slot] = max(
+        self.normal_force_n[slot], abs(float(self._contact_wrench[0]))
+      )
+    return self
+
+  def assign(self, on_floor: np.ndarray, normal_force_n: np.ndarray) -> FloorContacts:
+    """分類済みの 1 物理ステップ分（``sim/substep_rollout.py`` の行）を読み込み、自身を返す。"""
+    self.on_floor[:] = on_floor
+    self.normal_force_n[:] = normal_force_n
+    self.body_on_floor = bool(np.count_nonzero(self.on_floor[_FIRST_FORCE_SLOT:]))
+    return self
+
+  @property
+  def left_foot(self) -> bool:
+    return bool(self.on_floor[SLOT_LEFT_FOOT])
+
+  @property
+  def right_foot(self) -> bool:
+    return bool(self.on_floor[SLOT_RIGHT_FOOT])
+
+  @property
+  def any_foot(self) -> bool:
+    return self.left_foot or self.right_foot
@@ -2,18 +2,21 @@
 
 - エピソードごとに ``EnvBipedPPO.reset(episode_index=...)`` から適用
 - eval（``reset_eval``）には影響しない（適用前に名目値へ復元）
-- RNG: ``training_seed`` + ``episode_index``（eval seed とは独立）
+- パラメータは ``DR_TABLE_BLOCK`` エピソード分をまとめて structured array にサンプルし、
+  reset では該当行をベクトル書き込みするだけにする
+- RNG: ``training_seed`` + ブロック番号（eval seed とは独立）。行は (seed, episode_index) で決まる
+- 事後分析用のエピソード別ログは ``write_dr_episode_log``（seed から再生成して npz に書く）
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from pathlib import Path
 from typing import Any
 
 import mujoco
 import numpy as np
 
-from lib.actuators import ACTUATOR_NAMES
+from lib.actuators import ACTUATOR_NAMES, JOINT_NAMES
 from lib.experiment_context import ExperimentContext, build_experiment_context
 from conf.schema import build_app_config
 
@@ -21,38 +24,135 @@ from conf.schema import build_app_config
 _DR_RNG_TAG = 0x4452
 
 
-@dataclass(frozen=True)
-class _FootFrictionNominal:
-  """足底 geom の slide friction 名目値。"""
+# 1 ブロックで先にサンプルしておくエピソード数
+DR_TABLE_BLOCK = 256
 
-  geom_name: str
-  geom_id: int
-  slide: float
 
-
-@dataclass(frozen=True)
-class _ActuatorNominal:
-  """position アクチュエータの kp / kv 名目値（MuJoCo biasprm 形式）。"""
-
-  actuator_name: str
-  act_id: int
-  kp: float
-  bias_kp: float
-  bias_kv: float
-
-
-def make_episode_dr_rng(
+def make_dr_block_rng(
   training_seed: int | None,
-  episode_index: int,
+  block_index: int,
 ) -> np.random.Generator:
-  """エピソード DR 用 RNG（``training_seed`` 未設定時は非決定的）。"""
+  """DR テーブル 1 ブロック分の RNG（``training_seed`` 未設定時は非決定的）。"""
   if training_seed is not None:
     return np.random.default_rng(
-      [int(training_seed), int(episode_index), _DR_RNG_TAG]
+      [int(training_seed), int(block_index), _DR_RNG_TAG]
     )
   return np.random.default_rng()
 
 
+def dr_table_dtype(num_feet: int) -> np.dtype:
+  """エピソード 1 行分の DR パラメータ（structured array の dtype）。"""
+  num_act = len(ACTUATOR_NAMES)
+  return np.dtype(
+    [
+      ("episode_index", np.int64),
+      ("friction_slide_mult", np.float64, (num_feet,)),
+      ("kp_mult", np.float64, (num_act,)),
+      ("kv_mult", np.float64, (num_act,)),
+      ("root_yaw_rad", np.float64),
+      ("root_xy_m", np.float64, (2,)),
+      ("joint_delta_rad", np.float64, (len(JOINT_NAMES),)),
+      ("root_lin_vel", np.float64, (3,)),
+      ("root_ang_vel", np.float64, (3,)),
+    ]
+  )
+
+
+def sample_dr_block(
+  ctx: ExperimentContext,
+  training_seed: int | None,
+  block_index: int,
+  *,
+  block_size: int = DR_TABLE_BLOCK,
+) -> np.ndarray:
+  """エピソード ``[block_index * block_size, (block_index + 1) * block_size)`` の DR パラメータ表。
+
+  各フィールドをブロック単位でまとめてサンプルする。行は (training_seed, episode_index)
+  だけで決まり、どの順でブロックを引いても同じ値になる。
+  """
+  # eval パッケージとの循環 import を避けるため遅延 import
+  from eval.spec import (
+    JOINT_NOISE_RAD,
+    ROOT_ANG_VEL_NOISE_RAD_S,
+    ROOT_LIN_VEL_NOISE_M_S,
+    ROOT_XY_NOISE_M,
+    ROOT_YAW_NOISE_RAD,
+  )
+
+  training = ctx.cfg.training
+  num_feet = len(training.training_dr_foot_friction_geoms)
+  num_act = len(ACTUATOR_NAMES)
+  n = int(block_size)
+  scale = float(training.training_dr_pose_scale)
+  rng = make_dr_block_rng(training_seed, block_index)
+
+  table = np.zeros(n, dtype=dr_table_dtype(num_feet))
+  table["episode_index"] = int(block_index) * n + np.arange(n)
+  lo_f, hi_f = training.training_dr_friction_slide_mult_range
+  table["friction_slide_mult"] = rng.uniform(lo_f, hi_f, size=(n, num_feet))
+  lo_kp, hi_kp = training.training_dr_actuator_kp_mult_range
+  table["kp_mult"] = rng.uniform(lo_kp, hi_kp, size=(n, num_act))
+  lo_kv, hi_kv = training.training_dr_actuator_kv_mult_range
+  table["kv_mult"] = rng.uniform(lo_kv, hi_kv, size=(n, num_act))
+  # 姿勢ノイズは eval と同じレンジ × pose_scale（X/Y 位置だけは eval と同じく scale を掛けない）
+  table["root_yaw_rad"] = rng.uniform(-ROOT_YAW_NOISE_RAD * scale, ROOT_YAW_NOISE_RAD * scale, size=n)
+  table["root_xy_m"] = rng.uniform(-ROOT_XY_NOISE_M, ROOT_XY_NOISE_M, size=(n, 2))
+  table["joint_delta_rad"] = rng.uniform(
+    -JOINT_NOISE_RAD * scale, JOINT_NOISE_RAD * scale, size=(n, len(JOINT_NAMES))
+  )
+  table["root_lin_vel"] = rng.uniform(
+    -ROOT_LIN_VEL_NOISE_M_S * scale, ROOT_LIN_VEL_NOISE_M_S * scale, size=(n, 3)
+  )
+  table["root_ang_vel"] = rng.uniform(
+    -ROOT_ANG_VEL_NOISE_RAD_S * scale, ROOT_ANG_VEL_NOISE_RAD_S * scale, size=(n, 3)
+  )
+  return table
+
+
+def sample_dr_episodes(
+  ctx: ExperimentContext,
+  training_seed: int,
+  start: int,
+  stop: int,
+) -> np.ndarray:
+  """エピソード ``[start, stop)`` の DR パラメータ行（ブロックから切り出す）。"""
+  start, stop = int(start), max(int(start), int(stop))
+  blocks = [
+    sample_dr_block(ctx, training_seed, b)
+    for b in range(start // DR_TABLE_BLOCK, (stop + DR_TABLE_BLOCK - 1) // DR_TABLE_BLOCK)
+  ]
+  if not blocks:
+    return np.zeros(0, dtype=dr_table_dtype(len(ctx.cfg.training.training_dr_foot_friction_geoms)))
+  table = np.concatenate(blocks)
+  offset = (start // DR_TABLE_BLOCK) * DR_TABLE_BLOCK
+  return table[start - offset : stop - offset]
+
+
+def write_dr_episode_log(
+  path: Path,
+  ctx: ExperimentContext,
+  *,
+  training_seed: int,
+  start: int,
+  stop: int,
+) -> Path:
+  """エピソード ``[start, stop)`` の DR パラメータを列ごとの npz に書く（事後分析用）。
+
+  行は seed から再生成するので、学習中の reset ごとの記録は持たない。
+  """
+  table = sample_dr_episodes(ctx, training_seed, start, stop)
+  path = Path(path)
+  path.parent.mkdir(parents=True, exist_ok=True)
+  np.savez_compressed(
+    path,
+    training_seed=np.int64(training_seed),
+    foot_friction_geom_names=np.asarray(ctx.cfg.training.training_dr_foot_friction_geoms, dtype=str),
+    actuator_names=np.asarray(ACTUATOR_NAMES, dtype=str),
+    **{name: table[name] for name in table.dtype.names},
+  )
+  return path
+
+
 _DEFAULT_CTX: ExperimentContext | None = None
 
 
@@ -80,89 +180,80 @@ def training_dr_spec_dict(ctx: ExperimentContext | None = None) -> dict[str, Any
 
 
 class TrainingDomainRandomization:
-  """MuJoCo model の名目物理パラメータを保持し、エピソードごとにサンプルする。"""
+  """MuJoCo model の名目物理パラメータを保持し、エピソードごとに DR 表の行を書き込む。"""
 
-  def __init__(self, model: mujoco.MjModel, ctx: ExperimentContext) -> None:
-    self._ctx = ctx
-    self._foot_friction: tuple[_FootFrictionNominal, ...] = tuple(
-      self._snapshot_foot_friction(model, name)
-      for name in self._ctx.cfg.training.training_dr_foot_friction_geoms
-    )
-    self._actuators: tuple[_ActuatorNominal, ...] = tuple(
-      self._snapshot_actuator(model, name) for name in ACTUATOR_NAMES
-    )
+  def __init__(
+    self,
+    model: mujoco.MjModel,
+    ctx: ExperimentContext,
+    *,
+    training_seed: int | None = None,
+  ) -> None:
+    # eval パッケージとの循環 import を避けるため遅延 import
+    from eval.noise import pose_noise_addresses
 
-  @staticmethod
-  def _snapshot_foot_friction(model: mujoco.MjModel, geom_name: str) -> _FootFrictionNominal:
-    geom_id = int(model.geom(geom_name).id)
-    slide = float(model.geom_friction[geom_id, 0])
-    return _FootFrictionNominal(geom_name, geom_id, slide)
-
-  @staticmethod
-  def _snapshot_actuator(model: mujoco.MjModel, actuator_name: str) -> _ActuatorNominal:
-    act_id = int(model.actuator(actuator_name).id)
-    return _ActuatorNominal(
-      actuator_name=actuator_name,
-      act_id=act_id,
-      kp=float(model.actuator_gainprm[act_id, 0]),
-      bias_kp=float(model.actuator_biasprm[act_id, 1]),
-      bias_kv=float(model.actuator_biasprm[act_id, 2]),
+    self._ctx = ctx
+    self._training_seed = training_seed
+    self._foot_geom_ids = np.array(
+      [int(model.geom(name).id) for name in self._ctx.cfg.training.training_dr_foot_friction_geoms],
+      dtype=np.intp,
     )
+    self._act_ids = np.array([int(model.actuator(name).id) for name in ACTUATOR_NAMES], dtype=np.intp)
+    self._foot_slide = model.geom_friction[self._foot_geom_ids, 0].copy()
+    self._act_kp = model.actuator_gainprm[self._act_ids, 0].copy()
+    # biasprm[1:3] = (-kp, -kv)
+    self._act_bias = model.actuator_biasprm[self._act_ids, 1:3].copy()
+    self._pose_adr = pose_noise_addresses(model)
+    self._block_index = -1
+    self._block: np.ndarray | None = None
 
   def restore_nominal(self, model: mujoco.MjModel) -> None:
     """XML 名目値へ戻す（eval / visualize 前にも呼ぶ）。"""
-    for foot in self._foot_friction:
-      model.geom_friction[foot.geom_id, 0] = foot.slide
-    for act in self._actuators:
-      model.actuator_gainprm[act.act_id, 0] = act.kp
-      model.actuator_biasprm[act.act_id, 1] = act.bias_kp
-      model.actuator_biasprm[act.act_id, 2] = act.bias_kv
+    model.geom_friction[self._foot_geom_ids, 0] = self._foot_slide
+    model.actuator_gainprm[self._act_ids, 0] = self._act_kp
+    model.actuator_biasprm[self._act_ids, 1:3] = self._act_bias
+
+  def episode_params(self, episode_index: int) -> np.void:
+    """``episode_index`` の DR パラメータ行（ブロックを外れたら次のブロックをサンプルする）。"""
+    block_index, row = divmod(int(episode_index), DR_TABLE_BLOCK)
+    if self._block is None or block_index != self._block_index:
+      self._block = sample_dr_block(self._ctx, self._training_seed, block_index)
+      self._block_index = block_index
+    return self._block[row]
+
+  def write_model_params(self, model: mujoco.MjModel, params: np.void) -> None:
+    """摩擦・kp/kv を名目値 × 行の倍率で上書きする（同じ構成の model なら複製にも書ける）。"""
+    model.geom_friction[self._foot_geom_ids, 0] = self._foot_slide * params["friction_slide_mult"]
+    kp_mult = params["kp_mult"]
+    model.actuator_gainprm[self._act_ids, 0] = self._act_kp * kp_mult
+    model.actuator_biasprm[self._act_ids, 1] = self._act_bias[:, 0] * kp_mult
+    model.actuator_biasprm[self._act_ids, 2] = self._act_bias[:, 1] * params["kv_mult"]
+
+  def apply_pose_params(self, model: mujoco.MjModel, data: mujoco.MjData, params: np.void) -> None:
+    """stand 適用済み state に行の初期姿勢ノイズを書き込み、``mj_forward`` する。"""
+    from eval.noise import apply_pose_noise
+    from eval.spec import APPLY_ROOT_XY_POSITION_NOISE
+
+    apply_pose_noise(
+      model,
+      data,
+      self._pose_adr,
+      yaw_rad=float(params["root_yaw_rad"]),
+      joint_delta_rad=params["joint_delta_rad"],
+      root_lin_vel=params["root_lin_vel"],
+      root_ang_vel=params["root_ang_vel"],
+      root_xy=params["root_xy_m"] if APPLY_ROOT_XY_POSITION_NOISE else None,
+    )
 
   def apply_for_episode(
     self,
     model: mujoco.MjModel,
     data: mujoco.MjData,
     *,
-    rng: np.random.Generator,
-  ) -> dict[str, Any]:
-    """名目値復元 → 摩擦・kp/kv サンプル → 初期姿勢ノイズ（eval 同レンジ × scale）。"""
-    self.restore_nominal(model)
-
-    applied: dict[str, Any] = {}
-
-    foot_mult: dict[str, float] = {}
-    lo_f, hi_f = self._ctx.cfg.training.training_dr_friction_slide_mult_range
-    for foot in self._foot_friction:
-      mult = float(rng.uniform(lo_f, hi_f))
-      model.geom_friction[foot.geom_id, 0] = foot.slide * mult
-      foot_mult[foot.geom_name] = mult
-    applied["foot_friction_slide_mult"] = foot_mult
-
-    lo_kp, hi_kp = self._ctx.cfg.training.training_dr_actuator_kp_mult_range
-    lo_kv, hi_kv = self._ctx.cfg.training.training_dr_actuator_kv_mult_range
-    actuator_mult: list[dict[str, float | str]] = []
-    for act in self._actuators:
-      kp_mult = float(rng.uniform(lo_kp, hi_kp))
-      kv_mult = float(rng.uniform(lo_kv, hi_kv))
-      model.actuator_gainprm[act.act_id, 0] = act.kp * kp_mult
-      model.actuator_biasprm[act.act_id, 1] = act.bias_kp * kp_mult
-      model.actuator_biasprm[act.act_id, 2] = act.bias_kv * kv_mult
-      actuator_mult.append(
-        {
-          "name": act.actuator_name,
-          "kp_mult": kp_mult,
-          "kv_mult": kv_mult,
-        }
-      )
-    applied["actuator_mult"] = actuator_mult
-
-    # eval パッケージとの循環 import を避けるため遅延 import
-    from eval.noise import apply_initial_pose_noise
-
-    applied["pose"] = apply_initial_pose_noise(
-      model,
-      data,
-      rng,
-      scale=float(self._ctx.cfg.training.training_dr_pose_scale),
-    )
-    return applied
+    episode_index: int,
+  ) -> np.void:
+    """摩擦・kp/kv を名目値 × 倍率で上書き → 初期姿勢ノイズ（eval 同レンジ × scale）。適用した行を返す。"""
+    params = self.episode_params(episode_index)
+    self.write_model_params(model, params)
+    self.apply_pose_params(model, data, params)
+    return params
@@ -3,6 +3,7 @@
 from dataclasses import dataclass
 
 import mujoco
+import numpy as np
 
 from lib.actuators import ACTUATOR_NAMES
 from lib.experiment_context import ExperimentContext
@@ -15,32 +16,51 @@ class EffortBreakdown:
 
 
 class EffortTracker:
+  """物理ステップごとに Σ |τ_i·q̇_i| / τmax_i · dt を積算する。
+
+  アクチュエータ id・DOF アドレス・重み dt/τmax は構築時に配列化し、
+  ``record_physics_step`` は gather 2 回と内積 1 回だけにする。
+  """
+
   def __init__(self, model: mujoco.MjModel, ctx: ExperimentContext):
     self._ctx = ctx
-    self._dt = float(model.opt.timestep)
-    self._act_ids: list[int] = []
-    self._dof_adr: list[int] = []
-    self._tau_max: list[float] = []
+    dt = float(model.opt.timestep)
+    act_ids: list[int] = []
+    dof_adr: list[int] = []
+    tau_max: list[float] = []
     for name in ACTUATOR_NAMES:
       act = model.actuator(name)
       act_id = act.id
-      self._act_ids.append(act_id)
+      act_ids.append(act_id)
       jnt_id = int(model.actuator_trnid[act_id, 0])
-      self._dof_adr.append(int(model.jnt_dofadr[jnt_id]))
+      dof_adr.append(int(model.jnt_dofadr[jnt_id]))
       fr = model.actuator_forcerange[act_id]
-      self._tau_max.append(max(abs(float(fr[0])), abs(float(fr[1]))))
+      tau_max.append(max(abs(float(fr[0])), abs(float(fr[1]))))
+    self._act_ids = np.array(act_ids, dtype=np.intp)
+    self._dof_adr = np.array(dof_adr, dtype=np.intp)
+    self._weights = dt / np.array(tau_max, dtype=np.float64)
     self._power_cost = 0.0
 
   def reset_control_step(self) -> None:
     self._power_cost = 0.0
 
   def record_physics_step(self, data: mujoco.MjData) -> None:
-    for act_id, dof_adr, tau_max in zip(
-      self._act_ids, self._dof_adr, self._tau_max, strict=True
-    ):
-      tau = float(data.actuator_force[act_id])
-      qvel = float(data.qvel[dof_adr])
-      self._power_cost += abs(tau * qvel) / tau_max * self._dt
+    self._accumulate(data.actuator_force[self._act_ids], data.qvel[self._dof_adr])
+
+  def record_physics_steps(self, actuator_force: np.ndarray, qvel: np.ndarray) -> None:
+    """物理ステップごとの行（``actuator_force`` は ``ACTUATOR_NAMES`` 順、``qvel`` は全 DOF）を順に積算する。
+
+    |τ·q̇| は全行まとめて求め、重み付き和は 1 行ずつ ``record_physics_step`` と同じ内積で
+    足す（結果は bit 単位で一致する）。
+    """
+    power = actuator_force * qvel[:, self._dof_adr]
+    np.abs(power, out=power)
+    for row in power:
+      self._power_cost += float(row @ self._weights)
+
+  def _accumulate(self, tau: np.ndarray, qvel: np.ndarray) -> None:
+    power = tau * qvel
+    self._power_cost += float(np.abs(power, out=power) @ self._weights)
 
   def control_step_breakdown(self) -> EffortBreakdown:
     penalty = self._power_cost * self._ctx.cfg.reward.effort_penalty_scale
@@ -21,13 +21,19 @@ from telemetry.biped_ppo import (
 
 from lib.action import ActionBinding
 from lib.actuators import LEFT_FOOT_SITE, RIGHT_FOOT_SITE
+from sim.contacts import FloorContacts
 from sim.observation import Observation
+from sim.step_info_ipc import (
+  STEP_INFO_DIM,
+  STEP_INFO_FULL,
+  STEP_INFO_SCALARS,
+  termination_reason_code,
+  validate_step_info_level,
+)
 from sim.effort import EffortTracker
 from sim.reward import Reward
-from sim.domain_randomization import (
-  TrainingDomainRandomization,
-  make_episode_dr_rng,
-)
+from sim.domain_randomization import TrainingDomainRandomization
+from sim.reset_cache import ResetStateCache
 from sim.termination import (
   NOT_TERMINATED,
   REASON_CONTACT_BASKET,
@@ -36,6 +42,7 @@ from sim.termination import (
   REASON_LOW_UPRIGHT,
   REASON_BACKWARD_LEAN,
   Termination,
+  TerminationOutcome,
 )
 
 class EnvBipedPPO:
@@ -53,6 +60,7 @@ class EnvBipedPPO:
     training_dr_enabled: bool | None = None,
     training_seed: int | None = None,
     hydra_config_path: str | None = None,
+    step_info_level: str = STEP_INFO_FULL,
   ):
     if ctx is None:
       if hydra_config_path is None:
@@ -64,7 +72,14 @@ class EnvBipedPPO:
         ctx = build_experiment_context(loaded_cfg)
     self._ctx = ctx
 
-    self.model = mujoco.MjModel.from_xml_path(self._ctx.xml_path)
+    self._physics_rollout = bool(self._ctx.cfg.runtime.physics_rollout)
+    if self._physics_rollout:
+      # 新しめの MuJoCo（rollout.Rollout・接触センサ）が要るので、有効時だけ読み込む
+      from sim.substep_rollout import SubstepRollout, load_model_with_substep_sensors
+
+      self.model = load_model_with_substep_sensors(self._ctx.xml_path)
+    else:
+      self.model = mujoco.MjModel.from_xml_path(self._ctx.xml_path)
     apply_model_visual_preset(self.model)
     self.data = mujoco.MjData(self.model)
 
@@ -72,7 +87,7 @@ class EnvBipedPPO:
       training_dr_enabled = bool(self._ctx.cfg.training.training_dr)
     self._training_dr_enabled = bool(training_dr_enabled)
     self._training_seed = training_seed
-    self._training_dr = TrainingDomainRandomization(self.model, self._ctx)
+    self._training_dr = TrainingDomainRandomization(self.model, self._ctx, training_seed=training_seed)
 
     physics_dt = float(self.model.opt.timestep)
     if abs(physics_dt - self._ctx.cfg.sim.physics_timestep_s) > 1e-9:
@@ -91,17 +106,30 @@ class EnvBipedPPO:
     self._reward = Reward(self.model, self._ctx)
     self._effort = EffortTracker(self.model, self._ctx)
     self._termination = Termination(self.model, self._ctx)
+    self._contacts = FloorContacts(self.model)
+    self._substeps = (
+      SubstepRollout(self.model, self._ctx.cfg.sim.frame_skip)
+      if self._physics_rollout
+      else None
+    )
     self._stand_key_id = mujoco.mj_name2id(
       self.model, mujoco.mjtObj.mjOBJ_KEY, "stand"
     )
+    # stand 名目 state（model がまだ名目値のうちに作る）と DR 初期 state の先読みプール
+    self._reset_cache = ResetStateCache(
+      self.model,
+      self._stand_key_id,
+      training_dr=self._training_dr if self._training_dr_enabled else None,
+      pool_size=int(self._ctx.cfg.runtime.reset_prefetch),
+    )
     self._step_wall_sleep_sec = float(self._ctx.cfg.runtime.step_wall_sleep_sec)
+    self._step_info_level = validate_step_info_level(step_info_level)
+    # scalars レベルの step_info（STEP_INFO_FIELDS 順）。step ごとに上書きする
+    self._step_info_record = np.zeros(STEP_INFO_DIM, dtype=np.float32)
 
   def _apply_stand_keyframe(self) -> None:
-    if self._stand_key_id >= 0:
-      mujoco.mj_resetDataKeyframe(self.model, self.data, self._stand_key_id)
-    else:
-      mujoco.mj_resetData(self.model, self.data)
-    mujoco.mj_forward(self.model, self.data)
+    """keyframe ``stand`` + ``mj_forward`` 直後の state に戻す（キャッシュからのコピー）。"""
+    self._reset_cache.restore_stand(self.model, self.data)
 
   def _finalize_reset(self) -> tuple[np.ndarray, float]:
     """物理状態確定後にエピソード状態・観測を初期化する。
@@ -124,28 +152,45 @@ class EnvBipedPPO:
       n_action=self._ctx.cfg.sim.action_dim,
     )
 
-    policy_obs, _ = self._observation.build(
-      self.model, self.data, self._episode, dx=0.0
+    obs, _ = self._observation.build(
+      self.model,
+      self.data,
+      self._episode,
+      contacts=self._contacts.update(self.data),
+      dx=0.0,
     )
-    return policy_obs.to_vector(), imu_x
+    # 観測バッファは次の build で上書きされるため、呼び出し側にはコピーを返す
+    return obs.copy(), imu_x
 
   def reset(self, *, episode_index: int = 0):
     """keyframe ``stand`` から再開し、エピソード状態・観測を初期化する。
 
-    学習 DR 有効時はエピソードごとに初期姿勢・足底摩擦・kp/kv をサンプルする。
+    学習 DR 有効時はエピソードごとに初期姿勢・足底摩擦・kp/kv をサンプルする
+    （``prefetch_reset`` 済みならその state をコピーするだけ）。
     """
-    self._training_dr.restore_nominal(self.model)
-    self._apply_stand_keyframe()
     if self._training_dr_enabled:
-      dr_rng = make_episode_dr_rng(self._training_seed, episode_index)
-      _applied = self._training_dr.apply_for_episode(
-        self.model,
-        self.data,
-        rng=dr_rng,
-      )
+      if self._reset_cache.take(self.model, self.data, episode_index) is None:
+        # stand state は名目 model で計算済みのキャッシュ。摩擦・kp/kv は DR がすべて上書きする
+        self._apply_stand_keyframe()
+        self._training_dr.apply_for_episode(
+          self.model,
+          self.data,
+          episode_index=episode_index,
+        )
+    else:
+      self._training_dr.restore_nominal(self.model)
+      self._apply_stand_keyframe()
     obs, _origin_imu_x = self._finalize_reset()
     return obs
 
+  def prefetch_reset(self, episode_index: int) -> bool:
+    """``reset(episode_index=...)`` の DR 初期 state を先に作っておく（``runtime.reset_prefetch``）。
+
+    作ったら True。DR 無効・先読み無効・プールが満杯・作成済みなら何もせず False。
+    subproc worker が次のコマンドを待つ間に呼ぶ。
+    """
+    return self._reset_cache.prefetch(episode_index)
+
   def reset_eval(self, rng: np.random.Generator) -> tuple[np.ndarray, float, dict]:
     """Eval 用 reset: stand keyframe + 初期姿勢ノイズ（学習 DR は使わない）。
 
@@ -168,24 +213,22 @@ class EnvBipedPPO:
       2. FRAME_SKIP 回 mj_step（接触終了・すね床接触ペナルティを毎物理ステップ評価）
       3. 観測ベクトル構築（observation.py）
       4. 歩行位相更新 → 報酬（reward.py）→ 姿勢終了（termination.py）
+      5. step_info を ``step_info_level`` に応じて構築（full: dict / scalars: float32 行 / none: None）
+
+    scalars の行は env 内のバッファで、次の step で上書きされる。
     """
     _ = episode_step
     prev_action = self._action.apply(self.data, action)
 
-    termination = NOT_TERMINATED
-    shank_penalty_sum = 0.0
     self._effort.reset_control_step()
 
     # --- 物理積分（50 Hz 制御 = 10 × 500 Hz 物理）---
-    for _ in range(self._ctx.cfg.sim.frame_skip):
-      mujoco.mj_step(self.model, self.data)
-      self._effort.record_physics_step(self.data)
-      
-      termination = self._termination.done_reason_contact(self.data)
-      if termination.terminated:
-        break
-
-      shank_penalty_sum += self._termination.shank_contact_step_penalty(self.data)
+    # 接触は物理ステップごとに 1 回だけ分類し、終了判定・すねペナルティ・観測・報酬で共有する
+    if self._substeps is not None:
+      termination, shank_penalty_sum = self._integrate_rollout()
+    else:
+      termination, shank_penalty_sum = self._integrate_loop()
+    contacts = self._contacts
 
     effort = self._effort.control_step_breakdown()
 
@@ -205,10 +248,11 @@ class EnvBipedPPO:
     right_foot_dx = right_foot_x - self._episode.prev_right_foot_x
 
     # --- 観測・歩行位相・報酬 ---
-    policy_obs, step_physics = self._observation.build(
+    obs, step_physics = self._observation.build(
       self.model,
       self.data,
       self._episode,
+      contacts=contacts,
       dx=dx,
       left_foot_dx=left_foot_dx,
       right_foot_dx=right_foot_dx,
@@ -233,7 +277,6 @@ class EnvBipedPPO:
       physics=step_physics,
       progress_m=progress_m,
     )
-    reward_breakdown = reward_result.breakdown
 
     self._episode.advance_imu_x(imu_x)
     self._episode.advance_foot_dx(left_foot_x, right_foot_x)
@@ -241,11 +284,10 @@ class EnvBipedPPO:
     # 接触以外の転倒条件（低姿勢・後傾など）は物理ステップ後に 1 回だけ評価
     if not termination.terminated:
       termination = self._termination.done_reason_pose(
-        self.data
+        self.data, contacts
       )
 
     terminated = termination.terminated
-    termination_reason = termination.reason
 
     reward = (
       reward_result.total
@@ -255,8 +297,98 @@ class EnvBipedPPO:
 
     self._episode.prev_action = prev_action
 
+    if self._step_info_level == STEP_INFO_FULL:
+      step_info = self._full_step_info(
+        imu_x=imu_x,
+        imu_z=imu_z,
+        dx=dx,
+        prev_action=prev_action,
+        step_physics=step_physics,
+        biped=biped,
+        reward_result=reward_result,
+        termination=termination,
+        shank_penalty_sum=shank_penalty_sum,
+        reward=reward,
+      )
+    elif self._step_info_level == STEP_INFO_SCALARS:
+      step_info = self._scalar_step_info(
+        imu_x=imu_x,
+        dx=dx,
+        step_physics=step_physics,
+        biped=biped,
+        reward_result=reward_result,
+        termination=termination,
+        shank_penalty_sum=shank_penalty_sum,
+      )
+    else:
+      step_info = None
+
+    return obs.copy(), reward, terminated, step_info
+
+  def _integrate_loop(self) -> tuple[TerminationOutcome, float]:
+    """``frame_skip`` 回 ``mj_step`` し、物理ステップごとに筋負荷・接触終了・すねペナルティを評価する。"""
+    termination = NOT_TERMINATED
+    shank_penalty_sum = 0.0
+    model, data, contacts = self.model, self.data, self._contacts
+    record_effort = self._effort.record_physics_step
+    contact_substep = self._termination.contact_substep
+    for _ in range(self._ctx.cfg.sim.frame_skip):
+      mujoco.mj_step(model, data)
+      record_effort(data)
+      termination, shank_penalty = contact_substep(contacts.update(data))
+      if termination.terminated:
+        break
+      shank_penalty_sum += shank_penalty
+    return termination, shank_penalty_sum
+
+  def _integrate_rollout(self) -> tuple[TerminationOutcome, float]:
+    """``_integrate_loop`` と同じ評価を、``mujoco.rollout`` で積分した後の配列に対して行う。
+
+    足以外の床接触がある物理ステップだけを順に判定し、最初の接触終了で打ち切る。
+    """
+    substeps = self._substeps
+    substeps.run(self.data)
+    contacts = self._contacts
+    termination = NOT_TERMINATED
+    shank_penalty_sum = 0.0
+    last = substeps.frame_skip - 1
+    for k in substeps.body_contact_substeps():
+      outcome, shank_penalty = self._termination.contact_substep(
+        contacts.assign(substeps.on_floor[k], substeps.normal_force_n[k])
+      )
+      if outcome.terminated:
+        termination, last = outcome, int(k)
+        break
+      shank_penalty_sum += shank_penalty
+
+    self._effort.record_physics_steps(
+      substeps.actuator_force[: last + 1], substeps.qvel[: last + 1]
+    )
+    contacts.assign(substeps.on_floor[last], substeps.normal_force_n[last])
+    if last < substeps.frame_skip - 1:
+      substeps.restore(self.data, last)
+    return termination, shank_penalty_sum
+
+  def _full_step_info(
+    self,
+    *,
+    imu_x: float,
+    imu_z: float,
+    dx: float,
+    prev_action,
+    step_physics,
+    biped,
+    reward_result,
+    termination,
+    shank_penalty_sum: float,
+    reward: float,
+  ) -> dict:
+    """telemetry 込みの step_info（full レベル）。"""
+    reward_breakdown = reward_result.breakdown
+    terminated = termination.terminated
+    termination_reason = termination.reason
     contact_force_n = termination.contact_normal_force_n
-    step_info = {
+    return {
       "imu_x": imu_x,
       "imu_dx": dx,
       "upright": step_physics.upright,
@@ -349,10 +481,63 @@ class EnvBipedPPO:
       "truncated": False,
     }
 
-    return policy_obs.to_vector(), reward, terminated, step_info
+  def _scalar_step_info(
+    self,
+    *,
+    imu_x: float,
+    dx: float,
+    step_physics,
+    biped,
+    reward_result,
+    termination,
+    shank_penalty_sum: float,
+  ) -> np.ndarray:
+    """``STEP_INFO_FIELDS`` 順の float32 行（scalars レベル）。dict・telemetry 変換は行わない。"""
+    reward_breakdown = reward_result.breakdown
+    reason = termination.reason
+    force_n = termination.contact_normal_force_n
+    self._step_info_record[:] = (
+      imu_x,
+      dx,
+      step_physics.upright,
+      step_physics.any_foot_on_floor,
+      reward_result.forward,
+      reward_breakdown.forward_imu,
+      reward_breakdown.forward_foot,
+      reward_breakdown.effort_penalty,
+      reward_result.shaping,
+      reward_breakdown.upright_bonus,
+      reward_breakdown.push_off_bonus,
+      reward_breakdown.landing_bonus,
+      reward_breakdown.backward_lean_penalty,
+      reward_breakdown.forward_lean_penalty,
+      reward_breakdown.height_penalty,
+      reward_breakdown.flight_duration_penalty,
+      reward_breakdown.heading_misalign_penalty,
+      reward_breakdown.lateral_tilt_penalty,
+      shank_penalty_sum,
+      reward_breakdown.double_support_penalty,
+      reward_breakdown.alternating_landing_bonus,
+      biped.left_landed or biped.right_landed,
+      biped.alternating_landing,
+      biped.single_support,
+      biped.both_feet_on_floor,
+      biped.aerial_steps,
+      termination_reason_code(reason),
+      force_n if reason == REASON_CONTACT_BASKET else np.nan,
+      force_n if reason == REASON_CONTACT_THIGH else np.nan,
+      termination.terminated,
+    )
+    return self._step_info_record
 
   def set_step_wall_sleep_sec(self, sec: float) -> None:
     self._step_wall_sleep_sec = max(0.0, float(sec))
 
   def get_step_wall_sleep_sec(self) -> float:
     return float(self._step_wall_sleep_sec)
+
+  def set_step_info_level(self, level: str) -> None:
+    self._step_info_level = validate_step_info_level(level)
+
+  def get_step_info_level(self) -> str:
+    return self._step_info_level
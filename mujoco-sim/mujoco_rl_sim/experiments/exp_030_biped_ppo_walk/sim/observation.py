@@ -1,89 +1,99 @@
-"""両脚バイペッド向け観測（51 次元・交互片脚歩行）。"""
+"""両脚バイペッド向け観測（51 次元・交互片脚歩行）。
+
+観測の並び（contract/biped_walk_v1.py と一致）::
+
+  [0]     dx
+  [1:4]   imu_gyro xyz
+  [4:7]   imu_zaxis xyz
+  [7]     imu_z (正規化)
+  [8:10]  左右足接地 ±1
+  [10:12] 左右足 dx
+  [12:14] 左右足 z
+  [14]    single_support ±1
+  [15:27] joint_q ×12
+  [27:39] joint_qvel ×12
+  [39:51] prev_action ×12
+
+``Observation`` は構築時に site / sensor / qpos / qvel のアドレスを index 配列へ解決しておき、
+毎 step は名前引きをせずに ``np.take`` で生値を集め、``生値 * scale + offset`` を [-1, 1] に
+クリップして事前確保した float32 バッファへ書き込む（step ごとの配列確保なし）。
+"""
 
 from dataclasses import dataclass
-from typing import NamedTuple
 
 import mujoco
+import numpy as np
 
 from sim.episode_state import EpisodeState
 from lib.actuators import (
   JOINT_NAMES,
-  LEFT_FOOT_GEOM,
   LEFT_FOOT_SITE,
-  RIGHT_FOOT_GEOM,
   RIGHT_FOOT_SITE,
 )
 from contract.validate import assert_obs_vector
 
 from contract import TELEMETRY_CONTRACT
 from lib.experiment_context import ExperimentContext
-from lib.obs_norm import clip_scale, height_to_norm, range_to_norm
-from lib.pose import pose_metrics
+from lib.pose import BODY_NAME, WORLD_FORWARD_X, WORLD_FORWARD_Y, WORLD_FORWARD_Z
+from sim.contacts import FloorContacts
 
 LEFT_HEEL_SITE = "heel_bottom_site"
 LEFT_TOE_SITE = "toe_bottom_site"
 RIGHT_HEEL_SITE = "right_heel_bottom_site"
 RIGHT_TOE_SITE = "right_toe_bottom_site"
 
+OBS_DX = 0
+OBS_IMU_GYRO = slice(1, 4)
+OBS_IMU_ZAXIS = slice(4, 7)
+OBS_IMU_Z = 7
+OBS_FOOT_CONTACT = slice(8, 10)
+OBS_FOOT_DX = slice(10, 12)
+OBS_FOOT_Z = slice(12, 14)
+OBS_SINGLE_SUPPORT = 14
+OBS_JOINT_Q = slice(15, 27)
+OBS_JOINT_QVEL = slice(27, 39)
+OBS_PREV_ACTION = slice(39, 51)
+OBS_DIM = 51
 
-class PolicyObs(NamedTuple):
-  """ポリシー入力ベクトル（51 次元）。並びは contract/biped_walk_v1.py と一致。
+# site_xpos を集める順（_SITE_* はこの並びの行番号）
+_SITE_NAMES = (
+  "imu_site",
+  LEFT_FOOT_SITE,
+  RIGHT_FOOT_SITE,
+  LEFT_TOE_SITE,
+  LEFT_HEEL_SITE,
+  RIGHT_TOE_SITE,
+  RIGHT_HEEL_SITE,
+)
+_SITE_IMU = 0
+_SITE_LEFT_FOOT = 1
+_SITE_RIGHT_FOOT = 2
+_SITE_LEFT_TOE = 3
+_SITE_LEFT_HEEL = 4
+_SITE_RIGHT_TOE = 5
+_SITE_RIGHT_HEEL = 6
 
-  [0]     dx
-  [1:4]   imu_gyro xyz
-  [4:7]   imu_zaxis xyz
-  [7]     imu_z (正規化)
-  [8:10]  左右足接地 ±1
-  [10:12] 左右足 dx
-  [12:14] 左右足 z
-  [14]    single_support ±1
-  [15:27] joint_q ×12
-  [27:39] joint_qvel ×12
-  [39:51] prev_action ×12
-  """
+_LEFT_KNEE = JOINT_NAMES.index("left_knee_pitch")
+_RIGHT_KNEE = JOINT_NAMES.index("right_knee_pitch")
 
-  dx: float
-  imu_gyro_x: float
-  imu_gyro_y: float
-  imu_gyro_z: float
-  imu_zaxis_x: float
-  imu_zaxis_y: float
-  imu_zaxis_z: float
-  imu_z: float
-  left_foot_contact: float
-  right_foot_contact: float
-  left_foot_dx: float
-  right_foot_dx: float
-  left_foot_z: float
-  right_foot_z: float
-  single_support: float
-  joint_q: tuple[float, ...]
-  joint_qvel: tuple[float, ...]
-  prev_action: tuple[float, ...]
-
-  def to_vector(self) -> tuple[float, ...]:
-    vec = (
-      self.dx,
-      self.imu_gyro_x,
-      self.imu_gyro_y,
-      self.imu_gyro_z,
-      self.imu_zaxis_x,
-      self.imu_zaxis_y,
-      self.imu_zaxis_z,
-      self.imu_z,
-      self.left_foot_contact,
-      self.right_foot_contact,
-      self.left_foot_dx,
-      self.right_foot_dx,
-      self.left_foot_z,
-      self.right_foot_z,
-      self.single_support,
-      *self.joint_q,
-      *self.joint_qvel,
-      *self.prev_action,
-    )
-    assert_obs_vector(vec, TELEMETRY_CONTRACT)
-    return vec
+
+def _sensor_indices(model: mujoco.MjModel, name: str) -> np.ndarray:
+  sensor = model.sensor(name)
+  adr = int(model.sensor_adr[sensor.id])
+  return np.arange(adr, adr + int(model.sensor_dim[sensor.id]), dtype=np.intp)
+
+
+def _affine_to_unit(lo: float, hi: float) -> tuple[float, float]:
+  """[lo, hi] を [-1, 1] へ写す ``(scale, offset)``。幅が 0 以下なら常に 0 を返す係数。"""
+  span = hi - lo
+  if span <= 0.0:
+    return 0.0, 0.0
+  return 2.0 / span, -2.0 * lo / span - 1.0
+
+
+def _inverse_scale(scale: float) -> float:
+  """``clip(value / scale)`` 用の係数。scale が 0 以下なら常に 0 を返す係数。"""
+  return 1.0 / scale if scale > 0.0 else 0.0
 
 
 @dataclass(frozen=True)
@@ -127,33 +137,53 @@ class StepPhysics:
 
 
 class Observation:
-  """MuJoCo 状態から PolicyObs（正規化済み）と StepPhysics（生値）を構築する。"""
+  """MuJoCo 状態から正規化済み観測（float32 ``[51]``）と StepPhysics（生値）を構築する。
+
+  ``build`` が返す観測は内部バッファそのもので、次の ``build`` で上書きされる。
+  保持する場合は呼び出し側でコピーする。``runtime.check_obs_contract`` が true のときだけ
+  毎 step 契約チェック（``assert_obs_vector``）を行う。
+  """
 
   def __init__(self, model: mujoco.MjModel, ctx: ExperimentContext):
     self._ctx = ctx
-    self._floor_id = model.geom("floor").id
-    self._left_foot_id = model.geom(LEFT_FOOT_GEOM).id
-    self._right_foot_id = model.geom(RIGHT_FOOT_GEOM).id
-    self._joint_q_ranges = [
-      model.jnt_range[model.joint(name).id].copy() for name in JOINT_NAMES
-    ]
-
-  @staticmethod
-  def _site_x(data: mujoco.MjData, site_name: str) -> float:
-    return float(data.site(site_name).xpos[0])
-
-  @staticmethod
-  def _site_z(data: mujoco.MjData, site_name: str) -> float:
-    return float(data.site(site_name).xpos[2])
-
-  def _geom_on_floor(self, data: mujoco.MjData, geom_id: int) -> bool:
-    for i in range(data.ncon):
-      c = data.contact[i]
-      if (c.geom1 == geom_id and c.geom2 == self._floor_id) or (
-        c.geom2 == geom_id and c.geom1 == self._floor_id
-      ):
-        return True
-    return False
+    sim = ctx.cfg.sim
+    self._check_contract = bool(ctx.cfg.runtime.check_obs_contract)
+
+    # --- 名前 → アドレス（構築時に 1 回だけ解決） ---
+    self._site_ids = np.array([model.site(name).id for name in _SITE_NAMES], dtype=np.intp)
+    self._gyro_idx = _sensor_indices(model, "imu_gyro")
+    self._zaxis_idx = _sensor_indices(model, "imu_zaxis")
+    joint_ids = [model.joint(name).id for name in JOINT_NAMES]
+    self._qpos_adr = np.array([model.jnt_qposadr[j] for j in joint_ids], dtype=np.intp)
+    self._qvel_adr = np.array([model.jnt_dofadr[j] for j in joint_ids], dtype=np.intp)
+    # ボディ +X 軸 = xmat（行優先 3x3）の第 0 列
+    body_id = model.body(BODY_NAME).id
+    self._body_xaxis_idx = np.array([9 * body_id, 9 * body_id + 3, 9 * body_id + 6], dtype=np.intp)
+
+    # --- 正規化係数: obs = clip(raw * scale + offset, -1, 1) ---
+    scale = np.ones(OBS_DIM, dtype=np.float64)
+    offset = np.zeros(OBS_DIM, dtype=np.float64)
+    scale[OBS_DX] = _inverse_scale(float(sim.max_dx_per_step))
+    scale[OBS_IMU_GYRO] = _inverse_scale(float(sim.max_gyro_rad_s))
+    scale[OBS_IMU_Z], offset[OBS_IMU_Z] = _affine_to_unit(
+      float(sim.min_imu_z_norm), float(sim.max_imu_z)
+    )
+    scale[OBS_FOOT_DX] = _inverse_scale(float(sim.max_foot_dx_per_step))
+    scale[OBS_FOOT_Z], offset[OBS_FOOT_Z] = _affine_to_unit(
+      float(sim.min_foot_z_norm), float(sim.max_foot_z_norm)
+    )
+    for i, j in enumerate(joint_ids):
+      lo, hi = (float(x) for x in model.jnt_range[j])
+      scale[OBS_JOINT_Q.start + i], offset[OBS_JOINT_Q.start + i] = _affine_to_unit(lo, hi)
+    scale[OBS_JOINT_QVEL] = _inverse_scale(float(sim.max_joint_vel_rad_s))
+    self._scale = scale
+    self._offset = offset
+
+    # --- step ごとに上書きする作業領域 ---
+    self._raw = np.zeros(OBS_DIM, dtype=np.float64)
+    self._site_xpos = np.zeros((len(_SITE_NAMES), 3), dtype=np.float64)
+    self._body_xaxis = np.zeros(3, dtype=np.float64)
+    self.obs = np.zeros(OBS_DIM, dtype=np.float32)
 
   def build(
     self,
@@ -161,127 +191,109 @@ class Observation:
     data: mujoco.MjData,
     episode: EpisodeState,
     *,
+    contacts: FloorContacts,
     dx: float,
     left_foot_dx: float = 0.0,
     right_foot_dx: float = 0.0,
-  ) -> tuple[PolicyObs, StepPhysics]:
+  ) -> tuple[np.ndarray, StepPhysics]:
     _ = model
-    imu_x = float(data.site("imu_site").xpos[0])
-    imu_z = float(data.site("imu_site").xpos[2])
-    rel_imu_x = imu_x - episode.origin_imu_x
-
-    # 接地判定: 足 geom と床 geom の接触有無
-    left_on = self._geom_on_floor(data, self._left_foot_id)
-    right_on = self._geom_on_floor(data, self._right_foot_id)
-    any_foot = left_on or right_on
+    raw = self._raw
+    site = self._site_xpos
+    np.take(data.site_xpos, self._site_ids, axis=0, out=site)
+    np.take(data.sensordata, self._gyro_idx, out=raw[OBS_IMU_GYRO])
+    np.take(data.sensordata, self._zaxis_idx, out=raw[OBS_IMU_ZAXIS])
+    np.take(data.qpos, self._qpos_adr, out=raw[OBS_JOINT_Q])
+    np.take(data.qvel, self._qvel_adr, out=raw[OBS_JOINT_QVEL])
+    np.take(data.xmat, self._body_xaxis_idx, out=self._body_xaxis)
+
+    imu_x = float(site[_SITE_IMU, 0])
+    imu_z = float(site[_SITE_IMU, 2])
+
+    # 接地判定: 足 geom と床 geom の接触有無（contacts は現在の data で update 済み）
+    left_on = contacts.left_foot
+    right_on = contacts.right_foot
     # 片足支持 = 左右どちらか 1 本だけ接地（歩行の基本位相）
-    single_support = (left_on and not right_on) or (right_on and not left_on)
-    if left_on and not right_on:
-      support_side = 1   # 左支持
-    elif right_on and not left_on:
-      support_side = -1  # 右支持
+    single_support = left_on != right_on
+    if single_support:
+      support_side = 1 if left_on else -1  # 左支持 / 右支持
     else:
-      support_side = 0   # 両足 or 両足非接地
-
-    left_foot_z = self._site_z(data, LEFT_FOOT_SITE)
-    right_foot_z = self._site_z(data, RIGHT_FOOT_SITE)
-    left_toe_z = self._site_z(data, LEFT_TOE_SITE)
-    left_heel_z = self._site_z(data, LEFT_HEEL_SITE)
-    right_toe_z = self._site_z(data, RIGHT_TOE_SITE)
-    right_heel_z = self._site_z(data, RIGHT_HEEL_SITE)
-
-    imu_gyro = data.sensor("imu_gyro").data
-    imu_zaxis = data.sensor("imu_zaxis").data
-    upright = float(imu_zaxis[2])
-    lean_fwd_body, heading_align, tilt_horiz = pose_metrics(imu_zaxis, data)
-
-    joint_q: list[float] = []
-    joint_qvel: list[float] = []
-    joint_q_norm: list[float] = []
-    joint_qvel_norm: list[float] = []
-    for jname, q_range in zip(JOINT_NAMES, self._joint_q_ranges, strict=True):
-      q = float(data.joint(jname).qpos[0])
-      qv = float(data.joint(jname).qvel[0])
-      joint_q.append(q)
-      joint_qvel.append(qv)
-      lo, hi = float(q_range[0]), float(q_range[1])
-      joint_q_norm.append(range_to_norm(q, lo, hi))
-      joint_qvel_norm.append(clip_scale(qv, self._ctx.cfg.sim.max_joint_vel_rad_s))
-
-    left_knee = float(data.joint("left_knee_pitch").qpos[0])
-    right_knee = float(data.joint("right_knee_pitch").qpos[0])
-    left_knee_vel = float(data.joint("left_knee_pitch").qvel[0])
-    right_knee_vel = float(data.joint("right_knee_pitch").qvel[0])
+      support_side = 0  # 両足 or 両足非接地
+
+    raw[OBS_DX] = dx
+    raw[OBS_IMU_Z] = imu_z
+    raw[8] = 1.0 if left_on else -1.0
+    raw[9] = 1.0 if right_on else -1.0
+    raw[10] = left_foot_dx
+    raw[11] = right_foot_dx
+    raw[12] = site[_SITE_LEFT_FOOT, 2]
+    raw[13] = site[_SITE_RIGHT_FOOT, 2]
+    raw[OBS_SINGLE_SUPPORT] = 1.0 if single_support else -1.0
+    raw[OBS_PREV_ACTION] = episode.prev_action
+
+    # 生値 → [-1, 1]（raw を作業領域として使い回す）
+    joint_q = tuple(raw[OBS_JOINT_Q].tolist())
+    joint_qvel = tuple(raw[OBS_JOINT_QVEL].tolist())
+    imu_gyro = raw[OBS_IMU_GYRO].tolist()
+    imu_zaxis = raw[OBS_IMU_ZAXIS].tolist()
+    np.multiply(raw, self._scale, out=raw)
+    np.add(raw, self._offset, out=raw)
+    np.clip(raw, -1.0, 1.0, out=raw)
+    self.obs[:] = raw
+    if self._check_contract:
+      assert_obs_vector(self.obs, TELEMETRY_CONTRACT)
+
+    # ボディフレーム姿勢量（lib.pose.pose_metrics と同じ定義）
+    body_x = self._body_xaxis
+    lean_fwd_body = float(
+      imu_zaxis[0] * body_x[0] + imu_zaxis[1] * body_x[1] + imu_zaxis[2] * body_x[2]
+    )
+    heading_align = float(
+      body_x[0] * WORLD_FORWARD_X
+      + body_x[1] * WORLD_FORWARD_Y
+      + body_x[2] * WORLD_FORWARD_Z
+    )
+    tilt_horiz = float(np.hypot(imu_zaxis[0], imu_zaxis[1]))
 
     foot_dx = 0.0
     if single_support:
-      if left_on:
-        foot_dx = left_foot_dx
-      else:
-        foot_dx = right_foot_dx
-
-    z_min = self._ctx.cfg.sim.min_imu_z_norm
-    z_max = self._ctx.cfg.sim.max_imu_z
-    fz_min = self._ctx.cfg.sim.min_foot_z_norm
-    fz_max = self._ctx.cfg.sim.max_foot_z_norm
-
-    obs = PolicyObs(
-      clip_scale(dx, self._ctx.cfg.sim.max_dx_per_step),
-      clip_scale(float(imu_gyro[0]), self._ctx.cfg.sim.max_gyro_rad_s),
-      clip_scale(float(imu_gyro[1]), self._ctx.cfg.sim.max_gyro_rad_s),
-      clip_scale(float(imu_gyro[2]), self._ctx.cfg.sim.max_gyro_rad_s),
-      float(imu_zaxis[0]),
-      float(imu_zaxis[1]),
-      float(imu_zaxis[2]),
-      height_to_norm(imu_z, z_min, z_max),
-      1.0 if left_on else -1.0,
-      1.0 if right_on else -1.0,
-      clip_scale(left_foot_dx, self._ctx.cfg.sim.max_foot_dx_per_step),
-      clip_scale(right_foot_dx, self._ctx.cfg.sim.max_foot_dx_per_step),
-      height_to_norm(left_foot_z, fz_min, fz_max),
-      height_to_norm(right_foot_z, fz_min, fz_max),
-      1.0 if single_support else -1.0,
-      tuple(joint_q_norm),
-      tuple(joint_qvel_norm),
-      tuple(episode.prev_action),
-    )
+      foot_dx = left_foot_dx if left_on else right_foot_dx
 
     step_physics = StepPhysics(
       imu_x=imu_x,
-      rel_imu_x=rel_imu_x,
+      rel_imu_x=imu_x - episode.origin_imu_x,
       dx=dx,
-      left_foot_x=self._site_x(data, LEFT_FOOT_SITE),
-      right_foot_x=self._site_x(data, RIGHT_FOOT_SITE),
+      left_foot_x=float(site[_SITE_LEFT_FOOT, 0]),
+      right_foot_x=float(site[_SITE_RIGHT_FOOT, 0]),
       left_foot_dx=left_foot_dx,
       right_foot_dx=right_foot_dx,
       foot_dx=foot_dx,
       imu_z=imu_z,
-      left_foot_z=left_foot_z,
-      right_foot_z=right_foot_z,
-      left_toe_z=left_toe_z,
-      left_heel_z=left_heel_z,
-      right_toe_z=right_toe_z,
-      right_heel_z=right_heel_z,
+      left_foot_z=float(site[_SITE_LEFT_FOOT, 2]),
+      right_foot_z=float(site[_SITE_RIGHT_FOOT, 2]),
+      left_toe_z=float(site[_SITE_LEFT_TOE, 2]),
+      left_heel_z=float(site[_SITE_LEFT_HEEL, 2]),
+      right_toe_z=float(site[_SITE_RIGHT_TOE, 2]),
+      right_heel_z=float(site[_SITE_RIGHT_HEEL, 2]),
       left_foot_on_floor=left_on,
       right_foot_on_floor=right_on,
-      any_foot_on_floor=any_foot,
+      any_foot_on_floor=left_on or right_on,
       single_support=single_support,
       single_support_side=support_side,
-      imu_gyro_x=float(imu_gyro[0]),
-      imu_gyro_y=float(imu_gyro[1]),
-      imu_gyro_z=float(imu_gyro[2]),
-      imu_zaxis_x=float(imu_zaxis[0]),
-      imu_zaxis_y=float(imu_zaxis[1]),
-      imu_zaxis_z=float(imu_zaxis[2]),
-      upright=upright,
+      imu_gyro_x=imu_gyro[0],
+      imu_gyro_y=imu_gyro[1],
+      imu_gyro_z=imu_gyro[2],
+      imu_zaxis_x=imu_zaxis[0],
+      imu_zaxis_y=imu_zaxis[1],
+      imu_zaxis_z=imu_zaxis[2],
+      upright=imu_zaxis[2],
       lean_fwd_body=lean_fwd_body,
       heading_align=heading_align,
       tilt_horiz=tilt_horiz,
-      joint_q=tuple(joint_q),
-      joint_qvel=tuple(joint_qvel),
-      left_knee_angle=left_knee,
-      right_knee_angle=right_knee,
-      left_knee_vel=left_knee_vel,
-      right_knee_vel=right_knee_vel,
+      joint_q=joint_q,
+      joint_qvel=joint_qvel,
+      left_knee_angle=joint_q[_LEFT_KNEE],
+      right_knee_angle=joint_q[_RIGHT_KNEE],
+      left_knee_vel=joint_qvel[_LEFT_KNEE],
+      right_knee_vel=joint_qvel[_RIGHT_KNEE],
     )
-    return obs, step_physics
+    return self.obs, step_physics
@@ -0,0 +1,104 @@
+"""``EnvBipedPPO.reset`` 用の初期 state キャッシュ。
+
+- stand keyframe を適用して ``mj_forward`` した名目 state を構築時に 1 回だけ作り、
+  reset では ``mj_copyData`` で書き戻す（``mj_resetDataKeyframe`` + ``mj_forward`` を省く）
+- 学習 DR 有効時は、これから使う episode_index の DR 初期 state（model パラメータ書き換え・
+  姿勢ノイズ・``mj_forward`` まで済んだもの）を ``prefetch`` で先に作っておける。
+  reset はプールにあれば model パラメータのベクトル書き込みと ``mj_copyData`` だけで済む
+
+先読みは env の model を汚さないよう複製 model 上で行う。どちらの経路でも reset 後の
+``MjData`` はその場で計算した場合と bit 単位で一致する。
+"""
+
+from __future__ import annotations
+
+import copy
+from dataclasses import dataclass
+
+import mujoco
+import numpy as np
+
+from sim.domain_randomization import TrainingDomainRandomization
+
+
+@dataclass
+class _PooledResetState:
+  params: np.void
+  data: mujoco.MjData
+
+
+class ResetStateCache:
+  """stand 名目 state のスナップショットと、先読みした DR 初期 state のプール。
+
+  Args:
+    model: 名目値（DR 未適用）の model。stand state はこの時点の model で ``mj_forward`` する。
+    stand_key_id: keyframe ``stand`` の id（無ければ負値で ``mj_resetData``）。
+    training_dr: 先読み時に DR 行をサンプル・適用する DR。``None`` なら先読みしない。
+    pool_size: 先読みしておく episode 数の上限（0 で先読みしない）。
+  """
+
+  def __init__(
+    self,
+    model: mujoco.MjModel,
+    stand_key_id: int,
+    *,
+    training_dr: TrainingDomainRandomization | None = None,
+    pool_size: int = 0,
+  ) -> None:
+    self._stand = mujoco.MjData(model)
+    if stand_key_id >= 0:
+      mujoco.mj_resetDataKeyframe(model, self._stand, stand_key_id)
+    else:
+      mujoco.mj_resetData(model, self._stand)
+    mujoco.mj_forward(model, self._stand)
+
+    self._training_dr = training_dr
+    self._pool_size = max(0, int(pool_size)) if training_dr is not None else 0
+    self._pool: dict[int, _PooledResetState] = {}
+    self._free: list[mujoco.MjData] = []
+    self._scratch_model: mujoco.MjModel | None = None
+    if self._pool_size > 0:
+      # copy.copy(MjModel) は mj_copyModel による複製（配列は共有しない）
+      self._scratch_model = copy.copy(model)
+
+  @property
+  def pool_size(self) -> int:
+    return self._pool_size
+
+  def restore_stand(self, model: mujoco.MjModel, data: mujoco.MjData) -> None:
+    """stand keyframe + ``mj_forward`` 直後の state を ``data`` に書き戻す。"""
+    mujoco.mj_copyData(data, model, self._stand)
+
+  def prefetch(self, episode_index: int) -> bool:
+    """``episode_index`` の DR 初期 state をプールに作る。作ったら True（既にある・満杯なら False）。"""
+    episode_index = int(episode_index)
+    if self._scratch_model is None or episode_index in self._pool or len(self._pool) >= self._pool_size:
+      return False
+    assert self._training_dr is not None
+    model = self._scratch_model
+    data = self._free.pop() if self._free else mujoco.MjData(model)
+    params = self._training_dr.episode_params(episode_index)
+    self._training_dr.write_model_params(model, params)
+    self.restore_stand(model, data)
+    self._training_dr.apply_pose_params(model, data, params)
+    self._pool[episode_index] = _PooledResetState(params=params.copy(), data=data)
+    return True
+
+  def take(self, model: mujoco.MjModel, data: mujoco.MjData, episode_index: int) -> np.void | None:
+    """プールに ``episode_index`` があれば model パラメータと state を書き込み、その DR 行を返す。
+
+    無ければ ``None``。取り出した index 以前のエントリは捨て、外れた場合は先読みが
+    ずれているのでプールを空にする。
+    """
+    episode_index = int(episode_index)
+    entry = self._pool.pop(episode_index, None)
+    stale = [e for e in self._pool if entry is None or e < episode_index]
+    for e in stale:
+      self._free.append(self._pool.pop(e).data)
+    if entry is None:
+      return None
+    assert self._training_dr is not None
+    self._training_dr.write_model_params(model, entry.params)
+    mujoco.mj_copyData(data, model, entry.data)
+    self._free.append(entry.data)
+    return entry.params
@@ -9,9 +9,7 @@ from lib.experiment_context import ExperimentContext
 from sim.effort import EffortBreakdown
 from sim.episode_state import BipedStepContext, EpisodeState
 from lib.actuators import (
-  LEFT_FOOT_GEOM,
   LEFT_FOOT_SITE,
-  RIGHT_FOOT_GEOM,
   RIGHT_FOOT_SITE,
 )
 from lib.pose import pose_metrics
@@ -63,21 +61,9 @@ class Reward:
     self._imu_site_id = model.site("imu_site").id
     self._left_foot_site_id = model.site(LEFT_FOOT_SITE).id
     self._right_foot_site_id = model.site(RIGHT_FOOT_SITE).id
-    self._floor_geom_id = model.geom("floor").id
-    self._left_foot_geom_id = model.geom(LEFT_FOOT_GEOM).id
-    self._right_foot_geom_id = model.geom(RIGHT_FOOT_GEOM).id
     self._left_knee_joint_id = model.joint("left_knee_pitch").id
     self._right_knee_joint_id = model.joint("right_knee_pitch").id
 
-  def _geom_on_floor(self, data: mujoco.MjData, geom_id: int) -> bool:
-    for i in range(data.ncon):
-      c = data.contact[i]
-      if (c.geom1 == geom_id and c.geom2 == self._floor_geom_id) or (
-        c.geom2 == geom_id and c.geom1 == self._floor_geom_id
-      ):
-        return True
-    return False
-
   def _aerial_duration_penalty(self, *, any_foot_on_floor: bool, aerial_steps: int) -> float:
     """両足非接地が AERIAL_DURATION_PENALTY_AFTER_STEPS を超えるとホップ抑制ペナルティ。"""
     if any_foot_on_floor:
@@ -288,8 +274,9 @@ class Reward:
     #endregion
 
     #region 接地・姿勢
-    left_foot_on_floor = self._geom_on_floor(data, self._left_foot_geom_id)
-    right_foot_on_floor = self._geom_on_floor(data, self._right_foot_geom_id)
+    # 接地は env が物理 step ごとに分類した結果（sim/contacts.py）を StepPhysics 経由で使う
+    left_foot_on_floor = physics.left_foot_on_floor
+    right_foot_on_floor = physics.right_foot_on_floor
     any_foot_on_floor = left_foot_on_floor or right_foot_on_floor
     single_support = biped.single_support
 
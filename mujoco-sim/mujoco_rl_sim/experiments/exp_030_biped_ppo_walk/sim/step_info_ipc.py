@@ -2,12 +2,36 @@
 
 telemetry 用の大きな配列（関節角リスト等）は送らず、
 ``EpisodeMetricsCollector`` が参照するスカラーのみ残す。
+VecEnv の転送路（共有メモリ / Pipe）では ``pack_step_info`` で
+固定スキーマの float32 行に詰めて送る。
+
+``EnvBipedPPO`` の step_info 生成レベル（``STEP_INFO_LEVELS``）もここで定義する。
+``scalars`` レベルの env は dict を作らず、この固定スキーマの行を直接返す。
 """
 
 from __future__ import annotations
 
+import math
 from typing import Any
 
+import numpy as np
+
+from sim.termination import TERMINATION_REASONS
+
+
+# EnvBipedPPO.step が返す step_info の生成レベル
+# none: 作らない（None）/ scalars: STEP_INFO_FIELDS の float32 行 / full: telemetry 込みの dict
+STEP_INFO_NONE = "none"
+STEP_INFO_SCALARS = "scalars"
+STEP_INFO_FULL = "full"
+STEP_INFO_LEVELS: tuple[str, ...] = (STEP_INFO_NONE, STEP_INFO_SCALARS, STEP_INFO_FULL)
+
+
+def validate_step_info_level(level: str) -> str:
+  if level not in STEP_INFO_LEVELS:
+    raise ValueError(f"step_info_level must be one of {STEP_INFO_LEVELS}, got {level!r}")
+  return level
+
 
 def lite_step_info(step_info: dict[str, Any]) -> dict[str, Any]:
   """IPC 向けに step_info を必要最小限の dict に絞る。"""
@@ -61,3 +85,88 @@ def lite_step_info(step_info: dict[str, Any]) -> dict[str, Any]:
     "thigh_contact_normal_force_n": step_info.get("thigh_contact_normal_force_n"),
     "terminated": bool(step_info.get("terminated", False)),
   }
+
+
+# 共有メモリ / Pipe 共通の固定スキーマ（float32 1 行 = 1 env の step_info）。
+# ``lite_step_info`` のキーと同じ並び。文字列・None は数値コードへ写像する。
+STEP_INFO_FIELDS: tuple[str, ...] = (
+  "imu_x",
+  "imu_dx",
+  "upright",
+  "foot_on_floor",
+  "reward_forward",
+  "reward_forward_imu",
+  "reward_forward_foot",
+  "reward_effort_penalty",
+  "reward_shaping",
+  "reward_upright",
+  "reward_push_off",
+  "reward_landing",
+  "reward_backward_lean_penalty",
+  "reward_forward_lean_penalty",
+  "reward_height_penalty",
+  "reward_flight_duration_penalty",
+  "reward_heading_misalign_penalty",
+  "reward_lateral_tilt_penalty",
+  "reward_shank_step_penalty",
+  "reward_double_support_penalty",
+  "reward_alternating_landing",
+  "landed",
+  "alternating_landing",
+  "single_support",
+  "both_feet_on_floor",
+  "flight_steps",
+  "termination_reason",
+  "basket_contact_normal_force_n",
+  "thigh_contact_normal_force_n",
+  "terminated",
+)
+STEP_INFO_DIM = len(STEP_INFO_FIELDS)
+STEP_INFO_INDEX: dict[str, int] = {name: i for i, name in enumerate(STEP_INFO_FIELDS)}
+
+# termination_reason: TERMINATION_REASONS の添字、None は -1
+_NO_REASON_CODE = -1.0
+_REASON_CODES: dict[str, float] = {
+  reason: float(i) for i, reason in enumerate(TERMINATION_REASONS)
+}
+# 値が None になり得るキー（NaN で表現）
+_OPTIONAL_FIELDS = frozenset(
+  ("basket_contact_normal_force_n", "thigh_contact_normal_force_n")
+)
+
+
+def termination_reason_code(reason: str | None) -> float:
+  """termination_reason を ``STEP_INFO_FIELDS`` 行の数値コードへ写像する。"""
+  return _REASON_CODES.get(reason, _NO_REASON_CODE) if reason else _NO_REASON_CODE
+
+
+def pack_step_info(
+  step_info: dict[str, Any],
+  out: np.ndarray | None = None,
+) -> np.ndarray:
+  """step_info を ``[STEP_INFO_DIM]`` の float32 行へ詰める（``out`` があれば上書き）。"""
+  row = out if out is not None else np.empty(STEP_INFO_DIM, dtype=np.float32)
+  for i, name in enumerate(STEP_INFO_FIELDS):
+    value = step_info.get(name)
+    if name == "termination_reason":
+      row[i] = termination_reason_code(value)
+    elif name in _OPTIONAL_FIELDS:
+      row[i] = np.nan if value is None else float(value)
+    else:
+      row[i] = float(value) if value is not None else 0.0
+  return row
+
+
+def unpack_step_info(row: np.ndarray) -> dict[str, Any]:
+  """``pack_step_info`` の逆変換。``lite_step_info`` と同じキー・型の dict を返す。"""
+  values = row.tolist()
+  info: dict[str, Any] = dict(zip(STEP_INFO_FIELDS, values, strict=True))
+  code = int(info["termination_reason"])
+  info["termination_reason"] = (
+    TERMINATION_REASONS[code] if 0 <= code < len(TERMINATION_REASONS) else None
+  )
+  for name in _OPTIONAL_FIELDS:
+    if math.isnan(info[name]):
+      info[name] = None
+  info["terminated"] = bool(info["terminated"])
+  return info
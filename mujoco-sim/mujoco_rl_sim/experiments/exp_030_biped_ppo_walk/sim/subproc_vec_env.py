@@ -1,22 +1,64 @@
 """Subproc VecEnv: 親が方策、子プロセスが MuJoCo sim（SB3 SubprocVecEnv 相当）。
 
 Windows ``spawn`` 向けに worker はモジュールトップレベル関数とする。
+
+転送路（``transport``）:
+  - ``"shm"``（既定）: ``sim/vec_buffers.py`` の共有メモリ上の ``[num_envs, ...]`` 配列に
+    action / 観測 / 報酬 / 終了 / info を直接書き、worker ごとの Semaphore で起こす。
+    step ごとの pickle は発生しない。
+  - ``"pipe"``: 従来の ``multiprocessing.Pipe`` + pickle（フォールバック）。
+どちらも ``VecStepBatch`` は配列で返す。
+
+1 worker は連続する ``envs_per_worker`` 個の env を持ち、担当行を順に step して
+まとめて返す（プロセス数は env 数ではなく ``ceil(num_envs / envs_per_worker)``）。
+
+``autoreset=True``（既定）では、終了（terminated / ``max_episode_steps`` 到達）した env を
+worker がその場で reset し、終端観測と reset 後の観測を同じ step の結果で返す
+（gymnasium の autoreset 相当）。reset に使う episode 番号は親が env ごとに予約しておき、
+消費されたら env 順に次の番号を補充する（DR の再現性のため決定的に割り当てる）。
+worker は次のコマンドを待つ間に、予約済み番号の DR 初期 state を先読みしておく
+（``EnvBipedPPO.prefetch_reset`` / ``runtime.reset_prefetch``）。auto-reset はそれをコピーするだけで済む。
+
+``step_async`` / ``step_wait`` は worker 境界に揃えた env 範囲（``env_groups``）単位で
+送信と受信を分けられる。親は片方の group の物理 step 中に別 group の方策推論を進められる。
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
-from multiprocessing import Pipe, Process
+from multiprocessing import Pipe, Process, Semaphore
 from multiprocessing.connection import Connection
 from typing import Any, Sequence
 
 import numpy as np
 
-from sim.step_info_ipc import lite_step_info
+from conf.schema.app_config import SimConfig
+from sim.step_info_ipc import STEP_INFO_SCALARS, unpack_step_info
+from sim.vec_buffers import (
+  CMD_IDLE,
+  CMD_RESET,
+  CMD_STEP,
+  STATUS_ERROR,
+  STATUS_OK,
+  STEP_INPUT_FIELDS,
+  STEP_OUTPUT_FIELDS,
+  WORKER_CLOSE,
+  WORKER_RUN,
+  SharedBufferSpec,
+  SharedStepBuffers,
+  StepBuffers,
+)
 
 # 実験ルート（子プロセスへ明示的に渡す）
 _EXP_ROOT = str(__import__("pathlib").Path(__file__).resolve().parent.parent)
 
+TRANSPORT_SHM = "shm"
+TRANSPORT_PIPE = "pipe"
+VEC_ENV_TRANSPORTS = (TRANSPORT_SHM, TRANSPORT_PIPE)
+
+# 子プロセス死活確認の間隔 [s]（共有メモリ転送の完了待ち）
+_WAIT_POLL_SEC = 1.0
+
 
 def _install_exp_root(exp_root: str) -> None:
   """spawn 子プロセス用: 実験ルートを sys.path 先頭に載せ、古い import キャッシュを消す。"""
@@ -31,31 +73,147 @@ def _install_exp_root(exp_root: str) -> None:
       del sys.modules[name]
 
 
-def _subproc_env_worker(
-  conn: Connection,
+def _make_worker_envs(
   exp_root: str,
+  num_envs: int,
   *,
   training_dr_enabled: bool,
   training_seed: int | None,
   step_wall_sleep_sec: float,
   hydra_config_path: str | None,
-) -> None:
-  """子プロセス: Pipe 経由で step / reset を受け、MuJoCo env を実行する。"""
+) -> list[Any]:
+  """worker が担当する env を生成する。
+
+  DR が env ごとに MjModel（摩擦・kp/kv）を書き換えるため、model は env ごとに持つ。
+  """
   _install_exp_root(exp_root)
 
   # 遅延 import（spawn 子プロセスの起動コストと循環 import 回避）
   from sim.env import EnvBipedPPO
 
-  env = EnvBipedPPO(
-    hydra_config_path=hydra_config_path,
-    enable_viewer=False,
+  envs = []
+  for _ in range(num_envs):
+    env = EnvBipedPPO(
+      hydra_config_path=hydra_config_path,
+      enable_viewer=False,
+      training_dr_enabled=training_dr_enabled,
+      training_seed=training_seed,
+      # 親へは固定スキーマの行しか送らないので、dict・telemetry 変換は作らせない
+      step_info_level=STEP_INFO_SCALARS,
+    )
+    env.set_step_wall_sleep_sec(step_wall_sleep_sec)
+    envs.append(env)
+  return envs
+
+
+def _run_env_command(
+  env,
+  cmd: int,
+  buf: StepBuffers,
+  row: int,
+  *,
+  autoreset: bool,
+  max_episode_steps: int,
+) -> None:
+  """``buf`` の入力行を読み、env を reset / step して出力行へ書く（転送路共通）。"""
+  if cmd == CMD_RESET:
+    buf.observations[row] = env.reset(episode_index=int(buf.episode_index[row]))
+    buf.episode_step[row] = 0
+    buf.reset_mask[row] = False
+  elif cmd == CMD_STEP:
+    action = tuple(float(x) for x in buf.actions[row])
+    obs, reward, terminated, step_info = env.step(
+      action,
+      visualize=False,
+      episode_step=0,
+    )
+    buf.episode_step[row] += 1
+    truncated = max_episode_steps > 0 and int(buf.episode_step[row]) >= max_episode_steps
+    buf.rewards[row] = float(reward)
+    buf.terminated[row] = bool(terminated)
+    buf.truncated[row] = truncated
+    buf.info[row] = step_info
+    if autoreset and (terminated or truncated):
+      # 終端観測を退避し、親が予約した番号で次の episode を始める
+      buf.final_observations[row] = obs
+      episode_index = int(buf.next_episode_index[row])
+      buf.observations[row] = env.reset(episode_index=episode_index)
+      buf.episode_index[row] = episode_index
+      buf.episode_step[row] = 0
+      buf.reset_mask[row] = True
+    else:
+      buf.observations[row] = obs
+      buf.reset_mask[row] = False
+  else:
+    raise ValueError(f"unknown command: {cmd!r}")
+
+
+def _run_pending(
+  envs: Sequence[Any],
+  buf: StepBuffers,
+  *,
+  autoreset: bool,
+  max_episode_steps: int,
+) -> None:
+  """``buf.command`` が立っている行だけを順に実行し、CMD_IDLE へ戻す。"""
+  for row, env in enumerate(envs):
+    cmd = int(buf.command[row])
+    if cmd == CMD_IDLE:
+      continue
+    _run_env_command(
+      env,
+      cmd,
+      buf,
+      row,
+      autoreset=autoreset,
+      max_episode_steps=max_episode_steps,
+    )
+    buf.command[row] = CMD_IDLE
+
+
+def _prefetch_one_reset(envs: Sequence[Any], buf: StepBuffers) -> bool:
+  """待ち時間用: 次に auto-reset する episode の初期 state を 1 env 分だけ先読みする。
+
+  親が番号を補充する前の行は ``next_episode_index == episode_index`` のままなので飛ばす。
+  先読みしたら True（次のコマンドが来ていなければ続けて呼ぶ）。
+  """
+  for row, env in enumerate(envs):
+    episode_index = int(buf.next_episode_index[row])
+    if episode_index != int(buf.episode_index[row]) and env.prefetch_reset(episode_index):
+      return True
+  return False
+
+
+def _subproc_env_worker(
+  conn: Connection,
+  exp_root: str,
+  num_envs: int,
+  *,
+  training_dr_enabled: bool,
+  training_seed: int | None,
+  step_wall_sleep_sec: float,
+  hydra_config_path: str | None,
+  autoreset: bool,
+  max_episode_steps: int,
+  obs_dim: int,
+  action_dim: int,
+) -> None:
+  """子プロセス（Pipe 転送）: 担当行の入力ブロックを受け、実行結果のブロックを返す。"""
+  envs = _make_worker_envs(
+    exp_root,
+    num_envs,
     training_dr_enabled=training_dr_enabled,
     training_seed=training_seed,
+    step_wall_sleep_sec=step_wall_sleep_sec,
+    hydra_config_path=hydra_config_path,
   )
-  env.set_step_wall_sleep_sec(step_wall_sleep_sec)
+  buf = StepBuffers.allocate(num_envs, obs_dim=obs_dim, action_dim=action_dim)
 
   try:
     while True:
+      # 次のコマンドが来るまでの間に auto-reset 用の初期 state を先読みする
+      while autoreset and not conn.poll() and _prefetch_one_reset(envs, buf):
+        pass
       msg = conn.recv()
       if not isinstance(msg, tuple) or len(msg) < 1:
         conn.send(("error", "invalid message"))
@@ -67,34 +225,19 @@ def _subproc_env_worker(
         conn.send(("ok",))
         break
 
-      if cmd == "reset":
-        if len(msg) != 2:
-          conn.send(("error", "reset expects episode_index"))
+      if cmd == "run":
+        if len(msg) != 2 or not isinstance(msg[1], dict):
+          conn.send(("error", "run expects input arrays"))
           continue
-        episode_index = int(msg[1])
-        obs = env.reset(episode_index=episode_index)
-        conn.send(("reset_result", list(obs)))
-
-      elif cmd == "step":
-        if len(msg) != 2:
-          conn.send(("error", "step expects action"))
-          continue
-        action = tuple(float(x) for x in msg[1])
-
-        obs, reward, terminated, step_info = env.step(
-          action,
-          visualize=False,
-          episode_step=0,
-        )
-        conn.send(
-          (
-            "step_result",
-            list(obs),
-            float(reward),
-            bool(terminated),
-            lite_step_info(step_info),
-          )
+        for name in STEP_INPUT_FIELDS:
+          getattr(buf, name)[:] = msg[1][name]
+        _run_pending(
+          envs,
+          buf,
+          autoreset=autoreset,
+          max_episode_steps=max_episode_steps,
         )
+        conn.send(("result", buf.pack(STEP_OUTPUT_FIELDS)))
 
       else:
         conn.send(("error", f"unknown command: {cmd!r}"))
@@ -106,18 +249,99 @@ def _subproc_env_worker(
     conn.close()
 
 
+def _wait_prefetching(wake: Any, envs: Sequence[Any], rows: StepBuffers, *, prefetch: bool) -> None:
+  """``wake`` を待つ。``prefetch`` なら起こされるまでの間に初期 state を先読みする（1 件ごとに wake を確認）。"""
+  while prefetch:
+    if wake.acquire(block=False):
+      return
+    if not _prefetch_one_reset(envs, rows):
+      break
+  wake.acquire()
+
+
+def _shm_env_worker(
+  worker_id: int,
+  exp_root: str,
+  spec: SharedBufferSpec,
+  env_slice: slice,
+  wake: Any,
+  done: Any,
+  error_conn: Connection,
+  *,
+  training_dr_enabled: bool,
+  training_seed: int | None,
+  step_wall_sleep_sec: float,
+  hydra_config_path: str | None,
+  autoreset: bool,
+  max_episode_steps: int,
+) -> None:
+  """子プロセス（共有メモリ転送）: ``wake`` で起き、担当行の保留コマンドを実行して ``done`` を返す。"""
+  shared = SharedStepBuffers.attach(spec)
+  try:
+    rows = shared.buffers.rows(env_slice)
+    envs = _make_worker_envs(
+      exp_root,
+      env_slice.stop - env_slice.start,
+      training_dr_enabled=training_dr_enabled,
+      training_seed=training_seed,
+      step_wall_sleep_sec=step_wall_sleep_sec,
+      hydra_config_path=hydra_config_path,
+    )
+    while True:
+      _wait_prefetching(wake, envs, rows, prefetch=autoreset)
+      if int(shared.cmd[worker_id]) == WORKER_CLOSE:
+        break
+      _run_pending(
+        envs,
+        rows,
+        autoreset=autoreset,
+        max_episode_steps=max_episode_steps,
+      )
+      done.release()
+  except Exception as exc:
+    shared.status[worker_id] = STATUS_ERROR
+    error_conn.send(repr(exc))
+    done.release()
+    raise
+  finally:
+    rows = None
+    error_conn.close()
+    shared.close()
+
+
 @dataclass(frozen=True)
 class VecStepBatch:
-  """1 回のベクトル step の結果。"""
+  """1 回のベクトル step の結果（各配列の行 = env）。
+
+  ``info`` は ``sim/step_info_ipc.py`` の ``STEP_INFO_FIELDS`` 順の float32 行。
+  dict が必要な消費側は ``step_info(env_id)`` で復元する。
+  """
 
-  observations: list[tuple[float, ...]]
+  observations: np.ndarray
   rewards: np.ndarray
   terminated: np.ndarray
-  infos: list[dict[str, Any]]
+  info: np.ndarray
+  # auto-reset: reset_mask の行は observations が新 episode の初期観測、
+  # final_observations が終端観測（それ以外の行の final_observations は未定義）
+  truncated: np.ndarray
+  reset_mask: np.ndarray
+  final_observations: np.ndarray
+
+  def step_info(self, env_id: int) -> dict[str, Any]:
+    """``lite_step_info`` 互換の dict（1 env 分）。"""
+    return unpack_step_info(self.info[env_id])
+
+  @property
+  def infos(self) -> list[dict[str, Any]]:
+    return [self.step_info(env_id) for env_id in range(self.info.shape[0])]
 
 
 class SubprocVecEnvBiped:
-  """N 個の ``EnvBipedPPO`` を子プロセスで並列に step する VecEnv。"""
+  """N 個の ``EnvBipedPPO`` を子プロセスで並列に step する VecEnv。
+
+  env ``i`` は worker ``i // envs_per_worker`` が担当する。
+  ``max_episode_steps > 0`` なら worker 側で打ち切り（truncated）を判定する。
+  """
 
   def __init__(
     self,
@@ -127,32 +351,131 @@ class SubprocVecEnvBiped:
     training_seed: int | None,
     step_wall_sleep_sec: float,
     hydra_config_path: str | None = None,
+    transport: str = TRANSPORT_SHM,
+    envs_per_worker: int = 1,
+    autoreset: bool = True,
+    max_episode_steps: int = 0,
+    obs_dim: int = SimConfig.obs_dim,
+    action_dim: int = SimConfig.action_dim,
   ):
     if num_envs < 1:
       raise ValueError(f"num_envs must be >= 1, got {num_envs}")
+    if envs_per_worker < 1:
+      raise ValueError(f"envs_per_worker must be >= 1, got {envs_per_worker}")
+    if transport not in VEC_ENV_TRANSPORTS:
+      raise ValueError(
+        f"transport must be one of {VEC_ENV_TRANSPORTS}, got {transport!r}"
+      )
 
     self.num_envs = int(num_envs)
+    self.envs_per_worker = int(envs_per_worker)
+    self.num_workers = -(-self.num_envs // self.envs_per_worker)
+    self.transport = transport
+    self.autoreset = bool(autoreset)
+    self._next_episode_counter = 0
+    self._worker_slices = [
+      slice(w * self.envs_per_worker, min(self.num_envs, (w + 1) * self.envs_per_worker))
+      for w in range(self.num_workers)
+    ]
     self._processes: list[Process] = []
     self._parent_conns: list[Connection] = []
-
-    for _ in range(self.num_envs):
-      parent_conn, child_conn = Pipe(duplex=True)
-      proc = Process(
-        target=_subproc_env_worker,
-        args=(child_conn, _EXP_ROOT),
-        kwargs={
-          "training_dr_enabled": training_dr_enabled,
-          "training_seed": training_seed,
-          "step_wall_sleep_sec": step_wall_sleep_sec,
-          "hydra_config_path": hydra_config_path,
-        },
-        daemon=True,
+    self._shared: SharedStepBuffers | None = None
+    self._wake: list[Any] = []
+    self._done: list[Any] = []
+    self._in_flight: set[int] = set()
+
+    env_kwargs = {
+      "training_dr_enabled": training_dr_enabled,
+      "training_seed": training_seed,
+      "step_wall_sleep_sec": step_wall_sleep_sec,
+      "hydra_config_path": hydra_config_path,
+      "autoreset": self.autoreset,
+      "max_episode_steps": int(max_episode_steps),
+    }
+
+    if transport == TRANSPORT_SHM:
+      self._shared = SharedStepBuffers.create(
+        num_envs=self.num_envs,
+        num_workers=self.num_workers,
+        obs_dim=int(obs_dim),
+        action_dim=int(action_dim),
       )
+      self._buf = self._shared.buffers
+    else:
+      self._buf = StepBuffers.allocate(
+        self.num_envs,
+        obs_dim=int(obs_dim),
+        action_dim=int(action_dim),
+      )
+
+    for worker_id, env_slice in enumerate(self._worker_slices):
+      if self._shared is not None:
+        # 子→親はエラー文字列の通知だけに使う
+        parent_conn, child_conn = Pipe(duplex=False)
+        wake = Semaphore(0)
+        done = Semaphore(0)
+        proc = Process(
+          target=_shm_env_worker,
+          args=(
+            worker_id,
+            _EXP_ROOT,
+            self._shared.spec,
+            env_slice,
+            wake,
+            done,
+            child_conn,
+          ),
+          kwargs=env_kwargs,
+          daemon=True,
+        )
+        self._wake.append(wake)
+        self._done.append(done)
+      else:
+        parent_conn, child_conn = Pipe(duplex=True)
+        proc = Process(
+          target=_subproc_env_worker,
+          args=(child_conn, _EXP_ROOT, env_slice.stop - env_slice.start),
+          kwargs={
+            **env_kwargs,
+            "obs_dim": int(obs_dim),
+            "action_dim": int(action_dim),
+          },
+          daemon=True,
+        )
       proc.start()
       child_conn.close()
       self._processes.append(proc)
       self._parent_conns.append(parent_conn)
 
+  def worker_of(self, env_id: int) -> int:
+    """env_id を担当する worker 番号。"""
+    return int(env_id) // self.envs_per_worker
+
+  def env_groups(self, num_groups: int) -> list[slice]:
+    """worker 境界で env を ``num_groups`` 個の連続範囲に分ける（``step_async`` 用）。"""
+    if not 1 <= num_groups <= self.num_workers:
+      raise ValueError(
+        f"num_groups must be in [1, {self.num_workers}], got {num_groups}"
+      )
+    bounds = np.linspace(0, self.num_workers, num_groups + 1).round().astype(int)
+    return [
+      slice(
+        self._worker_slices[lo].start,
+        self._worker_slices[hi - 1].stop,
+      )
+      for lo, hi in zip(bounds[:-1], bounds[1:])
+    ]
+
+  def _workers_in(self, env_slice: slice) -> range:
+    start = self.worker_of(env_slice.start)
+    stop = self.worker_of(env_slice.stop - 1) + 1
+    if (
+      self._worker_slices[start].start != env_slice.start
+      or self._worker_slices[stop - 1].stop != env_slice.stop
+    ):
+      raise ValueError(f"env range {env_slice} is not aligned to worker boundaries")
+    return range(start, stop)
+
   def _recv(self, conn: Connection) -> tuple:
     msg = conn.recv()
     if not isinstance(msg, tuple) or len(msg) < 1:
@@ -161,74 +484,154 @@ class SubprocVecEnvBiped:
       raise RuntimeError(f"subproc env worker error: {msg[1]}")
     return msg
 
-  def reset_env(self, env_id: int, *, episode_index: int) -> tuple[float, ...]:
-    """単一 env を reset する。"""
-    conn = self._parent_conns[env_id]
-    conn.send(("reset", int(episode_index)))
-    msg = self._recv(conn)
-    if msg[0] != "reset_result":
-      raise RuntimeError(f"expected reset_result, got {msg[0]!r}")
-    return tuple(float(x) for x in msg[1])
+  def _post(self, worker_id: int) -> None:
+    """``self._buf`` に書いた担当行の入力・コマンドで worker を起こす（完了は待たない）。"""
+    if self._shared is not None:
+      self._shared.cmd[worker_id] = WORKER_RUN
+      self._wake[worker_id].release()
+      return
+    rows = self._buf.rows(self._worker_slices[worker_id])
+    self._parent_conns[worker_id].send(("run", rows.pack(STEP_INPUT_FIELDS)))
+
+  def _wait(self, worker_id: int) -> None:
+    """worker の完了を待ち、結果を ``self._buf`` の担当行に揃える。"""
+    if self._shared is not None:
+      done = self._done[worker_id]
+      while not done.acquire(timeout=_WAIT_POLL_SEC):
+        if not self._processes[worker_id].is_alive():
+          raise RuntimeError(
+            f"subproc env worker {worker_id} exited "
+            f"(exitcode={self._processes[worker_id].exitcode})"
+          )
+      if int(self._shared.status[worker_id]) != STATUS_OK:
+        conn = self._parent_conns[worker_id]
+        detail = conn.recv() if conn.poll(_WAIT_POLL_SEC) else "unknown error"
+        raise RuntimeError(f"subproc env worker error: {detail}")
+      return
+
+    msg = self._recv(self._parent_conns[worker_id])
+    if msg[0] != "result":
+      raise RuntimeError(f"expected result, got {msg[0]!r}")
+    rows = self._buf.rows(self._worker_slices[worker_id])
+    # コマンドを送った行だけを反映する（それ以外の行は親側の値を保つ）
+    ran = rows.command != CMD_IDLE
+    for name in STEP_OUTPUT_FIELDS:
+      getattr(rows, name)[ran] = msg[1][name][ran]
+    rows.command[:] = CMD_IDLE
+
+  def _run_all(self) -> None:
+    """全 worker を起こしてから全完了を待つ（worker 間は並列に実行される）。"""
+    if self._in_flight:
+      raise RuntimeError("step_async is pending; call step_wait first")
+    for worker_id in range(self.num_workers):
+      self._post(worker_id)
+    for worker_id in range(self.num_workers):
+      self._wait(worker_id)
+
+  def reset_env(self, env_id: int, *, episode_index: int) -> np.ndarray:
+    """単一 env を reset し、観測 ``[obs_dim]`` を返す。"""
+    worker_id = self.worker_of(env_id)
+    if worker_id in self._in_flight:
+      raise RuntimeError(f"step_async is pending for env {env_id}")
+    self._buf.episode_index[env_id] = int(episode_index)
+    self._buf.command[env_id] = CMD_RESET
+    self._post(worker_id)
+    self._wait(worker_id)
+    return self._buf.observations[env_id].copy()
 
   def reset_all(
     self,
     *,
     start_episode_index: int,
-  ) -> list[tuple[float, ...]]:
-    """全 env を reset し、互いに異なる episode_index を割り当てる。"""
-    obs_list: list[tuple[float, ...]] = []
-    for env_id in range(self.num_envs):
-      obs = self.reset_env(
-        env_id,
-        episode_index=int(start_episode_index) + env_id,
+  ) -> np.ndarray:
+    """全 env を reset し、互いに異なる episode_index を割り当てる。観測は ``[N, obs_dim]``。
+
+    auto-reset 用に、続く N 個の番号を各 env の次 episode として予約する。
+    """
+    start = int(start_episode_index)
+    self._buf.episode_index[:] = start + np.arange(self.num_envs)
+    self._buf.next_episode_index[:] = start + self.num_envs + np.arange(self.num_envs)
+    self._next_episode_counter = start + 2 * self.num_envs
+    self._buf.command[:] = CMD_RESET
+    self._run_all()
+    return self._buf.observations.copy()
+
+  def step_async(
+    self,
+    actions: Sequence[Sequence[float]] | np.ndarray,
+    *,
+    env_slice: slice | None = None,
+  ) -> None:
+    """``env_slice``（既定: 全 env）の worker に action を送る。完了は ``step_wait`` で受け取る。"""
+    env_slice = slice(0, self.num_envs) if env_slice is None else env_slice
+    workers = self._workers_in(env_slice)
+    if len(actions) != env_slice.stop - env_slice.start:
+      raise ValueError(
+        f"actions length {len(actions)} != envs in {env_slice}"
       )
-      obs_list.append(obs)
-    return obs_list
+    if self._in_flight.intersection(workers):
+      raise RuntimeError(f"step_async already pending for envs {env_slice}")
+    self._buf.actions[env_slice] = np.asarray(actions, dtype=np.float64)
+    self._buf.command[env_slice] = CMD_STEP
+    # 親→子: 先に全 worker へ送信（子は並列に MuJoCo を実行できる）
+    for worker_id in workers:
+      self._post(worker_id)
+    self._in_flight.update(workers)
+
+  def step_wait(self, *, env_slice: slice | None = None) -> VecStepBatch:
+    """``step_async`` 済みの ``env_slice`` の完了を待ち、その行の結果を返す。"""
+    env_slice = slice(0, self.num_envs) if env_slice is None else env_slice
+    workers = self._workers_in(env_slice)
+    if not self._in_flight.issuperset(workers):
+      raise RuntimeError(f"no step_async pending for envs {env_slice}")
+    for worker_id in workers:
+      self._wait(worker_id)
+    self._in_flight.difference_update(workers)
+
+    rows = self._buf.rows(env_slice)
+    # 消費された予約番号を env 順に補充する（終了順に依らず決定的）
+    for row in np.flatnonzero(rows.reset_mask):
+      rows.next_episode_index[row] = self._next_episode_counter
+      self._next_episode_counter += 1
+
+    # 共有メモリは次の step で上書きされるため、呼び出し側へはコピーを渡す
+    return VecStepBatch(
+      observations=rows.observations.copy(),
+      rewards=rows.rewards.copy(),
+      terminated=rows.terminated.copy(),
+      info=rows.info.copy(),
+      truncated=rows.truncated.copy(),
+      reset_mask=rows.reset_mask.copy(),
+      final_observations=rows.final_observations.copy(),
+    )
 
-  def step(self, actions: Sequence[Sequence[float]]) -> VecStepBatch:
+  def step(self, actions: Sequence[Sequence[float]] | np.ndarray) -> VecStepBatch:
     """全 env に action を送り、並列 step の結果をまとめて受け取る。"""
     if len(actions) != self.num_envs:
       raise ValueError(
         f"actions length {len(actions)} != num_envs {self.num_envs}"
       )
-
-    # 親→子: 先に全 worker へ送信（子は並列に MuJoCo を実行できる）
-    for env_id, conn in enumerate(self._parent_conns):
-      action = tuple(float(x) for x in actions[env_id])
-      conn.send(("step", action))
-
-    observations: list[tuple[float, ...]] = []
-    rewards = np.zeros(self.num_envs, dtype=np.float64)
-    terminated = np.zeros(self.num_envs, dtype=bool)
-    infos: list[dict[str, Any]] = []
-
-    for env_id, conn in enumerate(self._parent_conns):
-      msg = self._recv(conn)
-      if msg[0] != "step_result":
-        raise RuntimeError(f"expected step_result, got {msg[0]!r}")
-      obs = tuple(float(x) for x in msg[1])
-      observations.append(obs)
-      rewards[env_id] = float(msg[2])
-      terminated[env_id] = bool(msg[3])
-      infos.append(dict(msg[4]))
-
-    return VecStepBatch(
-      observations=observations,
-      rewards=rewards,
-      terminated=terminated,
-      infos=infos,
-    )
+    self.step_async(actions)
+    return self.step_wait()
 
   def close(self) -> None:
     """子プロセスを終了する。"""
-    for conn in self._parent_conns:
-      try:
-        conn.send(("close",))
-        conn.recv()
-      except (BrokenPipeError, EOFError, OSError):
-        pass
-      finally:
+    if self._shared is not None:
+      for worker_id, wake in enumerate(self._wake):
+        if self._processes[worker_id].is_alive():
+          self._shared.cmd[worker_id] = WORKER_CLOSE
+          wake.release()
+      for conn in self._parent_conns:
         conn.close()
+    else:
+      for conn in self._parent_conns:
+        try:
+          conn.send(("close",))
+          conn.recv()
+        except (BrokenPipeError, EOFError, OSError):
+          pass
+        finally:
+          conn.close()
 
     for proc in self._processes:
       proc.join(timeout=5.0)
@@ -238,3 +641,11 @@ class SubprocVecEnvBiped:
 
     self._parent_conns.clear()
     self._processes.clear()
+    self._wake.clear()
+    self._done.clear()
+    self._in_flight.clear()
+    if self._shared is not None:
+      # 共有メモリ上のビューを手放してから unlink する
+      self._buf = None  # type: ignore[assignment]
+      self._shared.close()
+      self._shared = None
@@ -0,0 +1,178 @@
+"""1 制御ステップ分の物理ステップを ``mujoco.rollout`` の 1 回の呼び出しで積分する。
+
+``runtime.physics_rollout=true`` のときの ``EnvBipedPPO.step`` の物理積分経路。
+モデルに床接触センサ（部位スロットごと）とアクチュエータ力センサを足しておき、
+``frame_skip`` 物理ステップ分の状態・センサ値を配列で受け取る。接触終了判定・
+すねペナルティ・筋負荷はその配列を後から走査して求める。
+
+早期終了が起きない制御ステップでは、物理状態・観測・報酬は Python の
+``mj_step`` ループと bit 単位で一致する。接触終了した場合は全物理ステップを
+積分し終えてから終了した物理ステップの状態へ戻す（``mj_forward`` で再計算するため、
+運動学量はループ版と 1 物理ステップ内の差が出る）。
+"""
+
+from __future__ import annotations
+
+import mujoco
+import numpy as np
+
+try:
+  from mujoco import rollout
+except ImportError:
+  rollout = None
+
+from lib.actuators import (
+  ACTUATOR_NAMES,
+  LEFT_FOOT_GEOM,
+  RIGHT_FOOT_GEOM,
+  SHANK_GEOM_IDS,
+  THIGH_GEOM_IDS,
+)
+from sim.contacts import (
+  NUM_SLOTS,
+  SLOT_BASKET,
+  SLOT_LEFT_FOOT,
+  SLOT_RIGHT_FOOT,
+  SLOT_SHANKS,
+  SLOT_THIGHS,
+)
+
+if rollout is None or not hasattr(rollout, "Rollout") or not hasattr(mujoco.mjtSensor, "mjSENS_CONTACT"):
+  raise ImportError(
+    "runtime.physics_rollout=true needs mujoco.rollout.Rollout and contact sensors (mjSENS_CONTACT); "
+    f"installed mujoco {mujoco.__version__} is too old. Upgrade mujoco or set runtime.physics_rollout=false."
+  )
+
+# 1 部位あたり記録する接触数の上限（1 geom と床の接触点はこれ以下）
+MAX_CONTACTS_PER_SLOT = 8
+# 接触センサの data 指定: found（一致した接触数）+ force（接触フレームの力 3 成分）
+_CONTACT_DATA = 1 | 2
+_CONTACT_VALUES = 4
+_REDUCE_NONE = 0
+
+_SENSOR_PREFIX = "_substep_"
+_STATE_SPEC = mujoco.mjtState.mjSTATE_FULLPHYSICS
+
+
+def _slot_geom_names() -> dict[int, str]:
+  return {
+    SLOT_LEFT_FOOT: LEFT_FOOT_GEOM,
+    SLOT_RIGHT_FOOT: RIGHT_FOOT_GEOM,
+    SLOT_BASKET: "basket",
+    **dict(zip(SLOT_THIGHS, THIGH_GEOM_IDS, strict=True)),
+    **dict(zip(SLOT_SHANKS, SHANK_GEOM_IDS, strict=True)),
+  }
+
+
+def _contact_sensor_name(slot: int) -> str:
+  return f"{_SENSOR_PREFIX}floor_contact_{slot}"
+
+
+def _actuator_force_sensor_name(actuator: str) -> str:
+  return f"{_SENSOR_PREFIX}actuator_force_{actuator}"
+
+
+def load_model_with_substep_sensors(xml_path: str) -> mujoco.MjModel:
+  """``xml_path`` のモデルに床接触・アクチュエータ力センサを足してコンパイルする。
+
+  センサは既存センサの後ろに追加するので、既存センサのアドレスは変わらない。
+  センサは力学に影響しない（``from_xml_path`` と同じ物理になる）。
+  """
+  spec = mujoco.MjSpec.from_file(xml_path)
+  for slot, geom in _slot_geom_names().items():
+    sensor = spec.add_sensor()
+    sensor.name = _contact_sensor_name(slot)
+    sensor.type = mujoco.mjtSensor.mjSENS_CONTACT
+    sensor.objtype = mujoco.mjtObj.mjOBJ_GEOM
+    sensor.objname = geom
+    sensor.reftype = mujoco.mjtObj.mjOBJ_GEOM
+    sensor.refname = "floor"
+    sensor.intprm[0] = _CONTACT_DATA
+    sensor.intprm[1] = _REDUCE_NONE
+    sensor.intprm[2] = MAX_CONTACTS_PER_SLOT
+  for actuator in ACTUATOR_NAMES:
+    sensor = spec.add_sensor()
+    sensor.name = _actuator_force_sensor_name(actuator)
+    sensor.type = mujoco.mjtSensor.mjSENS_ACTUATORFRC
+    sensor.objtype = mujoco.mjtObj.mjOBJ_ACTUATOR
+    sensor.objname = actuator
+  return spec.compile()
+
+
+class SubstepRollout:
+  """``frame_skip`` 物理ステップの積分と、物理ステップごとの接触・力の配列。
+
+  ``run`` の後、先頭 ``frame_skip`` 行が有効:
+    ``on_floor[k, slot]`` … 物理ステップ k の後の床接触（``FloorContacts.on_floor`` と同じ）
+    ``normal_force_n[k, slot]`` … 同 法線力最大値 [N]（足スロットは 0）
+    ``actuator_force[k]`` … ``ACTUATOR_NAMES`` 順のアクチュエータ力
+    ``qvel[k]`` … 物理ステップ k の後の qvel
+  """
+
+  def __init__(self, model: mujoco.MjModel, frame_skip: int):
+    self._model = model
+    # skip_checks=True の rollout は model / data を list で受け取り、入力を tile しない。
+    # スレッドプールは使わず（nthread=0）呼び出し元スレッドで積分する
+    self._models = [model]
+    self._rollout = rollout.Rollout(nthread=0)
+    self.frame_skip = int(frame_skip)
+    nstate = mujoco.mj_stateSize(model, _STATE_SPEC)
+    self._initial_state = np.empty((1, nstate), dtype=np.float64)
+    self._control = np.empty((1, self.frame_skip, model.nu), dtype=np.float64)
+    self._warmstart = np.empty((1, model.nv), dtype=np.float64)
+    self._states = np.empty((1, self.frame_skip, nstate), dtype=np.float64)
+    self._sensordata = np.empty((1, self.frame_skip, model.nsensordata), dtype=np.float64)
+
+    contact_adr = [int(model.sensor(_contact_sensor_name(slot)).adr[0]) for slot in range(NUM_SLOTS)]
+    # スロットの接触センサは連続して並ぶ（load_model_with_substep_sensors の追加順）
+    width = MAX_CONTACTS_PER_SLOT * _CONTACT_VALUES
+    if contact_adr != [contact_adr[0] + slot * width for slot in range(NUM_SLOTS)]:
+      raise ValueError("substep contact sensors are not contiguous")
+    self._contacts = self._sensordata[0, :, contact_adr[0] : contact_adr[0] + NUM_SLOTS * width].reshape(
+      self.frame_skip, NUM_SLOTS, MAX_CONTACTS_PER_SLOT, _CONTACT_VALUES
+    )
+    force_adr = int(model.sensor(_actuator_force_sensor_name(ACTUATOR_NAMES[0])).adr[0])
+    self.actuator_force = self._sensordata[0, :, force_adr : force_adr + len(ACTUATOR_NAMES)]
+    qvel_adr = mujoco.mj_stateSize(model, mujoco.mjtState.mjSTATE_TIME) + model.nq
+    self.qvel = self._states[0, :, qvel_adr : qvel_adr + model.nv]
+
+    self.on_floor = np.zeros((self.frame_skip, NUM_SLOTS), dtype=bool)
+    self.normal_force_n = np.zeros((self.frame_skip, NUM_SLOTS), dtype=np.float64)
+    # found を超える接触枠は未使用（値は不定）なので、力の最大を取る前に落とす
+    self._contact_rank = np.arange(MAX_CONTACTS_PER_SLOT, dtype=np.float64)
+
+  def run(self, data: mujoco.MjData) -> None:
+    """現在の ctrl を保ったまま ``frame_skip`` 物理ステップ進める（``data`` は最終状態になる）。"""
+    model = self._model
+    mujoco.mj_getState(model, data, self._initial_state[0], _STATE_SPEC)
+    self._control[0] = data.ctrl
+    self._warmstart[0] = data.qacc_warmstart
+    self._rollout.rollout(
+      self._models,
+      [data],
+      self._initial_state,
+      self._control,
+      nstep=self.frame_skip,
+      initial_warmstart=self._warmstart,
+      state=self._states,
+      sensordata=self._sensordata,
+      skip_checks=True,
+    )
+
+    found = self._contacts[:, :, 0, 0]
+    np.greater(found, 0.0, out=self.on_floor)
+    self.normal_force_n[:] = 0.0
+    body = self.on_floor[:, SLOT_BASKET:]
+    if body.any():
+      used = self._contact_rank < found[:, SLOT_BASKET:, None]
+      normal = np.abs(self._contacts[:, SLOT_BASKET:, :, 1])
+      self.normal_force_n[:, SLOT_BASKET:] = np.where(used, normal, 0.0).max(axis=2)
+
+  def body_contact_substeps(self) -> np.ndarray:
+    """足以外が床に触れていた物理ステップの添字（昇順）。"""
+    return np.flatnonzero(self.on_floor[:, SLOT_BASKET:].any(axis=1))
+
+  def restore(self, data: mujoco.MjData, substep: int) -> None:
+    """``data`` を物理ステップ ``substep`` の後の状態へ戻し、派生量を再計算する。"""
+    mujoco.mj_setState(self._model, data, self._states[0, substep], _STATE_SPEC)
+    mujoco.mj_forward(self._model, data)
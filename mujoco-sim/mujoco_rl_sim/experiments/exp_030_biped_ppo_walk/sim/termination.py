@@ -5,9 +5,9 @@ from dataclasses import dataclass
 import mujoco
 import numpy as np
 
-from lib.actuators import LEFT_FOOT_GEOM, RIGHT_FOOT_GEOM, SHANK_GEOM_IDS, THIGH_GEOM_IDS
 from lib.experiment_context import ExperimentContext
 from lib.pose import pose_metrics
+from sim.contacts import SLOT_BASKET, SLOT_SHANKS, SLOT_THIGHS, FloorContacts
 
 REASON_TRUNCATED = "truncated"
 REASON_IMU_Z = "imu_z"
@@ -51,52 +51,7 @@ class Termination:
   def __init__(self, model: mujoco.MjModel, ctx: ExperimentContext):
     self._ctx = ctx
     self._model = model
-    self._floor_geom_id = model.geom("floor").id
-    self._basket_geom_id = model.geom("basket").id
-    self._left_foot_geom_id = model.geom(LEFT_FOOT_GEOM).id
-    self._right_foot_geom_id = model.geom(RIGHT_FOOT_GEOM).id
-    self._thigh_geom_ids = tuple(model.geom(name).id for name in THIGH_GEOM_IDS)
-    self._shank_geom_ids = tuple(model.geom(name).id for name in SHANK_GEOM_IDS)
-    # mj_contactForce の出力先（ループ内で再利用）
-    self._contact_wrench = np.zeros(6)
-
-  @staticmethod
-  def _is_geom_pair(
-    contact: mujoco.MjContact, geom_a_id: int, geom_b_id: int
-  ) -> bool:
-    """geom1/geom2 の順序は MuJoCo が入れ替えることがある。"""
-    return (contact.geom1 == geom_a_id and contact.geom2 == geom_b_id) or (
-      contact.geom1 == geom_b_id and contact.geom2 == geom_a_id
-    )
-
-  @staticmethod
-  def _has_contact_between_geoms(
-    data: mujoco.MjData, geom_a_id: int, geom_b_id: int
-  ) -> bool:
-    """2 geom 間に接触が1つでもあるか。"""
-    for contact_index in range(data.ncon):
-      if Termination._is_geom_pair(
-        data.contact[contact_index], geom_a_id, geom_b_id
-      ):
-        return True
-    return False
-
-  def _max_normal_force_between_geoms(
-    self, data: mujoco.MjData, geom_a_id: int, geom_b_id: int
-  ) -> float:
-    """2 geom 間の接触のうち、法線力 |force[0]| の最大値 [N]。接触なしなら 0。"""
-    peak_normal_force_n = 0.0
-    for contact_index in range(data.ncon):
-      contact = data.contact[contact_index]
-      if not self._is_geom_pair(contact, geom_a_id, geom_b_id):
-        continue
-      mujoco.mj_contactForce(
-        self._model, data, contact_index, self._contact_wrench
-      )
-      peak_normal_force_n = max(
-        peak_normal_force_n, abs(float(self._contact_wrench[0]))
-      )
-    return peak_normal_force_n
+    self._contact_shank_terminates = bool(ctx.cfg.termination.contact_shank_terminates)
 
   @staticmethod
   def _floor_termination_penalty(
@@ -132,20 +87,18 @@ class Termination:
 
   def _floor_contact_outcome(
     self,
-    data: mujoco.MjData,
+    contacts: FloorContacts,
     *,
-    geom_id: int,
+    slot: int,
     reason: str,
   ) -> TerminationOutcome | None:
     BASKET_PENALTY_SCALE = 1.0
     LINK_PENALTY_SCALE = 0.5
 
-    if not self._has_contact_between_geoms(data, geom_id, self._floor_geom_id):
+    if not contacts.on_floor[slot]:
       return None
-    
-    normal_force_n = self._max_normal_force_between_geoms(
-      data, geom_id, self._floor_geom_id
-    )
+
+    normal_force_n = float(contacts.normal_force_n[slot])
 
     if reason == REASON_CONTACT_BASKET:
       penalty_scale = BASKET_PENALTY_SCALE
@@ -160,29 +113,33 @@ class Termination:
 
     return TerminationOutcome(reason, penalty, normal_force_n)
 
-  def done_reason_contact(self, data: mujoco.MjData) -> TerminationOutcome:
+  def done_reason_contact(self, contacts: FloorContacts) -> TerminationOutcome:
+    """床接触による終了（バスケット → 大腿 → すねの優先順）。"""
+    if not contacts.body_on_floor:
+      return NOT_TERMINATED
+
     outcome = self._floor_contact_outcome(
-      data,
-      geom_id=self._basket_geom_id,
+      contacts,
+      slot=SLOT_BASKET,
       reason=REASON_CONTACT_BASKET,
     )
     if outcome is not None:
       return outcome
 
-    for thigh_id in self._thigh_geom_ids:
+    for thigh_slot in SLOT_THIGHS:
       outcome = self._floor_contact_outcome(
-        data,
-        geom_id=thigh_id,
+        contacts,
+        slot=thigh_slot,
         reason=REASON_CONTACT_THIGH,
       )
       if outcome is not None:
         return outcome
 
-    if self._ctx.cfg.termination.contact_shank_terminates:
-      for shank_id in self._shank_geom_ids:
+    if self._contact_shank_terminates:
+      for shank_slot in SLOT_SHANKS:
         outcome = self._floor_contact_outcome(
-          data,
-          geom_id=shank_id,
+          contacts,
+          slot=shank_slot,
           reason=REASON_CONTACT_SHANK,
         )
         if outcome is not None:
@@ -190,25 +147,33 @@ class Termination:
 
     return NOT_TERMINATED
 
-  def shank_contact_step_penalty(self, data: mujoco.MjData) -> float:
-    if self._ctx.cfg.termination.contact_shank_terminates:
+  def shank_contact_step_penalty(self, contacts: FloorContacts) -> float:
+    if self._contact_shank_terminates or not contacts.body_on_floor:
       return 0.0
 
     total = 0.0
-    for shank_id in self._shank_geom_ids:
-      if not self._has_contact_between_geoms(
-        data, shank_id, self._floor_geom_id
-      ):
+    for shank_slot in SLOT_SHANKS:
+      if not contacts.on_floor[shank_slot]:
         continue
-      normal_force_n = self._max_normal_force_between_geoms(
-        data, shank_id, self._floor_geom_id
-      )
-      total += self._shank_step_penalty(normal_force_n)
+      total += self._shank_step_penalty(float(contacts.normal_force_n[shank_slot]))
 
     return total
 
+  def contact_substep(self, contacts: FloorContacts) -> tuple[TerminationOutcome, float]:
+    """1 物理ステップ分の接触判定: (接触終了, すね床接触ペナルティ)。
+
+    足以外が床に触れていなければ即座に (NOT_TERMINATED, 0.0)。終了した物理ステップの
+    すねペナルティは数えない（終了ペナルティ側に含める）。
+    """
+    if not contacts.body_on_floor:
+      return NOT_TERMINATED, 0.0
+    outcome = self.done_reason_contact(contacts)
+    if outcome.terminated:
+      return outcome, 0.0
+    return outcome, self.shank_contact_step_penalty(contacts)
+
   def done_reason_pose(
-    self, data: mujoco.MjData
+    self, data: mujoco.MjData, contacts: FloorContacts
   ) -> TerminationOutcome:
     # 閾値・ペナルティの正本は config.py（--set / dispatch でも上書き可）。
 
@@ -217,11 +182,7 @@ class Termination:
     upright = float(imu_zaxis[WORLD_Z])
     lean_fwd_body, _, _ = pose_metrics(imu_zaxis, data)
 
-    any_foot_on_floor = self._has_contact_between_geoms(
-      data, self._left_foot_geom_id, self._floor_geom_id
-    ) or self._has_contact_between_geoms(
-      data, self._right_foot_geom_id, self._floor_geom_id
-    )
+    any_foot_on_floor = contacts.any_foot
 
     min_imu_z = (
       self._ctx.cfg.termination.min_imu_z_stance
@@ -245,5 +206,5 @@ class Termination:
 
     return NOT_TERMINATED
 
-  def is_done_contact(self, data: mujoco.MjData) -> bool:
-    return self.done_reason_contact(data).terminated
+  def is_done_contact(self, contacts: FloorContacts) -> bool:
+    return self.done_reason_contact(contacts).terminated
@@ -0,0 +1,200 @@
+"""VecEnv の step 入出力バッファ（``[num_envs, ...]`` 固定レイアウト）。
+
+親プロセスと子プロセスの間で受け渡す配列（action・観測・報酬・終了・info）を
+1 つのレイアウトにまとめる。共有メモリ転送では ``SharedStepBuffers`` が
+``multiprocessing.shared_memory`` 上に同じレイアウトの numpy ビューを張り、
+Pipe 転送では同じ ``StepBuffers`` をプロセスローカルに確保する。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from sim.step_info_ipc import STEP_INFO_DIM
+
+# 各配列の先頭を 8 byte 境界に揃える（float64 / int64 の整列アクセス用）
+_ALIGN = 8
+
+# env 単位のコマンド（``StepBuffers.command``）。worker は実行後に CMD_IDLE へ戻す
+CMD_IDLE = 0
+CMD_STEP = 1
+CMD_RESET = 2
+
+# worker 単位の制御ワード（共有メモリの ``cmd``）
+WORKER_RUN = 1
+WORKER_CLOSE = 2
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+
+@dataclass(frozen=True)
+class StepBuffers:
+  """env 単位の入出力配列（いずれも先頭次元が env）。
+
+  auto-reset 用に、親が予約した次の episode 番号（``next_episode_index``）と、
+  worker が返す終端観測（``final_observations``）・reset 済みフラグ（``reset_mask``）を持つ。
+  """
+
+  command: np.ndarray
+  actions: np.ndarray
+  episode_index: np.ndarray
+  next_episode_index: np.ndarray
+  observations: np.ndarray
+  final_observations: np.ndarray
+  rewards: np.ndarray
+  terminated: np.ndarray
+  truncated: np.ndarray
+  reset_mask: np.ndarray
+  episode_step: np.ndarray
+  info: np.ndarray
+
+  @classmethod
+  def allocate(cls, num_envs: int, *, obs_dim: int, action_dim: int) -> StepBuffers:
+    """プロセスローカルに確保する（Pipe 転送・単体テスト用）。"""
+    arrays = {
+      name: np.zeros(shape, dtype=dtype)
+      for name, shape, dtype in _buffer_fields(num_envs, obs_dim, action_dim)
+    }
+    return cls(**arrays)
+
+  def rows(self, env_slice: slice) -> StepBuffers:
+    """``env_slice`` 行だけを指すビュー（コピーしない）。"""
+    return StepBuffers(
+      **{name: getattr(self, name)[env_slice] for name in _FIELD_NAMES}
+    )
+
+  def pack(self, names: tuple[str, ...]) -> dict[str, np.ndarray]:
+    """Pipe 転送用: 指定フィールドのコピーを dict で返す。"""
+    return {name: getattr(self, name).copy() for name in names}
+
+
+def _buffer_fields(
+  num_envs: int,
+  obs_dim: int,
+  action_dim: int,
+) -> list[tuple[str, tuple[int, ...], np.dtype]]:
+  n = num_envs
+  return [
+    ("command", (n,), np.dtype(np.int32)),
+    ("actions", (n, action_dim), np.dtype(np.float64)),
+    ("episode_index", (n,), np.dtype(np.int64)),
+    ("next_episode_index", (n,), np.dtype(np.int64)),
+    ("observations", (n, obs_dim), np.dtype(np.float64)),
+    ("final_observations", (n, obs_dim), np.dtype(np.float64)),
+    ("rewards", (n,), np.dtype(np.float64)),
+    ("terminated", (n,), np.dtype(np.bool_)),
+    ("truncated", (n,), np.dtype(np.bool_)),
+    ("reset_mask", (n,), np.dtype(np.bool_)),
+    ("episode_step", (n,), np.dtype(np.int64)),
+    ("info", (n, STEP_INFO_DIM), np.dtype(np.float32)),
+  ]
+
+
+_FIELD_NAMES = tuple(name for name, _, _ in _buffer_fields(0, 0, 0))
+
+# 親→worker（コマンド実行前に読む）/ worker→親（実行後に書く）のフィールド
+STEP_INPUT_FIELDS = ("command", "actions", "episode_index", "next_episode_index")
+STEP_OUTPUT_FIELDS = (
+  "episode_index",
+  "observations",
+  "final_observations",
+  "rewards",
+  "terminated",
+  "truncated",
+  "reset_mask",
+  "episode_step",
+  "info",
+)
+
+
+@dataclass(frozen=True)
+class SharedBufferSpec:
+  """子プロセスへ渡す共有メモリの名前と形状（pickle 可能）。"""
+
+  shm_name: str
+  num_envs: int
+  num_workers: int
+  obs_dim: int
+  action_dim: int
+
+
+def _layout(spec: SharedBufferSpec) -> tuple[list[tuple[str, tuple[int, ...], np.dtype, int]], int]:
+  """(name, shape, dtype, offset) の一覧と総バイト数。"""
+  w = spec.num_workers
+  fields = _buffer_fields(spec.num_envs, spec.obs_dim, spec.action_dim) + [
+    ("cmd", (w,), np.dtype(np.int32)),
+    ("status", (w,), np.dtype(np.int32)),
+  ]
+  out: list[tuple[str, tuple[int, ...], np.dtype, int]] = []
+  offset = 0
+  for name, shape, dtype in fields:
+    offset = (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+    out.append((name, shape, dtype, offset))
+    offset += int(np.prod(shape)) * dtype.itemsize
+  return out, max(offset, 1)
+
+
+class SharedStepBuffers:
+  """``StepBuffers`` + worker 制御ワードを 1 つの共有メモリブロックに載せる。
+
+  親が ``create`` で確保し、子は ``attach(spec)`` で同じブロックにビューを張る。
+  ブロックの破棄（unlink）は確保した親だけが行う。
+  """
+
+  def __init__(
+    self,
+    shm: shared_memory.SharedMemory,
+    spec: SharedBufferSpec,
+    *,
+    owner: bool,
+  ) -> None:
+    self._shm = shm
+    self._owner = owner
+    self.spec = spec
+    layout, _ = _layout(spec)
+    views: dict[str, np.ndarray] = {}
+    for name, shape, dtype, offset in layout:
+      views[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+    self.cmd = views.pop("cmd")
+    self.status = views.pop("status")
+    self.buffers = StepBuffers(**views)
+
+  @classmethod
+  def create(
+    cls,
+    *,
+    num_envs: int,
+    num_workers: int,
+    obs_dim: int,
+    action_dim: int,
+  ) -> SharedStepBuffers:
+    probe = SharedBufferSpec("", num_envs, num_workers, obs_dim, action_dim)
+    _, nbytes = _layout(probe)
+    shm = shared_memory.SharedMemory(create=True, size=nbytes)
+    spec = SharedBufferSpec(shm.name, num_envs, num_workers, obs_dim, action_dim)
+    shared = cls(shm, spec, owner=True)
+    shared.buffers.command[:] = CMD_IDLE
+    shared.cmd[:] = 0
+    shared.status[:] = STATUS_OK
+    return shared
+
+  @classmethod
+  def attach(cls, spec: SharedBufferSpec) -> SharedStepBuffers:
+    return cls(shared_memory.SharedMemory(name=spec.shm_name), spec, owner=False)
+
+  def close(self) -> None:
+    """ビューを手放してからマップを閉じる（所有者なら unlink も行う）。"""
+    # numpy ビューが残っていると SharedMemory.close が BufferError になる
+    self.buffers = None  # type: ignore[assignment]
+    self.cmd = None  # type: ignore[assignment]
+    self.status = None  # type: ignore[assignment]
+    self._shm.close()
+    if self._owner:
+      try:
+        self._shm.unlink()
+      except FileNotFoundError:
+        pass
@@ -0,0 +1,69 @@
+"""並列 eval のプロセスプール スモーク（spawn 用・``__main__`` ガード付き）。"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+from pathlib import Path
+
+# ``python tests/...py`` 実行時は sys.path[0] が tests/ になるため実験ルートを先頭に載せる
+_EXP_ROOT = Path(__file__).resolve().parent.parent
+if str(_EXP_ROOT) not in sys.path:
+  sys.path.insert(0, str(_EXP_ROOT))
+
+import _paths
+
+_paths.install()
+
+import torch
+
+import rl.checkpoint as checkpoint
+from eval import runner
+from eval.spec import iter_eval_trials
+from lib.load_run_context import default_ctx
+from rl.agent import AgentPPO
+
+
+def main() -> None:
+  torch.manual_seed(0)
+  agent = AgentPPO(default_ctx())
+  plans = iter_eval_trials(eval_seeds=(101, 102), episodes_per_seed=3)
+  with tempfile.TemporaryDirectory() as tmp:
+    (ckpt,) = checkpoint.save_agent_checkpoint(
+      agent,
+      run_dir=Path(tmp),
+      update=0,
+      total_env_steps=0,
+      episodes_finished=0,
+      numbered=False,
+      final=True,
+    )
+    eval_context, policy = runner._load_eval_policy(ckpt, "cpu")
+    env = runner._make_eval_env(eval_context)
+    max_steps = int(eval_context.cfg.training.max_steps_per_episode)
+    serial = [
+      runner.run_eval_episode(
+        env,
+        policy.act_eval,
+        eval_seed=plan.eval_seed,
+        ep_index=plan.ep_index,
+        trial_index=plan.trial_index,
+        max_steps_per_episode=max_steps,
+      )
+      for plan in plans
+    ]
+    pooled = runner._run_checkpoint_eval_pool(
+      ckpt,
+      plans,
+      device="cpu",
+      num_workers=2,
+      envs_per_worker=2,
+    )
+  # worker 数・同時試行数が違っても記録は直列 eval と一致する
+  assert pooled == serial
+
+  print("eval_pool_smoke_ok")
+
+
+if __name__ == "__main__":
+  main()
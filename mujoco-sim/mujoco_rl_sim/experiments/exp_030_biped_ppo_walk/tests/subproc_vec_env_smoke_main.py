@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import sys
 import tempfile
+import time
 from pathlib import Path
 
 # ``python tests/...py`` 実行時は sys.path[0] が tests/ になるため実験ルートを先頭に載せる
@@ -15,37 +16,169 @@ import _paths
 
 _paths.install()
 
+import numpy as np
+
 from lib.hydra_checkpoint import save_hydra_config
 from lib.hydra_compose import compose_cfg
+from sim.step_info_ipc import STEP_INFO_DIM
 from sim.subproc_vec_env import SubprocVecEnvBiped
 
 
+def _run_transport(
+  transport: str,
+  hydra_path: str,
+  sim,
+  *,
+  envs_per_worker: int = 1,
+) -> tuple[np.ndarray, np.ndarray]:
+  vec = SubprocVecEnvBiped(
+    2,
+    training_dr_enabled=False,
+    training_seed=0,
+    step_wall_sleep_sec=0.0,
+    hydra_config_path=hydra_path,
+    transport=transport,
+    envs_per_worker=envs_per_worker,
+    obs_dim=int(sim.obs_dim),
+    action_dim=int(sim.action_dim),
+  )
+  try:
+    obs = vec.reset_all(start_episode_index=0)
+    assert obs.shape == (2, int(sim.obs_dim))
+
+    zero_action = tuple(0.0 for _ in range(int(sim.action_dim)))
+    batch = vec.step([zero_action, zero_action])
+    assert batch.observations.shape == (2, int(sim.obs_dim))
+    assert batch.rewards.shape == (2,)
+    assert batch.info.shape == (2, STEP_INFO_DIM)
+    assert "reward_forward" in batch.step_info(0)
+
+    obs_reset = vec.reset_env(1, episode_index=5)
+    assert obs_reset.shape == (int(sim.obs_dim),)
+    # worker 内の 1 env だけを reset しても、続けて全 env を step できる
+    batch_after = vec.step([zero_action, zero_action])
+    assert batch_after.observations.shape == (2, int(sim.obs_dim))
+    return batch.observations, batch.rewards
+  finally:
+    vec.close()
+
+
+def _run_autoreset(transport: str, hydra_path: str, sim) -> np.ndarray:
+  """``max_episode_steps=2`` で worker 側 auto-reset を確認し、終端観測を返す。"""
+  vec = SubprocVecEnvBiped(
+    2,
+    training_dr_enabled=False,
+    training_seed=0,
+    step_wall_sleep_sec=0.0,
+    hydra_config_path=hydra_path,
+    transport=transport,
+    envs_per_worker=2,
+    max_episode_steps=2,
+    obs_dim=int(sim.obs_dim),
+    action_dim=int(sim.action_dim),
+  )
+  try:
+    obs0 = vec.reset_all(start_episode_index=0)
+    zero_actions = np.zeros((2, int(sim.action_dim)))
+    first = vec.step(zero_actions)
+    assert not first.reset_mask.any()
+    assert not first.truncated.any()
+    second = vec.step(zero_actions)
+    assert second.truncated.all()
+    assert second.reset_mask.all()
+    # DR 無効なら reset 後の観測は初期観測と一致し、終端観測とは異なる
+    assert np.array_equal(second.observations, obs0)
+    assert not np.array_equal(second.final_observations, obs0)
+    third = vec.step(zero_actions)
+    assert not third.reset_mask.any()
+    return second.final_observations
+  finally:
+    vec.close()
+
+
+def _run_async(transport: str, hydra_path: str, sim) -> np.ndarray:
+  """``step_async`` / ``step_wait`` を group ごとに分けて 1 step 進め、観測を返す。"""
+  vec = SubprocVecEnvBiped(
+    2,
+    training_dr_enabled=False,
+    training_seed=0,
+    step_wall_sleep_sec=0.0,
+    hydra_config_path=hydra_path,
+    transport=transport,
+    obs_dim=int(sim.obs_dim),
+    action_dim=int(sim.action_dim),
+  )
+  try:
+    vec.reset_all(start_episode_index=0)
+    groups = vec.env_groups(2)
+    assert groups == [slice(0, 1), slice(1, 2)]
+    zero_row = np.zeros((1, int(sim.action_dim)))
+    vec.step_async(zero_row, env_slice=groups[0])
+    vec.step_async(zero_row, env_slice=groups[1])
+    # 受信順は送信順と逆でもよい
+    second = vec.step_wait(env_slice=groups[1])
+    first = vec.step_wait(env_slice=groups[0])
+    assert first.observations.shape == (1, int(sim.obs_dim))
+    return np.concatenate([first.observations, second.observations], axis=0)
+  finally:
+    vec.close()
+
+
+def _run_dr_autoreset(transport: str, hydra_path: str, sim) -> np.ndarray:
+  """学習 DR 有効・``max_episode_steps=2`` で数 episode 回し、各 step の観測を返す。
+
+  worker は待ち時間に次 episode の初期 state を先読みする（``runtime.reset_prefetch``）。
+  """
+  vec = SubprocVecEnvBiped(
+    2,
+    training_dr_enabled=True,
+    training_seed=0,
+    step_wall_sleep_sec=0.0,
+    hydra_config_path=hydra_path,
+    transport=transport,
+    envs_per_worker=2,
+    max_episode_steps=2,
+    obs_dim=int(sim.obs_dim),
+    action_dim=int(sim.action_dim),
+  )
+  try:
+    observations = [vec.reset_all(start_episode_index=0)]
+    zero_actions = np.zeros((2, int(sim.action_dim)))
+    for _ in range(8):
+      time.sleep(0.05)  # worker が先読みする待ち時間
+      observations.append(vec.step(zero_actions).observations)
+    return np.stack(observations)
+  finally:
+    vec.close()
+
+
 def main() -> None:
   cfg = compose_cfg(["wandb=disabled", "runtime=fast"])
   with tempfile.TemporaryDirectory() as tmp:
-    hydra_path = save_hydra_config(tmp, cfg)
-    sim = cfg.sim
-    vec = SubprocVecEnvBiped(
-      2,
-      training_dr_enabled=False,
-      training_seed=0,
-      step_wall_sleep_sec=0.0,
-      hydra_config_path=str(hydra_path),
-    )
-    try:
-      obs_list = vec.reset_all(start_episode_index=0)
-      assert len(obs_list) == 2
-      assert len(obs_list[0]) == int(sim.obs_dim)
-
-      zero_action = tuple(0.0 for _ in range(int(sim.action_dim)))
-      batch = vec.step([zero_action, zero_action])
-      assert len(batch.observations) == 2
-      assert batch.rewards.shape == (2,)
-
-      obs_reset = vec.reset_env(0, episode_index=5)
-      assert len(obs_reset) == int(sim.obs_dim)
-    finally:
-      vec.close()
+    hydra_path = str(save_hydra_config(tmp, cfg))
+    obs_shm, rew_shm = _run_transport("shm", hydra_path, cfg.sim)
+    obs_pipe, rew_pipe = _run_transport("pipe", hydra_path, cfg.sim)
+    obs_grouped, rew_grouped = _run_transport("shm", hydra_path, cfg.sim, envs_per_worker=2)
+    obs_pipe_grouped, _ = _run_transport("pipe", hydra_path, cfg.sim, envs_per_worker=2)
+    # 転送路・worker 割り当てが違っても同じ seed・同じ action なら結果は一致する
+    assert np.array_equal(obs_shm, obs_pipe)
+    assert np.array_equal(rew_shm, rew_pipe)
+    assert np.array_equal(obs_shm, obs_grouped)
+    assert np.array_equal(rew_shm, rew_grouped)
+    assert np.array_equal(obs_shm, obs_pipe_grouped)
+    assert np.array_equal(obs_shm, _run_async("shm", hydra_path, cfg.sim))
+    assert np.array_equal(obs_shm, _run_async("pipe", hydra_path, cfg.sim))
+    final_shm = _run_autoreset("shm", hydra_path, cfg.sim)
+    final_pipe = _run_autoreset("pipe", hydra_path, cfg.sim)
+    assert np.array_equal(final_shm, final_pipe)
+
+    # 先読みした初期 state から始めても、その場で reset した場合と同じ観測になる
+    no_prefetch_path = str(save_hydra_config(Path(tmp) / "no_prefetch", compose_cfg(
+      ["wandb=disabled", "runtime=fast", "runtime.reset_prefetch=0"]
+    )))
+    dr_obs = _run_dr_autoreset("shm", no_prefetch_path, cfg.sim)
+    assert np.array_equal(dr_obs, _run_dr_autoreset("shm", hydra_path, cfg.sim))
+    assert np.array_equal(dr_obs, _run_dr_autoreset("pipe", hydra_path, cfg.sim))
 
   print("subproc_vec_env_smoke_ok")
 
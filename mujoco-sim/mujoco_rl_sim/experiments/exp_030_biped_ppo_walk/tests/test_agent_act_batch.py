@@ -7,7 +7,7 @@ import torch
 
 from conf.schema import build_app_config
 from lib.experiment_context import build_experiment_context
-from rl.agent import AgentPPO
+from rl.agent import AgentPPO, _ppo_minibatch_losses, _tanh_log_abs_det_jacobian
 
 
 def test_act_batch_shape_and_finite() -> None:
@@ -25,3 +25,60 @@ def test_act_batch_shape_and_finite() -> None:
   assert log_probs.shape == (n,)
   assert np.isfinite(actions).all()
 
+
+def test_store_batch_then_update_uses_env_columns() -> None:
+  """num_envs 列のバッファを act_batch → store_batch で埋めて update できる。"""
+  torch.manual_seed(0)
+  cfg = build_app_config(
+    {"runtime": {"num_envs": 4}, "ppo": {"rollout_steps": 32, "ppo_epochs": 1}}
+  )
+  ctx = build_experiment_context(cfg)
+  agent = AgentPPO(ctx)
+  assert agent.rollout.horizon == 8
+  assert agent.rollout.num_envs == 4
+
+  obs_batch = np.zeros((4, ctx.cfg.sim.obs_dim), dtype=np.float64)
+  for _ in range(agent.rollout.horizon):
+    actions, values, log_probs = agent.act_batch(obs_batch)
+    agent.store_batch(
+      obs_batch,
+      actions,
+      np.ones(4),
+      values,
+      np.zeros(4, dtype=bool),
+      log_probs,
+    )
+  assert agent.rollout.filled_steps == agent.rollout.horizon
+
+  stats = agent.update(obs_batch)
+  assert np.isfinite(stats["policy_loss"])
+  assert agent.rollout.filled_steps == 0
+
+
+def test_closed_form_log_prob_matches_tanh_transform() -> None:
+  """閉形式の tanh 付きガウス log π(a|s) が TransformedDistribution と一致する。"""
+  torch.manual_seed(0)
+  ctx = build_experiment_context(build_app_config())
+  agent = AgentPPO(ctx)
+  obs = torch.randn(16, ctx.cfg.sim.obs_dim)
+  with torch.no_grad():
+    dist = agent.actor.squashed_dist(obs)
+    action = dist.sample().clamp(-1.0 + 1e-6, 1.0 - 1e-6)
+    expected = agent._squashed_log_prob(dist, action)
+    _, stats = _ppo_minibatch_losses(
+      agent.actor,
+      agent.critic,
+      obs,
+      torch.atanh(action),
+      _tanh_log_abs_det_jacobian(torch.atanh(action)),
+      torch.zeros(16),
+      torch.zeros(16),
+      expected,
+      clip_eps=0.2,
+      value_coef=0.5,
+      entropy_coef=0.0,
+      log_prob_clip=float(ctx.cfg.ppo.log_prob_clip),
+    )
+  # old == new なら approx_kl と clip_fraction は 0
+  assert abs(float(stats[3])) < 1e-4
+  assert float(stats[4]) == 0.0
@@ -0,0 +1,90 @@
+"""チェックポイントの mmap 形式（rl/checkpoint_file.py）と非同期保存（rl/checkpoint.py）のテスト。"""
+
+from __future__ import annotations
+
+import numpy as np
+import torch
+
+import rl.checkpoint as checkpoint
+from lib.hydra_checkpoint import save_hydra_config
+from lib.hydra_compose import compose_cfg
+from lib.load_run_context import ctx_from_checkpoint
+from rl.agent import AgentPPO
+from rl.checkpoint_file import is_tensor_checkpoint
+
+
+def _trained_agent(run_dir):
+  save_hydra_config(run_dir, compose_cfg(["wandb=disabled", "ppo.obs_norm=true"]))
+  torch.manual_seed(0)
+  agent = AgentPPO(ctx_from_checkpoint(run_dir / "final.pt"))
+  agent.obs_normalizer.update(np.random.default_rng(1).normal(size=(32, agent.obs_dim)))
+  # optimizer の state（int キーの辞書・step テンソル）を作る
+  loss = agent.actor.net(torch.ones(1, agent.obs_dim)).sum() + agent.critic.net(torch.ones(1, agent.obs_dim)).sum()
+  loss.backward()
+  agent.optimizer.step()
+  return agent
+
+
+def _assert_state_equal(a, b) -> None:
+  if isinstance(a, torch.Tensor):
+    assert torch.equal(a, b)
+  elif isinstance(a, np.ndarray):
+    np.testing.assert_array_equal(a, b)
+  elif isinstance(a, dict):
+    assert a.keys() == b.keys()
+    for key in a:
+      _assert_state_equal(a[key], b[key])
+  elif isinstance(a, (list, tuple)):
+    assert type(a) is type(b) and len(a) == len(b)
+    for x, y in zip(a, b):
+      _assert_state_equal(x, y)
+  else:
+    assert a == b
+
+
+def test_tensor_checkpoint_round_trip_and_links(tmp_path) -> None:
+  run_dir = tmp_path / "run"
+  agent = _trained_agent(run_dir)
+  paths = checkpoint.save_agent_checkpoint(
+    agent, run_dir=run_dir, update=3, total_env_steps=30, episodes_finished=2, latest=True, final=True
+  )
+  assert [p.name for p in paths] == ["update_000003.pt", "latest.pt", "final.pt"]
+  assert all(is_tensor_checkpoint(p) for p in paths)
+  assert paths[1].read_bytes() == paths[0].read_bytes() == paths[2].read_bytes()
+  assert not list(run_dir.glob(".*.tmp"))
+
+  expected = checkpoint.build_payload(agent, update=3, total_env_steps=30, episodes_finished=2)
+  _assert_state_equal(expected, checkpoint.load_checkpoint(paths[0]))
+  eval_payload = checkpoint.load_checkpoint(paths[2], include_optimizer=False)
+  assert "optimizer" not in eval_payload
+  _assert_state_equal(expected["actor"], eval_payload["actor"])
+
+  restored = AgentPPO.from_checkpoint(ctx_from_checkpoint(paths[2]), paths[2])
+  _assert_state_equal(agent.optimizer.state_dict(), restored.optimizer.state_dict())
+  obs = np.random.default_rng(3).normal(size=(4, agent.obs_dim))
+  np.testing.assert_array_equal(restored.act_eval_batch(obs), agent.act_eval_batch(obs))
+
+
+def test_async_writer_snapshots_weights_at_save_time(tmp_path) -> None:
+  run_dir = tmp_path / "run"
+  agent = _trained_agent(run_dir)
+  expected = {k: v.clone() for k, v in agent.actor.state_dict().items()}
+  writer = checkpoint.CheckpointWriter(async_save=True)
+  (path,) = writer.save(agent, run_dir=run_dir, update=1, total_env_steps=0, episodes_finished=0)
+  # 書き込み完了前に学習が重みを書き換えても、保存されるのは save 時点の値
+  with torch.no_grad():
+    for param in agent.actor.parameters():
+      param.add_(1.0)
+  writer.close()
+  _assert_state_equal(expected, checkpoint.load_checkpoint(path)["actor"])
+
+
+def test_torch_format_checkpoints_still_load(tmp_path) -> None:
+  run_dir = tmp_path / "run"
+  agent = _trained_agent(run_dir)
+  (path,) = checkpoint.save_agent_checkpoint(
+    agent, run_dir=run_dir, update=1, total_env_steps=0, episodes_finished=0, file_format="torch"
+  )
+  assert not is_tensor_checkpoint(path)
+  restored = AgentPPO.from_checkpoint(ctx_from_checkpoint(path), path)
+  _assert_state_equal(agent.actor.state_dict(), restored.actor.state_dict())
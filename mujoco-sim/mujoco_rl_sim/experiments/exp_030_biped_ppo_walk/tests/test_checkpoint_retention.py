@@ -0,0 +1,103 @@
+"""チェックポイントの保持ポリシーとマニフェスト（rl/checkpoint_retention.py）のテスト。"""
+
+from __future__ import annotations
+
+import threading
+
+import torch
+
+import rl.checkpoint as checkpoint
+from lib.hydra_checkpoint import save_hydra_config
+from lib.hydra_compose import compose_cfg
+from lib.load_run_context import ctx_from_checkpoint
+from rl.agent import AgentPPO
+from rl.checkpoint_retention import (
+  RetentionPolicy,
+  load_manifest,
+  manifest_checkpoint_paths,
+  manifest_lock,
+  rebuild_manifest,
+  record_eval_metrics,
+  select_kept,
+  write_manifest,
+)
+
+
+def _entry(update: int, ret: float | None = None) -> dict:
+  metrics = {} if ret is None else {"train/ep_return_mean": ret}
+  return {"filename": f"update_{update:06d}.pt", "update": update, "metrics": metrics}
+
+
+def test_select_kept_unions_last_every_and_best() -> None:
+  entries = [_entry(u, ret) for u, ret in [(100, 1.0), (200, 9.0), (300, 2.0), (400, None), (500, 3.0)]]
+  entries.append({"filename": "latest.pt", "update": 500, "metrics": {}})
+  kept = select_kept(entries, RetentionPolicy(keep_last=1, keep_every=300, keep_best=2))
+  assert kept == {
+    "latest.pt": ["alias"],
+    "update_000500.pt": ["last", "best"],
+    "update_000300.pt": ["every"],
+    "update_000200.pt": ["best"],
+  }
+  assert set(select_kept(entries, RetentionPolicy())) == {e["filename"] for e in entries}
+
+
+def test_writer_prunes_records_manifest_and_links_identical_final(tmp_path) -> None:
+  run_dir = tmp_path / "run"
+  save_hydra_config(run_dir, compose_cfg(["wandb=disabled"]))
+  torch.manual_seed(0)
+  agent = AgentPPO(ctx_from_checkpoint(run_dir / "final.pt"))
+  writer = checkpoint.CheckpointWriter(retention=RetentionPolicy(keep_last=2, keep_best=1))
+  for update, ret in [(1, 5.0), (2, 1.0), (3, 2.0), (4, 3.0)]:
+    with torch.no_grad():
+      agent.actor.net[0].bias.add_(1.0)
+    writer.save(
+      agent, run_dir=run_dir, update=update, total_env_steps=update * 10, episodes_finished=update,
+      latest=True, metrics={"train/ep_return_mean": ret},
+    )
+  # 最後の update と同じ中身の final は書き直さずリンクする
+  (final,) = writer.save(
+    agent, run_dir=run_dir, update=4, total_env_steps=40, episodes_finished=4, numbered=False, final=True
+  )
+  writer.close()
+
+  assert sorted(p.name for p in run_dir.glob("*.pt")) == [
+    "final.pt", "latest.pt", "update_000001.pt", "update_000003.pt", "update_000004.pt"
+  ]
+  assert final.stat().st_ino == (run_dir / "update_000004.pt").stat().st_ino
+  manifest = load_manifest(run_dir)
+  by_name = {e["filename"]: e for e in manifest["checkpoints"]}
+  assert by_name["update_000001.pt"]["keep"] == ["best"]
+  assert by_name["final.pt"]["alias_of"] == "update_000004.pt"
+  assert by_name["latest.pt"]["sha256"] == by_name["final.pt"]["sha256"]
+  assert [p.name for p in manifest_checkpoint_paths(run_dir)] == sorted(by_name)
+
+  # eval の指標は同じ中身の ckpt すべてに入る
+  assert record_eval_metrics(final, {"eval/displacement_x_mean": 0.5})
+  by_name = {e["filename"]: e for e in load_manifest(run_dir)["checkpoints"]}
+  assert by_name["update_000004.pt"]["metrics"]["eval/displacement_x_mean"] == 0.5
+  assert "eval/displacement_x_mean" not in by_name["update_000003.pt"]["metrics"]
+
+  rebuilt = {e["filename"]: e for e in rebuild_manifest(run_dir)["checkpoints"]}
+  assert rebuilt["update_000003.pt"]["update"] == 3
+  assert rebuilt["final.pt"]["update"] == 4 and rebuilt["final.pt"]["alias_of"] == "update_000004.pt"
+  assert rebuilt["final.pt"]["metrics"]["eval/displacement_x_mean"] == 0.5
+
+
+def test_record_eval_metrics_waits_for_manifest_lock(tmp_path) -> None:
+  write_manifest(tmp_path, {"format": "checkpoint_manifest_v1", "checkpoints": [_entry(1, 1.0)]})
+  done = threading.Event()
+
+  def record() -> None:
+    record_eval_metrics(tmp_path / "update_000001.pt", {"eval/displacement_x_mean": 0.5})
+    done.set()
+
+  with manifest_lock(tmp_path):
+    # 保持ポリシーの適用中（ロック中）は eval の書き込みが割り込まない
+    thread = threading.Thread(target=record)
+    thread.start()
+    assert not done.wait(0.3)
+    write_manifest(tmp_path, {"format": "checkpoint_manifest_v1", "checkpoints": [_entry(1, 2.0)]})
+  thread.join(timeout=5)
+  assert done.is_set()
+  (entry,) = load_manifest(tmp_path)["checkpoints"]
+  assert entry["metrics"] == {"train/ep_return_mean": 2.0, "eval/displacement_x_mean": 0.5}
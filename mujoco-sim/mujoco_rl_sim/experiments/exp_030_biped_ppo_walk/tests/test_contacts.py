@@ -0,0 +1,71 @@
+"""FloorContacts（床接触の一括分類）の単体テスト。"""
+
+from __future__ import annotations
+
+import mujoco
+import numpy as np
+import pytest
+
+from lib.actuators import LEFT_FOOT_GEOM, RIGHT_FOOT_GEOM, SHANK_GEOM_IDS, THIGH_GEOM_IDS
+from sim.contacts import SLOT_BASKET, SLOT_LEFT_FOOT, SLOT_RIGHT_FOOT, SLOT_SHANKS, SLOT_THIGHS
+from sim.env import EnvBipedPPO
+from sim.termination import REASON_CONTACT_BASKET
+
+
+def _brute_force(model: mujoco.MjModel, data: mujoco.MjData, geom_name: str) -> tuple[bool, float]:
+  """1 geom と床の接触有無・法線力最大値を data.contact の素朴な走査で求める。"""
+  geom_id = model.geom(geom_name).id
+  floor_id = model.geom("floor").id
+  wrench = np.zeros(6)
+  hit = False
+  peak = 0.0
+  for i in range(data.ncon):
+    c = data.contact[i]
+    if {int(c.geom1), int(c.geom2)} != {geom_id, floor_id}:
+      continue
+    hit = True
+    mujoco.mj_contactForce(model, data, i, wrench)
+    peak = max(peak, abs(float(wrench[0])))
+  return hit, peak
+
+
+@pytest.mark.slow
+def test_floor_contacts_match_brute_force_scan(smoke_ctx) -> None:
+  """倒れ込む間の毎物理 step で、一括分類が geom ごとの走査結果と一致する。"""
+  env = EnvBipedPPO(smoke_ctx, enable_viewer=False, training_dr_enabled=False)
+  env.reset()
+  model, data = env.model, env.data
+  # 横倒しにして落とし、バスケットを床に当てる
+  angle = np.deg2rad(80.0)
+  data.qpos[2] = 0.4
+  data.qpos[3:7] = [np.cos(angle / 2), np.sin(angle / 2), 0.0, 0.0]
+  mujoco.mj_forward(model, data)
+
+  slots = {
+    SLOT_LEFT_FOOT: LEFT_FOOT_GEOM,
+    SLOT_RIGHT_FOOT: RIGHT_FOOT_GEOM,
+    SLOT_BASKET: "basket",
+    **dict(zip(SLOT_THIGHS, THIGH_GEOM_IDS)),
+    **dict(zip(SLOT_SHANKS, SHANK_GEOM_IDS)),
+  }
+  contacts = env._contacts
+  basket_seen = False
+  for _ in range(600):
+    mujoco.mj_step(model, data)
+    contacts.update(data)
+    for slot, name in slots.items():
+      hit, peak = _brute_force(model, data, name)
+      assert contacts.on_floor[slot] == hit, name
+      if slot >= SLOT_BASKET:
+        assert contacts.normal_force_n[slot] == pytest.approx(peak), name
+    assert contacts.body_on_floor == bool(contacts.on_floor[SLOT_BASKET:].any())
+    outcome, shank_penalty = env._termination.contact_substep(contacts)
+    assert outcome == env._termination.done_reason_contact(contacts)
+    if not outcome.terminated:
+      assert shank_penalty == env._termination.shank_contact_step_penalty(contacts)
+    basket_seen |= bool(contacts.on_floor[SLOT_BASKET])
+    if contacts.on_floor[SLOT_BASKET]:
+      outcome = env._termination.done_reason_contact(contacts)
+      assert outcome.reason == REASON_CONTACT_BASKET
+      assert outcome.contact_normal_force_n == contacts.normal_force_n[SLOT_BASKET]
+  assert basket_seen
@@ -6,18 +6,57 @@ import mujoco
 import numpy as np
 
 from sim.domain_randomization import (
+  DR_TABLE_BLOCK,
   TrainingDomainRandomization,
-  make_episode_dr_rng,
+  sample_dr_block,
+  sample_dr_episodes,
+  write_dr_episode_log,
 )
 from sim.env import EnvBipedPPO
 
 
-def test_make_episode_dr_rng_is_deterministic() -> None:
-  r1 = make_episode_dr_rng(42, 3)
-  r2 = make_episode_dr_rng(42, 3)
-  assert r1.random() == r2.random()
-  r3 = make_episode_dr_rng(42, 4)
-  assert r1.random() != r3.random()
+def test_dr_rows_depend_only_on_seed_and_episode_index(default_ctx) -> None:
+  block = sample_dr_block(default_ctx, 42, 1)
+  assert block["episode_index"][0] == DR_TABLE_BLOCK
+  np.testing.assert_array_equal(block, sample_dr_block(default_ctx, 42, 1))
+  assert not np.array_equal(block["kp_mult"], sample_dr_block(default_ctx, 43, 1)["kp_mult"])
+
+  # ブロック境界をまたぐ切り出しでも同じ行
+  rows = sample_dr_episodes(default_ctx, 42, DR_TABLE_BLOCK - 2, DR_TABLE_BLOCK + 3)
+  np.testing.assert_array_equal(rows["episode_index"], np.arange(DR_TABLE_BLOCK - 2, DR_TABLE_BLOCK + 3))
+  np.testing.assert_array_equal(rows[2:], block[:3])
+
+  lo, hi = default_ctx.cfg.training.training_dr_actuator_kp_mult_range
+  assert np.all((block["kp_mult"] >= lo) & (block["kp_mult"] <= hi))
+
+
+def test_apply_writes_nominal_times_table_row(default_ctx) -> None:
+  model = mujoco.MjModel.from_xml_path(default_ctx.xml_path)
+  data = mujoco.MjData(model)
+  dr = TrainingDomainRandomization(model, default_ctx, training_seed=5)
+  foot_id = int(model.geom("foot_plate").id)
+  act_id = int(model.actuator(0).id)
+  slide = float(model.geom_friction[foot_id, 0])
+  kp = float(model.actuator_gainprm[act_id, 0])
+  bias_kv = float(model.actuator_biasprm[act_id, 2])
+
+  # 別ブロックを挟んでから戻っても同じ行を書く
+  dr.apply_for_episode(model, data, episode_index=3 * DR_TABLE_BLOCK)
+  params = dr.apply_for_episode(model, data, episode_index=7)
+  expected = sample_dr_episodes(default_ctx, 5, 7, 8)[0]
+  assert params == expected
+  foot_col = list(default_ctx.cfg.training.training_dr_foot_friction_geoms).index("foot_plate")
+  assert model.geom_friction[foot_id, 0] == slide * expected["friction_slide_mult"][foot_col]
+  assert model.actuator_gainprm[act_id, 0] == kp * expected["kp_mult"][0]
+  assert model.actuator_biasprm[act_id, 2] == bias_kv * expected["kv_mult"][0]
+
+
+def test_dr_episode_log_roundtrip(default_ctx, tmp_path) -> None:
+  path = write_dr_episode_log(tmp_path / "dr.npz", default_ctx, training_seed=9, start=10, stop=20)
+  with np.load(path) as log:
+    np.testing.assert_array_equal(log["episode_index"], np.arange(10, 20))
+    np.testing.assert_array_equal(log["kv_mult"], sample_dr_episodes(default_ctx, 9, 10, 20)["kv_mult"])
+    assert log["actuator_names"].shape == (log["kp_mult"].shape[1],)
 
 
 def test_apply_changes_friction_and_restores_nominal(default_ctx) -> None:
@@ -27,10 +66,9 @@ def test_apply_changes_friction_and_restores_nominal(default_ctx) -> None:
   foot_id = int(model.geom("foot_plate").id)
   nominal = float(model.geom_friction[foot_id, 0])
 
-  rng = np.random.default_rng(0)
   stand_key = mujoco.mj_name2id(model, mujoco.mjtObj.mjOBJ_KEY, "stand")
   mujoco.mj_resetDataKeyframe(model, data, stand_key)
-  dr.apply_for_episode(model, data, rng=rng)
+  dr.apply_for_episode(model, data, episode_index=0)
   assert model.geom_friction[foot_id, 0] != nominal
 
   dr.restore_nominal(model)
@@ -0,0 +1,41 @@
+"""EffortTracker（|τ·q̇| 積算の内積化）の単体テスト。"""
+
+from __future__ import annotations
+
+import mujoco
+import numpy as np
+import pytest
+
+from lib.actuators import ACTUATOR_NAMES
+from sim.env import EnvBipedPPO
+
+
+def _loop_power_cost(model: mujoco.MjModel, data: mujoco.MjData) -> float:
+  """アクチュエータを名前で 1 つずつ引く素朴な Σ |τ·q̇| / τmax · dt。"""
+  total = 0.0
+  for name in ACTUATOR_NAMES:
+    act_id = model.actuator(name).id
+    jnt_id = int(model.actuator_trnid[act_id, 0])
+    tau = float(data.actuator_force[act_id])
+    qvel = float(data.qvel[model.jnt_dofadr[jnt_id]])
+    tau_max = float(np.abs(model.actuator_forcerange[act_id]).max())
+    total += abs(tau * qvel) / tau_max * float(model.opt.timestep)
+  return total
+
+
+@pytest.mark.slow
+def test_record_physics_step_matches_per_actuator_loop(smoke_ctx) -> None:
+  env = EnvBipedPPO(smoke_ctx, enable_viewer=False, training_dr_enabled=False)
+  env.reset()
+  model, data = env.model, env.data
+  rng = np.random.default_rng(0)
+  effort = env._effort
+  effort.reset_control_step()
+  expected = 0.0
+  for _ in range(30):
+    data.ctrl[:] = rng.uniform(model.actuator_ctrlrange[:, 0], model.actuator_ctrlrange[:, 1])
+    mujoco.mj_step(model, data)
+    effort.record_physics_step(data)
+    expected += _loop_power_cost(model, data)
+  assert expected > 0.0
+  assert effort.control_step_breakdown().power_cost == pytest.approx(expected, rel=1e-12)
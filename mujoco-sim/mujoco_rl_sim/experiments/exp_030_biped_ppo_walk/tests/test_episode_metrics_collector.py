@@ -0,0 +1,96 @@
+"""env 別エピソード集計（EpisodeMetricsCollector の batch 経路）の単体テスト。"""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from rl import wandb_logging
+from sim.step_info_ipc import STEP_INFO_DIM, STEP_INFO_INDEX, unpack_step_info
+
+
+@pytest.fixture
+def logged(default_ctx, monkeypatch):
+  """wandb を有効扱いにし、``log`` に渡された指標を (step, metrics) で記録する。"""
+  records: list[tuple[int, dict[str, float]]] = []
+  monkeypatch.setattr(wandb_logging, "_ctx", default_ctx)
+  monkeypatch.setattr(wandb_logging, "_active", True)
+  monkeypatch.setattr(wandb_logging, "_termination_tracker", None)
+  monkeypatch.setattr(wandb_logging, "log", lambda metrics, *, step: records.append((step, metrics)))
+  return records
+
+
+def _random_info(rng: np.random.Generator, n: int) -> np.ndarray:
+  info = rng.normal(size=(n, STEP_INFO_DIM)).astype(np.float32)
+  info[:, STEP_INFO_INDEX["termination_reason"]] = -1.0
+  info[:, STEP_INFO_INDEX["basket_contact_normal_force_n"]] = np.nan
+  info[:, STEP_INFO_INDEX["thigh_contact_normal_force_n"]] = np.nan
+  return info
+
+
+def test_vec_batch_matches_per_env_dict_collectors(logged) -> None:
+  """N env をまとめて集計しても、env ごとに dict で集計した結果と一致する。"""
+  num_envs, steps = 3, 30
+  rng = np.random.default_rng(0)
+  batches = []
+  for _ in range(steps):
+    terminated = rng.uniform(size=num_envs) < 0.15
+    truncated = ~terminated & (rng.uniform(size=num_envs) < 0.05)
+    info = _random_info(rng, num_envs)
+    info[:, STEP_INFO_INDEX["terminated"]] = terminated
+    batches.append(
+      SimpleNamespace(
+        rewards=rng.normal(size=num_envs).astype(np.float32),
+        info=info,
+        terminated=terminated,
+        truncated=truncated,
+        step_info=lambda row, info=info: unpack_step_info(info[row]),
+      )
+    )
+
+  vec = wandb_logging.EpisodeMetricsCollector(num_envs)
+  env_step = 0
+  finished = 0
+  for batch in batches:
+    finished += vec.on_vec_batch(batch, env_slice=slice(0, num_envs), env_step=env_step)
+    env_step += num_envs
+  vec_records = list(logged)
+  logged.clear()
+
+  # 参照: env ごとに独立した単一 env collector へ dict で流す
+  refs = [wandb_logging.EpisodeMetricsCollector() for _ in range(num_envs)]
+  lengths = [0] * num_envs
+  env_step = 0
+  for batch in batches:
+    for row in range(num_envs):
+      env_step += 1
+      lengths[row] += 1
+      step_info = batch.step_info(row)
+      refs[row].on_step(float(batch.rewards[row]), step_info)
+      if batch.terminated[row] or batch.truncated[row]:
+        refs[row].on_episode_end(
+          episode_step=lengths[row],
+          terminated=bool(batch.terminated[row]),
+          truncated=bool(batch.truncated[row]),
+          step_info=step_info,
+          env_step=env_step,
+        )
+        lengths[row] = 0
+
+  assert finished == len(vec_records) > 0
+  assert [step for step, _ in vec_records] == [step for step, _ in logged]
+  for (_, got), (_, expected) in zip(vec_records, logged, strict=True):
+    assert got.keys() == expected.keys()
+    assert got == pytest.approx(expected, rel=1e-6, abs=1e-6)
+
+
+def test_partial_env_slice_only_touches_its_columns(logged) -> None:
+  collector = wandb_logging.EpisodeMetricsCollector(4)
+  rng = np.random.default_rng(1)
+  collector.on_step_batch(np.ones(2), _random_info(rng, 2), env_slice=slice(2, 4))
+  assert collector._steps.tolist() == [0, 0, 1, 1]
+  assert collector._returns.tolist() == [0.0, 0.0, 1.0, 1.0]
+  collector.reset(3)
+  assert collector._steps.tolist() == [0, 0, 1, 0]
@@ -0,0 +1,61 @@
+"""エピソードのローリング / interval 統計（差分更新）の単体テスト。"""
+
+from __future__ import annotations
+
+from statistics import mean
+
+import numpy as np
+import pytest
+
+from lib.episode_rolling import EpisodeIntervalBuffer, EpisodeRollingWindow, EpisodeSnapshot
+
+
+def _snapshots(n: int, seed: int = 0) -> list[EpisodeSnapshot]:
+  rng = np.random.default_rng(seed)
+  return [
+    EpisodeSnapshot(
+      return_=float(rng.normal(scale=50.0)),
+      length=float(rng.integers(1, 500)),
+      forward_reward_sum=float(rng.normal()),
+      total_dx_imu=float(rng.normal()),
+      net_imu_x=float(rng.normal()),
+    )
+    for _ in range(n)
+  ]
+
+
+def _reference(eps: list[EpisodeSnapshot]) -> dict[str, float]:
+  return {
+    "ep_roll_n": float(len(eps)),
+    "ep_ret_mean": mean(e.return_ for e in eps),
+    "ep_ret_max": max(e.return_ for e in eps),
+    "ep_len_mean": mean(e.length for e in eps),
+    "ep_fwd_rw_mean": mean(e.forward_reward_sum for e in eps),
+    "ep_dx_mean": mean(e.total_dx_imu for e in eps),
+    "ep_dx_max": max(e.total_dx_imu for e in eps),
+    "ep_net_x_mean": mean(e.net_imu_x for e in eps),
+    "ep_net_x_max": max(e.net_imu_x for e in eps),
+  }
+
+
+def test_rolling_window_matches_full_recompute() -> None:
+  window = 7
+  rolling = EpisodeRollingWindow(window=window)
+  assert rolling.summary() is None
+  eps = _snapshots(40)
+  for i, snapshot in enumerate(eps):
+    rolling.push(snapshot)
+    expected = _reference(eps[max(0, i + 1 - window) : i + 1])
+    assert rolling.count() == min(i + 1, window)
+    assert rolling.summary() == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+
+def test_interval_buffer_take_summary_clears() -> None:
+  interval = EpisodeIntervalBuffer()
+  eps = _snapshots(5, seed=1)
+  for snapshot in eps:
+    interval.push(snapshot)
+  assert interval.take_summary() == pytest.approx(_reference(eps))
+  assert interval.take_summary() is None
+  interval.push(eps[0])
+  assert interval.take_summary() == pytest.approx(_reference(eps[:1]))
@@ -0,0 +1,101 @@
+"""eval 結果キャッシュ（eval/cache.py）のテスト。"""
+
+from __future__ import annotations
+
+import pytest
+import torch
+
+import rl.checkpoint as checkpoint
+from eval import runner
+from eval.cache import EvalCache, env_config_hash, eval_cache_key
+from eval.metrics import EpisodeEvalRecord
+from eval.spec import iter_eval_trials
+from lib.hydra_checkpoint import save_hydra_config
+from lib.hydra_compose import compose_app_config, compose_cfg
+from lib.load_run_context import default_ctx
+from rl.agent import AgentPPO
+
+
+def _record(eval_seed: int, ep_index: int, trial_index: int) -> EpisodeEvalRecord:
+  return EpisodeEvalRecord(
+    trial_index=trial_index,
+    eval_seed=eval_seed,
+    ep_index=ep_index,
+    displacement_x=0.1 * ep_index + 1e-17,
+    origin_imu_x=0.0,
+    final_imu_x=0.1 * ep_index,
+    episode_length=10 + ep_index,
+    truncated=False,
+    termination_reason="low_upright",
+    alternating_landing_rate=0.5,
+    single_support_ratio=1.0 / 3.0,
+    double_support_ratio=0.25,
+    episode_return=-1.5,
+    noise_applied={"root_yaw_noise_deg": 0.3, "joint_noise_deg": [0.1, -0.2]},
+  )
+
+
+def test_lookup_returns_stored_trials_and_missing_plans(tmp_path) -> None:
+  cache = EvalCache(tmp_path)
+  plans = iter_eval_trials(eval_seeds=(101, 102), episodes_per_seed=2)
+  stored = [_record(p.eval_seed, p.ep_index, p.trial_index) for p in plans[:3]]
+  cache.store("k", stored, meta={})
+
+  # ep 数を増やした計画では trial_index が変わるが、(seed, ep) で引ける
+  wider = iter_eval_trials(eval_seeds=(101, 102), episodes_per_seed=3)
+  hits, missing = cache.lookup("k", wider)
+
+  assert [(r.eval_seed, r.ep_index, r.trial_index) for r in hits] == [(101, 0, 0), (101, 1, 1), (102, 0, 3)]
+  assert hits[0] == stored[0]
+  assert hits[2] == _record(102, 0, 3)
+  assert [(p.eval_seed, p.ep_index) for p in missing] == [(101, 2), (102, 1), (102, 2)]
+  assert cache.lookup("other", wider) == ([], list(wider))
+
+
+def test_env_config_hash_tracks_reward_but_not_runtime_knobs() -> None:
+  base = compose_app_config(["wandb=disabled"])
+  same = compose_app_config(["wandb=enabled", "runtime.num_envs=8", "eval.num_workers=1"])
+  reward = compose_app_config(["wandb=disabled", "reward.forward_reward_scale=99.0"])
+
+  assert env_config_hash(base) == env_config_hash(same)
+  assert env_config_hash(base) != env_config_hash(reward)
+  assert eval_cache_key(checkpoint_sha256="a", env_sha256="b") != eval_cache_key(
+    checkpoint_sha256="a", env_sha256="b", eval_spec_id="other_spec"
+  )
+
+
+@pytest.mark.slow
+def test_checkpoint_eval_runs_only_uncached_trials(tmp_path, monkeypatch) -> None:
+  run_dir = tmp_path / "run"
+  save_hydra_config(
+    run_dir,
+    compose_cfg(["wandb=disabled", f"eval.cache_dir={tmp_path / 'cache'}", "eval.num_workers=0"]),
+  )
+  torch.manual_seed(0)
+  (ckpt,) = checkpoint.save_agent_checkpoint(
+    AgentPPO(default_ctx()),
+    run_dir=run_dir,
+    update=0,
+    total_env_steps=0,
+    episodes_finished=0,
+    numbered=False,
+    final=True,
+  )
+  ran: list[int] = []
+  run_trials = runner._run_trials
+
+  def counting_run_trials(checkpoint_path, plans, **kwargs):
+    ran.append(len(plans))
+    return run_trials(checkpoint_path, plans, **kwargs)
+
+  monkeypatch.setattr(runner, "_run_trials", counting_run_trials)
+
+  first = runner.run_checkpoint_eval(ckpt, eval_seeds=(101,), episodes_per_seed=2)
+  again = runner.run_checkpoint_eval(ckpt, eval_seeds=(101,), episodes_per_seed=2)
+  wider = runner.run_checkpoint_eval(ckpt, eval_seeds=(101,), episodes_per_seed=3)
+  uncached = runner.run_checkpoint_eval(ckpt, eval_seeds=(101,), episodes_per_seed=3, use_cache=False)
+
+  assert ran == [2, 1, 3]
+  assert again == first
+  assert wider[:2] == first
+  assert wider == uncached
@@ -0,0 +1,89 @@
+"""並列 eval（行動のまとめ推論・同時試行・プロセスプール）が直列 eval と同じ記録を返すかのテスト。"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+import torch
+
+import rl.checkpoint as checkpoint
+from eval import runner
+from eval.spec import iter_eval_trials
+from lib.load_run_context import default_ctx
+from rl.agent import AgentPPO
+
+_EXP_ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_act_eval_batch_rows_match_act_eval() -> None:
+  torch.manual_seed(0)
+  agent = AgentPPO(default_ctx())
+  obs = np.random.default_rng(0).normal(size=(7, agent.obs_dim)).astype(np.float32)
+
+  batch = agent.act_eval_batch(obs)
+
+  assert batch.shape == (7, agent.action_dim)
+  for row, expected in zip(batch, obs, strict=True):
+    np.testing.assert_array_equal(row, np.asarray(agent.act_eval(expected), dtype=np.float32))
+
+
+@pytest.mark.slow
+def test_lockstep_eval_matches_serial_eval(tmp_path) -> None:
+  torch.manual_seed(0)
+  (ckpt,) = checkpoint.save_agent_checkpoint(
+    AgentPPO(default_ctx()),
+    run_dir=tmp_path,
+    update=0,
+    total_env_steps=0,
+    episodes_finished=0,
+    numbered=False,
+    final=True,
+  )
+  plans = iter_eval_trials(eval_seeds=(101, 102), episodes_per_seed=3)
+  eval_context, agent = runner._load_eval_policy(ckpt, "cpu")
+  env = runner._make_eval_env(eval_context)
+  max_steps = int(eval_context.cfg.training.max_steps_per_episode)
+  serial = [
+    runner.run_eval_episode(
+      env,
+      agent.act_eval,
+      eval_seed=plan.eval_seed,
+      ep_index=plan.ep_index,
+      trial_index=plan.trial_index,
+      max_steps_per_episode=max_steps,
+    )
+    for plan in plans
+  ]
+
+  lockstep = runner.run_checkpoint_eval(
+    ckpt,
+    eval_seeds=(101, 102),
+    episodes_per_seed=3,
+    num_workers=0,
+    envs_per_worker=4,
+    use_cache=False,
+  )
+
+  assert [r.trial_index for r in lockstep] == list(range(len(plans)))
+  assert lockstep == serial
+
+
+@pytest.mark.slow
+def test_eval_pool_smoke_subprocess() -> None:
+  """spawn の worker が実験ルートから import できるよう、専用スクリプトを subprocess で実行する。"""
+  result = subprocess.run(
+    [sys.executable, "tests/eval_pool_smoke_main.py"],
+    cwd=_EXP_ROOT,
+    capture_output=True,
+    text=True,
+    timeout=300,
+    check=False,
+  )
+  assert result.returncode == 0, (
+    f"stdout:\n{result.stdout}\nstderr:\n{result.stderr}"
+  )
+  assert "eval_pool_smoke_ok" in result.stdout
@@ -0,0 +1,53 @@
+"""Observation.build（アドレス解決済みの観測構築）の単体テスト。"""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from contract import TELEMETRY_CONTRACT
+from contract.validate import assert_obs_vector
+from lib.actuators import JOINT_NAMES
+from lib.obs_norm import clip_scale, range_to_norm
+from sim.env import EnvBipedPPO
+from sim.observation import OBS_IMU_GYRO, OBS_JOINT_Q, OBS_JOINT_QVEL
+
+
+@pytest.mark.slow
+def test_build_matches_name_based_lookup(smoke_ctx) -> None:
+  """index 配列で集めた観測が、名前引き + obs_norm の値と一致する。"""
+  env = EnvBipedPPO(smoke_ctx, enable_viewer=False, training_dr_enabled=False)
+  sim = smoke_ctx.cfg.sim
+  rng = np.random.default_rng(0)
+  env.reset()
+  for _ in range(5):
+    obs, _, terminated, _ = env.step(rng.uniform(-1.0, 1.0, size=int(sim.action_dim)))
+    assert obs.dtype == np.float32
+    assert_obs_vector(obs, TELEMETRY_CONTRACT)
+    if terminated:
+      break
+
+  data, model = env.data, env.model
+  expected_q = [
+    range_to_norm(float(data.joint(n).qpos[0]), *model.jnt_range[model.joint(n).id])
+    for n in JOINT_NAMES
+  ]
+  expected_qvel = [
+    clip_scale(float(data.joint(n).qvel[0]), sim.max_joint_vel_rad_s) for n in JOINT_NAMES
+  ]
+  expected_gyro = [
+    clip_scale(float(x), sim.max_gyro_rad_s) for x in data.sensor("imu_gyro").data
+  ]
+  np.testing.assert_allclose(obs[OBS_JOINT_Q], expected_q, atol=1e-6)
+  np.testing.assert_allclose(obs[OBS_JOINT_QVEL], expected_qvel, atol=1e-6)
+  np.testing.assert_allclose(obs[OBS_IMU_GYRO], expected_gyro, atol=1e-6)
+
+
+@pytest.mark.slow
+def test_env_returns_copy_of_obs_buffer(smoke_ctx) -> None:
+  """env が返す観測は次の step で上書きされない。"""
+  env = EnvBipedPPO(smoke_ctx, enable_viewer=False, training_dr_enabled=False)
+  first = env.reset()
+  snapshot = first.copy()
+  env.step(np.ones(int(smoke_ctx.cfg.sim.action_dim)))
+  np.testing.assert_array_equal(first, snapshot)
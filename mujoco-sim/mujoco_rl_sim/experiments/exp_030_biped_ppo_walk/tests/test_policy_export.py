@@ -0,0 +1,62 @@
+"""推論用方策の書き出し（rl/policy_export.py）と numpy ランタイム（rl/policy_runtime.py）のテスト。"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import torch
+
+import rl.checkpoint as checkpoint
+from lib.hydra_checkpoint import save_hydra_config
+from lib.hydra_compose import compose_cfg
+from lib.load_run_context import ctx_from_checkpoint
+from rl.agent import AgentPPO
+from rl.policy_export import export_checkpoint_policy
+from rl.policy_runtime import NumpyPolicy
+
+_EXP_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _checkpoint_with_obs_norm(run_dir: Path) -> Path:
+  save_hydra_config(run_dir, compose_cfg(["wandb=disabled", "ppo.obs_norm=true"]))
+  torch.manual_seed(0)
+  agent = AgentPPO(ctx_from_checkpoint(run_dir / "final.pt"))
+  agent.obs_normalizer.update(np.random.default_rng(1).normal(loc=0.3, scale=0.5, size=(64, agent.obs_dim)))
+  (path,) = checkpoint.save_agent_checkpoint(
+    agent, run_dir=run_dir, update=0, total_env_steps=0, episodes_finished=0, numbered=False, final=True
+  )
+  return path
+
+
+def test_numpy_and_exported_torch_policies_match_act_eval(tmp_path) -> None:
+  ckpt = _checkpoint_with_obs_norm(tmp_path / "run")
+  npz_path, program_path = export_checkpoint_policy(ckpt, torch_program=True)
+  assert npz_path.name == "final.policy.npz"
+
+  agent = AgentPPO.from_checkpoint(ctx_from_checkpoint(ckpt), ckpt)
+  policy = NumpyPolicy.load(npz_path)
+  program = torch.export.load(program_path).module()
+  obs_batch = np.random.default_rng(2).normal(size=(5, agent.obs_dim))
+
+  assert policy.meta["obs_norm"] and policy.action_dim == agent.action_dim
+  np.testing.assert_allclose(policy.act_batch(obs_batch), agent.act_eval_batch(obs_batch), atol=1e-5)
+  for obs in obs_batch:
+    expected = np.asarray(agent.act_eval(obs), dtype=np.float32)
+    np.testing.assert_allclose(policy.act(obs), expected, atol=1e-5)
+    with torch.no_grad():
+      program_action = program(torch.as_tensor(obs, dtype=torch.float32).unsqueeze(0))[0].numpy()
+    np.testing.assert_array_equal(program_action, expected)
+
+
+def test_policy_runtime_imports_without_torch() -> None:
+  code = (
+    "import sys; import rl.policy_runtime; "
+    "assert 'torch' not in sys.modules, 'torch imported'; print('ok')"
+  )
+  result = subprocess.run(
+    [sys.executable, "-c", code], cwd=_EXP_ROOT, capture_output=True, text=True, timeout=60, check=False
+  )
+  assert result.returncode == 0, result.stderr
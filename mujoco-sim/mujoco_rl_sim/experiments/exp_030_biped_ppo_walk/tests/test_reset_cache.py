@@ -0,0 +1,56 @@
+"""reset 初期 state キャッシュ（sim/reset_cache.py）のテスト。"""
+
+from __future__ import annotations
+
+import mujoco
+import numpy as np
+
+from lib.experiment_context import build_experiment_context
+from lib.hydra_compose import compose_app_config
+from sim.env import EnvBipedPPO
+
+
+def _env(reset_prefetch: int) -> EnvBipedPPO:
+  ctx = build_experiment_context(
+    compose_app_config(["wandb=disabled", "runtime=fast", f"runtime.reset_prefetch={reset_prefetch}"])
+  )
+  return EnvBipedPPO(ctx, enable_viewer=False, training_dr_enabled=True, training_seed=11)
+
+
+def _keyframe_reset(env: EnvBipedPPO, episode_index: int) -> np.ndarray:
+  """キャッシュを使わない従来の reset（keyframe + mj_forward → DR）。"""
+  env._training_dr.restore_nominal(env.model)
+  mujoco.mj_resetDataKeyframe(env.model, env.data, env._stand_key_id)
+  mujoco.mj_forward(env.model, env.data)
+  env._training_dr.apply_for_episode(env.model, env.data, episode_index=episode_index)
+  obs, _ = env._finalize_reset()
+  return obs
+
+
+def test_cached_and_prefetched_resets_match_keyframe_reset() -> None:
+  pooled, cached, reference = _env(2), _env(0), _env(0)
+  assert pooled.prefetch_reset(4)
+  assert pooled.prefetch_reset(5)
+  assert not pooled.prefetch_reset(6)  # プール満杯
+  assert not cached.prefetch_reset(4)  # 先読み無効
+
+  rng = np.random.default_rng(0)
+  for episode_index in (4, 5, 6):
+    obs = [pooled.reset(episode_index=episode_index), cached.reset(episode_index=episode_index)]
+    obs.append(_keyframe_reset(reference, episode_index))
+    for _ in range(20):
+      action = rng.uniform(-1.0, 1.0, size=int(reference._ctx.cfg.sim.action_dim))
+      for env in (pooled, cached, reference):
+        env.step(action)
+    for env, o in zip((pooled, cached), obs[:2], strict=True):
+      np.testing.assert_array_equal(o, obs[2])
+      np.testing.assert_array_equal(env.data.qpos, reference.data.qpos)
+      np.testing.assert_array_equal(env.data.qvel, reference.data.qvel)
+      np.testing.assert_array_equal(env.model.actuator_biasprm, reference.model.actuator_biasprm)
+
+
+def test_prefetch_pool_drops_entries_after_a_miss() -> None:
+  env = _env(1)
+  assert env.prefetch_reset(3)
+  env.reset(episode_index=9)  # 先読みと違う番号: プールを空にする
+  assert env.prefetch_reset(10)
@@ -0,0 +1,79 @@
+"""観測・リターンの逐次正規化（rl/running_norm.py）と AgentPPO への組み込みのテスト。"""
+
+from __future__ import annotations
+
+import numpy as np
+import torch
+
+import rl.checkpoint as checkpoint
+from conf.schema import build_app_config
+from lib.experiment_context import build_experiment_context
+from rl.agent import AgentPPO
+from rl.running_norm import ReturnNormalizer, RunningMeanStd
+
+
+def test_chunked_updates_match_single_batch() -> None:
+  data = np.random.default_rng(0).normal(loc=3.0, scale=2.0, size=(600, 4))
+  chunked, whole = RunningMeanStd((4,)), RunningMeanStd((4,))
+  for chunk in np.split(data, [100, 350, 351]):
+    chunked.update(chunk)
+  whole.update(data)
+
+  np.testing.assert_allclose(chunked.mean, whole.mean, rtol=1e-12)
+  np.testing.assert_allclose(chunked.var, whole.var, rtol=1e-12)
+  np.testing.assert_allclose(whole.mean, data.mean(axis=0), atol=1e-5)
+  np.testing.assert_allclose(whole.var, data.var(axis=0), rtol=1e-4)
+
+
+def test_return_normalizer_resets_discounted_return_on_done() -> None:
+  norm = ReturnNormalizer(2, gamma=0.5)
+  rewards = np.array([[1.0, 2.0], [1.0, 2.0], [1.0, 2.0]])
+  dones = np.array([[0.0, 1.0], [0.0, 0.0], [0.0, 0.0]])
+
+  norm.scale_rollout(rewards, dones)
+
+  # env 0: 1, 1.5, 1.75 / env 1: 2 で終了 → 2, 3
+  np.testing.assert_allclose(norm._returns, [1.75, 3.0])
+  assert norm.rms.count > 6
+
+  # ckpt から戻すのは分散の統計だけ（再開時は全 env を reset するので途中のリターンは 0 から）
+  restored = ReturnNormalizer(2, gamma=0.5)
+  restored.scale_rollout(rewards, dones)
+  restored.load_state_dict(norm.state_dict())
+  assert restored.rms.var == norm.rms.var
+  np.testing.assert_array_equal(restored._returns, [0.0, 0.0])
+
+
+def test_obs_norm_statistics_roundtrip_through_checkpoint(tmp_path) -> None:
+  torch.manual_seed(0)
+  cfg = build_app_config(
+    {"runtime": {"num_envs": 2}, "ppo": {"rollout_steps": 16, "ppo_epochs": 1, "obs_norm": True, "reward_norm": True}}
+  )
+  ctx = build_experiment_context(cfg)
+  agent = AgentPPO(ctx)
+  rng = np.random.default_rng(0)
+  obs_dim = int(ctx.cfg.sim.obs_dim)
+  for _ in range(agent.rollout.horizon):
+    obs = rng.normal(loc=0.5, size=(2, obs_dim))
+    actions, values, log_probs = agent.act_batch(obs)
+    agent.store_batch(obs, actions, rng.normal(size=2), values, np.zeros(2, dtype=bool), log_probs)
+  probe = rng.normal(size=(3, obs_dim))
+  before = agent.act_eval_batch(probe)
+  agent.update(np.zeros((2, obs_dim)))
+
+  # 統計は update で 1 回だけ更新され、推論では変わらない
+  assert agent.obs_normalizer.rms.count > agent.rollout.horizon * 2
+  stats = agent.obs_normalizer.state_dict()
+  after = agent.act_eval_batch(probe)
+  assert not np.array_equal(before, after)
+  np.testing.assert_array_equal(agent.obs_normalizer.state_dict()["mean"], stats["mean"])
+  for row, obs in zip(after, probe, strict=True):
+    np.testing.assert_array_equal(row, np.asarray(agent.act_eval(obs), dtype=np.float32))
+
+  (path,) = checkpoint.save_agent_checkpoint(
+    agent, run_dir=tmp_path, update=1, total_env_steps=16, episodes_finished=0, numbered=False, final=True
+  )
+  # cfg で無効でも、ckpt に統計があれば同じ正規化で推論する
+  restored = AgentPPO.from_checkpoint(build_experiment_context(build_app_config()), path)
+  np.testing.assert_array_equal(restored.act_eval_batch(probe), after)
+  assert restored.reward_normalizer is None
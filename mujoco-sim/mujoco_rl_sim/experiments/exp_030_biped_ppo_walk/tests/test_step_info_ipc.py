@@ -0,0 +1,104 @@
+"""VecEnv 転送用 step_info 固定スキーマの単体テスト。"""
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pytest
+
+from sim.step_info_ipc import (
+  STEP_INFO_DIM,
+  STEP_INFO_FIELDS,
+  STEP_INFO_FULL,
+  STEP_INFO_NONE,
+  STEP_INFO_SCALARS,
+  pack_step_info,
+  unpack_step_info,
+  validate_step_info_level,
+)
+from sim.termination import TERMINATION_REASONS
+
+
+def _sample_info(**overrides) -> dict:
+  info = {name: 0.0 for name in STEP_INFO_FIELDS}
+  info.update(
+    {
+      "imu_x": 0.25,
+      "reward_forward": 1.5,
+      "flight_steps": 3,
+      "termination_reason": None,
+      "basket_contact_normal_force_n": None,
+      "thigh_contact_normal_force_n": 12.0,
+      "terminated": False,
+      "unused_key": "ignored",
+    }
+  )
+  info.update(overrides)
+  return info
+
+
+def test_pack_step_info_layout() -> None:
+  row = pack_step_info(_sample_info())
+  assert row.shape == (STEP_INFO_DIM,)
+  assert row.dtype == np.float32
+  assert len(STEP_INFO_FIELDS) == STEP_INFO_DIM
+
+
+def test_pack_unpack_round_trip() -> None:
+  out = unpack_step_info(pack_step_info(_sample_info()))
+  assert set(out) == set(STEP_INFO_FIELDS)
+  assert math.isclose(out["imu_x"], 0.25, rel_tol=1e-6)
+  assert out["flight_steps"] == 3.0
+  assert out["termination_reason"] is None
+  assert out["basket_contact_normal_force_n"] is None
+  assert math.isclose(out["thigh_contact_normal_force_n"], 12.0)
+  assert out["terminated"] is False
+
+
+def test_termination_reason_is_encoded_as_index() -> None:
+  reason = TERMINATION_REASONS[0]
+  out = unpack_step_info(pack_step_info(_sample_info(termination_reason=reason, terminated=True)))
+  assert out["termination_reason"] == reason
+  assert out["terminated"] is True
+
+
+def test_pack_into_preallocated_row() -> None:
+  buf = np.zeros((2, STEP_INFO_DIM), dtype=np.float32)
+  pack_step_info(_sample_info(), out=buf[1])
+  assert buf[0].sum() == 0.0
+  assert math.isclose(float(buf[1][STEP_INFO_FIELDS.index("imu_x")]), 0.25)
+
+
+def test_validate_step_info_level_rejects_unknown() -> None:
+  assert validate_step_info_level(STEP_INFO_SCALARS) == STEP_INFO_SCALARS
+  with pytest.raises(ValueError):
+    validate_step_info_level("telemetry")
+
+
+@pytest.mark.slow
+def test_scalar_level_matches_packed_full_info(smoke_ctx) -> None:
+  """scalars レベルの行は、同じ軌道の full dict を pack した行と一致する。"""
+  from sim.env import EnvBipedPPO
+
+  envs = {
+    level: EnvBipedPPO(
+      smoke_ctx, enable_viewer=False, training_dr_enabled=False, step_info_level=level
+    )
+    for level in (STEP_INFO_FULL, STEP_INFO_SCALARS, STEP_INFO_NONE)
+  }
+  for env in envs.values():
+    env.reset()
+  rng = np.random.default_rng(0)
+  for _ in range(40):
+    action = rng.uniform(-1.0, 1.0, size=int(smoke_ctx.cfg.sim.action_dim))
+    results = {level: env.step(action) for level, env in envs.items()}
+    full_obs, full_reward, full_terminated, full_info = results[STEP_INFO_FULL]
+    obs, reward, terminated, row = results[STEP_INFO_SCALARS]
+    assert isinstance(row, np.ndarray) and row.shape == (STEP_INFO_DIM,)
+    np.testing.assert_array_equal(row, pack_step_info(full_info))
+    np.testing.assert_array_equal(obs, full_obs)
+    assert reward == full_reward and terminated == full_terminated
+    assert results[STEP_INFO_NONE][3] is None
+    if full_terminated:
+      break
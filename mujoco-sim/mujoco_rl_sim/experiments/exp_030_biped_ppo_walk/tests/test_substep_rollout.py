@@ -0,0 +1,87 @@
+"""SubstepRollout（mujoco.rollout による物理ステップ一括積分）のテスト。"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+import mujoco
+import numpy as np
+import pytest
+
+from lib.experiment_context import build_experiment_context
+from lib.hydra_compose import compose_app_config
+from sim.contacts import FloorContacts
+from sim.env import EnvBipedPPO
+from sim.step_info_ipc import pack_step_info
+from sim.substep_rollout import SubstepRollout, load_model_with_substep_sensors
+
+
+def _env(physics_rollout: bool) -> EnvBipedPPO:
+  ctx = build_experiment_context(
+    compose_app_config(
+      ["training=smoke", "wandb=disabled", "runtime=fast", f"runtime.physics_rollout={str(physics_rollout).lower()}"]
+    )
+  )
+  return EnvBipedPPO(ctx, enable_viewer=False, training_dr_enabled=True, training_seed=3)
+
+
+@pytest.mark.slow
+def test_rollout_contacts_match_floor_contacts(smoke_ctx) -> None:
+  """横倒しに落とす間、センサ由来の接触分類が物理ステップごとに FloorContacts.update と一致する。"""
+  model = load_model_with_substep_sensors(smoke_ctx.xml_path)
+  frame_skip = 10
+  substeps = SubstepRollout(model, frame_skip)
+  data = mujoco.MjData(model)
+  ref_data = mujoco.MjData(model)
+  contacts = FloorContacts(model)
+  angle = np.deg2rad(80.0)
+  data.qpos[2] = 0.4
+  data.qpos[3:7] = [np.cos(angle / 2), np.sin(angle / 2), 0.0, 0.0]
+  mujoco.mj_forward(model, data)
+  mujoco.mj_copyData(ref_data, model, data)
+
+  body_seen = False
+  for _ in range(60):
+    substeps.run(data)
+    for k in range(frame_skip):
+      mujoco.mj_step(model, ref_data)
+      contacts.update(ref_data)
+      np.testing.assert_array_equal(substeps.on_floor[k], contacts.on_floor)
+      np.testing.assert_allclose(substeps.normal_force_n[k], contacts.normal_force_n, rtol=1e-9, atol=1e-9)
+      np.testing.assert_array_equal(substeps.qvel[k], ref_data.qvel)
+      body_seen |= contacts.body_on_floor
+    np.testing.assert_array_equal(data.qpos, ref_data.qpos)
+  assert body_seen
+
+
+@pytest.mark.slow
+def test_physics_rollout_step_matches_python_loop() -> None:
+  """接触終了しない制御ステップでは観測・報酬・step_info が Python ループ版と bit 単位で一致する。"""
+  envs = [_env(False), _env(True)]
+  for env in envs:
+    env.reset(episode_index=0)
+  rng = np.random.default_rng(0)
+  for i in range(300):
+    action = rng.uniform(-1.0, 1.0, size=int(envs[0]._ctx.cfg.sim.action_dim))
+    (obs_loop, r_loop, t_loop, info_loop), (obs_roll, r_roll, t_roll, info_roll) = (
+      env.step(action) for env in envs
+    )
+    reason = info_loop["termination_reason"]
+    if reason is not None and reason.startswith("contact"):
+      assert info_roll["termination_reason"] == reason
+    else:
+      np.testing.assert_array_equal(obs_roll, obs_loop)
+      assert r_roll == r_loop
+      assert t_roll == t_loop
+      np.testing.assert_array_equal(pack_step_info(info_roll), pack_step_info(info_loop))
+    if t_loop or t_roll:
+      for env in envs:
+        env.reset(episode_index=i + 1)
+
+
+def test_env_import_does_not_need_rollout_module() -> None:
+  """既定（physics_rollout=false）の経路は mujoco.rollout の無い古い MuJoCo でも import できる。"""
+  code = "import sys, sim.env; assert 'sim.substep_rollout' not in sys.modules"
+  subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parents[1], check=True)
@@ -10,6 +10,7 @@ from pathlib import Path
 import pytest
 
 from lib.hydra_checkpoint import hydra_config_path
+from rl.checkpoint_retention import manifest_checkpoint_paths
 
 _EXP_ROOT = Path(__file__).resolve().parent.parent
 
@@ -50,6 +51,8 @@ def test_train_one_update_smoke() -> None:
   assert run_dirs, f"checkpoint run dir not found under {runs_root}"
   cfg_path = hydra_config_path(run_dirs[0])
   assert cfg_path.is_file(), f"missing {cfg_path}"
+  # final.pt はマニフェスト（保持ポリシーの記録）に載る
+  assert manifest_checkpoint_paths(run_dirs[0]) == [run_dirs[0] / "final.pt"]
 
 
 @pytest.mark.slow
@@ -25,3 +25,19 @@ def test_throughput_tracker_averages() -> None:
 def test_pacing_warnings_lists_slow_settings() -> None:
   msgs = pacing_warnings(viewer=True, telemetry=True, step_wall_sleep_sec=0.02)
   assert len(msgs) == 3
+
+
+def test_update_timing_overlap_fraction() -> None:
+  timing = UpdateTiming(
+    rollout_s=4.0,
+    ppo_update_s=1.0,
+    rollout_steps=512,
+    act_batch_s=1.0,
+    num_envs=8,
+    overlap_s=0.75,
+  )
+  assert timing.overlap_fraction == 0.75
+  assert UpdateTiming(rollout_s=1.0, ppo_update_s=0.0, rollout_steps=1).overlap_fraction == 0.0
+  tracker = ThroughputTracker(rollout_steps_per_update=512)
+  assert tracker.wandb_metrics(timing)["train/act_overlap_fraction"] == 0.75
+  assert "overlap: 0.75" in tracker.format_interval_suffix(timing)
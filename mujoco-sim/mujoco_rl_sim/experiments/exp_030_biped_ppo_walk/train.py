@@ -69,7 +69,8 @@ def _create_agent(ctx: ExperimentContext) -> tuple[AgentPPO, dict[str, Any] | No
       agent.set_learning_rate(float(resume_lr))
     return agent, None
 
-  payload = checkpoint.load_checkpoint(resume_path, map_location="cpu")
+  # wandb 用のメタ情報だけ使うので optimizer の state は読まない
+  payload = checkpoint.load_checkpoint(resume_path, map_location="cpu", include_optimizer=False)
   agent = AgentPPO.from_checkpoint(
     ctx,
     resume_path,